@@ -0,0 +1,28 @@
+"""add document chunk content hashes
+
+Revision ID: 5b9c2e7d41a8
+Revises: 73e9983e5091
+Create Date: 2026-01-20 10:12:41.208817
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5b9c2e7d41a8"
+down_revision = "73e9983e5091"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("chunk_content_hashes", postgresql.ARRAY(sa.String()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "chunk_content_hashes")
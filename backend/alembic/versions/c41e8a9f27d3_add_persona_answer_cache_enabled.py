@@ -0,0 +1,32 @@
+"""add persona answer_cache_enabled
+
+Revision ID: c41e8a9f27d3
+Revises: 5b9c2e7d41a8
+Create Date: 2026-01-27 09:41:18.552903
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c41e8a9f27d3"
+down_revision = "5b9c2e7d41a8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "persona",
+        sa.Column(
+            "answer_cache_enabled",
+            sa.Boolean(),
+            nullable=False,
+            server_default="false",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("persona", "answer_cache_enabled")
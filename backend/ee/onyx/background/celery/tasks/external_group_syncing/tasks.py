@@ -42,6 +42,7 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.configs.constants import OnyxRedisLocks
 from onyx.configs.constants import OnyxRedisSignals
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.enums import AccessType
@@ -566,6 +567,7 @@ def _perform_external_group_sync(
             f"Removing stale external groups for {source_type} for cc_pair: {cc_pair_id}"
         )
         remove_stale_external_groups(db_session, cc_pair_id)
+        bump_search_filter_permission_version(tenant_id)
 
         # Calculate total unique users processed
         total_users_processed = len(seen_users)
@@ -8,6 +8,7 @@ from ee.onyx.db.user_group import fetch_user_group
 from ee.onyx.db.user_group import mark_user_group_as_synced
 from ee.onyx.db.user_group import prepare_user_group_for_deletion
 from onyx.background.celery.apps.app_base import task_logger
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
 from onyx.db.enums import SyncStatus
 from onyx.db.enums import SyncType
 from onyx.db.sync_record import update_sync_record_status
@@ -100,5 +101,7 @@ def monitor_usergroup_taskset(
                 num_docs_synced=initial_count,
             )
             raise e
+        finally:
+            bump_search_filter_permission_version(tenant_id)
 
     rug.reset()
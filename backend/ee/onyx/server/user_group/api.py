@@ -19,6 +19,7 @@ from ee.onyx.server.user_group.models import UserGroupUpdate
 from onyx.auth.users import current_admin_user
 from onyx.auth.users import current_curator_or_admin_user
 from onyx.configs.constants import PUBLIC_API_TAGS
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
 from onyx.db.engine.sql_engine import get_session
 from onyx.db.models import User
 from onyx.db.models import UserRole
@@ -70,16 +71,17 @@ def patch_user_group(
     db_session: Session = Depends(get_session),
 ) -> UserGroup:
     try:
-        return UserGroup.from_model(
-            update_user_group(
-                db_session=db_session,
-                user=user,
-                user_group_id=user_group_id,
-                user_group_update=user_group_update,
-            )
+        db_user_group = update_user_group(
+            db_session=db_session,
+            user=user,
+            user_group_id=user_group_id,
+            user_group_update=user_group_update,
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    # membership changes alter the ACLs of the affected users right away
+    bump_search_filter_permission_version()
+    return UserGroup.from_model(db_user_group)
 
 
 @router.post("/admin/user-group/{user_group_id}/add-users")
@@ -90,16 +92,16 @@ def add_users(
     db_session: Session = Depends(get_session),
 ) -> UserGroup:
     try:
-        return UserGroup.from_model(
-            add_users_to_user_group(
-                db_session=db_session,
-                user=user,
-                user_group_id=user_group_id,
-                user_ids=add_users_request.user_ids,
-            )
+        db_user_group = add_users_to_user_group(
+            db_session=db_session,
+            user=user,
+            user_group_id=user_group_id,
+            user_ids=add_users_request.user_ids,
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    bump_search_filter_permission_version()
+    return UserGroup.from_model(db_user_group)
 
 
 @router.post("/admin/user-group/{user_group_id}/set-curator")
@@ -131,3 +133,4 @@ def delete_user_group(
         prepare_user_group_for_deletion(db_session, user_group_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    bump_search_filter_permission_version()
@@ -0,0 +1,158 @@
+"""Dynamic micro-batching for the bi-encoder endpoint.
+
+Query embeddings arrive as many small, concurrent HTTP requests (one per chat search).
+Running each of them through its own `SentenceTransformer.encode` call pays a full
+forward pass per request and lets several encodes race on the same tokenizer.
+
+Instead, concurrent requests for the same model / max_context_length / normalization
+are coalesced into a single `encode` call. A batch is flushed once it holds
+`max_batch_size` texts or once `max_wait_seconds` have passed since its first request,
+whichever comes first. Encodes for the same model are serialized, so the model is never
+used from two threads at once.
+"""
+
+import asyncio
+import threading
+import weakref
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from onyx.utils.logger import setup_logger
+from shared_configs.configs import MODEL_SERVER_EMBED_BATCH_MAX_WAIT_MS
+from shared_configs.configs import MODEL_SERVER_EMBED_MAX_BATCH_SIZE
+
+logger = setup_logger()
+
+
+@dataclass(frozen=True)
+class EmbeddingBatchKey:
+    model_name: str
+    max_context_length: int
+    normalize_embeddings: bool
+
+
+@dataclass
+class _PendingRequest:
+    texts: list[str]
+    future: asyncio.Future
+
+
+@dataclass
+class _OpenBatch:
+    requests: list[_PendingRequest] = field(default_factory=list)
+    num_texts: int = 0
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+# Takes the key and the texts of the whole batch, returns one vector per text
+EncodeFn = Callable[[EmbeddingBatchKey, list[str]], Any]
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        max_batch_size: int = MODEL_SERVER_EMBED_MAX_BATCH_SIZE,
+        max_wait_seconds: float = MODEL_SERVER_EMBED_BATCH_MAX_WAIT_MS / 1000,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        # Open batches are tracked per event loop so that a loop going away
+        # (e.g. between tests) can never leave a batch that is never flushed
+        self._open_batches: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[EmbeddingBatchKey, _OpenBatch]
+        ] = weakref.WeakKeyDictionary()
+
+        # Encodes run in executor threads, a model must only be used by one at a time
+        self._model_locks: dict[str, threading.Lock] = {}
+        self._model_locks_lock = threading.Lock()
+
+        # hold references so that the flush tasks are not garbage collected mid-flight
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    def _get_model_lock(self, model_name: str) -> threading.Lock:
+        with self._model_locks_lock:
+            if model_name not in self._model_locks:
+                self._model_locks[model_name] = threading.Lock()
+            return self._model_locks[model_name]
+
+    async def embed(
+        self, key: EmbeddingBatchKey, texts: list[str], encode_fn: EncodeFn
+    ) -> list[Any]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+
+        open_batches = self._open_batches.setdefault(loop, {})
+        batch = open_batches.get(key)
+        if batch is None or (
+            batch.num_texts > 0 and batch.num_texts + len(texts) > self.max_batch_size
+        ):
+            if batch is not None:
+                # the current batch can't fit this request, send it off now
+                batch.full.set()
+            batch = _OpenBatch()
+            open_batches[key] = batch
+            task = loop.create_task(self._flush_when_ready(key, batch, encode_fn))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+        batch.requests.append(_PendingRequest(texts=texts, future=future))
+        batch.num_texts += len(texts)
+        if batch.num_texts >= self.max_batch_size:
+            batch.full.set()
+
+        return await future
+
+    async def _flush_when_ready(
+        self, key: EmbeddingBatchKey, batch: _OpenBatch, encode_fn: EncodeFn
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(batch.full.wait(), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+        # stop accepting requests into this batch
+        open_batches = self._open_batches.get(loop, {})
+        if open_batches.get(key) is batch:
+            del open_batches[key]
+
+        all_texts = [text for request in batch.requests for text in request.texts]
+        logger.debug(
+            f"Flushing embedding batch: model={key.model_name} "
+            f"requests={len(batch.requests)} texts={len(all_texts)}"
+        )
+
+        model_lock = self._get_model_lock(key.model_name)
+
+        def _encode() -> Any:
+            with model_lock:
+                return encode_fn(key, all_texts)
+
+        try:
+            vectors = await loop.run_in_executor(None, _encode)
+            if len(vectors) != len(all_texts):
+                raise RuntimeError(
+                    f"Model returned {len(vectors)} embeddings for {len(all_texts)} texts"
+                )
+        except Exception as e:
+            for request in batch.requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch.requests:
+            end = offset + len(request.texts)
+            if not request.future.done():
+                request.future.set_result(list(vectors[offset:end]))
+            offset = end
+
+
+_embedding_batcher = EmbeddingBatcher()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    return _embedding_batcher
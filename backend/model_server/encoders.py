@@ -1,14 +1,21 @@
-import asyncio
 import time
 from typing import Any
 from typing import TYPE_CHECKING
 
+import numpy as np
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
+from fastapi.responses import JSONResponse
 
+from model_server.embedding_batcher import EmbeddingBatchKey
+from model_server.embedding_batcher import get_embedding_batcher
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
+from shared_configs.embedding_transport import encode_ndarray
+from shared_configs.embedding_transport import NDARRAY_MEDIA_TYPE
+from shared_configs.embedding_transport import parse_ndarray_accept_header
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 from shared_configs.model_server_models import EmbedRequest
@@ -78,36 +85,24 @@ def get_embedding_model(
     return _GLOBAL_MODELS_DICT[model_name]
 
 
-ENCODING_RETRIES = 3
-ENCODING_RETRY_DELAY = 0.1
-
-
-def _concurrent_embedding(
-    texts: list[str], model: "SentenceTransformer", normalize_embeddings: bool
-) -> Any:
-    """Synchronous wrapper for concurrent_embedding to use with run_in_executor."""
-    for _ in range(ENCODING_RETRIES):
-        try:
-            return model.encode(texts, normalize_embeddings=normalize_embeddings)
-        except RuntimeError as e:
-            # There is a concurrency bug in the SentenceTransformer library that causes
-            # the model to fail to encode texts. It's pretty rare and we want to allow
-            # concurrent embedding, hence we retry (the specific error is
-            # "RuntimeError: Already borrowed" and occurs in the transformers library)
-            logger.warning(f"Error encoding texts, retrying: {e}")
-            time.sleep(ENCODING_RETRY_DELAY)
-    return model.encode(texts, normalize_embeddings=normalize_embeddings)
+def _encode_batch(key: EmbeddingBatchKey, texts: list[str]) -> Any:
+    """Runs a single (possibly coalesced) batch through the model. Called from an
+    executor thread by the embedding batcher, which serializes calls per model."""
+    local_model = get_embedding_model(
+        model_name=key.model_name, max_context_length=key.max_context_length
+    )
+    return local_model.encode(texts, normalize_embeddings=key.normalize_embeddings)
 
 
 @simple_log_function_time()
-async def embed_text(
+async def embed_text_vectors(
     texts: list[str],
     model_name: str | None,
     max_context_length: int,
     normalize_embeddings: bool,
     prefix: str | None,
     gpu_type: str = "UNKNOWN",
-) -> list[Embedding]:
+) -> np.ndarray:
     if not all(texts):
         logger.error("Empty strings provided for embedding")
         raise ValueError("Empty strings are not allowed for embedding.")
@@ -132,20 +127,18 @@ async def embed_text(
 
         prefixed_texts = [f"{prefix}{text}" for text in texts] if prefix else texts
 
-        local_model = get_embedding_model(
-            model_name=model_name, max_context_length=max_context_length
-        )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: _concurrent_embedding(
-                prefixed_texts, local_model, normalize_embeddings
+        # Concurrent requests for the same model are coalesced into a single
+        # forward pass, which runs in a thread pool as it is CPU/GPU-bound
+        embeddings_vectors = await get_embedding_batcher().embed(
+            key=EmbeddingBatchKey(
+                model_name=model_name,
+                max_context_length=max_context_length,
+                normalize_embeddings=normalize_embeddings,
             ),
+            texts=prefixed_texts,
+            encode_fn=_encode_batch,
         )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
+        embeddings = np.asarray(embeddings_vectors)
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -167,17 +160,58 @@ async def embed_text(
     return embeddings
 
 
+async def embed_text(
+    texts: list[str],
+    model_name: str | None,
+    max_context_length: int,
+    normalize_embeddings: bool,
+    prefix: str | None,
+    gpu_type: str = "UNKNOWN",
+) -> list[Embedding]:
+    embeddings = await embed_text_vectors(
+        texts=texts,
+        model_name=model_name,
+        max_context_length=max_context_length,
+        normalize_embeddings=normalize_embeddings,
+        prefix=prefix,
+        gpu_type=gpu_type,
+    )
+    return embeddings.tolist()
+
+
 @router.post("/bi-encoder-embed")
 async def route_bi_encoder_embed(
     request: Request,
     embed_request: EmbedRequest,
-) -> EmbedResponse:
-    return await process_embed_request(embed_request, request.app.state.gpu_type)
+) -> Response:
+    # Clients that understand the binary format get the raw vectors instead of
+    # JSON lists of floats, everyone else keeps getting JSON
+    transport_dtype = parse_ndarray_accept_header(request.headers.get("accept"))
+    if transport_dtype is None:
+        embed_response = await process_embed_request(
+            embed_request, request.app.state.gpu_type
+        )
+        return JSONResponse(content=embed_response.model_dump())
+
+    embeddings = await process_embed_request_vectors(
+        embed_request, request.app.state.gpu_type
+    )
+    return Response(
+        content=encode_ndarray(embeddings, dtype=transport_dtype),
+        media_type=NDARRAY_MEDIA_TYPE,
+    )
 
 
 async def process_embed_request(
     embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
 ) -> EmbedResponse:
+    embeddings = await process_embed_request_vectors(embed_request, gpu_type)
+    return EmbedResponse(embeddings=embeddings.tolist())
+
+
+async def process_embed_request_vectors(
+    embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
+) -> np.ndarray:
     from litellm.exceptions import RateLimitError
 
     # Only local models should use this endpoint - API providers should make direct API calls
@@ -201,7 +235,7 @@ async def process_embed_request(
         else:
             prefix = None
 
-        embeddings = await embed_text(
+        return await embed_text_vectors(
             texts=embed_request.texts,
             model_name=embed_request.model_name,
             max_context_length=embed_request.max_context_length,
@@ -209,7 +243,6 @@ async def process_embed_request(
             prefix=prefix,
             gpu_type=gpu_type,
         )
-        return EmbedResponse(embeddings=embeddings)
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
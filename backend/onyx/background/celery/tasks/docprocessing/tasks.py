@@ -1468,6 +1468,8 @@ def _docprocessing_task(
                 credential_id=index_attempt.connector_credential_pair.credential.id,
                 tenant_id=tenant_id,
                 index_attempt_metadata=index_attempt_metadata,
+                # re-indexing from the beginning rewrites every chunk
+                skip_unchanged_chunks=not index_attempt.from_beginning,
             )
 
             # real work happens here!
@@ -7,6 +7,7 @@ from tenacity import wait_random_exponential
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.document_index.interfaces import VespaDocumentUserFields
+from onyx.document_index.interfaces_new import MetadataUpdateRequest
 
 
 class RetryDocumentIndex:
@@ -63,3 +64,16 @@ class RetryDocumentIndex:
             fields=fields,
             user_fields=user_fields,
         )
+
+    @retry(
+        retry=retry_if_exception_type(httpx.ReadTimeout),
+        wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
+        stop=stop_after_delay(STOP_AFTER),
+    )
+    def update(
+        self,
+        update_requests: list[MetadataUpdateRequest],
+        *,
+        tenant_id: str,
+    ) -> None:
+        self.index.update(update_requests, tenant_id=tenant_id)
@@ -1,13 +1,17 @@
 import time
+from collections.abc import Iterator
 from typing import cast
 from uuid import uuid4
 
 from celery import Celery
 from redis import Redis
 from redis.lock import Lock as RedisLock
+from sqlalchemy import Select
 from sqlalchemy.orm import Session
 
+from onyx.access.models import DocumentAccess
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
 from onyx.configs.constants import OnyxCeleryQueues
@@ -15,6 +19,9 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.document import construct_document_id_select_by_needs_sync
 from onyx.db.document import count_documents_by_needs_sync
+from onyx.db.models import Document as DbDocument
+from onyx.document_index.interfaces_new import MetadataUpdateRequest
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
 
 # Redis keys for document sync tracking
@@ -66,6 +73,69 @@ def reset_document_sync(r: Redis) -> None:
     r.delete(DOCUMENT_SYNC_FENCE_KEY)
 
 
+def generate_document_id_batches(
+    db_session: Session,
+    stmt: Select,
+    lock: RedisLock,
+    batch_size: int = VESPA_SYNC_BATCH_SIZE,
+) -> Iterator[list[str]]:
+    """Streams the document IDs selected by stmt in batches of batch_size,
+    periodically reacquiring the lock while the caller enqueues tasks."""
+    last_lock_time = time.monotonic()
+    doc_ids = cast(
+        Iterator[str], db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT)
+    )
+    for doc_id_batch in batch_generator(doc_ids, batch_size):
+        current_time = time.monotonic()
+
+        # Reacquire lock periodically to prevent timeout
+        if current_time - last_lock_time >= (CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4):
+            lock.reacquire()
+            last_lock_time = current_time
+
+        yield doc_id_batch
+
+
+def build_metadata_update_requests(
+    docs: list[DbDocument],
+    doc_id_to_doc_sets: dict[str, list[str]],
+    doc_id_to_access: dict[str, DocumentAccess],
+) -> list[MetadataUpdateRequest]:
+    """Builds the index updates syncing the given documents. Documents that end up
+    with identical fields share a single multi-document update request, which is
+    the common case when a document set or user group changes."""
+    # (document sets, ACL, boost, hidden) -> (access, documents)
+    grouped_docs: dict[
+        tuple[frozenset[str], frozenset[str], float, bool],
+        tuple[DocumentAccess, list[DbDocument]],
+    ] = {}
+    for doc in docs:
+        access = doc_id_to_access[doc.id]
+        key = (
+            frozenset(doc_id_to_doc_sets.get(doc.id, [])),
+            frozenset(access.to_acl()),
+            doc.boost,
+            doc.hidden,
+        )
+        grouped_docs.setdefault(key, (access, []))[1].append(doc)
+
+    return [
+        MetadataUpdateRequest(
+            document_ids=[doc.id for doc in group],
+            # NOTE: -1 represents an unknown chunk count.
+            doc_id_to_chunk_cnt={
+                doc.id: doc.chunk_count if doc.chunk_count is not None else -1
+                for doc in group
+            },
+            access=access,
+            document_sets=set(document_sets),
+            boost=boost,
+            hidden=hidden,
+        )
+        for (document_sets, _, boost, hidden), (access, group) in grouped_docs.items()
+    ]
+
+
 def generate_document_sync_tasks(
     r: Redis,
     max_tasks: int,
@@ -74,11 +144,12 @@ def generate_document_sync_tasks(
     lock: RedisLock,
     tenant_id: str,
 ) -> tuple[int, int]:
-    """Generate sync tasks for all documents that need syncing.
+    """Generate sync tasks for all documents that need syncing. Each task syncs a
+    batch of up to VESPA_SYNC_BATCH_SIZE documents.
 
     Args:
         r: Redis client
-        max_tasks: Maximum number of tasks to generate
+        max_tasks: Maximum number of (batch) tasks to generate
         celery_app: Celery application instance
         db_session: Database session
         lock: Redis lock for coordination
@@ -87,23 +158,14 @@ def generate_document_sync_tasks(
     Returns:
         tuple[int, int]: (tasks_generated, total_docs_found)
     """
-    last_lock_time = time.monotonic()
     num_tasks_sent = 0
     num_docs = 0
 
     # Get all documents that need syncing
     stmt = construct_document_id_select_by_needs_sync()
 
-    for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
-        doc_id = cast(str, doc_id)
-        current_time = time.monotonic()
-
-        # Reacquire lock periodically to prevent timeout
-        if current_time - last_lock_time >= (CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4):
-            lock.reacquire()
-            last_lock_time = current_time
-
-        num_docs += 1
+    for doc_id_batch in generate_document_id_batches(db_session, stmt, lock):
+        num_docs += len(doc_id_batch)
 
         # Create a unique task ID
         custom_task_id = f"{DOCUMENT_SYNC_PREFIX}_{uuid4()}"
@@ -113,8 +175,8 @@ def generate_document_sync_tasks(
 
         # Create the Celery task
         celery_app.send_task(
-            OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-            kwargs=dict(document_id=doc_id, tenant_id=tenant_id),
+            OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+            kwargs=dict(document_ids=doc_id_batch, tenant_id=tenant_id),
             queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
             task_id=custom_task_id,
             priority=OnyxCeleryPriority.MEDIUM,
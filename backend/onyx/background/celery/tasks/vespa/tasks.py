@@ -15,11 +15,15 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import LIGHT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import OnyxCeleryTaskCompletionStatus
+from onyx.background.celery.tasks.vespa.document_sync import (
+    build_metadata_update_requests,
+)
 from onyx.background.celery.tasks.vespa.document_sync import DOCUMENT_SYNC_FENCE_KEY
 from onyx.background.celery.tasks.vespa.document_sync import get_document_sync_payload
 from onyx.background.celery.tasks.vespa.document_sync import get_document_sync_remaining
@@ -33,11 +37,15 @@ from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.configs.constants import OnyxRedisLocks
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
 from onyx.db.document import get_document
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
@@ -447,9 +455,49 @@ def monitor_document_set_taskset(
                 "Resetting document set regardless."
             )
 
+        bump_search_filter_permission_version(tenant_id)
+
     rds.reset()
 
 
+def _handle_metadata_sync_exception(
+    task: Task, ex: Exception, description: str
+) -> OnyxCeleryTaskCompletionStatus:
+    """Logs a failed metadata sync and schedules a retry with exponential backoff
+    unless the failure is non-retryable. Raises celery's Retry exception when a
+    retry was scheduled."""
+    e: Exception = ex
+    if isinstance(ex, RetryError):
+        task_logger.warning(
+            f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
+        )
+
+        # only set the inner exception if it is of type Exception
+        e_temp = ex.last_attempt.exception()
+        if isinstance(e_temp, Exception):
+            e = e_temp
+
+    if isinstance(e, httpx.HTTPStatusError):
+        if e.response.status_code == HTTPStatus.BAD_REQUEST:
+            task_logger.exception(
+                f"Non-retryable HTTPStatusError: "
+                f"{description} "
+                f"status={e.response.status_code}"
+            )
+        return OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+
+    task_logger.exception(f"{task.name} exceptioned: {description}")
+
+    completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+    if task.max_retries is not None and task.request.retries >= task.max_retries:
+        completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+
+    # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+    countdown = 2 ** (task.request.retries + 4)
+    task.retry(exc=e, countdown=countdown)  # this will raise a celery exception
+    return completion_status  # we won't hit this, but it looks weird not to have it
+
+
 @shared_task(
     name=OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
     bind=True,
@@ -522,52 +570,91 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
         task_logger.info(f"SoftTimeLimitExceeded exception. doc={document_id}")
         completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
     except Exception as ex:
-        e: Exception | None = None
-        while True:
-            if isinstance(ex, RetryError):
-                task_logger.warning(
-                    f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
-                )
+        completion_status = _handle_metadata_sync_exception(
+            self, ex, f"doc={document_id}"
+        )
+    finally:
+        task_logger.info(
+            f"vespa_metadata_sync_task completed: status={completion_status.value} doc={document_id}"
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
 
-                # only set the inner exception if it is of type Exception
-                e_temp = ex.last_attempt.exception()
-                if isinstance(e_temp, Exception):
-                    e = e_temp
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=LIGHT_SOFT_TIME_LIMIT,
+    time_limit=LIGHT_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], *, tenant_id: str
+) -> bool:
+    """Batched version of vespa_metadata_sync_task. Document sets and access are
+    loaded for the whole batch with a handful of queries, the index is updated
+    with one call and all documents are marked as synced together."""
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    description = f"docs={len(document_ids)} first_doc={document_ids[0] if document_ids else None}"
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            docs = get_documents_by_ids(db_session, document_ids)
+            if not docs:
+                elapsed = time.monotonic() - start
+                task_logger.info(
+                    f"{description} action=no_operation elapsed={elapsed:.2f}"
+                )
+                completion_status = OnyxCeleryTaskCompletionStatus.SKIPPED
             else:
-                e = ex
-
-            if isinstance(e, httpx.HTTPStatusError):
-                if e.response.status_code == HTTPStatus.BAD_REQUEST:
-                    task_logger.exception(
-                        f"Non-retryable HTTPStatusError: "
-                        f"doc={document_id} "
-                        f"status={e.response.status_code}"
-                    )
-                completion_status = (
-                    OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+                found_doc_ids = [doc.id for doc in docs]
+                doc_id_to_doc_sets = dict(
+                    fetch_document_sets_for_documents(found_doc_ids, db_session)
+                )
+                doc_id_to_access = get_access_for_documents(
+                    document_ids=found_doc_ids, db_session=db_session
                 )
-                break
 
-            task_logger.exception(
-                f"vespa_metadata_sync_task exceptioned: doc={document_id}"
-            )
+                update_requests = build_metadata_update_requests(
+                    docs=docs,
+                    doc_id_to_doc_sets=doc_id_to_doc_sets,
+                    doc_id_to_access=doc_id_to_access,
+                )
 
-            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
-            if (
-                self.max_retries is not None
-                and self.request.retries >= self.max_retries
-            ):
-                completion_status = (
-                    OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+                active_search_settings = get_active_search_settings(db_session)
+                doc_index = get_default_document_index(
+                    search_settings=active_search_settings.primary,
+                    secondary_search_settings=active_search_settings.secondary,
+                    httpx_client=HttpxPool.get("vespa"),
                 )
 
-            # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
-            countdown = 2 ** (self.request.retries + 4)
-            self.retry(exc=e, countdown=countdown)  # this will raise a celery exception
-            break  # we won't hit this, but it looks weird not to have it
+                # update the index. OK if docs don't exist. Raises exception otherwise.
+                RetryDocumentIndex(doc_index).update(
+                    update_requests, tenant_id=tenant_id
+                )
+
+                # update db last. Worst case = we crash right before this and
+                # the sync might repeat again later
+                mark_documents_as_synced(found_doc_ids, db_session)
+
+                elapsed = time.monotonic() - start
+                task_logger.info(
+                    f"{description} action=sync "
+                    f"synced={len(found_doc_ids)} "
+                    f"update_requests={len(update_requests)} "
+                    f"elapsed={elapsed:.2f}"
+                )
+                completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(f"SoftTimeLimitExceeded exception. {description}")
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as ex:
+        completion_status = _handle_metadata_sync_exception(self, ex, description)
     finally:
         task_logger.info(
-            f"vespa_metadata_sync_task completed: status={completion_status.value} doc={document_id}"
+            f"vespa_metadata_sync_batch_task completed: status={completion_status.value} {description}"
         )
 
     return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
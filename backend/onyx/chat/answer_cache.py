@@ -0,0 +1,411 @@
+"""Opt-in semantic cache of final answers, per persona.
+
+Repeated questions ("how do I reset my VPN") each go through query expansion,
+several searches and a full answer generation. For personas with the answer cache
+enabled, the packets of a final answer are stored in Redis together with the
+embedding of the question, the documents it cites and the scope it was generated in.
+A later question of the same scope with a similar enough embedding replays the
+stored packets instead, unless one of the cited documents was updated or deleted
+since.
+
+The scope covers everything besides the question that an answer depends on: the
+user's ACL (so answers are only shared between users with the same access, or by
+everyone when ACLs are bypassed), the search filter permission version (bumped when
+personas, document sets or user groups change), the embedding model, the LLM, the
+prompt, the user's memories and the search filters.
+
+Redis layout, per tenant and persona:
+- `{persona}:scopes`: set of the scopes with cached answers
+- `{persona}:{scope}:embeddings`: hash of entry id -> normalized float32 embedding
+- `{persona}:{scope}:entry:{entry id}`: the cached answer, expires after the TTL
+- `{persona}:stats`: hash of lookup counters, see `AnswerCacheStats`
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+from itertools import groupby
+from typing import cast
+
+import numpy as np
+from prometheus_client import Counter
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from onyx.chat.chat_state import ChatStateContainer
+from onyx.configs.chat_configs import ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE
+from onyx.configs.chat_configs import ANSWER_CACHE_SIMILARITY_THRESHOLD
+from onyx.configs.chat_configs import ANSWER_CACHE_TTL_SECONDS
+from onyx.context.search.models import BaseFilters
+from onyx.context.search.models import SearchDoc
+from onyx.db.document import fetch_last_modified_for_documents
+from onyx.redis.redis_pool import get_redis_client
+from onyx.server.query_and_chat.placement import Placement
+from onyx.server.query_and_chat.streaming_models import AgentResponseDelta
+from onyx.server.query_and_chat.streaming_models import OverallStop
+from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.server.query_and_chat.streaming_models import ReasoningDelta
+from onyx.tools.models import ToolCallInfo
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+ANSWER_CACHE_LOOKUPS_COUNTER = Counter(
+    "onyx_answer_cache_lookups",
+    "Answer cache lookups of personas with the answer cache enabled, by result",
+    ["result"],
+)
+
+# lookup result -> field of the stats hash
+_STATS_FIELDS = {"hit": "hits", "miss": "misses", "stale": "stale"}
+
+
+@dataclass
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    # lookups that only found similar answers citing documents that changed since
+    stale: int = 0
+    stores: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.stale
+        if not total:
+            return 0.0
+        return self.hits / total
+
+
+class CachedAnswer(BaseModel):
+    question: str
+    answer: str
+    reasoning_tokens: str | None
+    citation_to_doc: dict[int, SearchDoc]
+    tool_calls: list[ToolCallInfo]
+    # replayed as is, with consecutive deltas merged
+    packets: list[Packet]
+    cited_document_ids: list[str]
+    # the cited documents must not have been modified after this
+    generated_at: datetime
+
+
+@dataclass(frozen=True)
+class AnswerCacheRequest:
+    persona_id: int
+    scope: str
+    question: str
+    question_embedding: Embedding
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def build_answer_cache_scope(
+    # None if ACLs are bypassed
+    user_acl: list[str] | None,
+    permission_version: str,
+    embedding_namespace: str,
+    llm_model: str,
+    custom_agent_prompt: str | None,
+    memories: list[str],
+    search_filters: BaseFilters | None,
+    allowed_tool_ids: list[int] | None,
+    forced_tool_id: int | None,
+    slack_channel_id: str | None,
+    include_citations: bool,
+) -> str:
+    scope = {
+        "acl": sorted(user_acl) if user_acl is not None else None,
+        "permission_version": permission_version,
+        "embedding_namespace": embedding_namespace,
+        "llm_model": llm_model,
+        "custom_agent_prompt": custom_agent_prompt,
+        "memories": memories,
+        "search_filters": (
+            search_filters.model_dump(mode="json") if search_filters else None
+        ),
+        "allowed_tool_ids": (
+            sorted(allowed_tool_ids) if allowed_tool_ids is not None else None
+        ),
+        "forced_tool_id": forced_tool_id,
+        "slack_channel_id": slack_channel_id,
+        "include_citations": include_citations,
+    }
+    return hashlib.sha256(json.dumps(scope, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _get_delta_run_key(packet: Packet) -> tuple[str, Placement] | None:
+    if isinstance(packet.obj, (AgentResponseDelta, ReasoningDelta)):
+        return packet.obj.type, packet.placement
+    return None
+
+
+def _coalesce_deltas(packets: list[Packet]) -> list[Packet]:
+    """Answers and reasoning are streamed token by token, there is no need to replay
+    them like that."""
+    coalesced: list[Packet] = []
+    for key, group in groupby(packets, key=_get_delta_run_key):
+        run = list(group)
+        if key is None or len(run) == 1:
+            coalesced.extend(run)
+        elif isinstance(run[0].obj, AgentResponseDelta):
+            content = "".join(cast(AgentResponseDelta, p.obj).content for p in run)
+            coalesced.append(
+                Packet(
+                    placement=run[0].placement, obj=AgentResponseDelta(content=content)
+                )
+            )
+        else:
+            reasoning = "".join(cast(ReasoningDelta, p.obj).reasoning for p in run)
+            coalesced.append(
+                Packet(
+                    placement=run[0].placement, obj=ReasoningDelta(reasoning=reasoning)
+                )
+            )
+    return coalesced
+
+
+def _documents_unchanged_since(
+    document_ids: list[str], since: datetime, db_session: Session
+) -> bool:
+    last_modified = fetch_last_modified_for_documents(document_ids, db_session)
+    return len(last_modified) == len(document_ids) and all(
+        modified_at <= since for modified_at in last_modified.values()
+    )
+
+
+def build_cached_answer(
+    request: AnswerCacheRequest,
+    packets: list[Packet],
+    state_container: ChatStateContainer,
+    search_tool_id: int | None,
+    db_session: Session,
+) -> CachedAnswer | None:
+    """Returns None if the answer must not be cached: if it did not complete, is a
+    clarification question, used tools other than search, or doesn't cite indexed
+    documents that are unchanged since the answer was started."""
+    answer = state_container.get_answer_tokens()
+    if (
+        not answer
+        or state_container.get_is_clarification()
+        or not packets
+        or not isinstance(packets[-1].obj, OverallStop)
+        or packets[-1].obj.stop_reason is not None
+    ):
+        return None
+
+    tool_calls = state_container.get_tool_calls()
+    if any(tool_call.tool_id != search_tool_id for tool_call in tool_calls):
+        return None
+
+    citation_to_doc = state_container.get_citation_to_doc()
+    cited_document_ids = sorted(
+        {search_doc.document_id for search_doc in citation_to_doc.values()}
+    )
+    if not cited_document_ids or not _documents_unchanged_since(
+        cited_document_ids, request.started_at, db_session
+    ):
+        return None
+
+    return CachedAnswer(
+        question=request.question,
+        answer=answer,
+        reasoning_tokens=state_container.get_reasoning_tokens(),
+        citation_to_doc=citation_to_doc,
+        tool_calls=tool_calls,
+        packets=_coalesce_deltas(packets),
+        cited_document_ids=cited_document_ids,
+        generated_at=request.started_at,
+    )
+
+
+def _normalize(embedding: Embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _persona_key(persona_id: int) -> str:
+    # prefixed with the tenant id up front, as the tenant aware client doesn't prefix
+    # all of the commands used here
+    return f"{get_current_tenant_id()}:answer_cache:{persona_id}"
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        max_entries_per_scope: int = ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE,
+    ) -> None:
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+
+    def lookup(
+        self, request: AnswerCacheRequest, db_session: Session
+    ) -> CachedAnswer | None:
+        """Returns the cached answer of the most similar question in the scope whose
+        cited documents are unchanged, if it is similar enough. Never raises."""
+        try:
+            return self._lookup(request, db_session)
+        except Exception:
+            logger.exception("Failed to look up the answer cache")
+            return None
+
+    def store(
+        self,
+        request: AnswerCacheRequest,
+        packets: list[Packet],
+        state_container: ChatStateContainer,
+        search_tool_id: int | None,
+        db_session: Session,
+    ) -> None:
+        """Stores the answer if it can be cached. Never raises."""
+        try:
+            cached_answer = build_cached_answer(
+                request=request,
+                packets=packets,
+                state_container=state_container,
+                search_tool_id=search_tool_id,
+                db_session=db_session,
+            )
+            if cached_answer is not None:
+                self._store(request, cached_answer)
+        except Exception:
+            logger.exception("Failed to store the answer in the answer cache")
+
+    def invalidate_persona(self, persona_id: int) -> None:
+        redis_client = get_redis_client()
+        persona_key = _persona_key(persona_id)
+        scopes_key = f"{persona_key}:scopes"
+        for scope in cast(set[bytes], redis_client.smembers(scopes_key)):
+            scope_key = f"{persona_key}:{scope.decode('utf-8')}"
+            embeddings_key = f"{scope_key}:embeddings"
+            entry_ids = cast(list[bytes], redis_client.hkeys(embeddings_key))
+            redis_client.delete(
+                embeddings_key,
+                *[
+                    f"{scope_key}:entry:{entry_id.decode('utf-8')}"
+                    for entry_id in entry_ids
+                ],
+            )
+        redis_client.delete(scopes_key)
+        redis_client.hincrby(f"{persona_key}:stats", "invalidations", 1)
+
+    def get_stats(self, persona_id: int) -> AnswerCacheStats:
+        values = cast(
+            dict[bytes, bytes],
+            get_redis_client().hgetall(f"{_persona_key(persona_id)}:stats"),
+        )
+        return AnswerCacheStats(
+            **{
+                name.decode("utf-8"): int(value)
+                for name, value in values.items()
+                if name.decode("utf-8") in AnswerCacheStats.__dataclass_fields__
+            }
+        )
+
+    def _lookup(
+        self, request: AnswerCacheRequest, db_session: Session
+    ) -> CachedAnswer | None:
+        redis_client = get_redis_client()
+        persona_key = _persona_key(request.persona_id)
+        scope_key = f"{persona_key}:{request.scope}"
+        embeddings_key = f"{scope_key}:embeddings"
+
+        question_vector = _normalize(request.question_embedding)
+        candidates: list[tuple[float, str]] = []
+        stored = cast(dict[bytes, bytes], redis_client.hgetall(embeddings_key))
+        for stored_entry_id, stored_vector in stored.items():
+            vector = np.frombuffer(stored_vector, dtype=np.float32)
+            if vector.shape != question_vector.shape:
+                continue
+            similarity = float(vector @ question_vector)
+            if similarity >= self.similarity_threshold:
+                candidates.append((similarity, stored_entry_id.decode("utf-8")))
+
+        result = "miss"
+        for similarity, entry_id in sorted(candidates, reverse=True):
+            entry_key = f"{scope_key}:entry:{entry_id}"
+            value = cast(bytes | None, redis_client.get(entry_key))
+            if value is None:
+                # expired
+                redis_client.hdel(embeddings_key, entry_id)
+                continue
+
+            cached_answer = CachedAnswer.model_validate_json(value)
+            if not _documents_unchanged_since(
+                cached_answer.cited_document_ids,
+                cached_answer.generated_at,
+                db_session,
+            ):
+                redis_client.delete(entry_key)
+                redis_client.hdel(embeddings_key, entry_id)
+                result = "stale"
+                continue
+
+            logger.info(
+                f"Answer cache hit for persona {request.persona_id} with "
+                f"similarity {similarity:.3f}"
+            )
+            self._record(persona_key, "hit")
+            return cached_answer
+
+        self._record(persona_key, result)
+        return None
+
+    def _store(self, request: AnswerCacheRequest, cached_answer: CachedAnswer) -> None:
+        redis_client = get_redis_client()
+        persona_key = _persona_key(request.persona_id)
+        scope_key = f"{persona_key}:{request.scope}"
+        embeddings_key = f"{scope_key}:embeddings"
+        scopes_key = f"{persona_key}:scopes"
+        ttl = int(self.ttl_seconds)
+
+        # ids sort by age, so that the oldest answers are dropped first
+        entry_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        pipe = redis_client.pipeline()
+        pipe.set(
+            f"{scope_key}:entry:{entry_id}", cached_answer.model_dump_json(), ex=ttl
+        )
+        pipe.hset(
+            embeddings_key,
+            mapping={entry_id: _normalize(request.question_embedding).tobytes()},
+        )
+        pipe.expire(embeddings_key, ttl)
+        pipe.sadd(scopes_key, request.scope)
+        pipe.expire(scopes_key, ttl)
+        pipe.hincrby(f"{persona_key}:stats", "stores", 1)
+        pipe.execute()
+
+        if cast(int, redis_client.hlen(embeddings_key)) > self.max_entries_per_scope:
+            entry_ids = sorted(
+                entry_id.decode("utf-8")
+                for entry_id in cast(list[bytes], redis_client.hkeys(embeddings_key))
+            )
+            oldest = entry_ids[: len(entry_ids) - self.max_entries_per_scope]
+            redis_client.hdel(embeddings_key, *oldest)
+            redis_client.delete(
+                *[f"{scope_key}:entry:{entry_id}" for entry_id in oldest]
+            )
+
+    def _record(self, persona_key: str, result: str) -> None:
+        ANSWER_CACHE_LOOKUPS_COUNTER.labels(result=result).inc()
+        try:
+            get_redis_client().hincrby(f"{persona_key}:stats", _STATS_FIELDS[result], 1)
+        except Exception:
+            logger.exception("Failed to record answer cache stats")
+
+
+_answer_cache = AnswerCache()
+
+
+def get_answer_cache() -> AnswerCache:
+    return _answer_cache
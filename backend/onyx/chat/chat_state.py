@@ -7,6 +7,7 @@ from typing import Any
 
 from onyx.chat.citation_processor import CitationMapping
 from onyx.chat.emitter import Emitter
+from onyx.context.search.filter_cache import search_filter_cache_scope
 from onyx.server.query_and_chat.placement import Placement
 from onyx.server.query_and_chat.streaming_models import OverallStop
 from onyx.server.query_and_chat.streaming_models import Packet
@@ -133,7 +134,9 @@ def run_chat_loop_with_state_containers(
         try:
             # Ensure state_container is passed explicitly, removing it from kwargs if present
             kwargs_with_state = {**kwargs, "state_container": state_container}
-            func(emitter, *args, **kwargs_with_state)
+            # searches in a turn share the resolved ACL and persona filters
+            with search_filter_cache_scope():
+                func(emitter, *args, **kwargs_with_state)
         except Exception as e:
             # If execution fails, emit an exception packet
             emitter.emit(
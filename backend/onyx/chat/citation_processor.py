@@ -61,6 +61,48 @@ def in_code_block(llm_text: str) -> bool:
     return count % 2 != 0
 
 
+_BACKTICK_RUN_PATTERN = re.compile("`+")
+_CITATION_OPEN_BRACKETS = frozenset("[【［")
+_CITATION_CLOSE_BRACKETS = frozenset("]】］")
+# Number of trailing output characters kept around to look up the character
+# preceding the current segment without joining the whole output.
+_LLM_OUT_TAIL_CHARS = 1024
+
+
+class _PartialCitation(Enum):
+    """How the end of the streamed text could still continue into a citation.
+
+    Tracks possible_citation_pattern one character at a time: opening brackets
+    followed by digits, each group optionally followed by a comma and a space.
+    """
+
+    BRACKETS = "brackets"  # e.g. '[', '[['
+    DIGITS = "digits"  # e.g. '[1', '[1, 23'
+    COMMA = "comma"  # e.g. '[1,'
+    SPACE = "space"  # e.g. '[1, ', '[1 '
+
+
+def _advance_partial_citation(
+    state: _PartialCitation | None, char: str
+) -> _PartialCitation | None:
+    if char in _CITATION_OPEN_BRACKETS:
+        return _PartialCitation.BRACKETS
+    if state is None:
+        return None
+    # \d in the pattern matches any unicode decimal digit
+    if char.isdecimal():
+        return _PartialCitation.DIGITS
+    if char == ",":
+        return _PartialCitation.COMMA if state == _PartialCitation.DIGITS else None
+    if char == " ":
+        return (
+            _PartialCitation.SPACE
+            if state in (_PartialCitation.DIGITS, _PartialCitation.COMMA)
+            else None
+        )
+    return None
+
+
 # ============================================================================
 # Main Citation Processor with Dynamic Mapping
 # ============================================================================
@@ -172,7 +214,10 @@ class DynamicCitationProcessor:
         self.seen_citations: CitationMapping = {}  # citation num -> SearchDoc
 
         # Token processing state
-        self.llm_out = ""  # entire output so far
+        # Entire output so far, joined lazily, see the llm_out property
+        self._llm_out_parts: list[str] = []
+        self._llm_out_len = 0
+        self._llm_out_tail = ""  # last _LLM_OUT_TAIL_CHARS characters of the output
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
         self.stop_stream = stop_stream
@@ -188,6 +233,20 @@ class DynamicCitationProcessor:
         )  # recently cited (for deduplication)
         self.non_citation_count = 0
 
+        # Incremental state, updated per token so that the work done for each
+        # token does not grow with the length of the output.
+        # Triple backticks in the output so far are
+        # _fence_count + _trailing_backticks // 3, which mirrors str.count.
+        self._fence_count = 0
+        self._trailing_backticks = 0
+        # Partial citation at the end of the output, and the same state as of
+        # one character earlier, since '$' also matches before a final newline.
+        self._partial_citation: _PartialCitation | None = None
+        self._partial_citation_before_last_char: _PartialCitation | None = None
+        # Whether curr_segment may contain complete citations not processed yet,
+        # either because a closing bracket arrived or they were in a code block.
+        self._segment_may_have_citations = False
+
         # Citation patterns
         # Matches potential incomplete citations: '[', '[[', '[1', '[[1', '[1,', '[1, ', etc.
         # Also matches unicode bracket variants: 【, ［
@@ -200,6 +259,81 @@ class DynamicCitationProcessor:
             r"([\[【［]{2}\d+[\]】］]{2})|([\[【［]\d+(?:, ?\d+)*[\]】］])"
         )
 
+    @property
+    def llm_out(self) -> str:
+        """The entire output so far."""
+        if len(self._llm_out_parts) > 1:
+            self._llm_out_parts = ["".join(self._llm_out_parts)]
+        return self._llm_out_parts[0] if self._llm_out_parts else ""
+
+    def _append_to_llm_out(self, token: str) -> None:
+        if not token:
+            return
+        self._llm_out_parts.append(token)
+        self._llm_out_len += len(token)
+        self._llm_out_tail = (self._llm_out_tail + token)[-_LLM_OUT_TAIL_CHARS:]
+        self._update_fence_state(token)
+        self._update_partial_citation_state(token)
+        if not _CITATION_CLOSE_BRACKETS.isdisjoint(token):
+            self._segment_may_have_citations = True
+
+    def _update_fence_state(self, token: str) -> None:
+        if "`" not in token:
+            self._fence_count += self._trailing_backticks // 3
+            self._trailing_backticks = 0
+            return
+
+        trailing = self._trailing_backticks
+        runs = [match.span() for match in _BACKTICK_RUN_PATTERN.finditer(token)]
+        if runs[0][0] != 0:
+            self._fence_count += trailing // 3
+            trailing = 0
+        for start, end in runs:
+            # A run at the start of the token continues the previous token's run
+            run_length = end - start + (trailing if start == 0 else 0)
+            if end == len(token):
+                trailing = run_length
+            else:
+                self._fence_count += run_length // 3
+                trailing = 0
+        self._trailing_backticks = trailing
+
+    def _in_code_block(self) -> bool:
+        return (self._fence_count + self._trailing_backticks // 3) % 2 != 0
+
+    def _update_partial_citation_state(self, token: str) -> None:
+        state = self._partial_citation
+        if state is None and _CITATION_OPEN_BRACKETS.isdisjoint(token):
+            self._partial_citation = None
+            self._partial_citation_before_last_char = None
+            return
+
+        # Everything before the last opening bracket is irrelevant
+        start = max(token.rfind(bracket) for bracket in _CITATION_OPEN_BRACKETS)
+        before_last_char = state
+        for char in token[max(start, 0) :]:
+            before_last_char = state
+            state = _advance_partial_citation(state, char)
+        self._partial_citation = state
+        self._partial_citation_before_last_char = before_last_char
+
+    def _possible_citation_at_end(self) -> bool:
+        """Equivalent to searching curr_segment for possible_citation_pattern."""
+        if not self.curr_segment:
+            return False
+        if self._partial_citation is not None:
+            return True
+        return (
+            self.curr_segment[-1] == "\n"
+            and self._partial_citation_before_last_char is not None
+        )
+
+    def _char_before_segment(self, segment_start_idx: int) -> str:
+        tail_start = self._llm_out_len - len(self._llm_out_tail)
+        if segment_start_idx - 1 >= tail_start:
+            return self._llm_out_tail[segment_start_idx - 1 - tail_start]
+        return self.llm_out[segment_start_idx - 1]
+
     def update_citation_mapping(
         self,
         citation_mapping: CitationMapping,
@@ -293,7 +427,8 @@ class DynamicCitationProcessor:
                 self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self._append_to_llm_out(token)
+        is_in_code_block = self._in_code_block()
 
         # Handle code blocks without language tags
         # If we see ``` followed by \n, add "plaintext" language specifier
@@ -304,19 +439,23 @@ class DynamicCitationProcessor:
                 parts = self.curr_segment.split("```")
                 if len(parts) > 1 and len(parts[1]) > 0:
                     piece_that_comes_after = parts[1][0]
-                    if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                    if piece_that_comes_after == "\n" and is_in_code_block:
                         self.curr_segment = self.curr_segment.replace(
                             "```", "```plaintext"
                         )
 
-        # Look for citations in current segment
-        citation_matches = list(self.citation_pattern.finditer(self.curr_segment))
-        possible_citation_found = bool(
-            re.search(self.possible_citation_pattern, self.curr_segment)
+        # Look for citations in current segment. Citations inside code blocks are
+        # left alone, and outside of them every complete citation has already been
+        # handled unless a closing bracket arrived since.
+        citation_matches = (
+            list(self.citation_pattern.finditer(self.curr_segment))
+            if self._segment_may_have_citations and not is_in_code_block
+            else []
         )
+        possible_citation_found = self._possible_citation_at_end()
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches:
             match_idx = 0
             for match in citation_matches:
                 match_span = match.span()
@@ -337,11 +476,11 @@ class DynamicCitationProcessor:
                         has_leading_space = True
                     else:
                         # Citation at start of segment - check if previous output has space
-                        segment_start_idx = len(self.llm_out) - len(self.curr_segment)
+                        segment_start_idx = self._llm_out_len - len(self.curr_segment)
                         if segment_start_idx > 0:
-                            has_leading_space = self.llm_out[
-                                segment_start_idx - 1
-                            ].isspace()
+                            has_leading_space = self._char_before_segment(
+                                segment_start_idx
+                            ).isspace()
                         else:
                             has_leading_space = False
 
@@ -402,11 +541,15 @@ class DynamicCitationProcessor:
             self.curr_segment = self.curr_segment[match_idx:]
             self.non_citation_count = len(self.curr_segment)
 
+        if not is_in_code_block:
+            self._segment_may_have_citations = False
+
         # Hold onto the current segment if potential citations found, otherwise stream it
         if not possible_citation_found:
             result += self.curr_segment
             self.non_citation_count += len(self.curr_segment)
             self.curr_segment = ""
+            self._segment_may_have_citations = False
 
         if result:
             yield result
@@ -11,6 +11,10 @@ from uuid import UUID
 from redis.client import Redis
 from sqlalchemy.orm import Session
 
+from onyx.chat.answer_cache import AnswerCacheRequest
+from onyx.chat.answer_cache import build_answer_cache_scope
+from onyx.chat.answer_cache import CachedAnswer
+from onyx.chat.answer_cache import get_answer_cache
 from onyx.chat.chat_processing_checker import set_processing_status
 from onyx.chat.chat_state import ChatStateContainer
 from onyx.chat.chat_state import run_chat_loop_with_state_containers
@@ -41,9 +45,13 @@ from onyx.configs.constants import DEFAULT_PERSONA_ID
 from onyx.configs.constants import DocumentSource
 from onyx.configs.constants import MessageType
 from onyx.configs.constants import MilestoneRecordType
+from onyx.context.search.filter_cache import get_permission_version
+from onyx.context.search.filter_cache import get_search_filter_cache
 from onyx.context.search.models import BaseFilters
 from onyx.context.search.models import CitationDocInfo
 from onyx.context.search.models import SearchDoc
+from onyx.context.search.query_embedding_cache import build_query_embedding_namespace
+from onyx.context.search.utils import get_query_embedding
 from onyx.db.chat import create_new_chat_message
 from onyx.db.chat import get_chat_session_by_id
 from onyx.db.chat import get_or_create_root_message
@@ -55,6 +63,7 @@ from onyx.db.models import Persona
 from onyx.db.models import User
 from onyx.db.projects import get_project_token_count
 from onyx.db.projects import get_user_files_from_project
+from onyx.db.search_settings import get_current_search_settings
 from onyx.db.tools import get_tools
 from onyx.deep_research.dr_loop import run_deep_research_llm_loop
 from onyx.file_store.models import ChatFileType
@@ -292,6 +301,98 @@ def _get_project_search_availability(
     )
 
 
+def _get_answer_cache_scope(
+    new_msg_req: SendMessageRequest,
+    persona: Persona,
+    chat_session: ChatSession,
+    chat_history: list[ChatMessage],
+    is_regeneration: bool,
+    user: User | None,
+    llm: LLM,
+    custom_agent_prompt: str | None,
+    memories: list[str],
+    bypass_acl: bool,
+    additional_context: str | None,
+    slack_context: SlackContext | None,
+    db_session: Session,
+) -> str | None:
+    """Returns the scope of the answer cache to use for this message, or None if the
+    answer must be generated."""
+    if (
+        not persona.answer_cache_enabled
+        # the user asked for a new answer
+        or is_regeneration
+        # follow-up questions depend on the earlier messages
+        or len(chat_history) != 1
+        or additional_context is not None
+        or new_msg_req.deep_research
+        or new_msg_req.file_descriptors
+        or chat_session.project_id is not None
+    ):
+        return None
+
+    permission_version = get_permission_version()
+    if permission_version is None:
+        return None
+
+    return build_answer_cache_scope(
+        user_acl=(
+            None
+            if bypass_acl
+            else get_search_filter_cache().get_user_acl(user, db_session)
+        ),
+        permission_version=permission_version,
+        embedding_namespace=build_query_embedding_namespace(
+            get_current_search_settings(db_session)
+        ),
+        llm_model=f"{llm.config.model_provider}/{llm.config.model_name}",
+        custom_agent_prompt=custom_agent_prompt,
+        memories=memories,
+        search_filters=new_msg_req.internal_search_filters,
+        allowed_tool_ids=new_msg_req.allowed_tool_ids,
+        forced_tool_id=new_msg_req.forced_tool_id,
+        slack_channel_id=slack_context.channel_id if slack_context else None,
+        include_citations=new_msg_req.include_citations,
+    )
+
+
+def _stream_cached_answer(
+    cached_answer: CachedAnswer,
+    chat_session_id: UUID,
+    user_message: ChatMessage,
+    state_container: ChatStateContainer,
+    db_session: Session,
+) -> AnswerStream:
+    """Saves the cached answer as the response to the user message, the same way as a
+    generated one, and replays its packets."""
+    assistant_response = reserve_message_id(
+        db_session=db_session,
+        chat_session_id=chat_session_id,
+        parent_message=user_message.id,
+        message_type=MessageType.ASSISTANT,
+    )
+
+    yield MessageResponseIDInfo(
+        user_message_id=user_message.id,
+        reserved_assistant_message_id=assistant_response.id,
+    )
+
+    state_container.set_answer_tokens(cached_answer.answer)
+    state_container.set_reasoning_tokens(cached_answer.reasoning_tokens)
+    state_container.set_citation_mapping(cached_answer.citation_to_doc)
+    for tool_call in cached_answer.tool_calls:
+        state_container.add_tool_call(tool_call)
+    llm_loop_completion_handle(
+        state_container=state_container,
+        is_connected=lambda: True,
+        db_session=db_session,
+        chat_session_id=str(chat_session_id),
+        assistant_message=assistant_response,
+    )
+
+    yield from cached_answer.packets
+
+
 def handle_stream_message_objects(
     new_msg_req: SendMessageRequest,
     user: User | None,
@@ -445,7 +546,8 @@ def handle_stream_message_objects(
             )
 
         # If the parent message is a user message, it's a regeneration and we use the existing user message.
-        if parent_message.message_type == MessageType.USER:
+        is_regeneration = parent_message.message_type == MessageType.USER
+        if is_regeneration:
             user_message = parent_message
         else:
             user_message = create_new_chat_message(
@@ -465,6 +567,43 @@ def handle_stream_message_objects(
 
         custom_agent_prompt = get_custom_agent_prompt(persona, chat_session)
 
+        # Replay the answer to a similar earlier question if the persona opted in
+        answer_cache_request: AnswerCacheRequest | None = None
+        answer_cache_scope = _get_answer_cache_scope(
+            new_msg_req=new_msg_req,
+            persona=persona,
+            chat_session=chat_session,
+            chat_history=chat_history,
+            is_regeneration=is_regeneration,
+            user=user,
+            llm=llm,
+            custom_agent_prompt=custom_agent_prompt,
+            memories=memories,
+            bypass_acl=bypass_acl,
+            additional_context=additional_context,
+            slack_context=slack_context,
+            db_session=db_session,
+        )
+        if answer_cache_scope is not None:
+            answer_cache_request = AnswerCacheRequest(
+                persona_id=persona.id,
+                scope=answer_cache_scope,
+                question=user_message.message,
+                question_embedding=get_query_embedding(
+                    user_message.message, db_session
+                ),
+            )
+            cached_answer = get_answer_cache().lookup(answer_cache_request, db_session)
+            if cached_answer is not None:
+                yield from _stream_cached_answer(
+                    cached_answer=cached_answer,
+                    chat_session_id=chat_session.id,
+                    user_message=user_message,
+                    state_container=external_state_container or ChatStateContainer(),
+                    db_session=db_session,
+                )
+                return
+
         reserved_token_count = calculate_reserved_tokens(
             db_session=db_session,
             persona_system_prompt=custom_agent_prompt or "",
@@ -635,7 +774,7 @@ def handle_stream_message_objects(
                 chat_session_id=str(chat_session.id),
             )
         else:
-            yield from run_chat_loop_with_state_containers(
+            answer_packets = run_chat_loop_with_state_containers(
                 run_llm_loop,
                 llm_loop_completion_callback,
                 is_connected=check_is_connected,  # Not passed through to run_llm_loop
@@ -655,6 +794,20 @@ def handle_stream_message_objects(
                 chat_session_id=str(chat_session.id),
                 include_citations=new_msg_req.include_citations,
             )
+            if answer_cache_request is None:
+                yield from answer_packets
+            else:
+                recorded_packets: list[Packet] = []
+                for packet in answer_packets:
+                    recorded_packets.append(packet)
+                    yield packet
+                get_answer_cache().store(
+                    request=answer_cache_request,
+                    packets=recorded_packets,
+                    state_container=state_container,
+                    search_tool_id=search_tool_id,
+                    db_session=db_session,
+                )
 
     except ValueError as e:
         logger.exception("Failed to process chat message.")
@@ -203,6 +203,18 @@ OPENSEARCH_ADMIN_PASSWORD = os.environ.get("OPENSEARCH_ADMIN_PASSWORD", "")
 ENABLE_OPENSEARCH_FOR_ONYX = (
     os.environ.get("ENABLE_OPENSEARCH_FOR_ONYX", "").lower() == "true"
 )
+# Index chunks into OpenSearch through the _bulk API instead of one request per
+# chunk. Stale chunks are removed by chunk ID rather than per-document queries.
+OPENSEARCH_BULK_INDEXING_ENABLED = (
+    os.environ.get("OPENSEARCH_BULK_INDEXING_ENABLED", "true").lower() == "true"
+)
+# Upper bounds on a single _bulk request, whichever is hit first
+OPENSEARCH_BULK_MAX_CHUNK_BYTES = int(
+    os.environ.get("OPENSEARCH_BULK_MAX_CHUNK_BYTES") or 10 * 1024 * 1024
+)
+OPENSEARCH_BULK_MAX_ACTIONS = int(os.environ.get("OPENSEARCH_BULK_MAX_ACTIONS") or 500)
+# Number of _bulk requests sent concurrently per indexing batch
+OPENSEARCH_BULK_THREAD_COUNT = int(os.environ.get("OPENSEARCH_BULK_THREAD_COUNT") or 2)
 
 VESPA_HOST = os.environ.get("VESPA_HOST") or "localhost"
 # NOTE: this is used if and only if the vespa config server is accessible via a
@@ -417,6 +429,9 @@ CELERY_WORKER_USER_FILE_PROCESSING_CONCURRENCY = int(
 
 # The maximum number of tasks that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 8192
+# Number of documents handled by a single metadata sync task. Each task loads
+# document sets and access for its whole batch and updates the index at once.
+VESPA_SYNC_BATCH_SIZE = int(os.environ.get("VESPA_SYNC_BATCH_SIZE") or 64)
 
 DB_YIELD_PER_DEFAULT = 64
 
@@ -665,6 +680,21 @@ LARGE_CHUNK_RATIO = 4
 # We don't want the metadata to overwhelm the actual contents of the chunk
 SKIP_METADATA_IN_CHUNK = os.environ.get("SKIP_METADATA_IN_CHUNK", "").lower() == "true"
 
+# Throughput mode for the chunker: each section is tokenized once, chunk token counts are
+# summed from the section counts instead of re-tokenizing the growing chunk, and the
+# counts are passed on so the embedder does not need to tokenize the chunks again.
+# Chunk boundaries may differ very slightly from the default mode since the token count
+# of joined text is not exactly the sum of the counts of its parts.
+CHUNKER_THROUGHPUT_MODE = (
+    os.environ.get("CHUNKER_THROUGHPUT_MODE", "").lower() == "true"
+)
+# In throughput mode, batches of at least CHUNKER_PROCESS_POOL_MIN_DOCUMENTS documents
+# are chunked across this many processes. 0 or 1 chunks in the calling process
+CHUNKER_NUM_PROCESSES = int(os.environ.get("CHUNKER_NUM_PROCESSES") or 0)
+CHUNKER_PROCESS_POOL_MIN_DOCUMENTS = int(
+    os.environ.get("CHUNKER_PROCESS_POOL_MIN_DOCUMENTS") or 16
+)
+
 # The indexer will warn in the logs whenver a document exceeds this threshold (in bytes)
 INDEXING_SIZE_WARNING_THRESHOLD = int(
     os.environ.get("INDEXING_SIZE_WARNING_THRESHOLD") or 100 * 1024 * 1024
@@ -680,6 +710,29 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 8
 )
 
+# Split each indexing batch into sub-batches and overlap their chunking, embedding and
+# document index writes, so that a single worker keeps both the embedder and the
+# document index busy. Works best with an INDEX_BATCH_SIZE of several sub-batches.
+ENABLE_PIPELINED_INDEXING = (
+    os.environ.get("ENABLE_PIPELINED_INDEXING", "").lower() == "true"
+)
+INDEXING_PIPELINE_SUB_BATCH_SIZE = int(
+    os.environ.get("INDEXING_PIPELINE_SUB_BATCH_SIZE") or 4
+)
+# Max number of sub-batches waiting between two stages, bounds memory usage when
+# one stage is slower than the others
+INDEXING_PIPELINE_QUEUE_DEPTH = int(
+    os.environ.get("INDEXING_PIPELINE_QUEUE_DEPTH") or 1
+)
+
+# Store a hash of every indexed chunk and, when a document is updated, only embed and
+# write the chunks that changed. The other chunks are left in the document index and
+# only get their update time refreshed. Re-indexing from the beginning rewrites all chunks.
+# Off by default: a failed update can leave a document with chunks of both versions
+SKIP_UNCHANGED_CHUNKS = (
+    os.environ.get("SKIP_UNCHANGED_CHUNKS", "false").lower() == "true"
+)
+
 # Maximum file size in a document to be indexed
 MAX_DOCUMENT_CHARS = int(os.environ.get("MAX_DOCUMENT_CHARS") or 5_000_000)
 MAX_FILE_SIZE_BYTES = int(
@@ -788,6 +841,24 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
 
+# Limits of the process-wide connection pool used for Vespa queries (search,
+# id based retrieval and the visit API). Size these per pod using the
+# onyx_httpx_pool_* metrics.
+VESPA_QUERY_POOL_MAX_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_POOL_MAX_CONNECTIONS") or 100
+)
+VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS") or 20
+)
+# Seconds an idle connection is kept open for reuse
+VESPA_QUERY_POOL_KEEPALIVE_EXPIRY = float(
+    os.environ.get("VESPA_QUERY_POOL_KEEPALIVE_EXPIRY") or 30
+)
+# Seconds a query may wait for a free connection before failing
+VESPA_QUERY_POOL_TIMEOUT = float(
+    os.environ.get("VESPA_QUERY_POOL_TIMEOUT") or VESPA_REQUEST_TIMEOUT
+)
+
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
 PARSE_WITH_TRAFILATURA = os.environ.get("PARSE_WITH_TRAFILATURA", "").lower() == "true"
@@ -982,6 +1053,13 @@ S3_GENERATE_LOCAL_CHECKSUM = (
     os.environ.get("S3_GENERATE_LOCAL_CHECKSUM", "").lower() == "true"
 )
 
+# Format of the intermediate document batches handed from docfetching to docprocessing.
+# "json" (default) or "jsonl_gz" (gzip compressed JSON lines, much smaller and decoded
+# one document at a time). Batches stored in either format can always be read.
+DOCUMENT_BATCH_STORAGE_FORMAT = (
+    os.environ.get("DOCUMENT_BATCH_STORAGE_FORMAT") or "json"
+).lower()
+
 # Forcing Vespa Language
 # English: en, German:de, etc. See: https://docs.vespa.ai/en/linguistics.html
 VESPA_LANGUAGE_OVERRIDE = os.environ.get("VESPA_LANGUAGE_OVERRIDE")
@@ -41,6 +41,49 @@ TITLE_CONTENT_RATIO = max(
     0, min(1, float(os.environ.get("TITLE_CONTENT_RATIO") or 0.10))
 )
 
+# Query embeddings are cached per process, keyed by the active search settings.
+# Multi-query search and deep research frequently embed the same queries repeatedly
+QUERY_EMBEDDING_CACHE_ENABLED = (
+    os.environ.get("QUERY_EMBEDDING_CACHE_ENABLED", "true").lower() != "false"
+)
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_MAX_ENTRIES") or 10_000
+)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60
+)
+# Also share cached query embeddings across processes through Redis
+QUERY_EMBEDDING_CACHE_USE_REDIS = (
+    os.environ.get("QUERY_EMBEDDING_CACHE_USE_REDIS", "").lower() == "true"
+)
+
+# Resolved user ACLs and persona filters used to build search filters are cached for a
+# short time per process, keyed by a permission version that is bumped whenever
+# document set or user group syncs complete
+SEARCH_FILTER_CACHE_ENABLED = (
+    os.environ.get("SEARCH_FILTER_CACHE_ENABLED", "true").lower() != "false"
+)
+SEARCH_FILTER_CACHE_MAX_ENTRIES = int(
+    os.environ.get("SEARCH_FILTER_CACHE_MAX_ENTRIES") or 5_000
+)
+SEARCH_FILTER_CACHE_TTL_SECONDS = int(
+    os.environ.get("SEARCH_FILTER_CACHE_TTL_SECONDS") or 30
+)
+
+# Personas with the answer cache enabled replay the stored answer of an earlier question
+# if a new question's embedding is at least this similar (cosine) to it
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD") or 0.95
+)
+ANSWER_CACHE_TTL_SECONDS = int(
+    os.environ.get("ANSWER_CACHE_TTL_SECONDS") or 24 * 60 * 60
+)
+# Per persona and scope (user access, model, prompt and filters), the oldest answers
+# are dropped beyond this. Every lookup compares against all answers of its scope
+ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE = int(
+    os.environ.get("ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE") or 1_000
+)
+
 # A list of languages passed to the LLM to rephase the query
 # For example "English,French,Spanish", be sure to use the "," separator
 # TODO these are not used, should probably reintroduce these
@@ -135,6 +135,9 @@ KG_CLUSTERING_THRESHOLD: float = float(
     os.environ.get("KG_CLUSTERING_THRESHOLD", "0.96")
 )
 
+# number of entities (and documents, for the vespa updates) clustered at once
+KG_CLUSTERING_BATCH_SIZE: int = int(os.environ.get("KG_CLUSTERING_BATCH_SIZE", "500"))
+
 KG_MAX_SEARCH_DOCUMENTS: int = int(os.environ.get("KG_MAX_SEARCH_DOCUMENTS", "15"))
 
 KG_MAX_DECOMPOSITION_SEGMENTS: int = int(
@@ -42,6 +42,33 @@ EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE") or 0) or None
 BATCH_SIZE_ENCODE_CHUNKS = EMBEDDING_BATCH_SIZE or 8
 # don't send over too many chunks at once, as sending too many could cause timeouts
 BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES = EMBEDDING_BATCH_SIZE or 512
+# Local embedding models pad each batch to its longest text, so group texts of similar
+# tokenized length together and size batches by a padded token budget instead of a fixed
+# count. If no budget is set, batch size * max sequence length is used.
+ENABLE_LENGTH_BUCKETED_EMBEDDING_BATCHING = (
+    os.environ.get("ENABLE_LENGTH_BUCKETED_EMBEDDING_BATCHING", "true").lower()
+    != "false"
+)
+EMBEDDING_BATCH_TOKEN_BUDGET = (
+    int(os.environ.get("EMBEDDING_BATCH_TOKEN_BUDGET") or 0) or None
+)
+# Content-addressed embedding cache, lets re-indexing skip re-embedding unchanged text
+EMBEDDING_CACHE_ENABLED = (
+    os.environ.get("EMBEDDING_CACHE_ENABLED", "").lower() == "true"
+)
+EMBEDDING_CACHE_DIR = (
+    os.environ.get("EMBEDDING_CACHE_DIR") or "/tmp/onyx_embedding_cache"
+)
+# Least recently used entries are evicted once this many embeddings are stored
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES") or 1_000_000
+)
+# Embedding clients of secondary flows (e.g. KG processing) reuse the current search
+# settings of a tenant for this long before looking them up again. A search settings
+# swap in the same process takes effect immediately
+EMBEDDING_CLIENT_SEARCH_SETTINGS_TTL_SECONDS = float(
+    os.environ.get("EMBEDDING_CLIENT_SEARCH_SETTINGS_TTL_SECONDS") or 60
+)
 # For score display purposes, only way is to know the expected ranges
 CROSS_ENCODER_RANGE_MAX = 1
 CROSS_ENCODER_RANGE_MIN = 0
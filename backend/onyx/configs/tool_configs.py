@@ -24,3 +24,20 @@ if _CUSTOM_TOOL_PASS_THROUGH_HEADERS_RAW:
         logger.error(
             "Failed to parse CUSTOM_TOOL_PASS_THROUGH_HEADERS, must be a valid JSON object"
         )
+
+# MCP client sessions are kept open and reused across tool calls. Sessions that are
+# unused for this long are closed, set to 0 to open a new session for every call.
+MCP_SESSION_IDLE_TIMEOUT_SECONDS = float(
+    os.environ.get("MCP_SESSION_IDLE_TIMEOUT_SECONDS") or 300
+)
+# max number of open MCP sessions per process, the least recently used idle session is
+# closed when a new one is needed
+MCP_SESSION_POOL_MAX_SIZE = int(os.environ.get("MCP_SESSION_POOL_MAX_SIZE") or 32)
+# a session that has been idle for this long is pinged before it is reused
+MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS = float(
+    os.environ.get("MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS") or 30
+)
+# how long the tools listed by an MCP server are reused, set to 0 to disable caching
+MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS = float(
+    os.environ.get("MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS") or 60
+)
@@ -38,9 +38,11 @@ from onyx.document_index.document_index_utils import (
 )
 from onyx.federated_connectors.slack.models import SlackEntities
 from onyx.indexing.chunker import Chunker
-from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.models import DocAwareChunk
 from onyx.llm.factory import get_default_llm
+from onyx.natural_language_processing.embedding_client_registry import (
+    get_embedding_client,
+)
 from onyx.onyxbot.slack.models import ChannelType
 from onyx.onyxbot.slack.models import SlackContext
 from onyx.redis.redis_pool import get_redis_client
@@ -1154,15 +1156,13 @@ def slack_retrieval(
     # chunk index docs into doc aware chunks
     # a single index doc can get split into multiple chunks
     search_settings = get_current_search_settings(db_session)
-    embedder = DefaultIndexingEmbedder.from_db_search_settings(
-        search_settings=search_settings
-    )
+    embedding_client = get_embedding_client(search_settings=search_settings)
     multipass_config = get_multipass_config(search_settings)
     enable_contextual_rag = (
         search_settings.enable_contextual_rag or ENABLE_CONTEXTUAL_RAG
     )
     chunker = Chunker(
-        tokenizer=embedder.embedding_model.tokenizer,
+        tokenizer=embedding_client.model.tokenizer,
         enable_multipass=multipass_config.multipass_indexing,
         enable_large_chunks=multipass_config.enable_large_chunks,
         enable_contextual_rag=enable_contextual_rag,
@@ -0,0 +1,256 @@
+"""Short-TTL cache of the Postgres lookups that go into search filters.
+
+Every search resolves the user's ACL (including user group and external group
+expansion in EE) and the persona's document sets, user files and time cutoff. A
+single chat turn runs many searches for the same user and persona, so these are
+cached at two levels:
+
+- per chat turn, see `search_filter_cache_scope`, which also logs how many database
+  round trips were saved
+- per process, with a short TTL, keyed by a per-tenant permission version stored in
+  Redis. The version is bumped when document set or user group syncs complete, when
+  personas are updated, when user group memberships change and when users are
+  deactivated or change roles, which makes every process stop serving older entries.
+
+If the permission version cannot be read, the per-process cache is skipped.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from typing import Any
+from typing import cast
+from typing import TypeVar
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from onyx.configs.chat_configs import SEARCH_FILTER_CACHE_ENABLED
+from onyx.configs.chat_configs import SEARCH_FILTER_CACHE_MAX_ENTRIES
+from onyx.configs.chat_configs import SEARCH_FILTER_CACHE_TTL_SECONDS
+from onyx.context.search.preprocessing.access_filters import (
+    build_access_filters_for_user,
+)
+from onyx.db.models import Persona
+from onyx.db.models import User
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+# Redis keys are prefixed with the tenant id by the tenant aware client
+_PERMISSION_VERSION_KEY = "search_filter_cache:permission_version"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PersonaSearchFilters:
+    user_file_ids: tuple[UUID, ...]
+    document_set_names: tuple[str, ...]
+    search_start_date: datetime | None
+
+
+@dataclass
+class SearchFilterCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def db_round_trips_saved(self) -> int:
+        return self.hits
+
+
+@dataclass
+class _TurnScope:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    entries: dict[str, Any] = field(default_factory=dict)
+    # permission version, read once per turn, None if it could not be read
+    permission_version: str | None = None
+    permission_version_read: bool = False
+    stats: SearchFilterCacheStats = field(default_factory=SearchFilterCacheStats)
+
+
+_turn_scope: ContextVar[_TurnScope | None] = ContextVar(
+    "search_filter_cache_turn_scope", default=None
+)
+
+
+def get_permission_version(tenant_id: str | None = None) -> str | None:
+    try:
+        value = get_redis_client(tenant_id=tenant_id).get(_PERMISSION_VERSION_KEY)
+    except Exception:
+        logger.exception("Failed to read the search filter permission version")
+        return None
+    return cast(bytes, value).decode("utf-8") if value is not None else "0"
+
+
+def bump_search_filter_permission_version(tenant_id: str | None = None) -> None:
+    """Invalidates the cached ACLs and persona filters of a tenant in all processes.
+    Should be called whenever document access, user groups or personas change."""
+    try:
+        get_redis_client(tenant_id=tenant_id).incr(_PERMISSION_VERSION_KEY)
+    except Exception:
+        logger.exception("Failed to bump the search filter permission version")
+
+
+class SearchFilterCache:
+    def __init__(
+        self,
+        max_entries: int = SEARCH_FILTER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SEARCH_FILTER_CACHE_TTL_SECONDS,
+        enabled: bool = SEARCH_FILTER_CACHE_ENABLED,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        # key -> (expiry time, value), ordered from least to most recently used
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._stats = SearchFilterCacheStats()
+
+    def get_user_acl(self, user: User | None, db_session: Session) -> list[str]:
+        user_key = str(user.id) if user else "anonymous"
+        acl = self._get_or_compute(
+            f"acl:{user_key}",
+            lambda: tuple(build_access_filters_for_user(user, db_session)),
+        )
+        return list(acl)
+
+    def get_persona_filters(self, persona: Persona) -> PersonaSearchFilters:
+        def _compute() -> PersonaSearchFilters:
+            return PersonaSearchFilters(
+                user_file_ids=tuple(user_file.id for user_file in persona.user_files),
+                document_set_names=tuple(
+                    document_set.name for document_set in persona.document_sets
+                ),
+                search_start_date=persona.search_start_date,
+            )
+
+        # temporary personas are not saved and have no id to key them by
+        if persona.id is None:
+            return _compute()
+        return self._get_or_compute(f"persona:{persona.id}", _compute)
+
+    def _get_or_compute(self, name: str, compute: Callable[[], T]) -> T:
+        if not self.enabled:
+            return compute()
+
+        turn_scope = _turn_scope.get()
+        if turn_scope is not None:
+            with turn_scope.lock:
+                if name in turn_scope.entries:
+                    turn_scope.stats.hits += 1
+                    return cast(T, turn_scope.entries[name])
+
+        value = self._get_or_compute_shared(name, compute, turn_scope)
+
+        if turn_scope is not None:
+            with turn_scope.lock:
+                turn_scope.entries[name] = value
+        return value
+
+    def _get_or_compute_shared(
+        self, name: str, compute: Callable[[], T], turn_scope: _TurnScope | None
+    ) -> T:
+        permission_version = self._get_permission_version(turn_scope)
+        if permission_version is None:
+            self._record(turn_scope, hit=False)
+            return compute()
+
+        key = f"{get_current_tenant_id()}|{permission_version}|{name}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    self._record(turn_scope, hit=True)
+                    return cast(T, value)
+                del self._entries[key]
+
+        value = compute()
+        with self._lock:
+            self._stats.misses += 1
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._record(turn_scope, hit=False)
+        return value
+
+    @staticmethod
+    def _get_permission_version(turn_scope: _TurnScope | None) -> str | None:
+        if turn_scope is None:
+            return get_permission_version()
+
+        with turn_scope.lock:
+            if turn_scope.permission_version_read:
+                return turn_scope.permission_version
+        permission_version = get_permission_version()
+        with turn_scope.lock:
+            turn_scope.permission_version = permission_version
+            turn_scope.permission_version_read = True
+        return permission_version
+
+    @staticmethod
+    def _record(turn_scope: _TurnScope | None, hit: bool) -> None:
+        if turn_scope is None:
+            return
+        with turn_scope.lock:
+            if hit:
+                turn_scope.stats.hits += 1
+            else:
+                turn_scope.stats.misses += 1
+
+    def invalidate(self) -> None:
+        """Drops all entries cached by this process. Other processes are invalidated
+        through `bump_search_filter_permission_version`."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> SearchFilterCacheStats:
+        with self._lock:
+            return SearchFilterCacheStats(
+                hits=self._stats.hits, misses=self._stats.misses
+            )
+
+
+_search_filter_cache = SearchFilterCache()
+
+
+def get_search_filter_cache() -> SearchFilterCache:
+    return _search_filter_cache
+
+
+def invalidate_search_filter_cache() -> None:
+    _search_filter_cache.invalidate()
+
+
+@contextmanager
+def search_filter_cache_scope() -> Generator[SearchFilterCacheStats, None, None]:
+    """Memoizes search filter lookups for the duration of a chat turn and logs how
+    many database round trips were saved. Threads spawned with the threadpool
+    utilities share the scope since they copy the current context."""
+    turn_scope = _TurnScope()
+    token = _turn_scope.set(turn_scope)
+    try:
+        yield turn_scope.stats
+    finally:
+        _turn_scope.reset(token)
+        stats = turn_scope.stats
+        if stats.hits or stats.misses:
+            logger.info(
+                f"Search filter cache: hits={stats.hits} misses={stats.misses} "
+                f"db_round_trips_saved={stats.db_round_trips_saved}"
+            )
@@ -1,20 +1,18 @@
-from collections import defaultdict
 from datetime import datetime
 from uuid import UUID
 
+import numpy as np
 from sqlalchemy.orm import Session
 
+from onyx.context.search.filter_cache import get_search_filter_cache
 from onyx.context.search.models import BaseFilters
 from onyx.context.search.models import ChunkIndexRequest
 from onyx.context.search.models import ChunkSearchRequest
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
-from onyx.context.search.preprocessing.access_filters import (
-    build_access_filters_for_user,
-)
+from onyx.context.search.retrieval.search_runner import batch_search_chunks
 from onyx.context.search.retrieval.search_runner import search_chunks
-from onyx.context.search.utils import inference_section_from_chunks
 from onyx.db.models import Persona
 from onyx.db.models import User
 from onyx.document_index.interfaces import DocumentIndex
@@ -100,7 +98,7 @@ def _build_index_filters(
             logger.debug("Added USER_FILE to source_filter for user knowledge search")
 
     user_acl_filters = (
-        None if bypass_acl else build_access_filters_for_user(user, db_session)
+        None if bypass_acl else get_search_filter_cache().get_user_acl(user, db_session)
     )
 
     final_filters = IndexFilters(
@@ -117,6 +115,59 @@ def _build_index_filters(
     return final_filters
 
 
+def _build_search_filters(
+    chunk_search_request: ChunkSearchRequest,
+    user: User | None,
+    persona: Persona | None,
+    db_session: Session,
+    auto_detect_filters: bool = False,
+    llm: LLM | None = None,
+    project_id: int | None = None,
+) -> IndexFilters:
+    persona_filters = (
+        get_search_filter_cache().get_persona_filters(persona) if persona else None
+    )
+    user_uploaded_persona_files: list[UUID] | None = (
+        list(persona_filters.user_file_ids) if persona_filters else None
+    )
+
+    persona_document_sets: list[str] | None = (
+        list(persona_filters.document_set_names) if persona_filters else None
+    )
+    persona_time_cutoff: datetime | None = (
+        persona_filters.search_start_date if persona_filters else None
+    )
+
+    return _build_index_filters(
+        user_provided_filters=chunk_search_request.user_selected_filters,
+        user=user,
+        project_id=project_id,
+        user_file_ids=user_uploaded_persona_files,
+        persona_document_sets=persona_document_sets,
+        persona_time_cutoff=persona_time_cutoff,
+        db_session=db_session,
+        auto_detect_filters=auto_detect_filters,
+        query=chunk_search_request.query,
+        llm=llm,
+        bypass_acl=chunk_search_request.bypass_acl,
+    )
+
+
+def _censor_chunks(
+    chunks: list[InferenceChunk], user: User | None
+) -> list[InferenceChunk]:
+    # For some specific connectors like Salesforce, a user that has access to an object doesn't mean
+    # that they have access to all of the fields of the object.
+    return fetch_ee_implementation_or_noop(
+        "onyx.external_permissions.post_query_censoring",
+        "_post_query_chunk_censoring",
+        chunks,
+    )(
+        chunks=chunks,
+        user=user,
+    )
+
+
 def merge_individual_chunks(
     chunks: list[InferenceChunk],
 ) -> list[InferenceSection]:
@@ -125,111 +176,75 @@ def merge_individual_chunks(
     Chunks are considered adjacent if their chunk_ids differ by 1 and they
     are from the same document. The section maintains the position of the
     first chunk in the original list.
+
+    Chunks are sorted once by (document_id, chunk_id) and the runs of adjacent
+    chunks are found with array operations, so only the sections that are returned
+    get built. A chunk that is repeated in the list counts at its last position and
+    belongs to the last run it appears in.
     """
     if not chunks:
         return []
 
-    # Create a mapping from (document_id, chunk_id) to original index
-    # This helps us find the chunk that appears first in the original list
-    chunk_to_original_index: dict[tuple[str, int], int] = {}
-    for idx, chunk in enumerate(chunks):
-        chunk_to_original_index[(chunk.document_id, chunk.chunk_id)] = idx
-
-    # Group chunks by document_id
-    doc_chunks: dict[str, list[InferenceChunk]] = defaultdict(list)
-    for chunk in chunks:
-        doc_chunks[chunk.document_id].append(chunk)
-
-    # For each document, sort chunks by chunk_id to identify adjacent chunks
-    for doc_id in doc_chunks:
-        doc_chunks[doc_id].sort(key=lambda c: c.chunk_id)
-
-    # Create a mapping from (document_id, chunk_id) to the section it belongs to
-    # This helps us maintain the original order
-    chunk_to_section: dict[tuple[str, int], InferenceSection] = {}
-
-    # Process each document's chunks
-    for doc_id, doc_chunk_list in doc_chunks.items():
-        if not doc_chunk_list:
-            continue
-
-        # Group adjacent chunks into sections
-        current_section_chunks = [doc_chunk_list[0]]
-
-        for i in range(1, len(doc_chunk_list)):
-            prev_chunk = doc_chunk_list[i - 1]
-            curr_chunk = doc_chunk_list[i]
-
-            # Check if chunks are adjacent (chunk_id difference is 1)
-            if curr_chunk.chunk_id == prev_chunk.chunk_id + 1:
-                # Add to current section
-                current_section_chunks.append(curr_chunk)
-            else:
-                # Create section from previous chunks
-                # Find the chunk that appears first in the original list
-                center_chunk = min(
-                    current_section_chunks,
-                    key=lambda c: chunk_to_original_index.get(
-                        (c.document_id, c.chunk_id), float("inf")
-                    ),
-                )
-                section = inference_section_from_chunks(
-                    center_chunk=center_chunk,
-                    chunks=current_section_chunks.copy(),
-                )
-                if section:
-                    for chunk in current_section_chunks:
-                        chunk_to_section[(chunk.document_id, chunk.chunk_id)] = section
-
-                # Start new section
-                current_section_chunks = [curr_chunk]
-
-        # Create section for the last group
-        if current_section_chunks:
-            # Find the chunk that appears first in the original list
-            center_chunk = min(
-                current_section_chunks,
-                key=lambda c: chunk_to_original_index.get(
-                    (c.document_id, c.chunk_id), float("inf")
-                ),
-            )
-            section = inference_section_from_chunks(
-                center_chunk=center_chunk,
-                chunks=current_section_chunks.copy(),
-            )
-            if section:
-                for chunk in current_section_chunks:
-                    chunk_to_section[(chunk.document_id, chunk.chunk_id)] = section
+    num_chunks = len(chunks)
+    doc_codes: dict[str, int] = {}
+    doc_ids = np.fromiter(
+        (doc_codes.setdefault(chunk.document_id, len(doc_codes)) for chunk in chunks),
+        dtype=np.int64,
+        count=num_chunks,
+    )
+    chunk_ids = np.fromiter(
+        (chunk.chunk_id for chunk in chunks), dtype=np.int64, count=num_chunks
+    )
 
-    # Build result list maintaining original order
-    # Use (document_id, chunk_id) of center_chunk as unique identifier for sections
-    seen_section_ids: set[tuple[str, int]] = set()
-    result: list[InferenceSection] = []
+    # Stable, so repeated chunks keep their relative order
+    order = np.lexsort((chunk_ids, doc_ids))
+    sorted_doc_ids = doc_ids[order]
+    sorted_chunk_ids = chunk_ids[order]
+    same_doc = sorted_doc_ids[1:] == sorted_doc_ids[:-1]
 
-    for chunk in chunks:
-        section = chunk_to_section.get((chunk.document_id, chunk.chunk_id))
-        if section:
-            section_id = (
-                section.center_chunk.document_id,
-                section.center_chunk.chunk_id,
-            )
-            if section_id not in seen_section_ids:
-                seen_section_ids.add(section_id)
-                result.append(section)
-        else:
-            # Chunk wasn't part of any merged section, create a single-chunk section
-            single_section = inference_section_from_chunks(
-                center_chunk=chunk,
-                chunks=[chunk],
+    # Runs of adjacent chunks, each run becomes a section
+    run_start_mask = np.ones(num_chunks, dtype=bool)
+    run_start_mask[1:] = ~(
+        same_doc & (sorted_chunk_ids[1:] == sorted_chunk_ids[:-1] + 1)
+    )
+    run_starts = np.flatnonzero(run_start_mask)
+    run_ends = np.append(run_starts[1:], num_chunks)
+    sorted_run = np.cumsum(run_start_mask) - 1
+
+    # Repeated chunks are sorted next to each other, identify every chunk by the
+    # position of the last occurrence of its (document_id, chunk_id)
+    key_start_mask = np.ones(num_chunks, dtype=bool)
+    key_start_mask[1:] = ~(same_doc & (sorted_chunk_ids[1:] == sorted_chunk_ids[:-1]))
+    key_ends = np.append(np.flatnonzero(key_start_mask)[1:], num_chunks) - 1
+    sorted_key_pos = order[key_ends][np.cumsum(key_start_mask) - 1]
+
+    # The center of a run is the chunk that comes first in the original list. The
+    # chunks of a run are all distinct, so exactly one of them has the lowest position
+    run_min_pos = np.minimum.reduceat(sorted_key_pos, run_starts)
+    run_centers = np.flatnonzero(sorted_key_pos == run_min_pos[sorted_run])
+
+    # Section of every chunk in the original order, the last run of its key
+    final_run_of_key = np.full(num_chunks, -1, dtype=np.int64)
+    np.maximum.at(final_run_of_key, sorted_key_pos, sorted_run)
+    key_pos = np.empty(num_chunks, dtype=np.int64)
+    key_pos[order] = sorted_key_pos
+    chunk_runs = final_run_of_key[key_pos]
+
+    # Keep the first section of each center chunk, in original order
+    chunk_run_centers = sorted_key_pos[run_centers][chunk_runs]
+    _, first_seen = np.unique(chunk_run_centers, return_index=True)
+    result_runs = chunk_runs[np.sort(first_seen)]
+
+    result: list[InferenceSection] = []
+    for run in result_runs.tolist():
+        run_chunks = [chunks[idx] for idx in order[run_starts[run] : run_ends[run]]]
+        result.append(
+            InferenceSection(
+                center_chunk=chunks[order[run_centers[run]]],
+                chunks=run_chunks,
+                combined_content="\n".join(chunk.content for chunk in run_chunks),
             )
-            if single_section:
-                single_section_id = (
-                    single_section.center_chunk.document_id,
-                    single_section.center_chunk.chunk_id,
-                )
-                if single_section_id not in seen_section_ids:
-                    seen_section_ids.add(single_section_id)
-                    result.append(single_section)
+        )
 
     return result
 
@@ -251,31 +266,14 @@ def search_pipeline(
     # If a project ID is provided, it will be exclusively scoped to that project
     project_id: int | None = None,
 ) -> list[InferenceChunk]:
-    user_uploaded_persona_files: list[UUID] | None = (
-        [user_file.id for user_file in persona.user_files] if persona else None
-    )
-
-    persona_document_sets: list[str] | None = (
-        [persona_document_set.name for persona_document_set in persona.document_sets]
-        if persona
-        else None
-    )
-    persona_time_cutoff: datetime | None = (
-        persona.search_start_date if persona else None
-    )
-
-    filters = _build_index_filters(
-        user_provided_filters=chunk_search_request.user_selected_filters,
+    filters = _build_search_filters(
+        chunk_search_request=chunk_search_request,
         user=user,
-        project_id=project_id,
-        user_file_ids=user_uploaded_persona_files,
-        persona_document_sets=persona_document_sets,
-        persona_time_cutoff=persona_time_cutoff,
+        persona=persona,
         db_session=db_session,
         auto_detect_filters=auto_detect_filters,
-        query=chunk_search_request.query,
         llm=llm,
-        bypass_acl=chunk_search_request.bypass_acl,
+        project_id=project_id,
     )
 
     query_request = ChunkIndexRequest(
@@ -293,15 +291,94 @@ def search_pipeline(
         db_session=db_session,
     )
 
-    # For some specific connectors like Salesforce, a user that has access to an object doesn't mean
-    # that they have access to all of the fields of the object.
-    censored_chunks: list[InferenceChunk] = fetch_ee_implementation_or_noop(
-        "onyx.external_permissions.post_query_censoring",
-        "_post_query_chunk_censoring",
-        retrieved_chunks,
-    )(
-        chunks=retrieved_chunks,
+    return _censor_chunks(retrieved_chunks, user)
+
+
+@log_function_time(print_only=True, debug_only=True)
+def batch_search_pipeline(
+    # Queries and settings, must all have the same filters and ACL bypass
+    chunk_search_requests: list[ChunkSearchRequest],
+    # Document index to search over
+    # Note that federated sources will also be used (not related to this arg)
+    document_index: DocumentIndex,
+    # Used for ACLs and federated search
+    user: User | None,
+    # Used for default filters and settings
+    persona: Persona | None,
+    db_session: Session,
+    # If a project ID is provided, it will be exclusively scoped to that project
+    project_id: int | None = None,
+) -> list[list[InferenceChunk]]:
+    """Runs search_pipeline for several queries at once, e.g. the rephrasings of one
+    question. The filters are resolved once and the queries are embedded in a single
+    request. Returns the chunks of each request, in order."""
+    if not chunk_search_requests:
+        return []
+
+    first_request = chunk_search_requests[0]
+    if any(
+        request.user_selected_filters != first_request.user_selected_filters
+        or request.bypass_acl != first_request.bypass_acl
+        for request in chunk_search_requests[1:]
+    ):
+        raise ValueError("Batched search requests must share their filters")
+
+    filters = _build_search_filters(
+        chunk_search_request=first_request,
         user=user,
+        persona=persona,
+        db_session=db_session,
+        project_id=project_id,
     )
 
-    return censored_chunks
+    query_requests = [
+        ChunkIndexRequest(
+            query=request.query,
+            hybrid_alpha=request.hybrid_alpha,
+            recency_bias_multiplier=request.recency_bias_multiplier,
+            query_keywords=request.query_keywords,
+            filters=filters,
+        )
+        for request in chunk_search_requests
+    ]
+
+    retrieved_chunk_sets = batch_search_chunks(
+        query_requests=query_requests,
+        user_id=user.id if user else None,
+        document_index=document_index,
+        db_session=db_session,
+    )
+
+    # Censor the distinct chunks of all queries together, then map the results back
+    unique_chunks: dict[tuple[str, int], InferenceChunk] = {}
+    for chunk_set in retrieved_chunk_sets:
+        for chunk in chunk_set:
+            unique_chunks.setdefault((chunk.document_id, chunk.chunk_id), chunk)
+    censored_chunk_by_key = {
+        (chunk.document_id, chunk.chunk_id): chunk
+        for chunk in _censor_chunks(list(unique_chunks.values()), user)
+    }
+
+    censored_chunk_sets: list[list[InferenceChunk]] = []
+    for chunk_set in retrieved_chunk_sets:
+        censored_chunk_set: list[InferenceChunk] = []
+        for chunk in chunk_set:
+            key = (chunk.document_id, chunk.chunk_id)
+            censored_chunk = censored_chunk_by_key.get(key)
+            if censored_chunk is None:
+                continue
+            if censored_chunk is unique_chunks[key]:
+                # not modified by the censoring, keep this query's own chunk
+                censored_chunk_set.append(chunk)
+            else:
+                censored_chunk_set.append(
+                    censored_chunk.model_copy(
+                        update={
+                            "score": chunk.score,
+                            "match_highlights": chunk.match_highlights,
+                        }
+                    )
+                )
+        censored_chunk_sets.append(censored_chunk_set)
+
+    return censored_chunk_sets
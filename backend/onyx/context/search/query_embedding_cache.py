@@ -0,0 +1,284 @@
+"""Per-process TTL + LRU cache of query embeddings with single-flight coalescing.
+
+Multi-query search, deep research and Slack threads repeatedly embed the same query
+strings. Entries are keyed by the identity of the active search settings and by the
+tenant's search settings version in Redis, so once search settings are swapped or
+updated no process serves the old model's vectors anymore. Concurrent lookups
+of a query that is already being embedded wait for that call instead of issuing
+their own.
+
+Optionally, entries are also shared across processes through Redis.
+"""
+
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import cast
+
+from prometheus_client import Counter
+
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_USE_REDIS
+from onyx.db.models import SearchSettings
+from onyx.natural_language_processing.embedding_client_registry import (
+    get_search_settings_version,
+)
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+QUERY_EMBEDDING_CACHE_LOOKUPS_COUNTER = Counter(
+    "onyx_query_embedding_cache_lookups",
+    "Query embedding cache lookups, by result",
+    ["result"],
+)
+
+_REDIS_KEY_PREFIX = "query_embedding:"
+# Upper bound on how long to wait for another thread's in-flight embedding call
+_IN_FLIGHT_WAIT_TIMEOUT_SECONDS = 60.0
+
+
+def build_query_embedding_namespace(search_settings: SearchSettings) -> str:
+    """Identifies the model that produced an embedding. Includes the search settings
+    id and the shared search settings version, so swapping or updating search
+    settings in any process stops every process from serving vectors of the previous
+    model."""
+    return "|".join(
+        [
+            get_current_tenant_id(),
+            # empty if Redis can't be read, the search settings still apply
+            get_search_settings_version() or "",
+            str(search_settings.id),
+            search_settings.model_name,
+            (
+                search_settings.provider_type.value
+                if search_settings.provider_type
+                else ""
+            ),
+            search_settings.query_prefix or "",
+            str(search_settings.normalize),
+            str(search_settings.reduced_dimension or ""),
+        ]
+    )
+
+
+@dataclass
+class QueryEmbeddingCacheStats:
+    hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    # lookups that waited on another caller's in-flight embedding call
+    coalesced: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.redis_hits + self.misses + self.coalesced
+        if not total:
+            return 0.0
+        return (self.hits + self.redis_hits + self.coalesced) / total
+
+
+@dataclass
+class _InFlight:
+    done: threading.Event = field(default_factory=threading.Event)
+    embedding: Embedding | None = None
+
+
+class QueryEmbeddingCache:
+    def __init__(
+        self,
+        max_entries: int = QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        use_redis: bool = QUERY_EMBEDDING_CACHE_USE_REDIS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+
+        self._lock = threading.Lock()
+        # key -> (expiry time, embedding), ordered from least to most recently used
+        self._entries: OrderedDict[str, tuple[float, Embedding]] = OrderedDict()
+        self._in_flight: dict[str, _InFlight] = {}
+        self._stats = QueryEmbeddingCacheStats()
+
+    @staticmethod
+    def _build_key(namespace: str, query: str) -> str:
+        digest = hashlib.sha256(f"{namespace}\x00{query}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_embeddings(
+        self,
+        namespace: str,
+        queries: list[str],
+        encode_fn: Callable[[list[str]], list[Embedding]],
+    ) -> list[Embedding]:
+        """Returns one embedding per query. Only queries that are neither cached nor
+        being embedded by another caller are passed to `encode_fn`, in a single call."""
+        keys = [self._build_key(namespace, query) for query in queries]
+
+        results: dict[str, Embedding] = {}
+        to_compute: dict[str, str] = {}
+        to_wait: dict[str, tuple[str, _InFlight]] = {}
+
+        with self._lock:
+            now = time.monotonic()
+            for key, query in zip(keys, queries):
+                if key in results or key in to_compute or key in to_wait:
+                    continue
+
+                embedding = self._get_local(key, now)
+                if embedding is not None:
+                    self._stats.hits += 1
+                    QUERY_EMBEDDING_CACHE_LOOKUPS_COUNTER.labels(result="hit").inc()
+                    results[key] = embedding
+                    continue
+
+                in_flight = self._in_flight.get(key)
+                if in_flight is not None:
+                    self._stats.coalesced += 1
+                    QUERY_EMBEDDING_CACHE_LOOKUPS_COUNTER.labels(
+                        result="coalesced"
+                    ).inc()
+                    to_wait[key] = (query, in_flight)
+                    continue
+
+                # claim the key, concurrent callers will wait on us
+                self._in_flight[key] = _InFlight()
+                to_compute[key] = query
+
+        try:
+            if to_compute and self.use_redis:
+                for key, embedding in self._redis_get_many(list(to_compute)).items():
+                    results[key] = embedding
+                    del to_compute[key]
+                    self._finish(key, embedding, redis_hit=True)
+
+            if to_compute:
+                embeddings = encode_fn(list(to_compute.values()))
+                for key, embedding in zip(to_compute, embeddings):
+                    results[key] = embedding
+                    self._finish(key, embedding)
+                if self.use_redis:
+                    self._redis_set_many({key: results[key] for key in to_compute})
+        finally:
+            # release anything we claimed but could not fill, so waiters don't hang
+            for key in to_compute:
+                if key not in results:
+                    self._finish(key, None)
+
+        # queries embedded by another caller, fall back to embedding them here
+        # if that call failed or took too long
+        fallback: dict[str, str] = {}
+        for key, (query, in_flight) in to_wait.items():
+            in_flight.done.wait(timeout=_IN_FLIGHT_WAIT_TIMEOUT_SECONDS)
+            if in_flight.embedding is not None:
+                results[key] = in_flight.embedding
+            else:
+                fallback[key] = query
+        if fallback:
+            embeddings = encode_fn(list(fallback.values()))
+            results.update(zip(fallback, embeddings))
+
+        return [results[key] for key in keys]
+
+    def _get_local(self, key: str, now: float) -> Embedding | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, embedding = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _finish(
+        self, key: str, embedding: Embedding | None, redis_hit: bool = False
+    ) -> None:
+        with self._lock:
+            if embedding is not None:
+                if redis_hit:
+                    self._stats.redis_hits += 1
+                else:
+                    self._stats.misses += 1
+                QUERY_EMBEDDING_CACHE_LOOKUPS_COUNTER.labels(
+                    result="redis_hit" if redis_hit else "miss"
+                ).inc()
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+            in_flight = self._in_flight.pop(key, None)
+
+        if in_flight is not None:
+            in_flight.embedding = embedding
+            in_flight.done.set()
+
+    def _redis_get_many(self, keys: list[str]) -> dict[str, Embedding]:
+        try:
+            values = cast(
+                list[bytes | None],
+                get_redis_client().mget([_REDIS_KEY_PREFIX + key for key in keys]),
+            )
+        except Exception:
+            logger.exception("Failed to read query embeddings from Redis")
+            return {}
+
+        found: dict[str, Embedding] = {}
+        for key, value in zip(keys, values):
+            if isinstance(value, bytes):
+                embedding = array("f")
+                embedding.frombytes(value)
+                found[key] = embedding.tolist()
+        return found
+
+    def _redis_set_many(self, entries: dict[str, Embedding]) -> None:
+        try:
+            pipe = get_redis_client().pipeline()
+            for key, embedding in entries.items():
+                pipe.set(
+                    _REDIS_KEY_PREFIX + key,
+                    array("f", embedding).tobytes(),
+                    ex=int(self.ttl_seconds),
+                )
+            pipe.execute()
+        except Exception:
+            logger.exception("Failed to write query embeddings to Redis")
+
+    def invalidate(self) -> None:
+        """Drops all locally cached embeddings. Redis entries are keyed by the
+        search settings and their shared version and simply age out."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> QueryEmbeddingCacheStats:
+        with self._lock:
+            return QueryEmbeddingCacheStats(
+                hits=self._stats.hits,
+                redis_hits=self._stats.redis_hits,
+                misses=self._stats.misses,
+                coalesced=self._stats.coalesced,
+            )
+
+
+_query_embedding_cache = QueryEmbeddingCache()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    return _query_embedding_cache
+
+
+def invalidate_query_embedding_cache() -> None:
+    _query_embedding_cache.invalidate()
@@ -1,4 +1,5 @@
 from collections.abc import Callable
+from typing import Any
 from uuid import UUID
 
 from sqlalchemy.orm import Session
@@ -11,33 +12,48 @@ from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import QueryExpansionType
 from onyx.context.search.utils import get_query_embedding
+from onyx.context.search.utils import get_query_embeddings
 from onyx.context.search.utils import inference_section_from_chunks
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import VespaChunkRequest
+from onyx.federated_connectors.federated_retrieval import FederatedRetrievalInfo
 from onyx.federated_connectors.federated_retrieval import (
     get_federated_retrieval_functions,
 )
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
 
 
-def _dedupe_chunks(
+def _best_chunk_per_key(
     chunks: list[InferenceChunk],
-) -> list[InferenceChunk]:
-    used_chunks: dict[tuple[str, int], InferenceChunk] = {}
+) -> tuple[list[InferenceChunk], list[float]]:
+    """Keeps the highest scoring chunk of each (document_id, chunk_id), the first one
+    on ties, in order of first appearance. Also returns the kept chunks' scores."""
+    slots: dict[tuple[str, int], int] = {}
+    best_chunks: list[InferenceChunk] = []
+    best_scores: list[float] = []
     for chunk in chunks:
         key = (chunk.document_id, chunk.chunk_id)
-        if key not in used_chunks:
-            used_chunks[key] = chunk
-        else:
-            stored_chunk_score = used_chunks[key].score or 0
-            this_chunk_score = chunk.score or 0
-            if stored_chunk_score < this_chunk_score:
-                used_chunks[key] = chunk
+        score = chunk.score or 0
+        slot = slots.get(key)
+        if slot is None:
+            slots[key] = len(best_chunks)
+            best_chunks.append(chunk)
+            best_scores.append(score)
+        elif best_scores[slot] < score:
+            best_chunks[slot] = chunk
+            best_scores[slot] = score
+
+    return best_chunks, best_scores
 
-    return list(used_chunks.values())
+
+def _dedupe_chunks(
+    chunks: list[InferenceChunk],
+) -> list[InferenceChunk]:
+    return _best_chunk_per_key(chunks)[0]
 
 
 def download_nltk_data() -> None:
@@ -65,39 +81,21 @@ def download_nltk_data() -> None:
 def combine_retrieval_results(
     chunk_sets: list[list[InferenceChunk]],
 ) -> list[InferenceChunk]:
-    all_chunks = [chunk for chunk_set in chunk_sets for chunk in chunk_set]
-
-    unique_chunks: dict[tuple[str, int], InferenceChunk] = {}
-    for chunk in all_chunks:
-        key = (chunk.document_id, chunk.chunk_id)
-        if key not in unique_chunks:
-            unique_chunks[key] = chunk
-            continue
-
-        stored_chunk_score = unique_chunks[key].score or 0
-        this_chunk_score = chunk.score or 0
-        if stored_chunk_score < this_chunk_score:
-            unique_chunks[key] = chunk
-
-    sorted_chunks = sorted(
-        unique_chunks.values(), key=lambda x: x.score or 0, reverse=True
+    best_chunks, best_scores = _best_chunk_per_key(
+        [chunk for chunk_set in chunk_sets for chunk in chunk_set]
     )
 
-    return sorted_chunks
+    # Sorting positions by score keeps this stable without touching the chunks
+    order = sorted(range(len(best_chunks)), key=best_scores.__getitem__, reverse=True)
 
+    return [best_chunks[idx] for idx in order]
 
-def _embed_and_search(
-    query_request: ChunkIndexRequest,
-    document_index: DocumentIndex,
-    db_session: Session,
-) -> list[InferenceChunk]:
-    query_embedding = get_query_embedding(query_request.query, db_session)
 
+def _hybrid_retrieval_kwargs(query_request: ChunkIndexRequest) -> dict[str, Any]:
     hybrid_alpha = query_request.hybrid_alpha or HYBRID_ALPHA
 
-    top_chunks = document_index.hybrid_retrieval(
+    return dict(
         query=query_request.query,
-        query_embedding=query_embedding,
         final_keywords=query_request.query_keywords,
         filters=query_request.filters,
         hybrid_alpha=hybrid_alpha,
@@ -111,17 +109,35 @@ def _embed_and_search(
         offset=query_request.offset or 0,
     )
 
-    return top_chunks
 
+def _search_with_embedding(
+    query_request: ChunkIndexRequest,
+    query_embedding: Embedding,
+    document_index: DocumentIndex,
+) -> list[InferenceChunk]:
+    return document_index.hybrid_retrieval(
+        query_embedding=query_embedding,
+        **_hybrid_retrieval_kwargs(query_request),
+    )
 
-def search_chunks(
+
+def _embed_and_search(
     query_request: ChunkIndexRequest,
-    user_id: UUID | None,
     document_index: DocumentIndex,
     db_session: Session,
 ) -> list[InferenceChunk]:
-    run_queries: list[tuple[Callable, tuple]] = []
+    query_embedding = get_query_embedding(query_request.query, db_session)
+
+    return _search_with_embedding(query_request, query_embedding, document_index)
+
 
+def _get_federated_retrieval_infos(
+    query_request: ChunkIndexRequest,
+    user_id: UUID | None,
+    db_session: Session,
+) -> tuple[list[FederatedRetrievalInfo], bool]:
+    """Returns the federated retrievers to run, and whether the normal hybrid search
+    should run as well."""
     source_filters = (
         set(query_request.filters.source_type)
         if query_request.filters.source_type
@@ -141,10 +157,6 @@ def search_chunks(
         federated_retrieval_info.source.to_non_federated_source()
         for federated_retrieval_info in federated_retrieval_infos
     )
-    for federated_retrieval_info in federated_retrieval_infos:
-        run_queries.append(
-            (federated_retrieval_info.retrieval_function, (query_request,))
-        )
 
     # Don't run normal hybrid search if there are no indexed sources to
     # search over
@@ -152,13 +164,14 @@ def search_chunks(
         len(set(source_filters) - federated_sources) > 0
     )
 
-    if normal_search_enabled:
-        run_queries.append(
-            (_embed_and_search, (query_request, document_index, db_session))
-        )
+    return federated_retrieval_infos, normal_search_enabled
 
-    parallel_search_results = run_functions_tuples_in_parallel(run_queries)
-    top_chunks = combine_retrieval_results(parallel_search_results)
+
+def _finalize_search_results(
+    query_request: ChunkIndexRequest,
+    search_results: list[list[InferenceChunk]],
+) -> list[InferenceChunk]:
+    top_chunks = combine_retrieval_results(search_results)
 
     if not top_chunks:
         logger.debug(
@@ -170,6 +183,92 @@ def search_chunks(
     return top_chunks
 
 
+def search_chunks(
+    query_request: ChunkIndexRequest,
+    user_id: UUID | None,
+    document_index: DocumentIndex,
+    db_session: Session,
+) -> list[InferenceChunk]:
+    run_queries: list[tuple[Callable, tuple]] = []
+
+    federated_retrieval_infos, normal_search_enabled = _get_federated_retrieval_infos(
+        query_request, user_id, db_session
+    )
+    for federated_retrieval_info in federated_retrieval_infos:
+        run_queries.append(
+            (federated_retrieval_info.retrieval_function, (query_request,))
+        )
+
+    if normal_search_enabled:
+        run_queries.append(
+            (_embed_and_search, (query_request, document_index, db_session))
+        )
+
+    parallel_search_results = run_functions_tuples_in_parallel(run_queries)
+    return _finalize_search_results(query_request, parallel_search_results)
+
+
+def batch_search_chunks(
+    query_requests: list[ChunkIndexRequest],
+    user_id: UUID | None,
+    document_index: DocumentIndex,
+    db_session: Session,
+) -> list[list[InferenceChunk]]:
+    """Batched counterpart of search_chunks for requests that share the same filters.
+
+    The federated retrievers are looked up once, all of the queries are embedded in a
+    single model server request and the index and federated searches of every query
+    run in parallel. Returns the results of each request, in order.
+    """
+    if not query_requests:
+        return []
+
+    federated_retrieval_infos, normal_search_enabled = _get_federated_retrieval_infos(
+        query_requests[0], user_id, db_session
+    )
+    query_embeddings = (
+        get_query_embeddings(
+            [query_request.query for query_request in query_requests], db_session
+        )
+        if normal_search_enabled
+        else []
+    )
+
+    run_queries: list[tuple[Callable, tuple]] = []
+    # index of the request that each search belongs to
+    request_indices: list[int] = []
+    for request_idx, query_request in enumerate(query_requests):
+        for federated_retrieval_info in federated_retrieval_infos:
+            run_queries.append(
+                (federated_retrieval_info.retrieval_function, (query_request,))
+            )
+            request_indices.append(request_idx)
+
+        if normal_search_enabled:
+            run_queries.append(
+                (
+                    _search_with_embedding,
+                    (query_request, query_embeddings[request_idx], document_index),
+                )
+            )
+            request_indices.append(request_idx)
+
+    parallel_search_results = run_functions_tuples_in_parallel(run_queries)
+
+    search_results_per_request: list[list[list[InferenceChunk]]] = [
+        [] for _ in query_requests
+    ]
+    for request_idx, search_results in zip(request_indices, parallel_search_results):
+        search_results_per_request[request_idx].append(search_results)
+
+    return [
+        _finalize_search_results(query_request, search_results)
+        for query_request, search_results in zip(
+            query_requests, search_results_per_request
+        )
+    ]
+
+
 # TODO: This is unused code.
 def inference_sections_from_ids(
     doc_identifiers: list[tuple[str, int]],
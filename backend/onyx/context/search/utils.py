@@ -2,17 +2,22 @@ from typing import TypeVar
 
 from sqlalchemy.orm import Session
 
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_ENABLED
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import SavedSearchDoc
 from onyx.context.search.models import SavedSearchDocWithContent
 from onyx.context.search.models import SearchDoc
+from onyx.context.search.query_embedding_cache import (
+    build_query_embedding_namespace,
+)
+from onyx.context.search.query_embedding_cache import get_query_embedding_cache
 from onyx.db.search_settings import get_current_search_settings
-from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.natural_language_processing.embedding_client_registry import (
+    get_embedding_client,
+)
 from onyx.utils.logger import setup_logger
 from onyx.utils.timing import log_function_time
-from shared_configs.configs import MODEL_SERVER_HOST
-from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 
@@ -66,16 +71,16 @@ def inference_section_from_single_chunk(
 
 def get_query_embeddings(queries: list[str], db_session: Session) -> list[Embedding]:
     search_settings = get_current_search_settings(db_session)
+    model = get_embedding_client(search_settings=search_settings).model
 
-    model = EmbeddingModel.from_db_model(
-        search_settings=search_settings,
-        # The below are globally set, this flow always uses the indexing one
-        server_host=MODEL_SERVER_HOST,
-        server_port=MODEL_SERVER_PORT,
-    )
+    if not QUERY_EMBEDDING_CACHE_ENABLED:
+        return model.encode(queries, text_type=EmbedTextType.QUERY)
 
-    query_embedding = model.encode(queries, text_type=EmbedTextType.QUERY)
-    return query_embedding
+    return get_query_embedding_cache().get_embeddings(
+        namespace=build_query_embedding_namespace(search_settings),
+        queries=queries,
+        encode_fn=lambda texts: model.encode(texts, text_type=EmbedTextType.QUERY),
+    )
 
 
 @log_function_time(print_only=True, debug_only=True)
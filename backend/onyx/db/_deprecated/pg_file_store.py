@@ -1,5 +1,6 @@
 """Kept around since it's used in the migration to move to S3/MinIO"""
 
+import io
 import tempfile
 from io import BytesIO
 from typing import IO
@@ -10,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from onyx.file_store.constants import MAX_IN_MEMORY_SIZE
 from onyx.file_store.constants import STANDARD_CHUNK_SIZE
+from onyx.file_store.streaming import RangeReadStream
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -124,6 +126,62 @@ def read_lobj(
         return BytesIO(byte_data)
 
 
+def open_lobj_stream(
+    lobj_oid: int,
+    db_session: Session,
+) -> IO[bytes]:
+    """Open a PostgreSQL large object identified by *lobj_oid* as a lazy, seekable
+    stream, the equivalent of ``FileStore.open_stream``.
+
+    The large object is read in ranges as the stream is read, through the native
+    ``lobject`` API or ``lo_get`` with an offset if it is unavailable. The stream is
+    only usable while *db_session* stays in the same transaction. Close it to release
+    the large object before the transaction ends.
+    """
+
+    pg_conn = get_pg_conn_from_session(db_session)
+    if hasattr(pg_conn, "lobject"):
+        large_object = pg_conn.lobject(lobj_oid, mode="rb")
+        try:
+            size = large_object.seek(0, io.SEEK_END)
+        except Exception:
+            large_object.close()
+            raise
+
+        def _read_lobject_range(start: int, end: int) -> bytes:
+            large_object.seek(start)
+            return large_object.read(end - start)
+
+        return io.BufferedReader(
+            RangeReadStream(
+                size=size, read_range=_read_lobject_range, on_close=large_object.close
+            )
+        )
+
+    # lo_get doesn't need a descriptor, one is only opened to get the size.
+    # 262144 is INV_READ
+    descriptor = db_session.execute(
+        text("SELECT lo_open(:oid, 262144)"), {"oid": lobj_oid}
+    ).scalar_one()
+    try:
+        size = db_session.execute(
+            text("SELECT lo_lseek64(:fd, 0, 2)"), {"fd": descriptor}
+        ).scalar_one()
+    finally:
+        db_session.execute(text("SELECT lo_close(:fd)"), {"fd": descriptor})
+
+    def _read_range(start: int, end: int) -> bytes:
+        byte_data = db_session.execute(
+            text("SELECT lo_get(:oid, :offset, :length)"),
+            {"oid": lobj_oid, "offset": start, "length": end - start},
+        ).scalar()
+        if byte_data is None:
+            raise RuntimeError("Failed to read large object")
+        return bytes(byte_data)
+
+    return io.BufferedReader(RangeReadStream(size=size, read_range=_read_range))
+
+
 def delete_lobj_by_id(
     lobj_oid: int,
     db_session: Session,
@@ -605,6 +605,30 @@ def update_docs_chunk_count__no_commit(
         doc.chunk_count = doc_id_to_chunk_count[doc.id]
 
 
+def clear_docs_chunk_content_hashes__no_commit(
+    document_ids: list[str],
+    db_session: Session,
+) -> None:
+    db_session.execute(
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(chunk_content_hashes=None)
+    )
+
+
+def update_docs_chunk_content_hashes__no_commit(
+    doc_id_to_chunk_content_hashes: dict[str, list[str] | None],
+    db_session: Session,
+) -> None:
+    documents_to_update = (
+        db_session.query(DbDocument)
+        .filter(DbDocument.id.in_(doc_id_to_chunk_content_hashes.keys()))
+        .all()
+    )
+    for doc in documents_to_update:
+        doc.chunk_content_hashes = doc_id_to_chunk_content_hashes[doc.id]
+
+
 def mark_document_as_modified(
     document_id: str,
     db_session: Session,
@@ -630,6 +654,21 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(document_ids: list[str], db_session: Session) -> None:
+    """Bulk version of mark_document_as_synced. IDs of documents that no longer
+    exist are ignored."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -973,6 +1012,37 @@ def fetch_chunk_counts_for_documents(
     return [(doc_id, chunk_counts.get(doc_id, 0)) for doc_id in document_ids]
 
 
+def fetch_chunk_content_hashes_for_documents(
+    document_ids: list[str],
+    db_session: Session,
+) -> dict[str, list[str]]:
+    """Return the chunk content hashes of the documents that have them."""
+    stmt = select(DbDocument.id, DbDocument.chunk_content_hashes).where(
+        DbDocument.id.in_(document_ids),
+        DbDocument.chunk_content_hashes.is_not(None),
+    )
+    return {
+        str(row.id): list(row.chunk_content_hashes)
+        for row in db_session.execute(stmt).all()
+    }
+
+
+def fetch_last_modified_for_documents(
+    document_ids: list[str],
+    db_session: Session,
+) -> dict[str, datetime]:
+    """Return the last time each document or its metadata changed. Documents that
+    don't exist are left out."""
+    stmt = select(DbDocument.id, DbDocument.last_modified).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        str(row.id): row.last_modified
+        for row in db_session.execute(stmt).all()
+        if row.last_modified is not None
+    }
+
+
 def fetch_chunk_count_for_document(
     document_id: str,
     db_session: Session,
@@ -1064,6 +1134,24 @@ def update_document_kg_info(
     db_session.execute(stmt)
 
 
+def update_documents_kg_info(
+    db_session: Session, document_ids: Iterable[str], kg_stage: KGStage
+) -> None:
+    """Same as update_document_kg_info, for many documents at once."""
+    document_ids = list(document_ids)
+    if not document_ids:
+        return
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(
+            kg_stage=kg_stage,
+            kg_processing_time=datetime.now(timezone.utc),
+        )
+    )
+    db_session.execute(stmt)
+
+
 def update_document_kg_stage(
     db_session: Session,
     document_id: str,
@@ -1348,6 +1436,73 @@ def get_document_kg_entities_and_relationships(
     return entities, relationships
 
 
+def get_documents_kg_entities_and_relationships(
+    db_session: Session, document_ids: list[str]
+) -> dict[str, tuple[list[KGEntity], list[KGRelationship]]]:
+    """
+    Same as get_document_kg_entities_and_relationships, for many documents at once.
+    """
+    document_id_to_entities: dict[str, list[KGEntity]] = {
+        document_id: [] for document_id in document_ids
+    }
+    for entity in db_session.query(KGEntity).filter(
+        KGEntity.document_id.in_(document_ids)
+    ):
+        if entity.document_id is not None:
+            document_id_to_entities[entity.document_id].append(entity)
+
+    entity_id_name_to_document_id = {
+        entity.id_name: document_id
+        for document_id, entities in document_id_to_entities.items()
+        for entity in entities
+    }
+    documents_with_entities = [
+        document_id
+        for document_id, entities in document_id_to_entities.items()
+        if entities
+    ]
+    document_id_to_relationships: dict[str, list[KGRelationship]] = {
+        document_id: [] for document_id in document_ids
+    }
+    if documents_with_entities:
+        for relationship in db_session.query(KGRelationship).filter(
+            or_(
+                KGRelationship.source_node.in_(list(entity_id_name_to_document_id)),
+                KGRelationship.target_node.in_(list(entity_id_name_to_document_id)),
+                KGRelationship.source_document.in_(documents_with_entities),
+            )
+        ):
+            relationship_document_ids = {
+                entity_id_name_to_document_id.get(relationship.source_node),
+                entity_id_name_to_document_id.get(relationship.target_node),
+                relationship.source_document,
+            }
+            for document_id in relationship_document_ids:
+                # documents without entities don't get any relationships
+                if document_id is not None and document_id_to_entities.get(document_id):
+                    document_id_to_relationships[document_id].append(relationship)
+
+    return {
+        document_id: (
+            document_id_to_entities[document_id],
+            document_id_to_relationships[document_id],
+        )
+        for document_id in document_ids
+    }
+
+
 def get_num_chunks_for_document(db_session: Session, document_id: str) -> int:
     stmt = select(DbDocument.chunk_count).where(DbDocument.id == document_id)
     return db_session.execute(stmt).scalar_one_or_none() or 0
+
+
+def get_num_chunks_for_documents(
+    db_session: Session, document_ids: list[str]
+) -> dict[str, int]:
+    stmt = select(DbDocument.id, DbDocument.chunk_count).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        document_id: chunk_count or 0
+        for document_id, chunk_count in db_session.execute(stmt).all()
+    }
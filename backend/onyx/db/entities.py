@@ -3,12 +3,21 @@ from datetime import datetime
 from datetime import timezone
 from typing import List
 
+from sqlalchemy import Boolean
+from sqlalchemy import column
 from sqlalchemy import func
+from sqlalchemy import Integer
 from sqlalchemy import literal
+from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy import text
+from sqlalchemy import true
 from sqlalchemy import update
+from sqlalchemy import values
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm import Session
 
 import onyx.db.document as dbdocument
@@ -20,6 +29,7 @@ from onyx.db.models import KGEntityType
 from onyx.kg.models import KGGroundingType
 from onyx.kg.models import KGStage
 from onyx.kg.utils.formatting_utils import make_entity_id
+from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
 
 
 def upsert_staging_entity(
@@ -232,6 +242,258 @@ def merge_entities(
     return result
 
 
+def get_similar_entities(
+    db_session: Session,
+    queries: list[tuple[str, str, bool]],
+    similarity_threshold: float,
+) -> list[list[KGEntity]]:
+    """Find the entities with a name similar to each of the given names, in a single
+    query. Uses the trigram GIN index on the entity names.
+
+    Args:
+        db_session: SQLAlchemy session
+        queries: (name, entity type, only entities without a document) per query
+        similarity_threshold: Minimum trigram similarity of the names
+
+    Returns:
+        list[list[KGEntity]]: The similar entities of each query, in query order
+    """
+    if not queries:
+        return []
+
+    db_session.execute(
+        text("SET pg_trgm.similarity_threshold = " + str(float(similarity_threshold)))
+    )
+    query_entities = values(
+        column("idx", Integer),
+        column("name", String),
+        column("entity_type_id_name", String),
+        column("without_document", Boolean),
+        name="query_entities",
+    ).data(
+        [
+            (idx, name, entity_type_id_name, without_document)
+            for idx, (name, entity_type_id_name, without_document) in enumerate(queries)
+        ]
+    )
+    similar_entities = (
+        select(KGEntity)
+        .where(
+            KGEntity.entity_type_id_name == query_entities.c.entity_type_id_name,
+            or_(
+                query_entities.c.without_document.is_(False),
+                KGEntity.document_id.is_(None),
+            ),
+            getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
+                KGEntity.name, query_entities.c.name
+            ),
+        )
+        .lateral("similar_entities")
+    )
+    similar_entity = aliased(KGEntity, similar_entities)  # type: ignore[call-overload]
+    stmt = (
+        select(query_entities.c.idx, similar_entity)
+        .select_from(query_entities)
+        .join(similar_entities, true())
+    )
+
+    results: list[list[KGEntity]] = [[] for _ in queries]
+    for idx, entity in db_session.execute(stmt).all():
+        results[idx].append(entity)
+    return results
+
+
+def transfer_entities(
+    db_session: Session,
+    entity_groups: list[list[KGEntityExtractionStaging]],
+) -> list[KGEntity]:
+    """Transfer entities from the extraction staging table to the normalized table
+    with a single insert. Same as transfer_entity for each staging entity, except that
+    the entities of a group, which must have the same name, type and document, are
+    transferred into the same entity.
+
+    Args:
+        db_session: SQLAlchemy session
+        entity_groups: Groups of staging entities to transfer
+
+    Returns:
+        list[KGEntity]: The transferred entity of each group
+    """
+    if not entity_groups:
+        return []
+
+    group_values: dict[tuple[str, str, str | None], dict] = {}
+    for entities in entity_groups:
+        first = entities[0]
+        key = (first.name.casefold(), first.entity_type_id_name, first.document_id)
+        if key in group_values:
+            raise ValueError(f"Staging entities with the same key in groups: {key}")
+
+        # the same as transferring them one after the other
+        occurrences = 0
+        attributes: dict = {}
+        entity_key: str | None = None
+        parent_key: str | None = None
+        for entity in entities:
+            if (
+                entity.name.casefold(),
+                entity.entity_type_id_name,
+                entity.document_id,
+            ) != key:
+                raise ValueError(f"Staging entity {entity.id_name} is not in {key}")
+            occurrences += entity.occurrences
+            attributes = attributes | entity.attributes
+            entity_key = entity_key or entity.entity_key
+            parent_key = parent_key or entity.parent_key
+
+        group_values[key] = dict(
+            id_name=make_entity_id(first.entity_type_id_name, uuid.uuid4().hex[:20]),
+            name=first.name.casefold(),
+            entity_key=entity_key,
+            parent_key=parent_key,
+            alternative_names=first.alternative_names or [],
+            entity_type_id_name=first.entity_type_id_name,
+            document_id=first.document_id,
+            occurrences=occurrences,
+            attributes=attributes,
+            event_time=entities[-1].event_time,
+        )
+
+    stmt = pg_insert(KGEntity).values(list(group_values.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name", "entity_type_id_name", "document_id"],
+        set_=dict(
+            occurrences=KGEntity.occurrences + stmt.excluded.occurrences,
+            attributes=KGEntity.attributes.op("||")(stmt.excluded.attributes),
+            entity_key=func.coalesce(KGEntity.entity_key, stmt.excluded.entity_key),
+            parent_key=func.coalesce(KGEntity.parent_key, stmt.excluded.parent_key),
+            event_time=stmt.excluded.event_time,
+            time_updated=datetime.now(),
+        ),
+    ).returning(KGEntity)
+    # entities loaded in the session are refreshed with the upserted values
+    stmt = stmt.execution_options(populate_existing=True)
+    key_to_entity = {
+        (entity.name, entity.entity_type_id_name, entity.document_id): entity
+        for entity in db_session.execute(stmt).scalars().all()
+    }
+    if len(key_to_entity) != len(group_values):
+        raise RuntimeError(
+            f"Failed to transfer entities: {group_values.keys() - key_to_entity.keys()}"
+        )
+
+    # Update the documents' kg_stage
+    dbdocument.update_documents_kg_info(
+        db_session,
+        document_ids={key[2] for key in group_values if key[2] is not None},
+        kg_stage=KGStage.NORMALIZED,
+    )
+
+    # Update transferred
+    transferred_entities = [key_to_entity[key] for key in group_values]
+    _set_staging_entities_transferred(
+        db_session,
+        {
+            entity.id_name: transferred_entity.id_name
+            for entities, transferred_entity in zip(entity_groups, transferred_entities)
+            for entity in entities
+        },
+    )
+    db_session.flush()
+
+    return transferred_entities
+
+
+def merge_entities_into(
+    db_session: Session,
+    merges: list[tuple[KGEntity, list[KGEntityExtractionStaging]]],
+) -> None:
+    """Merge entities from the extraction staging table into existing entities in the
+    normalized table, with a single update statement. Same as merge_entities for
+    each child of each parent, in order.
+
+    Args:
+        db_session: SQLAlchemy session
+        merges: Parent entities, each with the staging entities to merge into it
+    """
+    if not merges:
+        return
+
+    parent_values: list[dict] = []
+    normalized_document_ids: set[str] = set()
+    transferred_id_names: dict[str, str] = {}
+    for parent, children in merges:
+        document_id = parent.document_id
+        alternative_names = set(parent.alternative_names or [])
+        occurrences = parent.occurrences
+        attributes = parent.attributes
+        entity_key = parent.entity_key
+        parent_key = parent.parent_key
+        for child in children:
+            # check we're not merging two entities with different document_ids
+            if (
+                document_id is not None
+                and child.document_id is not None
+                and document_id != child.document_id
+            ):
+                raise ValueError(
+                    "Overwriting the document_id of an entity with a document_id already is not allowed"
+                )
+            if document_id is None and child.document_id is not None:
+                document_id = child.document_id
+                normalized_document_ids.add(child.document_id)
+
+            alternative_names.update(child.alternative_names or [])
+            alternative_names.add(child.name.lower())
+            alternative_names.discard(parent.name)
+            occurrences += child.occurrences
+            attributes = attributes | child.attributes
+            entity_key = entity_key or child.entity_key
+            parent_key = parent_key or child.parent_key
+            transferred_id_names[child.id_name] = parent.id_name
+
+        parent_values.append(
+            dict(
+                id_name=parent.id_name,
+                document_id=document_id,
+                alternative_names=list(alternative_names),
+                occurrences=occurrences,
+                attributes=attributes,
+                entity_key=entity_key,
+                parent_key=parent_key,
+            )
+        )
+
+    # bulk update by primary key
+    db_session.execute(update(KGEntity), parent_values)
+
+    # Update the documents' kg_stage if document_id is set
+    dbdocument.update_documents_kg_info(
+        db_session,
+        document_ids=normalized_document_ids,
+        kg_stage=KGStage.NORMALIZED,
+    )
+
+    # Update transferred
+    _set_staging_entities_transferred(db_session, transferred_id_names)
+    db_session.flush()
+
+
+def _set_staging_entities_transferred(
+    db_session: Session, transferred_id_names: dict[str, str]
+) -> None:
+    if not transferred_id_names:
+        return
+    # bulk update by primary key
+    db_session.execute(
+        update(KGEntityExtractionStaging),
+        [
+            {"id_name": id_name, "transferred_id_name": transferred_id_name}
+            for id_name, transferred_id_name in transferred_id_names.items()
+        ],
+    )
+
+
 def get_kg_entity_by_document(db: Session, document_id: str) -> KGEntity | None:
     """
     Check if a document_id exists in the kg_entities table and return its id_name if found.
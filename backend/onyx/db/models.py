@@ -671,6 +671,12 @@ class Document(Base):
     # Only null for documents indexed prior to this change
     chunk_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Hashes of the chunks in the document index, in chunk order, used to skip
+    # re-embedding chunks that did not change. Null if unknown, e.g. after a failed write
+    chunk_content_hashes: Mapped[list[str] | None] = mapped_column(
+        postgresql.ARRAY(String), nullable=True, deferred=True
+    )
+
     # last time any vespa relevant row metadata or the doc changed.
     # does not include last_synced
     last_modified: Mapped[datetime.datetime | None] = mapped_column(
@@ -2854,6 +2860,9 @@ class Persona(Base):
         String(length=PROMPT_LENGTH), nullable=True
     )
     datetime_aware: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Final answers are cached and replayed for similar questions, see
+    # onyx/chat/answer_cache.py
+    answer_cache_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
 
     uploaded_image_id: Mapped[str | None] = mapped_column(String, nullable=True)
     icon_name: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -286,6 +286,7 @@ def create_update_persona(
             system_prompt=create_persona_request.system_prompt,
             task_prompt=create_persona_request.task_prompt,
             datetime_aware=create_persona_request.datetime_aware,
+            answer_cache_enabled=create_persona_request.answer_cache_enabled,
             replace_base_system_prompt=create_persona_request.replace_base_system_prompt,
             uploaded_image_id=create_persona_request.uploaded_image_id,
             icon_name=create_persona_request.icon_name,
@@ -822,6 +823,7 @@ def upsert_persona(
     chunks_above: int = CONTEXT_CHUNKS_ABOVE,
     chunks_below: int = CONTEXT_CHUNKS_BELOW,
     replace_base_system_prompt: bool = False,
+    answer_cache_enabled: bool | None = None,
 ) -> Persona:
     """
     NOTE: This operation cannot update persona configuration options that
@@ -930,6 +932,8 @@ def upsert_persona(
             existing_persona.task_prompt = task_prompt
         if datetime_aware is not None:
             existing_persona.datetime_aware = datetime_aware
+        if answer_cache_enabled is not None:
+            existing_persona.answer_cache_enabled = answer_cache_enabled
         existing_persona.replace_base_system_prompt = replace_base_system_prompt
 
         # Do not delete any associations manually added unless
@@ -971,6 +975,7 @@ def upsert_persona(
             system_prompt=system_prompt or "",
             task_prompt=task_prompt or "",
             datetime_aware=(datetime_aware if datetime_aware is not None else True),
+            answer_cache_enabled=bool(answer_cache_enabled),
             replace_base_system_prompt=replace_base_system_prompt,
             document_sets=document_sets or [],
             llm_model_provider_override=llm_model_provider_override,
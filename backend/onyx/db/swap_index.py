@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import VESPA_NUM_ATTEMPTS_ON_STARTUP
 from onyx.configs.constants import KV_REINDEX_KEY
+from onyx.context.search.query_embedding_cache import invalidate_query_embedding_cache
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
 from onyx.db.connector_credential_pair import resync_cc_pair
 from onyx.db.document import delete_all_documents_for_connector_credential_pair
@@ -22,6 +23,12 @@ from onyx.db.search_settings import get_secondary_search_settings
 from onyx.db.search_settings import update_search_settings_status
 from onyx.document_index.factory import get_default_document_index
 from onyx.key_value_store.factory import get_kv_store
+from onyx.natural_language_processing.embedding_client_registry import (
+    bump_search_settings_version,
+)
+from onyx.natural_language_processing.embedding_client_registry import (
+    invalidate_embedding_clients,
+)
 from onyx.utils.logger import setup_logger
 
 
@@ -69,6 +76,8 @@ def _perform_index_swap(
                 )
 
     # swap over search settings
+    invalidate_query_embedding_cache()
+    invalidate_embedding_clients()
     update_search_settings_status(
         search_settings=current_search_settings,
         new_status=IndexModelStatus.PAST,
@@ -79,6 +88,8 @@ def _perform_index_swap(
         new_status=IndexModelStatus.PRESENT,
         db_session=db_session,
     )
+    # other processes switch once the new search settings are committed
+    bump_search_settings_version()
 
     # remove the old index from the vector db
     document_index = get_default_document_index(new_search_settings, None)
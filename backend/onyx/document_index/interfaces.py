@@ -10,6 +10,7 @@ from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import QueryExpansionType
 from onyx.db.enums import EmbeddingPrecision
+from onyx.document_index.interfaces_new import MetadataUpdateRequest
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from shared_configs.model_server_models import Embedding
 
@@ -119,21 +120,6 @@ class VespaDocumentUserFields:
     user_projects: list[int] | None = None
 
 
-@dataclass
-class UpdateRequest:
-    """
-    For all document_ids, update the allowed_users and the boost to the new values
-    Does not update any of the None fields
-    """
-
-    minimal_document_indexing_info: list[MinimalDocumentIndexingInfo]
-    # all other fields except these 4 will always be left alone by the update request
-    access: DocumentAccess | None = None
-    document_sets: set[str] | None = None
-    boost: float | None = None
-    hidden: bool | None = None
-
-
 class Verifiable(abc.ABC):
     """
     Class must implement document index schema verification. For example, verify that all of the
@@ -233,6 +219,15 @@ class Indexable(abc.ABC):
         """
         raise NotImplementedError
 
+    def keeps_unchanged_chunks(self) -> bool:
+        """
+        Whether `index` only overwrites the chunks it is given and deletes the ones beyond the
+        new chunk count of each document in `index_batch_params`, leaving the other existing
+        chunks in place. If so, the indexing pipeline skips writing chunks that did not change
+        since the last time their document was indexed.
+        """
+        return False
+
 
 class Deletable(abc.ABC):
     """
@@ -293,11 +288,14 @@ class Updatable(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
+    def update(
+        self, update_requests: list[MetadataUpdateRequest], *, tenant_id: str
+    ) -> None:
         """
         Updates some set of chunks. The document and fields to update are specified in the update
         requests. Each update request in the list applies its changes to a list of document ids.
-        None values mean that the field does not need an update.
+        None values mean that the field does not need an update. Documents that do not exist
+        in the index are skipped without error.
 
         Parameters:
         - update_requests: for a list of document ids in the update request, apply the same updates
@@ -1,4 +1,5 @@
 import abc
+from datetime import datetime
 from typing import Self
 
 from pydantic import BaseModel
@@ -143,6 +144,8 @@ class MetadataUpdateRequest(BaseModel):
     hidden: bool | None = None
     secondary_index_updated: bool | None = None
     project_ids: set[int] | None = None
+    # Set when the contents of the document did not change but its update time did
+    doc_updated_at: datetime | None = None
 
 
 class IndexRetrievalFilters(BaseModel):
@@ -336,6 +339,20 @@ class IdRetrievalCapable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def async_id_based_retrieval(
+        self,
+        chunk_requests: list[DocumentSectionRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+    ) -> list[InferenceChunk]:
+        """Async counterpart of id_based_retrieval.
+
+        Must not block the event loop, so that many retrievals can run
+        concurrently on a single event loop.
+        """
+        raise NotImplementedError
+
 
 class HybridCapable(abc.ABC):
     """
@@ -376,6 +393,24 @@ class HybridCapable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def async_hybrid_retrieval(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        final_keywords: list[str] | None,
+        query_type: QueryType,
+        filters: IndexFilters,
+        num_to_retrieve: int,
+        offset: int = 0,
+    ) -> list[InferenceChunk]:
+        """Async counterpart of hybrid_retrieval.
+
+        Must not block the event loop, so that many searches can run
+        concurrently on a single event loop.
+        """
+        raise NotImplementedError
+
 
 class RandomCapable(abc.ABC):
     """
@@ -5,6 +5,7 @@ from typing import TypeVar
 
 from opensearchpy import OpenSearch
 from opensearchpy.exceptions import TransportError
+from opensearchpy.helpers import parallel_bulk
 from pydantic import BaseModel
 
 from onyx.configs.app_configs import OPENSEARCH_ADMIN_PASSWORD
@@ -14,6 +15,7 @@ from onyx.configs.app_configs import OPENSEARCH_REST_API_PORT
 from onyx.document_index.opensearch.schema import DocumentChunk
 from onyx.document_index.opensearch.schema import get_opensearch_doc_chunk_id
 from onyx.document_index.opensearch.search import DEFAULT_OPENSEARCH_MAX_RESULT_WINDOW
+from onyx.httpx.httpx_pool import AsyncHttpxPool
 from onyx.utils.logger import setup_logger
 
 
@@ -30,6 +32,8 @@ opensearch_logger.setLevel(logging.WARNING)
 
 SchemaDocumentModel = TypeVar("SchemaDocumentModel")
 
+OPENSEARCH_ASYNC_POOL_NAME = "opensearch"
+
 
 class SearchHit(BaseModel, Generic[SchemaDocumentModel]):
     """Represents a hit from OpenSearch in response to a query.
@@ -50,6 +54,29 @@ class SearchHit(BaseModel, Generic[SchemaDocumentModel]):
     match_highlights: dict[str, list[str]] = {}
 
 
+class BulkItemResult(BaseModel):
+    """The outcome of a single operation within a bulk request."""
+
+    model_config = {"frozen": True}
+
+    # The bulk operation type, e.g. "index" or "delete".
+    operation: str
+    document_chunk_id: str
+    # HTTP status of the individual operation.
+    status: int
+    # e.g. "created", "updated", "deleted", "not_found". None if the operation
+    # errored.
+    result: str | None = None
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        # Deleting a chunk that is already gone is not a failure.
+        return 200 <= self.status < 300 or (
+            self.operation == "delete" and self.status == 404
+        )
+
+
 class OpenSearchClient:
     """Client for interacting with OpenSearch.
 
@@ -74,6 +101,12 @@ class OpenSearchClient:
         ssl_show_warn: bool = False,
     ):
         self._index_name = index_name
+        # Used by the async methods, which talk to the REST API through httpx.
+        self._search_url = (
+            f"{'https' if use_ssl else 'http'}://{host}:{port}/{index_name}/_search"
+        )
+        self._auth = auth
+        self._verify_certs = verify_certs
         self._client = OpenSearch(
             hosts=[{"host": host, "port": port}],
             http_auth=auth,
@@ -222,8 +255,13 @@ class OpenSearchClient:
         Raises:
             Exception: There was an error updating the settings of the index.
         """
-        # TODO(andrei): Implement this.
-        raise NotImplementedError
+        response = self._client.indices.put_settings(
+            index=self._index_name, body=settings
+        )
+        if not response.get("acknowledged", False):
+            raise RuntimeError(
+                f"Failed to update the settings of index {self._index_name}."
+            )
 
     def index_document(self, document: DocumentChunk) -> None:
         """Indexes a document.
@@ -272,6 +310,91 @@ class OpenSearchClient:
                     f'Unknown OpenSearch indexing result: "{result_string}".'
                 )
 
+    def bulk_index_and_delete_documents(
+        self,
+        documents: list[DocumentChunk],
+        document_chunk_ids_to_delete: list[str],
+        max_chunk_bytes: int,
+        max_actions_per_request: int,
+        thread_count: int,
+    ) -> list[BulkItemResult]:
+        """Indexes and deletes document chunks using the _bulk API.
+
+        Unlike index_document, indexing overwrites a document chunk with the
+        same ID if one already exists. Operations are split into bulk requests
+        capped by both size and number of actions, and up to thread_count of
+        these requests are in flight at once.
+
+        Per-operation failures do not raise; they are reported in the returned
+        results so the caller can map them back to the documents they belong
+        to.
+
+        Args:
+            documents: The document chunks to index.
+            document_chunk_ids_to_delete: The OpenSearch IDs of the document
+                chunks to delete. These must not overlap with the IDs of the
+                chunks being indexed, as the order in which operations are
+                applied across concurrent requests is not defined.
+            max_chunk_bytes: Maximum size in bytes of a single bulk request.
+            max_actions_per_request: Maximum number of operations in a single
+                bulk request.
+            thread_count: Number of bulk requests to send concurrently.
+
+        Raises:
+            Exception: There was an error building the bulk requests.
+
+        Returns:
+            One result per operation.
+        """
+        actions: list[dict[str, Any]] = [
+            {
+                "_op_type": "index",
+                "_id": get_opensearch_doc_chunk_id(
+                    document_id=document.document_id,
+                    chunk_index=document.chunk_index,
+                    max_chunk_size=document.max_chunk_size,
+                ),
+                "_source": document.model_dump(exclude_none=True),
+            }
+            for document in documents
+        ]
+        actions.extend(
+            {"_op_type": "delete", "_id": document_chunk_id}
+            for document_chunk_id in document_chunk_ids_to_delete
+        )
+        if not actions:
+            return []
+
+        results: list[BulkItemResult] = []
+        for _, item in parallel_bulk(
+            self._client,
+            actions,
+            index=self._index_name,
+            thread_count=thread_count,
+            chunk_size=max_actions_per_request,
+            max_chunk_bytes=max_chunk_bytes,
+            # Report failures per operation instead of aborting the whole
+            # operation on the first one.
+            raise_on_error=False,
+            raise_on_exception=False,
+        ):
+            operation, info = next(iter(item.items()))
+            error = info.get("error")
+            status = info.get("status")
+            # Connection-level failures are reported with status "N/A".
+            if not isinstance(status, int):
+                status = 500
+            results.append(
+                BulkItemResult(
+                    operation=operation,
+                    document_chunk_id=info.get("_id", ""),
+                    status=status,
+                    result=info.get("result"),
+                    error=str(error) if error is not None else None,
+                )
+            )
+        return results
+
     def delete_document(self, document_chunk_id: str) -> bool:
         """Deletes a document.
 
@@ -475,6 +598,44 @@ class OpenSearchClient:
         else:
             result = self._client.search(index=self._index_name, body=body)
 
+        return self._get_search_hits_from_search_result(result)
+
+    async def async_search(
+        self, body: dict[str, Any], search_pipeline_id: str | None
+    ) -> list[SearchHit[DocumentChunk]]:
+        """Async counterpart of search.
+
+        Sends the request through a pooled async httpx client, so it does not
+        block the event loop.
+
+        Args:
+            body: The body of the search request.
+            search_pipeline_id: The ID of the search pipeline to use. If None,
+                the default search pipeline will be used.
+
+        Raises:
+            Exception: There was an error searching the index.
+
+        Returns:
+            List of search hits that match the search request.
+        """
+        http_client = AsyncHttpxPool.get(
+            OPENSEARCH_ASYNC_POOL_NAME, verify=self._verify_certs, http2=False
+        )
+        response = await http_client.post(
+            self._search_url,
+            json=body,
+            params=(
+                {"search_pipeline": search_pipeline_id} if search_pipeline_id else None
+            ),
+            auth=self._auth,
+        )
+        response.raise_for_status()
+        return self._get_search_hits_from_search_result(response.json())
+
+    def _get_search_hits_from_search_result(
+        self, result: dict[str, Any]
+    ) -> list[SearchHit[DocumentChunk]]:
         hits = self._get_hits_from_search_result(result)
 
         search_hits: list[SearchHit[DocumentChunk]] = []
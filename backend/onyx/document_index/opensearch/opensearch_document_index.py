@@ -1,8 +1,13 @@
+import asyncio
 import json
 from typing import Any
 
 import httpx
 
+from onyx.configs.app_configs import OPENSEARCH_BULK_INDEXING_ENABLED
+from onyx.configs.app_configs import OPENSEARCH_BULK_MAX_ACTIONS
+from onyx.configs.app_configs import OPENSEARCH_BULK_MAX_CHUNK_BYTES
+from onyx.configs.app_configs import OPENSEARCH_BULK_THREAD_COUNT
 from onyx.configs.chat_configs import TITLE_CONTENT_RATIO
 from onyx.connectors.cross_connector_utils.miscellaneous_utils import (
     get_experts_stores_representations,
@@ -24,7 +29,6 @@ from onyx.document_index.interfaces import (
     DocumentInsertionRecord as OldDocumentInsertionRecord,
 )
 from onyx.document_index.interfaces import IndexBatchParams
-from onyx.document_index.interfaces import UpdateRequest
 from onyx.document_index.interfaces import VespaChunkRequest
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.document_index.interfaces import VespaDocumentUserFields
@@ -44,6 +48,8 @@ from onyx.document_index.opensearch.schema import DocumentSchema
 from onyx.document_index.opensearch.schema import get_opensearch_doc_chunk_id
 from onyx.document_index.opensearch.schema import GLOBAL_BOOST_FIELD_NAME
 from onyx.document_index.opensearch.schema import HIDDEN_FIELD_NAME
+from onyx.document_index.opensearch.schema import LAST_UPDATED_FIELD_NAME
+from onyx.document_index.opensearch.schema import set_or_convert_timezone_to_utc
 from onyx.document_index.opensearch.schema import USER_PROJECTS_FIELD_NAME
 from onyx.document_index.opensearch.search import DocumentQuery
 from onyx.document_index.opensearch.search import (
@@ -67,6 +73,28 @@ from shared_configs.model_server_models import Embedding
 
 logger = setup_logger(__name__)
 
+# Each document adds two leaf clauses to the stale chunk cleanup query, so this
+# keeps it at about half of OpenSearch's default limit of 1024 boolean clauses
+# (indices.query.bool.max_clause_count), leaving room for clusters with a lower one.
+_MAX_DOCUMENTS_PER_STALE_QUERY = 250
+# Index settings from DocumentSchema.get_bulk_index_settings that can be changed
+# on an existing index.
+_DYNAMIC_BULK_INDEX_SETTINGS = ("number_of_replicas", "refresh_interval")
+
+
+class OpenSearchBulkIndexingError(RuntimeError):
+    """Raised when some operations of a bulk indexing request failed."""
+
+    def __init__(self, failed_document_id_to_error: dict[str, str]) -> None:
+        self.failed_document_ids = list(failed_document_id_to_error)
+        super().__init__(
+            f"Failed to index {len(failed_document_id_to_error)} document(s) into OpenSearch: "
+            + "; ".join(
+                f"{document_id} ({error})"
+                for document_id, error in failed_document_id_to_error.items()
+            )
+        )
+
 
 def _convert_retrieved_opensearch_chunk_to_inference_chunk_uncleaned(
     chunk: DocumentChunk,
@@ -317,20 +345,17 @@ class OpenSearchOldDocumentIndex(OldDocumentIndex):
 
     def update(
         self,
-        update_requests: list[UpdateRequest],
+        update_requests: list[MetadataUpdateRequest],
         *,
         tenant_id: str,
     ) -> None:
-        raise NotImplementedError("[ANDREI]: Update is not implemented for OpenSearch.")
+        return self._real_index.update(update_requests)
 
-    def id_based_retrieval(
-        self,
+    @staticmethod
+    def _to_document_section_requests(
         chunk_requests: list[VespaChunkRequest],
-        filters: IndexFilters,
-        batch_retrieval: bool = False,
-        get_large_chunks: bool = False,
-    ) -> list[InferenceChunk]:
-        section_requests = [
+    ) -> list[DocumentSectionRequest]:
+        return [
             DocumentSectionRequest(
                 document_id=req.document_id,
                 min_chunk_ind=req.min_chunk_ind,
@@ -339,8 +364,27 @@ class OpenSearchOldDocumentIndex(OldDocumentIndex):
             for req in chunk_requests
         ]
 
+    @staticmethod
+    def _to_query_type(hybrid_alpha: float) -> QueryType:
+        # Determine query type based on hybrid_alpha.
+        if hybrid_alpha >= 0.8:
+            return QueryType.SEMANTIC
+        elif hybrid_alpha <= 0.2:
+            return QueryType.KEYWORD
+        else:
+            return QueryType.SEMANTIC  # Default to semantic for hybrid.
+
+    def id_based_retrieval(
+        self,
+        chunk_requests: list[VespaChunkRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+        get_large_chunks: bool = False,
+    ) -> list[InferenceChunk]:
         return self._real_index.id_based_retrieval(
-            section_requests, filters, batch_retrieval
+            self._to_document_section_requests(chunk_requests),
+            filters,
+            batch_retrieval,
         )
 
     def hybrid_retrieval(
@@ -356,19 +400,11 @@ class OpenSearchOldDocumentIndex(OldDocumentIndex):
         offset: int = 0,
         title_content_ratio: float | None = TITLE_CONTENT_RATIO,
     ) -> list[InferenceChunk]:
-        # Determine query type based on hybrid_alpha.
-        if hybrid_alpha >= 0.8:
-            query_type = QueryType.SEMANTIC
-        elif hybrid_alpha <= 0.2:
-            query_type = QueryType.KEYWORD
-        else:
-            query_type = QueryType.SEMANTIC  # Default to semantic for hybrid.
-
         return self._real_index.hybrid_retrieval(
             query=query,
             query_embedding=query_embedding,
             final_keywords=final_keywords,
-            query_type=query_type,
+            query_type=self._to_query_type(hybrid_alpha),
             filters=filters,
             num_to_retrieve=num_to_retrieve,
             offset=offset,
@@ -445,10 +481,161 @@ class OpenSearchDocumentIndex(DocumentIndex):
             pipeline_body=ZSCORE_NORMALIZATION_PIPELINE_CONFIG,
         )
 
+    def enter_bulk_load_mode(self) -> None:
+        """Applies the dynamic parts of DocumentSchema.get_bulk_index_settings
+        to the index, disabling refreshes and replicas.
+
+        Intended for large backfills where nothing searches the index. Call
+        exit_bulk_load_mode once the backfill is done.
+        """
+        bulk_index_settings = DocumentSchema.get_bulk_index_settings()["index"]
+        self._os_client.update_settings(
+            {
+                "index": {
+                    key: bulk_index_settings[key]
+                    for key in _DYNAMIC_BULK_INDEX_SETTINGS
+                }
+            }
+        )
+
+    def exit_bulk_load_mode(self) -> None:
+        """Restores the regular index settings and makes everything indexed in
+        bulk load mode searchable."""
+        index_settings = DocumentSchema.get_index_settings()["index"]
+        self._os_client.update_settings(
+            {
+                "index": {
+                    # None resets a setting to the OpenSearch default.
+                    key: index_settings.get(key)
+                    for key in _DYNAMIC_BULK_INDEX_SETTINGS
+                }
+            }
+        )
+        self._os_client.refresh_index()
+
     def index(
         self,
         chunks: list[DocMetadataAwareIndexChunk],
         indexing_metadata: IndexingMetadata,
+    ) -> list[DocumentInsertionRecord]:
+        if not OPENSEARCH_BULK_INDEXING_ENABLED:
+            return self._index_per_chunk(chunks)
+        return self._bulk_index(chunks, indexing_metadata)
+
+    def _bulk_index(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
+        indexing_metadata: IndexingMetadata,
+    ) -> list[DocumentInsertionRecord]:
+        """Indexes chunks through the _bulk API.
+
+        New chunks overwrite existing chunks with the same ID, so only chunks
+        beyond a document's new chunk count need to be deleted. When the
+        previous chunk count is known these are deleted by chunk ID within the
+        same bulk requests. Documents with an unknown previous chunk count
+        (including brand new documents) are cleaned up afterwards with a single
+        query covering all of them.
+
+        Raises:
+            OpenSearchBulkIndexingError: Some operations failed. Lists the
+                documents affected so the caller can retry them.
+        """
+        opensearch_document_chunks: list[DocumentChunk] = []
+        chunk_id_to_document_id: dict[str, str] = {}
+        # Preserves the order in which documents are first seen.
+        document_id_to_new_chunk_count: dict[str, int] = {}
+        # Stale chunk IDs are built like the IDs of the chunks written.
+        document_id_to_max_chunk_size: dict[str, int] = {}
+        for chunk in chunks:
+            opensearch_document_chunk = _convert_onyx_chunk_to_opensearch_document(
+                chunk
+            )
+            opensearch_document_chunks.append(opensearch_document_chunk)
+            document_id = opensearch_document_chunk.document_id
+            chunk_id_to_document_id[
+                get_opensearch_doc_chunk_id(
+                    document_id=document_id,
+                    chunk_index=opensearch_document_chunk.chunk_index,
+                    max_chunk_size=opensearch_document_chunk.max_chunk_size,
+                )
+            ] = document_id
+            document_id_to_new_chunk_count[document_id] = (
+                document_id_to_new_chunk_count.get(document_id, 0) + 1
+            )
+            document_id_to_max_chunk_size.setdefault(
+                document_id, opensearch_document_chunk.max_chunk_size
+            )
+
+        stale_chunk_ids: list[str] = []
+        document_ids_with_unknown_chunk_count: dict[str, int] = {}
+        for document_id, num_chunks_in_batch in document_id_to_new_chunk_count.items():
+            chunk_counts = indexing_metadata.doc_id_to_chunk_cnt_diff.get(document_id)
+            new_chunk_count = (
+                chunk_counts.new_chunk_cnt if chunk_counts else num_chunks_in_batch
+            )
+            if chunk_counts is None or chunk_counts.old_chunk_cnt <= 0:
+                # A previous count of 0 means either a new document or one
+                # indexed before chunk counts were tracked.
+                document_ids_with_unknown_chunk_count[document_id] = new_chunk_count
+                continue
+            for chunk_index in range(new_chunk_count, chunk_counts.old_chunk_cnt):
+                stale_chunk_id = get_opensearch_doc_chunk_id(
+                    document_id=document_id,
+                    chunk_index=chunk_index,
+                    max_chunk_size=document_id_to_max_chunk_size[document_id],
+                )
+                if stale_chunk_id not in chunk_id_to_document_id:
+                    chunk_id_to_document_id[stale_chunk_id] = document_id
+                    stale_chunk_ids.append(stale_chunk_id)
+
+        results = self._os_client.bulk_index_and_delete_documents(
+            documents=opensearch_document_chunks,
+            document_chunk_ids_to_delete=stale_chunk_ids,
+            max_chunk_bytes=OPENSEARCH_BULK_MAX_CHUNK_BYTES,
+            max_actions_per_request=OPENSEARCH_BULK_MAX_ACTIONS,
+            thread_count=OPENSEARCH_BULK_THREAD_COUNT,
+        )
+
+        failed_document_id_to_error: dict[str, str] = {}
+        overwritten_document_ids: set[str] = set()
+        for result in results:
+            document_id = chunk_id_to_document_id.get(result.document_chunk_id, "")
+            if not result.succeeded:
+                failed_document_id_to_error.setdefault(
+                    document_id, f"{result.status}: {result.error}"
+                )
+            elif result.operation == "index" and result.result == "updated":
+                overwritten_document_ids.add(document_id)
+        if failed_document_id_to_error:
+            raise OpenSearchBulkIndexingError(failed_document_id_to_error)
+
+        unknown_document_ids = list(document_ids_with_unknown_chunk_count)
+        for i in range(0, len(unknown_document_ids), _MAX_DOCUMENTS_PER_STALE_QUERY):
+            query_body = DocumentQuery.delete_chunks_beyond_count_query(
+                document_id_to_chunk_count={
+                    document_id: document_ids_with_unknown_chunk_count[document_id]
+                    for document_id in unknown_document_ids[
+                        i : i + _MAX_DOCUMENTS_PER_STALE_QUERY
+                    ]
+                },
+                tenant_state=self._tenant_state,
+            )
+            self._os_client.delete_by_query(query_body)
+
+        # A document that existed before had at least its first chunk
+        # overwritten, even if its previous chunk count was unknown.
+        return [
+            DocumentInsertionRecord(
+                document_id=document_id,
+                already_existed=document_id not in document_ids_with_unknown_chunk_count
+                or document_id in overwritten_document_ids,
+            )
+            for document_id in document_id_to_new_chunk_count
+        ]
+
+    def _index_per_chunk(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
     ) -> list[DocumentInsertionRecord]:
         # Set of doc IDs.
         unique_docs_to_be_indexed: set[str] = set()
@@ -480,8 +667,6 @@ class OpenSearchDocumentIndex(DocumentIndex):
             opensearch_document_chunk = _convert_onyx_chunk_to_opensearch_document(
                 chunk
             )
-            # TODO(andrei): After our client supports batch indexing, use that
-            # here.
             self._os_client.index_document(opensearch_document_chunk)
 
             if document_insertion_record is not None:
@@ -562,6 +747,14 @@ class OpenSearchDocumentIndex(DocumentIndex):
                 properties_to_update[USER_PROJECTS_FIELD_NAME] = list(
                     update_request.project_ids
                 )
+            if update_request.doc_updated_at is not None:
+                # Stored as milliseconds since the epoch, see DocumentChunk.
+                properties_to_update[LAST_UPDATED_FIELD_NAME] = int(
+                    set_or_convert_timezone_to_utc(
+                        update_request.doc_updated_at
+                    ).timestamp()
+                    * 1000
+                )
 
             for doc_id in update_request.document_ids:
                 if not properties_to_update:
@@ -589,6 +782,29 @@ class OpenSearchDocumentIndex(DocumentIndex):
                         properties_to_update=properties_to_update,
                     )
 
+    def _get_id_based_retrieval_query(
+        self, chunk_request: DocumentSectionRequest
+    ) -> dict[str, Any]:
+        return DocumentQuery.get_from_document_id_query(
+            document_id=chunk_request.document_id,
+            tenant_state=self._tenant_state,
+            max_chunk_size=chunk_request.max_chunk_size,
+            min_chunk_index=chunk_request.min_chunk_ind,
+            max_chunk_index=chunk_request.max_chunk_ind,
+        )
+
+    @staticmethod
+    def _id_based_search_hits_to_inference_chunks(
+        search_hits: list[SearchHit[DocumentChunk]],
+    ) -> list[InferenceChunk]:
+        inference_chunks_uncleaned: list[InferenceChunkUncleaned] = [
+            _convert_retrieved_opensearch_chunk_to_inference_chunk_uncleaned(
+                search_hit.document_chunk, None, {}
+            )
+            for search_hit in search_hits
+        ]
+        return cleanup_content_for_chunks(inference_chunks_uncleaned)
+
     def id_based_retrieval(
         self,
         chunk_requests: list[DocumentSectionRequest],
@@ -606,29 +822,59 @@ class OpenSearchDocumentIndex(DocumentIndex):
         """
         results: list[InferenceChunk] = []
         for chunk_request in chunk_requests:
-            search_hits: list[SearchHit[DocumentChunk]] = []
-            query_body = DocumentQuery.get_from_document_id_query(
-                document_id=chunk_request.document_id,
-                tenant_state=self._tenant_state,
-                max_chunk_size=chunk_request.max_chunk_size,
-                min_chunk_index=chunk_request.min_chunk_ind,
-                max_chunk_index=chunk_request.max_chunk_ind,
-            )
             search_hits = self._os_client.search(
-                body=query_body,
+                body=self._get_id_based_retrieval_query(chunk_request),
                 search_pipeline_id=None,
             )
-            inference_chunks_uncleaned: list[InferenceChunkUncleaned] = [
-                _convert_retrieved_opensearch_chunk_to_inference_chunk_uncleaned(
-                    search_hit.document_chunk, None, {}
+            results.extend(self._id_based_search_hits_to_inference_chunks(search_hits))
+        return results
+
+    async def async_id_based_retrieval(
+        self,
+        chunk_requests: list[DocumentSectionRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+    ) -> list[InferenceChunk]:
+        # One search per request as in id_based_retrieval, but sent concurrently.
+        search_hit_sets = await asyncio.gather(
+            *(
+                self._os_client.async_search(
+                    body=self._get_id_based_retrieval_query(chunk_request),
+                    search_pipeline_id=None,
                 )
-                for search_hit in search_hits
-            ]
-            inference_chunks: list[InferenceChunk] = cleanup_content_for_chunks(
-                inference_chunks_uncleaned
+                for chunk_request in chunk_requests
             )
-            results.extend(inference_chunks)
-        return results
+        )
+        return [
+            inference_chunk
+            for search_hits in search_hit_sets
+            for inference_chunk in self._id_based_search_hits_to_inference_chunks(
+                search_hits
+            )
+        ]
+
+    def _get_hybrid_search_query(
+        self, query: str, query_embedding: Embedding, num_to_retrieve: int
+    ) -> dict[str, Any]:
+        return DocumentQuery.get_hybrid_search_query(
+            query_text=query,
+            query_vector=query_embedding,
+            num_candidates=1000,  # TODO(andrei): Magic number.
+            num_hits=num_to_retrieve,
+            tenant_state=self._tenant_state,
+        )
+
+    @staticmethod
+    def _hybrid_search_hits_to_inference_chunks(
+        search_hits: list[SearchHit[DocumentChunk]],
+    ) -> list[InferenceChunk]:
+        inference_chunks_uncleaned: list[InferenceChunkUncleaned] = [
+            _convert_retrieved_opensearch_chunk_to_inference_chunk_uncleaned(
+                search_hit.document_chunk, search_hit.score, search_hit.match_highlights
+            )
+            for search_hit in search_hits
+        ]
+        return cleanup_content_for_chunks(inference_chunks_uncleaned)
 
     def hybrid_retrieval(
         self,
@@ -643,28 +889,27 @@ class OpenSearchDocumentIndex(DocumentIndex):
         num_to_retrieve: int,
         offset: int = 0,
     ) -> list[InferenceChunk]:
-        query_body = DocumentQuery.get_hybrid_search_query(
-            query_text=query,
-            query_vector=query_embedding,
-            num_candidates=1000,  # TODO(andrei): Magic number.
-            num_hits=num_to_retrieve,
-            tenant_state=self._tenant_state,
-        )
         search_hits: list[SearchHit[DocumentChunk]] = self._os_client.search(
-            body=query_body,
+            body=self._get_hybrid_search_query(query, query_embedding, num_to_retrieve),
             search_pipeline_id=MIN_MAX_NORMALIZATION_PIPELINE_NAME,
         )
-        inference_chunks_uncleaned: list[InferenceChunkUncleaned] = [
-            _convert_retrieved_opensearch_chunk_to_inference_chunk_uncleaned(
-                search_hit.document_chunk, search_hit.score, search_hit.match_highlights
-            )
-            for search_hit in search_hits
-        ]
-        inference_chunks: list[InferenceChunk] = cleanup_content_for_chunks(
-            inference_chunks_uncleaned
-        )
+        return self._hybrid_search_hits_to_inference_chunks(search_hits)
 
-        return inference_chunks
+    async def async_hybrid_retrieval(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        final_keywords: list[str] | None,
+        query_type: QueryType,
+        filters: IndexFilters,
+        num_to_retrieve: int,
+        offset: int = 0,
+    ) -> list[InferenceChunk]:
+        search_hits = await self._os_client.async_search(
+            body=self._get_hybrid_search_query(query, query_embedding, num_to_retrieve),
+            search_pipeline_id=MIN_MAX_NORMALIZATION_PIPELINE_NAME,
+        )
+        return self._hybrid_search_hits_to_inference_chunks(search_hits)
 
     def random_retrieval(
         self,
@@ -210,6 +210,58 @@ class DocumentQuery:
 
         return final_delete_query
 
+    @staticmethod
+    def delete_chunks_beyond_count_query(
+        document_id_to_chunk_count: dict[str, int],
+        tenant_state: TenantState,
+    ) -> dict[str, Any]:
+        """
+        Returns a final query which deletes, for every given document ID, the
+        chunks whose index is greater than or equal to the given chunk count.
+
+        This covers many documents in a single request, so it can be used to
+        clean up stale chunks left over from a previous, longer version of
+        each document.
+
+        Intended to be supplied to the OpenSearch client's delete_by_query
+        method.
+
+        Args:
+            document_id_to_chunk_count: Maps Onyx document ID to the number of
+                chunks the document has now. Chunks with an index at or beyond
+                this count are deleted.
+            tenant_state: Tenant state containing the tenant ID.
+
+        Returns:
+            A dictionary representing the final delete query.
+        """
+        per_document_clauses: list[dict[str, Any]] = [
+            {
+                "bool": {
+                    "filter": [
+                        {"term": {DOCUMENT_ID_FIELD_NAME: {"value": document_id}}},
+                        {"range": {CHUNK_INDEX_FIELD_NAME: {"gte": chunk_count}}},
+                    ]
+                }
+            }
+            for document_id, chunk_count in document_id_to_chunk_count.items()
+        ]
+
+        filter_clauses: list[dict[str, Any]] = [
+            {"bool": {"should": per_document_clauses, "minimum_should_match": 1}}
+        ]
+
+        if tenant_state.multitenant:
+            filter_clauses.append(
+                {"term": {TENANT_ID_FIELD_NAME: {"value": tenant_state.tenant_id}}}
+            )
+
+        final_delete_query: dict[str, Any] = {
+            "query": {"bool": {"filter": filter_clauses}},
+        }
+
+        return final_delete_query
+
     @staticmethod
     def get_hybrid_search_query(
         query_text: str,
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import string
 from collections.abc import Callable
@@ -15,7 +16,10 @@ from onyx.configs.app_configs import VESPA_LANGUAGE_OVERRIDE
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunkUncleaned
 from onyx.document_index.interfaces import VespaChunkRequest
-from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
+from onyx.document_index.vespa.shared_utils.utils import (
+    get_vespa_async_query_http_client,
+)
+from onyx.document_index.vespa.shared_utils.utils import get_vespa_query_http_client
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
@@ -155,13 +159,35 @@ def _vespa_hit_to_inference_chunk(
     )
 
 
-def get_chunks_via_visit_api(
+_VESPA_QUERY_ERROR = "Failed to query Vespa"
+# Retry policy of query_vespa, shared with async_query_vespa
+_QUERY_TRIES = 3
+_QUERY_RETRY_DELAY = 1
+_QUERY_RETRY_BACKOFF = 2
+
+
+def _log_vespa_http_error(e: httpx.HTTPError, params: Mapping[str, Any]) -> None:
+    logger.error(
+        f"{_VESPA_QUERY_ERROR}:\n"
+        f"Request URL: {e.request.url}\n"
+        f"Request Headers: {e.request.headers}\n"
+        f"Request Payload: {params}\n"
+        f"Exception: {str(e)}"
+        + (
+            f"\nResponse: {e.response.text}"
+            if isinstance(e, httpx.HTTPStatusError)
+            else ""
+        )
+    )
+
+
+def _build_visit_api_request(
     chunk_request: VespaChunkRequest,
     index_name: str,
     filters: IndexFilters,
-    field_names: list[str] | None = None,
-    get_large_chunks: bool = False,
-) -> list[dict]:
+    field_names: list[str] | None,
+    get_large_chunks: bool,
+) -> tuple[str, dict[str, Any]]:
     # Constructing the URL for the Visit API
     # NOTE: visit API uses the same URL as the document API, but with different params
     url = DOCUMENT_ID_ENDPOINT.format(index_name=index_name)
@@ -213,51 +239,62 @@ def get_chunks_via_visit_api(
         "wantedDocumentCount": 1_000,
         "fieldSet": field_set,
     }
+    return url, params
+
+
+def _filter_visit_api_documents(
+    response_data: dict[str, Any], filters: IndexFilters
+) -> list[dict]:
+    document_chunks: list[dict] = []
+    for document in response_data.get("documents", []):
+        if filters.access_control_list:
+            document_acl = document["fields"].get(ACCESS_CONTROL_LIST)
+            if not document_acl or not any(
+                user_acl_entry in document_acl
+                for user_acl_entry in filters.access_control_list
+            ):
+                continue
+
+        if MULTI_TENANT:
+            if not filters.tenant_id:
+                raise ValueError("Tenant ID is required for multi-tenant")
+            document_tenant_id = document["fields"].get(TENANT_ID)
+            if document_tenant_id != filters.tenant_id:
+                logger.error(
+                    f"Skipping document {document['document_id']} because "
+                    f"it does not belong to tenant {filters.tenant_id}. "
+                    "This should never happen."
+                )
+                continue
+
+        document_chunks.append(document)
+    return document_chunks
+
+
+def get_chunks_via_visit_api(
+    chunk_request: VespaChunkRequest,
+    index_name: str,
+    filters: IndexFilters,
+    field_names: list[str] | None = None,
+    get_large_chunks: bool = False,
+) -> list[dict]:
+    url, params = _build_visit_api_request(
+        chunk_request, index_name, filters, field_names, get_large_chunks
+    )
 
+    http_client = get_vespa_query_http_client()
     document_chunks: list[dict] = []
     while True:
         try:
             filtered_params = {k: v for k, v in params.items() if v is not None}
-            with get_vespa_http_client() as http_client:
-                response = http_client.get(url, params=filtered_params)
-                response.raise_for_status()
+            response = http_client.get(url, params=filtered_params)
+            response.raise_for_status()
         except httpx.HTTPError as e:
-            error_base = "Failed to query Vespa"
-            logger.error(
-                f"{error_base}:\n"
-                f"Request URL: {e.request.url}\n"
-                f"Request Headers: {e.request.headers}\n"
-                f"Request Payload: {params}\n"
-                f"Exception: {str(e)}"
-            )
-            raise httpx.HTTPError(error_base) from e
+            _log_vespa_http_error(e, params)
+            raise httpx.HTTPError(_VESPA_QUERY_ERROR) from e
 
-        # Check if the response contains any documents
         response_data = response.json()
-
-        if "documents" in response_data:
-            for document in response_data["documents"]:
-                if filters.access_control_list:
-                    document_acl = document["fields"].get(ACCESS_CONTROL_LIST)
-                    if not document_acl or not any(
-                        user_acl_entry in document_acl
-                        for user_acl_entry in filters.access_control_list
-                    ):
-                        continue
-
-                if MULTI_TENANT:
-                    if not filters.tenant_id:
-                        raise ValueError("Tenant ID is required for multi-tenant")
-                    document_tenant_id = document["fields"].get(TENANT_ID)
-                    if document_tenant_id != filters.tenant_id:
-                        logger.error(
-                            f"Skipping document {document['document_id']} because "
-                            f"it does not belong to tenant {filters.tenant_id}. "
-                            "This should never happen."
-                        )
-                        continue
-
-                document_chunks.append(document)
+        document_chunks.extend(_filter_visit_api_documents(response_data, filters))
 
         # Check for continuation token to handle pagination
         if "continuation" in response_data and response_data["continuation"]:
@@ -268,6 +305,40 @@ def get_chunks_via_visit_api(
     return document_chunks
 
 
+async def async_get_chunks_via_visit_api(
+    chunk_request: VespaChunkRequest,
+    index_name: str,
+    filters: IndexFilters,
+    field_names: list[str] | None = None,
+    get_large_chunks: bool = False,
+) -> list[dict]:
+    """Async counterpart of get_chunks_via_visit_api."""
+    url, params = _build_visit_api_request(
+        chunk_request, index_name, filters, field_names, get_large_chunks
+    )
+
+    http_client = get_vespa_async_query_http_client()
+    document_chunks: list[dict] = []
+    while True:
+        try:
+            filtered_params = {k: v for k, v in params.items() if v is not None}
+            response = await http_client.get(url, params=filtered_params)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            _log_vespa_http_error(e, params)
+            raise httpx.HTTPError(_VESPA_QUERY_ERROR) from e
+
+        response_data = response.json()
+        document_chunks.extend(_filter_visit_api_documents(response_data, filters))
+
+        if "continuation" in response_data and response_data["continuation"]:
+            params["continuation"] = response_data["continuation"]
+        else:
+            break
+
+    return document_chunks
+
+
 # TODO(rkuo): candidate for removal if not being used
 # @retry(tries=10, delay=1, backoff=2)
 # def get_all_vespa_ids_for_document_id(
@@ -286,6 +357,19 @@ def get_chunks_via_visit_api(
 #     return [chunk["id"].split("::", 1)[-1] for chunk in document_chunks]
 
 
+def _visit_api_chunk_sets_to_inference_chunks(
+    vespa_chunk_sets: list[list[dict]],
+) -> list[InferenceChunkUncleaned]:
+    flattened_vespa_chunks = []
+    for chunk_set in vespa_chunk_sets:
+        flattened_vespa_chunks.extend(chunk_set)
+
+    return [
+        _vespa_hit_to_inference_chunk(chunk, null_score=True)
+        for chunk in flattened_vespa_chunks
+    ]
+
+
 def parallel_visit_api_retrieval(
     index_name: str,
     chunk_requests: list[VespaChunkRequest],
@@ -307,22 +391,41 @@ def parallel_visit_api_retrieval(
     # Any failures to retrieve would give a None, drop the Nones and empty lists
     vespa_chunk_sets = [res for res in parallel_results if res]
 
-    flattened_vespa_chunks = []
-    for chunk_set in vespa_chunk_sets:
-        flattened_vespa_chunks.extend(chunk_set)
+    return _visit_api_chunk_sets_to_inference_chunks(vespa_chunk_sets)
 
-    inference_chunks = [
-        _vespa_hit_to_inference_chunk(chunk, null_score=True)
-        for chunk in flattened_vespa_chunks
-    ]
 
-    return inference_chunks
+async def async_parallel_visit_api_retrieval(
+    index_name: str,
+    chunk_requests: list[VespaChunkRequest],
+    filters: IndexFilters,
+    get_large_chunks: bool = False,
+) -> list[InferenceChunkUncleaned]:
+    """Async counterpart of parallel_visit_api_retrieval, visits all documents
+    concurrently on the running event loop."""
+    results = await asyncio.gather(
+        *(
+            async_get_chunks_via_visit_api(
+                chunk_request, index_name, filters, None, get_large_chunks
+            )
+            for chunk_request in chunk_requests
+        ),
+        return_exceptions=True,
+    )
 
+    # Failures to retrieve are dropped, same as in parallel_visit_api_retrieval
+    vespa_chunk_sets: list[list[dict]] = []
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.error(f"Failed to retrieve chunks via the visit API: {result}")
+        elif result:
+            vespa_chunk_sets.append(result)
 
-@retry(tries=3, delay=1, backoff=2)
-def query_vespa(
+    return _visit_api_chunk_sets_to_inference_chunks(vespa_chunk_sets)
+
+
+def _build_query_params(
     query_params: Mapping[str, str | int | float],
-) -> list[InferenceChunkUncleaned]:
+) -> dict[str, Any]:
     if "query" in query_params and not cast(str, query_params["query"]).strip():
         raise ValueError("No/empty query received")
 
@@ -340,26 +443,13 @@ def query_vespa(
     if VESPA_LANGUAGE_OVERRIDE:
         params["language"] = VESPA_LANGUAGE_OVERRIDE
 
-    try:
-        with get_vespa_http_client() as http_client:
-            response = http_client.post(SEARCH_ENDPOINT, json=params)
-            response.raise_for_status()
-    except httpx.HTTPError as e:
-        error_base = "Failed to query Vespa"
-        logger.error(
-            f"{error_base}:\n"
-            f"Request URL: {e.request.url}\n"
-            f"Request Headers: {e.request.headers}\n"
-            f"Request Payload: {params}\n"
-            f"Exception: {str(e)}"
-            + (
-                f"\nResponse: {e.response.text}"
-                if isinstance(e, httpx.HTTPStatusError)
-                else ""
-            )
-        )
-        raise httpx.HTTPError(error_base) from e
+    return params
 
+
+def _query_response_to_inference_chunks(
+    response: httpx.Response,
+    query_params: Mapping[str, str | int | float],
+) -> list[InferenceChunkUncleaned]:
     response_json: dict[str, Any] = response.json()
 
     if LOG_VESPA_TIMING_INFORMATION:
@@ -401,32 +491,70 @@ def query_vespa(
     return inference_chunks
 
 
-def _get_chunks_via_batch_search(
+@retry(tries=_QUERY_TRIES, delay=_QUERY_RETRY_DELAY, backoff=_QUERY_RETRY_BACKOFF)
+def query_vespa(
+    query_params: Mapping[str, str | int | float],
+) -> list[InferenceChunkUncleaned]:
+    params = _build_query_params(query_params)
+
+    try:
+        response = get_vespa_query_http_client().post(SEARCH_ENDPOINT, json=params)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        _log_vespa_http_error(e, params)
+        raise httpx.HTTPError(_VESPA_QUERY_ERROR) from e
+
+    return _query_response_to_inference_chunks(response, query_params)
+
+
+async def async_query_vespa(
+    query_params: Mapping[str, str | int | float],
+) -> list[InferenceChunkUncleaned]:
+    """Async counterpart of query_vespa, with the same retry policy."""
+    params = _build_query_params(query_params)
+
+    delay: float = _QUERY_RETRY_DELAY
+    attempt = 1
+    while True:
+        try:
+            response = await get_vespa_async_query_http_client().post(
+                SEARCH_ENDPOINT, json=params
+            )
+            response.raise_for_status()
+            return _query_response_to_inference_chunks(response, query_params)
+        except httpx.HTTPError as e:
+            _log_vespa_http_error(e, params)
+            if attempt >= _QUERY_TRIES:
+                raise httpx.HTTPError(_VESPA_QUERY_ERROR) from e
+            logger.warning(f"{e}, retrying in {delay} seconds...")
+            await asyncio.sleep(delay)
+            delay *= _QUERY_RETRY_BACKOFF
+            attempt += 1
+
+
+def _build_batch_search_params(
     index_name: str,
     chunk_requests: list[VespaChunkRequest],
     filters: IndexFilters,
-    get_large_chunks: bool = False,
-) -> list[InferenceChunkUncleaned]:
-    if not chunk_requests:
-        return []
-
+) -> dict[str, str | int | float]:
     filters_str = build_vespa_filters(filters=filters, include_hidden=True)
 
     yql = (
         YQL_BASE.format(index_name=index_name)
         + filters_str
-        + build_vespa_id_based_retrieval_yql(chunk_requests[0])
+        + " or ".join(
+            build_vespa_id_based_retrieval_yql(request) for request in chunk_requests
+        )
     )
-    chunk_requests.pop(0)
-
-    for request in chunk_requests:
-        yql += " or " + build_vespa_id_based_retrieval_yql(request)
-    params: dict[str, str | int | float] = {
+    return {
         "yql": yql,
         "hits": MAX_ID_SEARCH_QUERY_SIZE,
     }
 
-    inference_chunks = query_vespa(params)
+
+def _finalize_batch_search_chunks(
+    inference_chunks: list[InferenceChunkUncleaned], get_large_chunks: bool
+) -> list[InferenceChunkUncleaned]:
     if not get_large_chunks:
         inference_chunks = [
             chunk for chunk in inference_chunks if not chunk.large_chunk_reference_ids
@@ -435,13 +563,40 @@ def _get_chunks_via_batch_search(
     return inference_chunks
 
 
-def batch_search_api_retrieval(
+def _get_chunks_via_batch_search(
     index_name: str,
     chunk_requests: list[VespaChunkRequest],
     filters: IndexFilters,
     get_large_chunks: bool = False,
 ) -> list[InferenceChunkUncleaned]:
-    retrieved_chunks: list[InferenceChunkUncleaned] = []
+    if not chunk_requests:
+        return []
+
+    params = _build_batch_search_params(index_name, chunk_requests, filters)
+    return _finalize_batch_search_chunks(query_vespa(params), get_large_chunks)
+
+
+async def _async_get_chunks_via_batch_search(
+    index_name: str,
+    chunk_requests: list[VespaChunkRequest],
+    filters: IndexFilters,
+    get_large_chunks: bool = False,
+) -> list[InferenceChunkUncleaned]:
+    if not chunk_requests:
+        return []
+
+    params = _build_batch_search_params(index_name, chunk_requests, filters)
+    return _finalize_batch_search_chunks(
+        await async_query_vespa(params), get_large_chunks
+    )
+
+
+def _group_chunk_requests(
+    chunk_requests: list[VespaChunkRequest],
+) -> tuple[list[list[VespaChunkRequest]], list[VespaChunkRequest]]:
+    """Splits requests into batches for the search API and the uncapped requests,
+    which have to go through the visit API."""
+    capped_batches: list[list[VespaChunkRequest]] = []
     capped_requests: list[VespaChunkRequest] = []
     uncapped_requests: list[VespaChunkRequest] = []
     chunk_count = 0
@@ -457,20 +612,29 @@ def batch_search_api_retrieval(
             chunk_count + range > MAX_ID_SEARCH_QUERY_SIZE
             or req_ind % MAX_OR_CONDITIONS == 0
         ):
-            retrieved_chunks.extend(
-                _get_chunks_via_batch_search(
-                    index_name=index_name,
-                    chunk_requests=capped_requests,
-                    filters=filters,
-                    get_large_chunks=get_large_chunks,
-                )
-            )
+            if capped_requests:
+                capped_batches.append(capped_requests)
             capped_requests = []
             chunk_count = 0
         capped_requests.append(request)
         chunk_count += range
 
     if capped_requests:
+        capped_batches.append(capped_requests)
+
+    return capped_batches, uncapped_requests
+
+
+def batch_search_api_retrieval(
+    index_name: str,
+    chunk_requests: list[VespaChunkRequest],
+    filters: IndexFilters,
+    get_large_chunks: bool = False,
+) -> list[InferenceChunkUncleaned]:
+    capped_batches, uncapped_requests = _group_chunk_requests(chunk_requests)
+
+    retrieved_chunks: list[InferenceChunkUncleaned] = []
+    for capped_requests in capped_batches:
         retrieved_chunks.extend(
             _get_chunks_via_batch_search(
                 index_name=index_name,
@@ -489,3 +653,33 @@ def batch_search_api_retrieval(
         )
 
     return retrieved_chunks
+
+
+async def async_batch_search_api_retrieval(
+    index_name: str,
+    chunk_requests: list[VespaChunkRequest],
+    filters: IndexFilters,
+    get_large_chunks: bool = False,
+) -> list[InferenceChunkUncleaned]:
+    """Async counterpart of batch_search_api_retrieval. All batches and visits run
+    concurrently, results keep the same order."""
+    capped_batches, uncapped_requests = _group_chunk_requests(chunk_requests)
+
+    if uncapped_requests:
+        logger.debug(f"Retrieving {len(uncapped_requests)} uncapped requests")
+    results = await asyncio.gather(
+        *(
+            _async_get_chunks_via_batch_search(
+                index_name=index_name,
+                chunk_requests=capped_requests,
+                filters=filters,
+                get_large_chunks=get_large_chunks,
+            )
+            for capped_requests in capped_batches
+        ),
+        async_parallel_visit_api_retrieval(
+            index_name, uncapped_requests, filters, get_large_chunks
+        ),
+    )
+
+    return [chunk for chunk_set in results for chunk in chunk_set]
@@ -39,7 +39,6 @@ from onyx.document_index.interfaces import (
 from onyx.document_index.interfaces import EnrichedDocumentIndexingInfo
 from onyx.document_index.interfaces import IndexBatchParams
 from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
-from onyx.document_index.interfaces import UpdateRequest
 from onyx.document_index.interfaces import VespaChunkRequest
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.document_index.interfaces import VespaDocumentUserFields
@@ -504,6 +503,11 @@ class VespaIndex(DocumentIndex):
             ]
         )
 
+    def keeps_unchanged_chunks(self) -> bool:
+        # chunks are overwritten by ID and only the tail beyond the new chunk count is
+        # deleted, see `_enrich_basic_chunk_info`
+        return True
+
     @classmethod
     def _apply_updates_batched(
         cls,
@@ -635,8 +639,19 @@ class VespaIndex(DocumentIndex):
             time.monotonic() - update_start,
         )
 
-    def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
-        raise NotImplementedError
+    def update(
+        self, update_requests: list[MetadataUpdateRequest], *, tenant_id: str
+    ) -> None:
+        vespa_document_index = VespaDocumentIndex(
+            index_name=self.index_name,
+            tenant_state=TenantState(
+                tenant_id=tenant_id,
+                multitenant=self.multitenant,
+            ),
+            large_chunks_enabled=self.large_chunks_enabled,
+            httpx_client=self.httpx_client,
+        )
+        vespa_document_index.update(update_requests)
 
     def update_single(
         self,
@@ -706,15 +721,11 @@ class VespaIndex(DocumentIndex):
         )
         return vespa_document_index.delete(document_id=doc_id, chunk_count=chunk_count)
 
-    def id_based_retrieval(
-        self,
-        chunk_requests: list[VespaChunkRequest],
-        filters: IndexFilters,
-        batch_retrieval: bool = False,
-        get_large_chunks: bool = False,
-    ) -> list[InferenceChunk]:
+    def _get_vespa_document_index_for_filters(
+        self, filters: IndexFilters
+    ) -> VespaDocumentIndex:
         tenant_id = filters.tenant_id if filters.tenant_id is not None else ""
-        vespa_document_index = VespaDocumentIndex(
+        return VespaDocumentIndex(
             index_name=self.index_name,
             tenant_state=TenantState(
                 tenant_id=tenant_id,
@@ -723,17 +734,45 @@ class VespaIndex(DocumentIndex):
             large_chunks_enabled=self.large_chunks_enabled,
             httpx_client=self.httpx_client,
         )
-        generic_chunk_requests: list[DocumentSectionRequest] = []
-        for chunk_request in chunk_requests:
-            generic_chunk_requests.append(
-                DocumentSectionRequest(
-                    document_id=chunk_request.document_id,
-                    min_chunk_ind=chunk_request.min_chunk_ind,
-                    max_chunk_ind=chunk_request.max_chunk_ind,
-                )
+
+    @staticmethod
+    def _to_document_section_requests(
+        chunk_requests: list[VespaChunkRequest],
+    ) -> list[DocumentSectionRequest]:
+        return [
+            DocumentSectionRequest(
+                document_id=chunk_request.document_id,
+                min_chunk_ind=chunk_request.min_chunk_ind,
+                max_chunk_ind=chunk_request.max_chunk_ind,
+            )
+            for chunk_request in chunk_requests
+        ]
+
+    @staticmethod
+    def _to_query_type(ranking_profile_type: QueryExpansionType) -> QueryType:
+        if not (
+            ranking_profile_type == QueryExpansionType.KEYWORD
+            or ranking_profile_type == QueryExpansionType.SEMANTIC
+        ):
+            raise ValueError(
+                f"Bug: Received invalid ranking profile type: {ranking_profile_type}"
             )
+        return (
+            QueryType.KEYWORD
+            if ranking_profile_type == QueryExpansionType.KEYWORD
+            else QueryType.SEMANTIC
+        )
+
+    def id_based_retrieval(
+        self,
+        chunk_requests: list[VespaChunkRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+        get_large_chunks: bool = False,
+    ) -> list[InferenceChunk]:
+        vespa_document_index = self._get_vespa_document_index_for_filters(filters)
         return vespa_document_index.id_based_retrieval(
-            chunk_requests=generic_chunk_requests,
+            chunk_requests=self._to_document_section_requests(chunk_requests),
             filters=filters,
             batch_retrieval=batch_retrieval,
         )
@@ -752,33 +791,12 @@ class VespaIndex(DocumentIndex):
         offset: int = 0,
         title_content_ratio: float | None = TITLE_CONTENT_RATIO,
     ) -> list[InferenceChunk]:
-        tenant_id = filters.tenant_id if filters.tenant_id is not None else ""
-        vespa_document_index = VespaDocumentIndex(
-            index_name=self.index_name,
-            tenant_state=TenantState(
-                tenant_id=tenant_id,
-                multitenant=self.multitenant,
-            ),
-            large_chunks_enabled=self.large_chunks_enabled,
-            httpx_client=self.httpx_client,
-        )
-        if not (
-            ranking_profile_type == QueryExpansionType.KEYWORD
-            or ranking_profile_type == QueryExpansionType.SEMANTIC
-        ):
-            raise ValueError(
-                f"Bug: Received invalid ranking profile type: {ranking_profile_type}"
-            )
-        query_type = (
-            QueryType.KEYWORD
-            if ranking_profile_type == QueryExpansionType.KEYWORD
-            else QueryType.SEMANTIC
-        )
+        vespa_document_index = self._get_vespa_document_index_for_filters(filters)
         return vespa_document_index.hybrid_retrieval(
             query,
             query_embedding,
             final_keywords,
-            query_type,
+            self._to_query_type(ranking_profile_type),
             filters,
             num_to_retrieve,
             offset,
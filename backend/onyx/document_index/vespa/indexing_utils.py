@@ -89,7 +89,7 @@ def _does_doc_chunk_exist(
     return True
 
 
-def _vespa_get_updated_at_attribute(t: datetime | None) -> int | None:
+def vespa_get_updated_at_attribute(t: datetime | None) -> int | None:
     if not t:
         return None
 
@@ -205,7 +205,7 @@ def _index_vespa_chunk(
         DOC_SUMMARY: chunk.doc_summary,
         EMBEDDINGS: embeddings_name_vector_map,
         TITLE_EMBEDDING: chunk.title_embedding,
-        DOC_UPDATED_AT: _vespa_get_updated_at_attribute(document.doc_updated_at),
+        DOC_UPDATED_AT: vespa_get_updated_at_attribute(document.doc_updated_at),
         PRIMARY_OWNERS: get_experts_stores_representations(document.primary_owners),
         SECONDARY_OWNERS: get_experts_stores_representations(document.secondary_owners),
         # the only `set` vespa has is `weightedset`, so we have to give each
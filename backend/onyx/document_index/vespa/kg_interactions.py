@@ -1,5 +1,5 @@
-from onyx.db.document import get_document_kg_entities_and_relationships
-from onyx.db.document import get_num_chunks_for_document
+from onyx.db.document import get_documents_kg_entities_and_relationships
+from onyx.db.document import get_num_chunks_for_documents
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.document_index.vespa.index import KGUChunkUpdateRequest
 from onyx.document_index.vespa.index import VespaIndex
@@ -34,28 +34,35 @@ def get_kg_vespa_info_update_requests_for_document(
     document_id: str,
 ) -> list[KGUChunkUpdateRequest]:
     """Get the kg_info update requests for a document."""
-    # get all entities and relationships tied to the document
-    with get_session_with_current_tenant() as db_session:
-        entities, relationships = get_document_kg_entities_and_relationships(
-            db_session, document_id
-        )
+    return get_kg_vespa_info_update_requests_for_documents([document_id])[document_id]
 
-    # create the kg vespa info
-    kg_entities = {entity.id_name for entity in entities}
-    kg_relationships = {relationship.id_name for relationship in relationships}
 
-    # get chunks in the document
+def get_kg_vespa_info_update_requests_for_documents(
+    document_ids: list[str],
+) -> dict[str, list[KGUChunkUpdateRequest]]:
+    """Get the kg_info update requests for each of the documents."""
+    # get all entities and relationships tied to the documents, and their chunk counts
     with get_session_with_current_tenant() as db_session:
-        num_chunks = get_num_chunks_for_document(db_session, document_id)
-
-    # get vespa update requests
-    return [
-        KGUChunkUpdateRequest(
-            document_id=document_id,
-            chunk_id=chunk_id,
-            core_entity="unused",
-            entities=kg_entities,
-            relationships=kg_relationships or None,
+        document_kg_info = get_documents_kg_entities_and_relationships(
+            db_session, document_ids
         )
-        for chunk_id in range(num_chunks)
-    ]
+        document_num_chunks = get_num_chunks_for_documents(db_session, document_ids)
+
+    update_requests: dict[str, list[KGUChunkUpdateRequest]] = {}
+    for document_id, (entities, relationships) in document_kg_info.items():
+        # create the kg vespa info
+        kg_entities = {entity.id_name for entity in entities}
+        kg_relationships = {relationship.id_name for relationship in relationships}
+
+        # get vespa update requests
+        update_requests[document_id] = [
+            KGUChunkUpdateRequest(
+                document_id=document_id,
+                chunk_id=chunk_id,
+                core_entity="unused",
+                entities=kg_entities,
+                relationships=kg_relationships or None,
+            )
+            for chunk_id in range(document_num_chunks.get(document_id, 0))
+        ]
+    return update_requests
@@ -1,4 +1,5 @@
 import time
+from typing import Any
 from typing import cast
 
 import httpx
@@ -6,8 +7,14 @@ import httpx
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
+from onyx.configs.app_configs import VESPA_QUERY_POOL_KEEPALIVE_EXPIRY
+from onyx.configs.app_configs import VESPA_QUERY_POOL_MAX_CONNECTIONS
+from onyx.configs.app_configs import VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS
+from onyx.configs.app_configs import VESPA_QUERY_POOL_TIMEOUT
 from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
 from onyx.document_index.vespa_constants import VESPA_APP_CONTAINER_URL
+from onyx.httpx.httpx_pool import AsyncHttpxPool
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -69,6 +76,45 @@ def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx
     )
 
 
+VESPA_QUERY_POOL_NAME = "vespa_query"
+
+
+def _vespa_query_client_kwargs() -> dict[str, Any]:
+    return {
+        "cert": (
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        "verify": MANAGED_VESPA,
+        "timeout": httpx.Timeout(VESPA_REQUEST_TIMEOUT, pool=VESPA_QUERY_POOL_TIMEOUT),
+        "http2": True,
+        "limits": httpx.Limits(
+            max_connections=VESPA_QUERY_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=VESPA_QUERY_POOL_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def get_vespa_query_http_client() -> httpx.Client:
+    """
+    Returns the process-wide pooled HTTP client used for Vespa queries, so that
+    connections are reused across searches instead of being set up per query.
+    The client is shared, do NOT close it or use it as a context manager.
+    """
+    HttpxPool.init_client(name=VESPA_QUERY_POOL_NAME, **_vespa_query_client_kwargs())
+    return HttpxPool.get(VESPA_QUERY_POOL_NAME)
+
+
+def get_vespa_async_query_http_client() -> httpx.AsyncClient:
+    """
+    Async counterpart of get_vespa_query_http_client for use from within an event
+    loop, e.g. FastAPI handlers. The client is shared, do NOT close it.
+    """
+    return AsyncHttpxPool.get(VESPA_QUERY_POOL_NAME, **_vespa_query_client_kwargs())
+
+
 def wait_for_vespa_with_timeout(wait_interval: int = 5, wait_limit: int = 60) -> bool:
     """Waits for Vespa to become ready subject to a timeout.
     Returns True if Vespa is ready, False otherwise."""
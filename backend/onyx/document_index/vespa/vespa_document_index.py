@@ -27,6 +27,13 @@ from onyx.document_index.interfaces_new import DocumentSectionRequest
 from onyx.document_index.interfaces_new import IndexingMetadata
 from onyx.document_index.interfaces_new import MetadataUpdateRequest
 from onyx.document_index.interfaces_new import TenantState
+from onyx.document_index.vespa.chunk_retrieval import (
+    async_batch_search_api_retrieval,
+)
+from onyx.document_index.vespa.chunk_retrieval import (
+    async_parallel_visit_api_retrieval,
+)
+from onyx.document_index.vespa.chunk_retrieval import async_query_vespa
 from onyx.document_index.vespa.chunk_retrieval import batch_search_api_retrieval
 from onyx.document_index.vespa.chunk_retrieval import (
     parallel_visit_api_retrieval,
@@ -39,6 +46,7 @@ from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_exist
 from onyx.document_index.vespa.indexing_utils import clean_chunk_id_copy
 from onyx.document_index.vespa.indexing_utils import GlobalHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import TemporaryHTTPXClientContext
+from onyx.document_index.vespa.indexing_utils import vespa_get_updated_at_attribute
 from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
@@ -175,6 +183,10 @@ def _update_single_chunk(
         model_config = {"frozen": True}
         assign: list[int]
 
+    class _DocUpdatedAt(BaseModel):
+        model_config = {"frozen": True}
+        assign: int
+
     class _VespaPutFields(BaseModel):
         model_config = {"frozen": True}
         # The names of these fields are based the Vespa schema. Changes to the
@@ -185,6 +197,7 @@ def _update_single_chunk(
         access_control_list: _AccessControl | None = None
         hidden: _Hidden | None = None
         user_project: _UserProjects | None = None
+        doc_updated_at: _DocUpdatedAt | None = None
 
     class _VespaPutRequest(BaseModel):
         model_config = {"frozen": True}
@@ -220,12 +233,18 @@ def _update_single_chunk(
         else None
     )
 
+    updated_at = vespa_get_updated_at_attribute(update_request.doc_updated_at)
+    doc_updated_at_update: _DocUpdatedAt | None = (
+        _DocUpdatedAt(assign=updated_at) if updated_at is not None else None
+    )
+
     vespa_put_fields = _VespaPutFields(
         boost=boost_update,
         document_sets=document_sets_update,
         access_control_list=access_update,
         hidden=hidden_update,
         user_project=user_projects_update,
+        doc_updated_at=doc_updated_at_update,
     )
 
     vespa_put_request = _VespaPutRequest(
@@ -461,7 +480,11 @@ class VespaDocumentIndex(DocumentIndex):
         # on connectors that are still indexing, and therefore do not yet have a
         # chunk count because update_docs_chunk_count__no_commit has not been
         # run yet.
-        with self._httpx_client_context as httpx_client:
+        with (
+            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
+            self._httpx_client_context as httpx_client,
+        ):
+            chunk_updates: list[tuple[UUID, str, MetadataUpdateRequest]] = []
             # Each invocation of this method can contain multiple update requests.
             for update_request in update_requests:
                 # Each update request can correspond to multiple documents.
@@ -482,28 +505,37 @@ class VespaDocumentIndex(DocumentIndex):
                         tenant_id=self._tenant_id,
                         large_chunks_enabled=self._large_chunks_enabled,
                     )
+                    # NOTE: The raw doc ID is used only for logging.
+                    chunk_updates.extend(
+                        (doc_chunk_id, doc_id, update_request)
+                        for doc_chunk_id in doc_chunk_ids
+                    )
 
-                    for doc_chunk_id in doc_chunk_ids:
-                        _update_single_chunk(
-                            doc_chunk_id,
-                            self._index_name,
-                            # NOTE: Used only for logging, raw ID is ok here.
-                            doc_id,
-                            httpx_client,
-                            update_request,
-                        )
-
-                    logger.info(
-                        f"Updated {len(doc_chunk_ids)} chunks for document {doc_id}."
+            # Chunks of all documents in this call are updated concurrently.
+            for chunk_update_batch in batch_generator(chunk_updates, BATCH_SIZE):
+                futures = [
+                    executor.submit(
+                        _update_single_chunk,
+                        doc_chunk_id,
+                        self._index_name,
+                        doc_id,
+                        httpx_client,
+                        update_request,
                     )
+                    for doc_chunk_id, doc_id, update_request in chunk_update_batch
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+
+        logger.info(
+            f"Updated {len(chunk_updates)} chunks for "
+            f"{sum(len(update_request.document_ids) for update_request in update_requests)} documents."
+        )
 
-    def id_based_retrieval(
-        self,
-        chunk_requests: list[DocumentSectionRequest],
-        filters: IndexFilters,
-        batch_retrieval: bool = False,
-    ) -> list[InferenceChunk]:
-        sanitized_chunk_requests = [
+    def _sanitize_chunk_requests(
+        self, chunk_requests: list[DocumentSectionRequest]
+    ) -> list[VespaChunkRequest]:
+        return [
             VespaChunkRequest(
                 document_id=replace_invalid_doc_id_characters(
                     chunk_request.document_id
@@ -514,6 +546,14 @@ class VespaDocumentIndex(DocumentIndex):
             for chunk_request in chunk_requests
         ]
 
+    def id_based_retrieval(
+        self,
+        chunk_requests: list[DocumentSectionRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+    ) -> list[InferenceChunk]:
+        sanitized_chunk_requests = self._sanitize_chunk_requests(chunk_requests)
+
         if batch_retrieval:
             return cleanup_content_for_chunks(
                 batch_search_api_retrieval(
@@ -536,7 +576,33 @@ class VespaDocumentIndex(DocumentIndex):
             )
         )
 
-    def hybrid_retrieval(
+    async def async_id_based_retrieval(
+        self,
+        chunk_requests: list[DocumentSectionRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+    ) -> list[InferenceChunk]:
+        sanitized_chunk_requests = self._sanitize_chunk_requests(chunk_requests)
+
+        if batch_retrieval:
+            return cleanup_content_for_chunks(
+                await async_batch_search_api_retrieval(
+                    index_name=self._index_name,
+                    chunk_requests=sanitized_chunk_requests,
+                    filters=filters,
+                    get_large_chunks=False,
+                )
+            )
+        return cleanup_content_for_chunks(
+            await async_parallel_visit_api_retrieval(
+                index_name=self._index_name,
+                chunk_requests=sanitized_chunk_requests,
+                filters=filters,
+                get_large_chunks=False,
+            )
+        )
+
+    def _build_hybrid_query_params(
         self,
         query: str,
         query_embedding: Embedding,
@@ -544,8 +610,8 @@ class VespaDocumentIndex(DocumentIndex):
         query_type: QueryType,
         filters: IndexFilters,
         num_to_retrieve: int,
-        offset: int = 0,
-    ) -> list[InferenceChunk]:
+        offset: int,
+    ) -> dict[str, str | int | float]:
         vespa_where_clauses = build_vespa_filters(filters)
         # Needs to be at least as much as the rerank-count value set in the
         # Vespa schema config. Otherwise we would be getting fewer results than
@@ -595,8 +661,50 @@ class VespaDocumentIndex(DocumentIndex):
             "timeout": VESPA_TIMEOUT,
         }
 
+        return params
+
+    def hybrid_retrieval(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        final_keywords: list[str] | None,
+        query_type: QueryType,
+        filters: IndexFilters,
+        num_to_retrieve: int,
+        offset: int = 0,
+    ) -> list[InferenceChunk]:
+        params = self._build_hybrid_query_params(
+            query,
+            query_embedding,
+            final_keywords,
+            query_type,
+            filters,
+            num_to_retrieve,
+            offset,
+        )
         return cleanup_content_for_chunks(query_vespa(params))
 
+    async def async_hybrid_retrieval(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        final_keywords: list[str] | None,
+        query_type: QueryType,
+        filters: IndexFilters,
+        num_to_retrieve: int,
+        offset: int = 0,
+    ) -> list[InferenceChunk]:
+        params = self._build_hybrid_query_params(
+            query,
+            query_embedding,
+            final_keywords,
+            query_type,
+            filters,
+            num_to_retrieve,
+            offset,
+        )
+        return cleanup_content_for_chunks(await async_query_vespa(params))
+
     def random_retrieval(
         self,
         filters: IndexFilters,
@@ -1,2 +1,4 @@
 MAX_IN_MEMORY_SIZE = 30 * 1024 * 1024  # 30MB
 STANDARD_CHUNK_SIZE = 10 * 1024 * 1024  # 10MB chunks
+# Minimum amount fetched at a time when streaming a file from the file store
+STREAM_READ_AHEAD_SIZE = 8 * 1024 * 1024  # 8MB
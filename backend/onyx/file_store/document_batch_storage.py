@@ -1,14 +1,19 @@
+import gzip
 import json
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Iterator
 from enum import Enum
+from io import BytesIO
 from io import StringIO
+from typing import IO
 from typing import List
 from typing import Optional
 from typing import TypeAlias
 
 from pydantic import BaseModel
 
+from onyx.configs.app_configs import DOCUMENT_BATCH_STORAGE_FORMAT
 from onyx.configs.constants import FileOrigin
 from onyx.connectors.models import DocExtractionContext
 from onyx.connectors.models import DocIndexingContext
@@ -33,6 +38,27 @@ STATE_TYPE_TO_MODEL: dict[str, type[DocumentStorageState]] = {
 }
 
 
+class DocumentBatchStorageFormat(str, Enum):
+    # a single pretty-printed JSON array
+    JSON = "json"
+    # one JSON document per line, gzip compressed
+    JSONL_GZIP = "jsonl_gz"
+
+
+BATCH_FORMAT_TO_FILE_EXTENSION: dict[DocumentBatchStorageFormat, str] = {
+    DocumentBatchStorageFormat.JSON: "json",
+    DocumentBatchStorageFormat.JSONL_GZIP: "jsonl.gz",
+}
+
+BATCH_FORMAT_TO_FILE_TYPE: dict[DocumentBatchStorageFormat, str] = {
+    DocumentBatchStorageFormat.JSON: "application/json",
+    DocumentBatchStorageFormat.JSONL_GZIP: "application/gzip",
+}
+
+# Favors speed over ratio, batches are short-lived
+_JSONL_GZIP_COMPRESS_LEVEL = 3
+
+
 class BatchStoragePathInfo(BaseModel):
     cc_pair_id: int
     index_attempt_id: int
@@ -93,6 +119,27 @@ class DocumentBatchStorage(ABC):
         doc_dicts = json.loads(data)
         return [Document.model_validate(doc_dict) for doc_dict in doc_dicts]
 
+    def _serialize_documents_jsonl_gzip(self, documents: list[Document]) -> bytes:
+        """Serialize documents to gzip compressed JSON lines."""
+        buffer = BytesIO()
+        with gzip.GzipFile(
+            fileobj=buffer, mode="wb", compresslevel=_JSONL_GZIP_COMPRESS_LEVEL
+        ) as gzip_file:
+            for doc in documents:
+                gzip_file.write(doc.model_dump_json().encode("utf-8"))
+                gzip_file.write(b"\n")
+        return buffer.getvalue()
+
+    def _iter_deserialize_documents_jsonl_gzip(
+        self, content: IO[bytes]
+    ) -> Iterator[Document]:
+        """Lazily deserialize documents from gzip compressed JSON lines, so only
+        one decompressed document is held in memory at a time."""
+        with gzip.GzipFile(fileobj=content, mode="rb") as gzip_file:
+            for line in gzip_file:
+                if line.strip():
+                    yield Document.model_validate_json(line)
+
     def _per_cc_pair_base_path(self) -> str:
         """Get the base path for the cc pair."""
         return f"iab/{self.cc_pair_id}"
@@ -101,27 +148,65 @@ class DocumentBatchStorage(ABC):
 class FileStoreDocumentBatchStorage(DocumentBatchStorage):
     """FileStore-based implementation of document batch storage."""
 
-    def __init__(self, cc_pair_id: int, index_attempt_id: int, file_store: FileStore):
+    def __init__(
+        self,
+        cc_pair_id: int,
+        index_attempt_id: int,
+        file_store: FileStore,
+        storage_format: DocumentBatchStorageFormat = DocumentBatchStorageFormat.JSON,
+    ):
         super().__init__(cc_pair_id, index_attempt_id)
         self.file_store = file_store
+        self.storage_format = storage_format
 
-    def _get_batch_file_name(self, batch_num: int) -> str:
+    def _get_batch_file_name(
+        self,
+        batch_num: int,
+        storage_format: DocumentBatchStorageFormat | None = None,
+    ) -> str:
         """Generate file name for a document batch."""
-        return f"{self.base_path}/{batch_num}.json"
+        extension = BATCH_FORMAT_TO_FILE_EXTENSION[
+            storage_format or self.storage_format
+        ]
+        return f"{self.base_path}/{batch_num}.{extension}"
+
+    def _find_stored_batch(
+        self, batch_num: int
+    ) -> tuple[str, DocumentBatchStorageFormat] | None:
+        """Finds a stored batch, batches written before a format change are still
+        found under their original format."""
+        # check the configured format first, it's the one almost always used
+        storage_formats = [self.storage_format] + [
+            storage_format
+            for storage_format in DocumentBatchStorageFormat
+            if storage_format != self.storage_format
+        ]
+        for storage_format in storage_formats:
+            file_name = self._get_batch_file_name(batch_num, storage_format)
+            if self.file_store.has_file(
+                file_id=file_name,
+                file_origin=FileOrigin.OTHER,
+                file_type=BATCH_FORMAT_TO_FILE_TYPE[storage_format],
+            ):
+                return file_name, storage_format
+        return None
 
     def store_batch(self, batch_num: int, documents: list[Document]) -> None:
         """Store a batch of documents using FileStore."""
         file_name = self._get_batch_file_name(batch_num)
         try:
-            data = self._serialize_documents(documents)
-            content = StringIO(data)
+            content: IO
+            if self.storage_format == DocumentBatchStorageFormat.JSONL_GZIP:
+                content = BytesIO(self._serialize_documents_jsonl_gzip(documents))
+            else:
+                content = StringIO(self._serialize_documents(documents))
 
             self.file_store.save_file(
                 file_id=file_name,
                 content=content,
                 display_name=f"Document Batch {batch_num}",
                 file_origin=FileOrigin.OTHER,
-                file_type="application/json",
+                file_type=BATCH_FORMAT_TO_FILE_TYPE[self.storage_format],
                 file_metadata={
                     "batch_num": batch_num,
                     "document_count": str(len(documents)),
@@ -137,23 +222,31 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
 
     def get_batch(self, batch_num: int) -> list[Document] | None:
         """Retrieve a batch of documents from FileStore."""
-        file_name = self._get_batch_file_name(batch_num)
         try:
             # Check if file exists
-            if not self.file_store.has_file(
-                file_id=file_name,
-                file_origin=FileOrigin.OTHER,
-                file_type="application/json",
-            ):
+            stored_batch = self._find_stored_batch(batch_num)
+            if stored_batch is None:
                 logger.warning(
-                    f"Batch {batch_num} not found in FileStore with name {file_name}"
+                    f"Batch {batch_num} not found in FileStore with name "
+                    f"{self._get_batch_file_name(batch_num)}"
                 )
                 return None
 
-            content_io = self.file_store.read_file(file_name)
-            data = content_io.read().decode("utf-8")
+            file_name, storage_format = stored_batch
+            if storage_format == DocumentBatchStorageFormat.JSONL_GZIP:
+                # spool to disk rather than memory, only the decoded documents
+                # need to be held in memory
+                with self.file_store.read_file(
+                    file_name, use_tempfile=True
+                ) as content_io:
+                    documents = list(
+                        self._iter_deserialize_documents_jsonl_gzip(content_io)
+                    )
+            else:
+                content_io = self.file_store.read_file(file_name)
+                data = content_io.read().decode("utf-8")
+                documents = self._deserialize_documents(data)
 
-            documents = self._deserialize_documents(data)
             logger.debug(
                 f"Retrieved batch {batch_num} with {len(documents)} documents from FileStore"
             )
@@ -169,7 +262,12 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
 
     def delete_batch_by_num(self, batch_num: int) -> None:
         """Delete a specific batch from FileStore."""
-        batch_file_name = self._get_batch_file_name(batch_num)
+        stored_batch = self._find_stored_batch(batch_num)
+        batch_file_name = (
+            stored_batch[0]
+            if stored_batch is not None
+            else self._get_batch_file_name(batch_num)
+        )
         self.delete_batch_by_name(batch_file_name)
         logger.debug(f"Deleted batch num {batch_num} {batch_file_name} from FileStore")
 
@@ -200,7 +298,18 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
                     f"Could not extract path info from batch file: {batch_file_name}"
                 )
                 continue
-            new_batch_file_name = self._get_batch_file_name(path_info.batch_num)
+            # keep the format the batch was stored in
+            storage_format = next(
+                (
+                    storage_format
+                    for storage_format, extension in BATCH_FORMAT_TO_FILE_EXTENSION.items()
+                    if batch_file_name.endswith(f".{extension}")
+                ),
+                DocumentBatchStorageFormat.JSON,
+            )
+            new_batch_file_name = self._get_batch_file_name(
+                path_info.batch_num, storage_format
+            )
             self.file_store.change_file_id(batch_file_name, new_batch_file_name)
 
     def extract_path_info(self, path: str) -> BatchStoragePathInfo | None:
@@ -214,7 +323,7 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
             return BatchStoragePathInfo(
                 cc_pair_id=int(cc_pair_id),
                 index_attempt_id=int(index_attempt_id),
-                batch_num=int(batch_num.split(".")[0]),  # remove .json
+                batch_num=int(batch_num.split(".")[0]),  # remove .json / .jsonl.gz
             )
         except Exception as e:
             logger.error(f"Failed to extract path info from {path}: {e}")
@@ -228,4 +337,14 @@ def get_document_batch_storage(
     # The get_default_file_store will now correctly use S3BackedFileStore
     # or other configured stores based on environment variables
     file_store = get_default_file_store()
-    return FileStoreDocumentBatchStorage(cc_pair_id, index_attempt_id, file_store)
+    try:
+        storage_format = DocumentBatchStorageFormat(DOCUMENT_BATCH_STORAGE_FORMAT)
+    except ValueError:
+        logger.warning(
+            f"Unknown DOCUMENT_BATCH_STORAGE_FORMAT {DOCUMENT_BATCH_STORAGE_FORMAT}, "
+            "falling back to json"
+        )
+        storage_format = DocumentBatchStorageFormat.JSON
+    return FileStoreDocumentBatchStorage(
+        cc_pair_id, index_attempt_id, file_store, storage_format
+    )
@@ -1,4 +1,5 @@
 import hashlib
+import io
 import tempfile
 import uuid
 from abc import ABC
@@ -36,6 +37,7 @@ from onyx.db.file_record import upsert_filerecord
 from onyx.db.models import FileRecord
 from onyx.db.models import FileRecord as FileStoreModel
 from onyx.file_store.s3_key_utils import generate_s3_key
+from onyx.file_store.streaming import RangeReadStream
 from onyx.utils.file import FileWithMimeType
 from onyx.utils.logger import setup_logger
 from shared_configs.contextvars import get_current_tenant_id
@@ -120,6 +122,17 @@ class FileStore(ABC):
             Contents of the file and metadata dict
         """
 
+    @abstractmethod
+    def open_stream(self, file_id: str) -> IO[bytes]:
+        """
+        Open the content of a given file by the ID as a lazy, seekable binary stream.
+        Unlike `read_file`, the file is fetched in ranges as it is read, so only a
+        bounded part of it is held in memory or written to disk.
+
+        Parameters:
+        - file_id: Unique ID of file to open
+        """
+
     @abstractmethod
     def read_file_record(self, file_id: str) -> FileStoreModel:
         """
@@ -422,6 +435,36 @@ class S3BackedFileStore(FileStore):
             file_content = response["Body"].read()
             return BytesIO(file_content)
 
+    def open_stream(self, file_id: str, db_session: Session | None = None) -> IO[bytes]:
+        with get_session_with_current_tenant_if_none(db_session) as db_session:
+            file_record = get_filerecord_by_file_id(
+                file_id=file_id, db_session=db_session
+            )
+
+        s3_client = self._get_s3_client()
+        bucket_name = file_record.bucket_name
+        object_key = file_record.object_key
+        try:
+            head = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        except ClientError:
+            logger.error(f"Failed to open file {file_id} from S3")
+            raise
+        etag = head["ETag"]
+
+        def _read_range(start: int, end: int) -> bytes:
+            # fails rather than mixing two versions if the file is overwritten
+            response = s3_client.get_object(
+                Bucket=bucket_name,
+                Key=object_key,
+                Range=f"bytes={start}-{end - 1}",
+                IfMatch=etag,
+            )
+            return response["Body"].read()
+
+        return io.BufferedReader(
+            RangeReadStream(size=head["ContentLength"], read_range=_read_range)
+        )
+
     def read_file_record(
         self, file_id: str, db_session: Session | None = None
     ) -> FileStoreModel:
@@ -0,0 +1,120 @@
+import io
+from collections.abc import Callable
+
+from onyx.file_store.constants import STREAM_READ_AHEAD_SIZE
+
+
+class RangeReadStream(io.RawIOBase):
+    """A lazy, seekable, read-only stream over a stored file.
+
+    Bytes are fetched with `read_range(start, end)` (end exclusive) only when they are
+    read. Each fetch reads at least `read_ahead_size` bytes, and only the last fetched
+    range is kept in memory, so reading a file of any size takes bounded memory as long
+    as the caller doesn't read it all at once. `on_close` releases whatever
+    `read_range` reads from, it is called once when the stream is closed.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        read_range: Callable[[int, int], bytes],
+        read_ahead_size: int = STREAM_READ_AHEAD_SIZE,
+        on_close: Callable[[], None] | None = None,
+    ) -> None:
+        super().__init__()
+        self._size = size
+        self._read_range = read_range
+        self._on_close = on_close
+        self._read_ahead_size = read_ahead_size
+        self._position = 0
+        self._buffer = b""
+        self._buffer_start = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        self._check_not_closed()
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_not_closed()
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position: {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        self._check_not_closed()
+        view = memoryview(buffer).cast("B")
+        if not len(view) or self._position >= self._size:
+            return 0
+
+        offset = self._position - self._buffer_start
+        if not 0 <= offset < len(self._buffer):
+            end = min(
+                self._size, self._position + max(len(view), self._read_ahead_size)
+            )
+            self._buffer = self._fetch(self._position, end)
+            self._buffer_start = self._position
+            offset = 0
+
+        num_bytes = min(len(view), len(self._buffer) - offset)
+        view[:num_bytes] = memoryview(self._buffer)[offset : offset + num_bytes]
+        self._position += num_bytes
+        return num_bytes
+
+    def readall(self) -> bytes:
+        # fetch the rest in one go rather than in read ahead sized ranges
+        self._check_not_closed()
+        if self._position >= self._size:
+            return b""
+
+        offset = self._position - self._buffer_start
+        if 0 <= offset < len(self._buffer):
+            data = self._buffer[offset:]
+            if self._buffer_start + len(self._buffer) < self._size:
+                data += self._fetch(self._buffer_start + len(self._buffer), self._size)
+        else:
+            data = self._fetch(self._position, self._size)
+
+        self._position = self._size
+        return data
+
+    def close(self) -> None:
+        self._buffer = b""
+        on_close, self._on_close = self._on_close, None
+        try:
+            if on_close is not None:
+                on_close()
+        finally:
+            super().close()
+
+    def _fetch(self, start: int, end: int) -> bytes:
+        data = self._read_range(start, end)
+        if len(data) != end - start:
+            raise IOError(
+                f"Expected {end - start} bytes at offset {start}, got {len(data)}. "
+                "The file may have changed while it was being read."
+            )
+        return data
+
+    def _check_not_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
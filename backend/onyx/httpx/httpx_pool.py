@@ -1,7 +1,44 @@
+import asyncio
 import threading
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
 from typing import Any
 
+import httpcore
 import httpx
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+# Pool level metrics, labeled by pool name, used to size the pools per pod
+POOL_CONNECTIONS_GAUGE = Gauge(
+    "onyx_httpx_pool_connections",
+    "Open connections of an httpx pool, sampled when a request is sent",
+    ["pool", "state"],
+)
+POOL_REQUESTS_IN_FLIGHT_GAUGE = Gauge(
+    "onyx_httpx_pool_requests_in_flight",
+    "Requests currently being sent through an httpx pool",
+    ["pool"],
+)
+POOL_WAIT_SECONDS_HISTOGRAM = Histogram(
+    "onyx_httpx_pool_wait_seconds",
+    "Time a request waited for a connection from an httpx pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Arguments of httpx.Client that configure its transport
+_TRANSPORT_KWARGS = ("verify", "cert", "trust_env", "http1", "http2", "limits")
+
+# httpcore trace events marking that a request got hold of a connection, either by
+# starting to open a new one or by sending its headers over an existing one
+_CONNECTION_ACQUIRED_EVENTS = (
+    "connection.connect_tcp.started",
+    "connection.connect_unix_socket.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
 
 
 def make_default_kwargs() -> dict[str, Any]:
@@ -11,6 +48,97 @@ def make_default_kwargs() -> dict[str, Any]:
     }
 
 
+def _split_transport_kwargs(
+    kwargs: dict[str, Any],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    merged_kwargs = {**(make_default_kwargs()), **kwargs}
+    transport_kwargs = {
+        key: merged_kwargs.pop(key) for key in _TRANSPORT_KWARGS if key in merged_kwargs
+    }
+    return merged_kwargs, transport_kwargs
+
+
+def _record_connections(
+    pool_name: str,
+    connections: (
+        list[httpcore.ConnectionInterface] | list[httpcore.AsyncConnectionInterface]
+    ),
+) -> None:
+    idle = sum(1 for connection in connections if connection.is_idle())
+    POOL_CONNECTIONS_GAUGE.labels(pool=pool_name, state="in_use").set(
+        len(connections) - idle
+    )
+    POOL_CONNECTIONS_GAUGE.labels(pool=pool_name, state="idle").set(idle)
+
+
+class InstrumentedHTTPTransport(httpx.HTTPTransport):
+    """HTTPTransport that reports connection usage and pool wait time."""
+
+    def __init__(self, pool_name: str, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.pool_name = pool_name
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        acquired_at: list[float] = []
+        outer_trace: Callable[[str, dict], None] | None = request.extensions.get(
+            "trace"
+        )
+
+        def trace(event_name: str, info: dict) -> None:
+            if not acquired_at and event_name in _CONNECTION_ACQUIRED_EVENTS:
+                acquired_at.append(time.monotonic())
+            if outer_trace:
+                outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        _record_connections(self.pool_name, self._pool.connections)
+        in_flight = POOL_REQUESTS_IN_FLIGHT_GAUGE.labels(pool=self.pool_name)
+        in_flight.inc()
+        try:
+            return super().handle_request(request)
+        finally:
+            in_flight.dec()
+            if acquired_at:
+                POOL_WAIT_SECONDS_HISTOGRAM.labels(pool=self.pool_name).observe(
+                    acquired_at[0] - start
+                )
+
+
+class InstrumentedAsyncHTTPTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that reports connection usage and pool wait time."""
+
+    def __init__(self, pool_name: str, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.pool_name = pool_name
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        acquired_at: list[float] = []
+        outer_trace: Callable[[str, dict], Awaitable[None]] | None = (
+            request.extensions.get("trace")
+        )
+
+        async def trace(event_name: str, info: dict) -> None:
+            if not acquired_at and event_name in _CONNECTION_ACQUIRED_EVENTS:
+                acquired_at.append(time.monotonic())
+            if outer_trace:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        _record_connections(self.pool_name, self._pool.connections)
+        in_flight = POOL_REQUESTS_IN_FLIGHT_GAUGE.labels(pool=self.pool_name)
+        in_flight.inc()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            in_flight.dec()
+            if acquired_at:
+                POOL_WAIT_SECONDS_HISTOGRAM.labels(pool=self.pool_name).observe(
+                    acquired_at[0] - start
+                )
+
+
 class HttpxPool:
     """Class to manage a global httpx Client instance"""
 
@@ -23,17 +151,20 @@ class HttpxPool:
         pass
 
     @classmethod
-    def _init_client(cls, **kwargs: Any) -> httpx.Client:
+    def _init_client(cls, name: str, **kwargs: Any) -> httpx.Client:
         """Private helper method to create and return an httpx.Client."""
-        merged_kwargs = {**(make_default_kwargs()), **kwargs}
-        return httpx.Client(**merged_kwargs)
+        client_kwargs, transport_kwargs = _split_transport_kwargs(kwargs)
+        return httpx.Client(
+            transport=InstrumentedHTTPTransport(name, **transport_kwargs),
+            **client_kwargs,
+        )
 
     @classmethod
     def init_client(cls, name: str, **kwargs: Any) -> None:
         """Allow the caller to init the client with extra params."""
         with cls._lock:
             if name not in cls._clients:
-                cls._clients[name] = cls._init_client(**kwargs)
+                cls._clients[name] = cls._init_client(name, **kwargs)
 
     @classmethod
     def close_client(cls, name: str) -> None:
@@ -56,5 +187,45 @@ class HttpxPool:
         """Gets the httpx.Client. Will init to default settings if not init'd."""
         with cls._lock:
             if name not in cls._clients:
-                cls._clients[name] = cls._init_client()
+                cls._clients[name] = cls._init_client(name)
             return cls._clients[name]
+
+
+class AsyncHttpxPool:
+    """Class to manage global httpx AsyncClient instances.
+
+    Async connections are bound to the event loop they were opened on, so clients are
+    kept per event loop. Only use from within a running event loop.
+    """
+
+    _clients: dict[tuple[str, asyncio.AbstractEventLoop], httpx.AsyncClient] = {}
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str, **kwargs: Any) -> httpx.AsyncClient:
+        """Gets the httpx.AsyncClient for the running event loop, creating it with
+        the given params on first use."""
+        key = (name, asyncio.get_running_loop())
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is None or client.is_closed:
+                # drop clients of loops that are gone, e.g. from earlier asyncio.run
+                for stale_key in [k for k in cls._clients if k[1].is_closed()]:
+                    del cls._clients[stale_key]
+                client_kwargs, transport_kwargs = _split_transport_kwargs(kwargs)
+                client = httpx.AsyncClient(
+                    transport=InstrumentedAsyncHTTPTransport(name, **transport_kwargs),
+                    **client_kwargs,
+                )
+                cls._clients[key] = client
+            return client
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close all registered clients of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            keys = [key for key in cls._clients if key[1] is loop]
+            clients = [cls._clients.pop(key) for key in keys]
+        for client in clients:
+            await client.aclose()
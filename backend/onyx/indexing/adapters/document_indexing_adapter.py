@@ -10,9 +10,11 @@ from onyx.configs.constants import DEFAULT_BOOST
 from onyx.connectors.models import Document
 from onyx.connectors.models import IndexAttemptMetadata
 from onyx.db.chunk import update_chunk_boost_components__no_commit
+from onyx.db.document import fetch_chunk_content_hashes_for_documents
 from onyx.db.document import fetch_chunk_counts_for_documents
 from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from onyx.db.document import prepare_to_modify_documents
+from onyx.db.document import update_docs_chunk_content_hashes__no_commit
 from onyx.db.document import update_docs_chunk_count__no_commit
 from onyx.db.document import update_docs_last_modified__no_commit
 from onyx.db.document import update_docs_updated_at__no_commit
@@ -41,12 +43,15 @@ class DocumentIndexingBatchAdapter:
         credential_id: int,
         tenant_id: str,
         index_attempt_metadata: IndexAttemptMetadata,
+        skip_unchanged_chunks: bool = True,
     ):
         self.db_session = db_session
         self.connector_id = connector_id
         self.credential_id = credential_id
         self.tenant_id = tenant_id
         self.index_attempt_metadata = index_attempt_metadata
+        # when False, all chunks are embedded and written even if they did not change
+        self.skip_unchanged_chunks = skip_unchanged_chunks
 
     def prepare(
         self, documents: list[Document], ignore_time_skip: bool
@@ -57,6 +62,7 @@ class DocumentIndexingBatchAdapter:
             index_attempt_metadata=self.index_attempt_metadata,
             db_session=self.db_session,
             ignore_time_skip=ignore_time_skip,
+            skip_unchanged_chunks=self.skip_unchanged_chunks,
         )
 
         if not context:
@@ -102,6 +108,19 @@ class DocumentIndexingBatchAdapter:
 
         updatable_ids = [doc.id for doc in context.updatable_docs]
 
+        concurrently_indexed_doc_ids: list[str] = []
+        if context.unchanged_chunk_counts:
+            # The hashes were cleared when preparing the batch. If they are set again,
+            # another indexing of these documents got in between and the chunks left
+            # in place may not be the ones that were compared against, so they have
+            # to be written after all.
+            concurrently_indexed_doc_ids = list(
+                fetch_chunk_content_hashes_for_documents(
+                    document_ids=list(context.unchanged_chunk_counts.keys()),
+                    db_session=self.db_session,
+                ).keys()
+            )
+
         doc_id_to_access_info = get_access_for_documents(
             document_ids=updatable_ids, db_session=self.db_session
         )
@@ -128,6 +147,12 @@ class DocumentIndexingBatchAdapter:
                     if chunk.source_document.id == document_id
                 ]
             )
+            # chunks left in place in the document index
+            + (
+                context.unchanged_chunk_counts.get(document_id, 0)
+                if document_id not in concurrently_indexed_doc_ids
+                else 0
+            )
             for document_id in updatable_ids
         }
 
@@ -156,6 +181,7 @@ class DocumentIndexingBatchAdapter:
             doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
             user_file_id_to_raw_text={},
             user_file_id_to_token_count={},
+            concurrently_indexed_doc_ids=concurrently_indexed_doc_ids,
         )
 
     def post_index(
@@ -191,6 +217,12 @@ class DocumentIndexingBatchAdapter:
             db_session=self.db_session,
         )
 
+        if context.chunk_content_hashes:
+            update_docs_chunk_content_hashes__no_commit(
+                doc_id_to_chunk_content_hashes=context.chunk_content_hashes,
+                db_session=self.db_session,
+            )
+
         # these documents can now be counted as part of the CC Pairs
         # document count, so we need to mark them as indexed
         # NOTE: even documents we skipped since they were already up
@@ -0,0 +1,140 @@
+"""Content hashes of indexed chunks, used to skip re-embedding and re-writing the
+chunks of an updated document that did not change.
+
+A chunk's hash covers everything the document index stores for it, except for the
+embeddings, which follow from the hashed text, and the fields that are kept up to date
+with partial updates: access, document sets and boosts through the metadata sync, and
+the document update time by the indexing pipeline. Chunks are compared with the hash
+stored at the same position, the chunk ID being part of the hash.
+
+With contextual RAG, a chunk also stores a summary of its whole document, so the hash of
+such a chunk covers the text of the whole document.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+
+from onyx.connectors.cross_connector_utils.miscellaneous_utils import (
+    get_experts_stores_representations,
+)
+from onyx.connectors.models import Document
+from onyx.indexing.models import DocAwareChunk
+
+
+@dataclass
+class ChunkChanges:
+    changed_chunks: list[DocAwareChunk]
+    unchanged_chunks: list[DocAwareChunk]
+    # hashes of all of the chunks of each document, in chunk order
+    doc_id_to_chunk_content_hashes: dict[str, list[str]]
+    doc_id_to_unchanged_chunk_cnt: dict[str, int]
+
+
+def _hash(value: object) -> str:
+    return hashlib.blake2b(
+        json.dumps(value, sort_keys=True).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+def _get_document_text_hash(document: Document) -> str:
+    return _hash([section.text for section in document.sections])
+
+
+def get_chunk_content_hash(
+    chunk: DocAwareChunk,
+    index_name: str,
+    document_text_hash: str | None = None,
+) -> str:
+    document = chunk.source_document
+    if chunk.contextual_rag_reserved_tokens and document_text_hash is None:
+        document_text_hash = _get_document_text_hash(document)
+
+    hashed_fields = {
+        # chunks of different indices (e.g. embedding models) never match
+        "index_name": index_name,
+        "chunk_id": chunk.chunk_id,
+        "blurb": chunk.blurb,
+        "content": chunk.content,
+        "source_links": chunk.source_links,
+        "image_file_id": chunk.image_file_id,
+        "section_continuation": chunk.section_continuation,
+        "title_prefix": chunk.title_prefix,
+        "metadata_suffix_semantic": chunk.metadata_suffix_semantic,
+        "metadata_suffix_keyword": chunk.metadata_suffix_keyword,
+        # contextual RAG runs after the comparison, this changes when it is toggled
+        "contextual_rag_reserved_tokens": chunk.contextual_rag_reserved_tokens,
+        "mini_chunk_texts": chunk.mini_chunk_texts,
+        "large_chunk_id": chunk.large_chunk_id,
+        "large_chunk_reference_ids": chunk.large_chunk_reference_ids,
+        "document_id": document.id,
+        "title": document.get_title_for_document_index(),
+        "semantic_identifier": document.semantic_identifier,
+        "source": document.source.value,
+        "metadata": document.metadata,
+        "primary_owners": get_experts_stores_representations(document.primary_owners),
+        "secondary_owners": get_experts_stores_representations(
+            document.secondary_owners
+        ),
+        # the update time can be set with a partial update, but not unset
+        "has_updated_at": document.doc_updated_at is not None,
+        # the contextual RAG summary and context depend on the whole document
+        "document_text": (
+            document_text_hash if chunk.contextual_rag_reserved_tokens else None
+        ),
+    }
+    return _hash(hashed_fields)
+
+
+def find_changed_chunks(
+    chunks: list[DocAwareChunk],
+    document_ids: list[str],
+    previous_chunk_content_hashes: dict[str, list[str]],
+    index_name: str,
+) -> ChunkChanges:
+    """Hashes the chunks of the documents and drops the ones whose hash matches the
+    previous hash at the same position of their document."""
+    doc_id_to_chunk_content_hashes: dict[str, list[str]] = {
+        document_id: [] for document_id in document_ids
+    }
+    doc_id_to_unchanged_chunk_cnt: dict[str, int] = defaultdict(int)
+    doc_id_to_text_hash: dict[str, str] = {}
+    changed_chunks: list[DocAwareChunk] = []
+    unchanged_chunks: list[DocAwareChunk] = []
+    for chunk in chunks:
+        document_id = chunk.source_document.id
+        chunk_content_hashes = doc_id_to_chunk_content_hashes.setdefault(
+            document_id, []
+        )
+        previous_hashes = previous_chunk_content_hashes.get(document_id, [])
+
+        document_text_hash: str | None = None
+        if chunk.contextual_rag_reserved_tokens:
+            if document_id not in doc_id_to_text_hash:
+                doc_id_to_text_hash[document_id] = _get_document_text_hash(
+                    chunk.source_document
+                )
+            document_text_hash = doc_id_to_text_hash[document_id]
+
+        chunk_content_hash = get_chunk_content_hash(
+            chunk, index_name, document_text_hash
+        )
+        position = len(chunk_content_hashes)
+        chunk_content_hashes.append(chunk_content_hash)
+
+        if (
+            position < len(previous_hashes)
+            and previous_hashes[position] == chunk_content_hash
+        ):
+            doc_id_to_unchanged_chunk_cnt[document_id] += 1
+            unchanged_chunks.append(chunk)
+        else:
+            changed_chunks.append(chunk)
+
+    return ChunkChanges(
+        changed_chunks=changed_chunks,
+        unchanged_chunks=unchanged_chunks,
+        doc_id_to_chunk_content_hashes=doc_id_to_chunk_content_hashes,
+        doc_id_to_unchanged_chunk_cnt=dict(doc_id_to_unchanged_chunk_cnt),
+    )
@@ -1,9 +1,18 @@
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
 from typing import cast
 
 from chonkie import SentenceChunker
 
 from onyx.configs.app_configs import AVERAGE_SUMMARY_EMBEDDINGS
 from onyx.configs.app_configs import BLURB_SIZE
+from onyx.configs.app_configs import CHUNKER_NUM_PROCESSES
+from onyx.configs.app_configs import CHUNKER_PROCESS_POOL_MIN_DOCUMENTS
+from onyx.configs.app_configs import CHUNKER_THROUGHPUT_MODE
 from onyx.configs.app_configs import LARGE_CHUNK_RATIO
 from onyx.configs.app_configs import MINI_CHUNK_SIZE
 from onyx.configs.app_configs import SKIP_METADATA_IN_CHUNK
@@ -37,6 +46,9 @@ CHUNK_MIN_CONTENT = 256
 
 logger = setup_logger()
 
+_chunker_process_pool: ProcessPoolExecutor | None = None
+_chunker_process_pool_lock = threading.Lock()
+
 
 def _get_metadata_suffix_for_document_index(
     metadata: dict[str, str | list[str]], include_separator: bool = False
@@ -71,10 +83,16 @@ def _get_metadata_suffix_for_document_index(
     return metadata_semantic, metadata_keyword
 
 
-def _combine_chunks(chunks: list[DocAwareChunk], large_chunk_id: int) -> DocAwareChunk:
+def _combine_chunks(
+    chunks: list[DocAwareChunk],
+    large_chunk_id: int,
+    separator_token_count: int | None = None,
+) -> DocAwareChunk:
     """
     Combines multiple DocAwareChunks into one large chunk (for "multipass" mode),
     appending the content and adjusting source_links accordingly.
+    If the token counts of the chunks are known, the large chunk's count is derived
+    from them.
     """
     merged_chunk = DocAwareChunk(
         source_document=chunks[0].source_document,
@@ -105,10 +123,18 @@ def _combine_chunks(chunks: list[DocAwareChunk], large_chunk_id: int) -> DocAwar
                 merged_chunk.source_links = {}
             merged_chunk.source_links[link_offset + offset] = link_text
 
+    content_token_counts = [chunk.content_token_count for chunk in chunks]
+    if separator_token_count is not None and None not in content_token_counts:
+        merged_chunk.content_token_count = sum(
+            cast(list[int], content_token_counts)
+        ) + separator_token_count * (len(chunks) - 1)
+
     return merged_chunk
 
 
-def generate_large_chunks(chunks: list[DocAwareChunk]) -> list[DocAwareChunk]:
+def generate_large_chunks(
+    chunks: list[DocAwareChunk], separator_token_count: int | None = None
+) -> list[DocAwareChunk]:
     """
     Generates larger "grouped" chunks by combining sets of smaller chunks.
     """
@@ -116,11 +142,39 @@ def generate_large_chunks(chunks: list[DocAwareChunk]) -> list[DocAwareChunk]:
     for idx, i in enumerate(range(0, len(chunks), LARGE_CHUNK_RATIO)):
         chunk_group = chunks[i : i + LARGE_CHUNK_RATIO]
         if len(chunk_group) > 1:
-            large_chunk = _combine_chunks(chunk_group, idx)
+            large_chunk = _combine_chunks(chunk_group, idx, separator_token_count)
             large_chunks.append(large_chunk)
     return large_chunks
 
 
+def _get_chunker_process_pool() -> ProcessPoolExecutor:
+    global _chunker_process_pool
+
+    with _chunker_process_pool_lock:
+        if _chunker_process_pool is None:
+            # fork is unsafe with the threads and connections of the workers
+            _chunker_process_pool = ProcessPoolExecutor(
+                max_workers=CHUNKER_NUM_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _chunker_process_pool
+
+
+def _reset_chunker_process_pool() -> None:
+    global _chunker_process_pool
+
+    with _chunker_process_pool_lock:
+        if _chunker_process_pool is not None:
+            _chunker_process_pool.shutdown(wait=False, cancel_futures=True)
+            _chunker_process_pool = None
+
+
+def _chunk_documents_in_subprocess(
+    chunker: "Chunker", documents: list[IndexingDocument]
+) -> list[list[DocAwareChunk]]:
+    return [chunker._handle_single_document(document) for document in documents]
+
+
 class Chunker:
     """
     Chunks documents into smaller chunks for indexing.
@@ -138,6 +192,7 @@ class Chunker:
         chunk_overlap: int = CHUNK_OVERLAP,
         mini_chunk_size: int = MINI_CHUNK_SIZE,
         callback: IndexingHeartbeatInterface | None = None,
+        throughput_mode: bool = CHUNKER_THROUGHPUT_MODE,
     ) -> None:
         self.include_metadata = include_metadata
         self.chunk_token_limit = chunk_token_limit
@@ -153,39 +208,74 @@ class Chunker:
         )
         self.tokenizer = tokenizer
         self.callback = callback
+        self.throughput_mode = throughput_mode
 
         self.max_context = 0
         self.prompt_tokens = 0
 
-        # Create a token counter function that returns the count instead of the tokens
-        def token_counter(text: str) -> int:
-            return len(tokenizer.encode(text))
+        self.blurb_size = blurb_size
+        self.chunk_overlap = chunk_overlap
+        self.mini_chunk_size = mini_chunk_size
+        # In throughput mode, token counts are memoized for the document being chunked.
+        # The blurb, chunk and mini chunk splitters all count the same sentences
+        self._token_counts: dict[str, int] = {}
+        self._separator_token_count = len(tokenizer.encode(SECTION_SEPARATOR))
+        self._init_splitters()
 
+    def _init_splitters(self) -> None:
         self.blurb_splitter = SentenceChunker(
-            tokenizer_or_token_counter=token_counter,
-            chunk_size=blurb_size,
+            tokenizer_or_token_counter=self._count_tokens,
+            chunk_size=self.blurb_size,
             chunk_overlap=0,
             return_type="texts",
         )
 
         self.chunk_splitter = SentenceChunker(
-            tokenizer_or_token_counter=token_counter,
-            chunk_size=chunk_token_limit,
-            chunk_overlap=chunk_overlap,
+            tokenizer_or_token_counter=self._count_tokens,
+            chunk_size=self.chunk_token_limit,
+            chunk_overlap=self.chunk_overlap,
             return_type="texts",
         )
 
         self.mini_chunk_splitter = (
             SentenceChunker(
-                tokenizer_or_token_counter=token_counter,
-                chunk_size=mini_chunk_size,
+                tokenizer_or_token_counter=self._count_tokens,
+                chunk_size=self.mini_chunk_size,
                 chunk_overlap=0,
                 return_type="texts",
             )
-            if enable_multipass
+            if self.enable_multipass
             else None
         )
 
+    def __getstate__(self) -> dict[str, Any]:
+        """Chunkers are sent to the chunking processes without the heartbeat callback,
+        the splitters are rebuilt on the other side."""
+        state = self.__dict__.copy()
+        for key in (
+            "callback",
+            "blurb_splitter",
+            "chunk_splitter",
+            "mini_chunk_splitter",
+        ):
+            state[key] = None
+        state["_token_counts"] = {}
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_splitters()
+
+    def _count_tokens(self, text: str) -> int:
+        if not self.throughput_mode:
+            return len(self.tokenizer.encode(text))
+
+        token_count = self._token_counts.get(text)
+        if token_count is None:
+            token_count = len(self.tokenizer.encode(text))
+            self._token_counts[text] = token_count
+        return token_count
+
     def _split_oversized_chunk(self, text: str, content_token_limit: int) -> list[str]:
         """
         Splits the text into smaller chunks based on token count to ensure
@@ -234,6 +324,7 @@ class Chunker:
         metadata_suffix_semantic: str = "",
         metadata_suffix_keyword: str = "",
         image_file_id: str | None = None,
+        content_token_count: int | None = None,
     ) -> None:
         """
         Helper to create a new DocAwareChunk, append it to chunks_list.
@@ -254,6 +345,7 @@ class Chunker:
             doc_summary="",
             chunk_context="",
             contextual_rag_reserved_tokens=0,  # set per-document in _handle_single_document
+            content_token_count=content_token_count,
         )
         chunks_list.append(new_chunk)
 
@@ -269,10 +361,16 @@ class Chunker:
         """
         Loops through sections of the document, converting them into one or more chunks.
         Works with processed sections that are base Section objects.
+
+        In throughput mode, the token count and link offset of the chunk being built are
+        kept up to date as sections are added instead of being recomputed.
         """
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        # only tracked in throughput mode
+        chunk_token_count = 0
+        chunk_offset = 0
 
         for section_idx, section in enumerate(sections):
             # Get section text and other attributes
@@ -301,9 +399,11 @@ class Chunker:
                         title_prefix=title_prefix,
                         metadata_suffix_semantic=metadata_suffix_semantic,
                         metadata_suffix_keyword=metadata_suffix_keyword,
+                        content_token_count=self._tracked_count(chunk_token_count),
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    chunk_token_count = chunk_offset = 0
 
                 # Create a chunk specifically for this image section
                 # (Using the text summary that was generated during processing)
@@ -316,12 +416,17 @@ class Chunker:
                     title_prefix=title_prefix,
                     metadata_suffix_semantic=metadata_suffix_semantic,
                     metadata_suffix_keyword=metadata_suffix_keyword,
+                    content_token_count=(
+                        self._count_tokens(section_text)
+                        if self.throughput_mode
+                        else None
+                    ),
                 )
                 # Continue to next section
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            section_token_count = self._count_tokens(section_text)
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -335,9 +440,11 @@ class Chunker:
                         title_prefix,
                         metadata_suffix_semantic,
                         metadata_suffix_keyword,
+                        content_token_count=self._tracked_count(chunk_token_count),
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    chunk_token_count = chunk_offset = 0
 
                 # chunker is in `text` mode
                 split_texts = cast(list[str], self.chunk_splitter.chunk(section_text))
@@ -345,7 +452,7 @@ class Chunker:
                     # If even the split_text is bigger than strict limit, further split
                     if (
                         STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        and self._count_tokens(split_text) > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -371,21 +478,32 @@ class Chunker:
                             title_prefix=title_prefix,
                             metadata_suffix_semantic=metadata_suffix_semantic,
                             metadata_suffix_keyword=metadata_suffix_keyword,
+                            content_token_count=(
+                                self._count_tokens(split_text)
+                                if self.throughput_mode
+                                else None
+                            ),
                         )
                 continue
 
             # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
-            current_offset = len(shared_precompare_cleanup(chunk_text))
-            next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
-            )
+            if self.throughput_mode:
+                # The separator is whitespace, so the cleaned up text of the chunk is
+                # the cleaned up texts of its sections joined together
+                current_token_count = chunk_token_count
+                current_offset = chunk_offset
+            else:
+                current_token_count = len(self.tokenizer.encode(chunk_text))
+                current_offset = len(shared_precompare_cleanup(chunk_text))
+            next_section_tokens = self._separator_token_count + section_token_count
 
             if next_section_tokens + current_token_count <= content_token_limit:
                 if chunk_text:
                     chunk_text += SECTION_SEPARATOR
+                    chunk_token_count += self._separator_token_count
                 chunk_text += section_text
                 link_offsets[current_offset] = section_link_text
+                chunk_token_count += section_token_count
             else:
                 # finalize the existing chunk
                 self._create_chunk(
@@ -397,10 +515,18 @@ class Chunker:
                     title_prefix,
                     metadata_suffix_semantic,
                     metadata_suffix_keyword,
+                    content_token_count=self._tracked_count(chunk_token_count),
                 )
                 # start a new chunk
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                chunk_token_count = section_token_count
+                current_offset = 0
+
+            if self.throughput_mode:
+                chunk_offset = current_offset + len(
+                    shared_precompare_cleanup(section_text)
+                )
 
         # finalize any leftover text chunk
         if chunk_text.strip() or not chunks:
@@ -413,9 +539,13 @@ class Chunker:
                 title_prefix,
                 metadata_suffix_semantic,
                 metadata_suffix_keyword,
+                content_token_count=self._tracked_count(chunk_token_count),
             )
         return chunks
 
+    def _tracked_count(self, chunk_token_count: int) -> int | None:
+        return chunk_token_count if self.throughput_mode else None
+
     def _handle_single_document(
         self, document: IndexingDocument
     ) -> list[DocAwareChunk]:
@@ -423,10 +553,13 @@ class Chunker:
         if document.source == DocumentSource.GMAIL:
             logger.debug(f"Chunking {document.semantic_identifier}")
 
+        # Token counts are only memoized per document to bound memory
+        self._token_counts.clear()
+
         # Title prep
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
-        title_tokens = len(self.tokenizer.encode(title_prefix))
+        title_tokens = self._count_tokens(title_prefix)
 
         # Metadata prep
         metadata_suffix_semantic = ""
@@ -439,7 +572,7 @@ class Chunker:
             ) = _get_metadata_suffix_for_document_index(
                 document.metadata, include_separator=True
             )
-            metadata_tokens = len(self.tokenizer.encode(metadata_suffix_semantic))
+            metadata_tokens = self._count_tokens(metadata_suffix_semantic)
 
         # If metadata is too large, skip it in the semantic content
         if metadata_tokens >= self.chunk_token_limit * MAX_METADATA_PERCENTAGE:
@@ -503,7 +636,10 @@ class Chunker:
 
         # Optional "multipass" large chunk creation
         if self.enable_multipass and self.enable_large_chunks:
-            large_chunks = generate_large_chunks(normal_chunks)
+            large_chunks = generate_large_chunks(
+                normal_chunks,
+                self._separator_token_count if self.throughput_mode else None,
+            )
             normal_chunks.extend(large_chunks)
 
         for chunk in normal_chunks:
@@ -518,6 +654,19 @@ class Chunker:
 
         Works with both standard Document objects and IndexingDocument objects with processed_sections.
         """
+        if (
+            self.throughput_mode
+            and CHUNKER_NUM_PROCESSES > 1
+            and len(documents) >= CHUNKER_PROCESS_POOL_MIN_DOCUMENTS
+        ):
+            try:
+                return self._chunk_in_process_pool(documents)
+            except BrokenProcessPool:
+                logger.exception(
+                    "Chunker process pool broke, chunking in the current process"
+                )
+                _reset_chunker_process_pool()
+
         final_chunks: list[DocAwareChunk] = []
         for document in documents:
             if self.callback and self.callback.should_stop():
@@ -530,3 +679,39 @@ class Chunker:
                 self.callback.progress("Chunker.chunk", len(chunks))
 
         return final_chunks
+
+    def _chunk_in_process_pool(
+        self, documents: list[IndexingDocument]
+    ) -> list[DocAwareChunk]:
+        """Chunks contiguous slices of the documents in separate processes, one slice
+        per process, and returns the chunks in document order."""
+        if self.callback and self.callback.should_stop():
+            raise RuntimeError("Chunker.chunk: Stop signal detected")
+
+        pool = _get_chunker_process_pool()
+        slice_size = math.ceil(len(documents) / CHUNKER_NUM_PROCESSES)
+        document_slices = [
+            documents[i : i + slice_size] for i in range(0, len(documents), slice_size)
+        ]
+        futures = [
+            pool.submit(_chunk_documents_in_subprocess, self, document_slice)
+            for document_slice in document_slices
+        ]
+
+        final_chunks: list[DocAwareChunk] = []
+        for document_slice, future in zip(document_slices, futures):
+            for document, chunks in zip(document_slice, future.result()):
+                # don't keep a copy of the document per process result around
+                for chunk in chunks:
+                    chunk.source_document = document
+                final_chunks.extend(chunks)
+
+                if self.callback:
+                    self.callback.progress("Chunker.chunk", len(chunks))
+
+            if self.callback and self.callback.should_stop():
+                for pending in futures:
+                    pending.cancel()
+                raise RuntimeError("Chunker.chunk: Stop signal detected")
+
+        return final_chunks
@@ -121,6 +121,9 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         """
         # All chunks at this point must have some non-empty content
         flat_chunk_texts: list[str] = []
+        # Known token counts of the texts, set when the chunker ran in throughput mode
+        flat_token_counts: list[int | None] = []
+        affix_token_counts: dict[str, int] = {}
         large_chunks_present = False
         for chunk in chunks:
             if chunk.large_chunk_reference_ids:
@@ -135,6 +138,9 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                 raise ValueError(f"Chunk has no content: {chunk.to_short_descriptor()}")
 
             flat_chunk_texts.append(chunk_text)
+            flat_token_counts.append(
+                self._get_chunk_token_count(chunk, affix_token_counts)
+            )
 
             if chunk.mini_chunk_texts:
                 if chunk.large_chunk_reference_ids:
@@ -143,6 +149,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     # otherwise it should match the normal chunk
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
+                flat_token_counts.extend([None] * len(chunk.mini_chunk_texts))
 
         embeddings = self.embedding_model.encode(
             texts=flat_chunk_texts,
@@ -150,6 +157,11 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             large_chunks_present=large_chunks_present,
             tenant_id=tenant_id,
             request_id=request_id,
+            token_counts=(
+                flat_token_counts
+                if any(count is not None for count in flat_token_counts)
+                else None
+            ),
         )
 
         chunk_titles = {
@@ -220,6 +232,31 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
 
         return embedded_chunks
 
+    def _get_chunk_token_count(
+        self, chunk: DocAwareChunk, affix_token_counts: dict[str, int]
+    ) -> int | None:
+        """Token count of the text embedded for the chunk, from the count the chunker
+        carried along. Title prefixes and metadata suffixes are shared by all chunks
+        of a document, so they are only counted once."""
+        if (
+            chunk.content_token_count is None
+            or not chunk.content
+            # added by contextual RAG after chunking
+            or chunk.doc_summary
+            or chunk.chunk_context
+        ):
+            return None
+
+        token_count = chunk.content_token_count
+        for affix in (chunk.title_prefix, chunk.metadata_suffix_semantic):
+            if affix:
+                if affix not in affix_token_counts:
+                    affix_token_counts[affix] = len(
+                        self.embedding_model.tokenizer.encode(affix)
+                    )
+                token_count += affix_token_counts[affix]
+        return token_count
+
     @classmethod
     def from_db_search_settings(
         cls,
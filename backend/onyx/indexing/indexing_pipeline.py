@@ -1,5 +1,15 @@
+import contextvars
+import queue
+import threading
+import time
 from collections import defaultdict
 from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
 from typing import Protocol
 
 from pydantic import BaseModel
@@ -9,8 +19,12 @@ from sqlalchemy.orm import Session
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import ENABLE_PIPELINED_INDEXING
+from onyx.configs.app_configs import INDEXING_PIPELINE_QUEUE_DEPTH
+from onyx.configs.app_configs import INDEXING_PIPELINE_SUB_BATCH_SIZE
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
+from onyx.configs.app_configs import SKIP_UNCHANGED_CHUNKS
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
 from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.llm_configs import get_image_extraction_and_analysis_enabled
@@ -26,6 +40,8 @@ from onyx.connectors.models import IndexAttemptMetadata
 from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import Section
 from onyx.connectors.models import TextSection
+from onyx.db.document import clear_docs_chunk_content_hashes__no_commit
+from onyx.db.document import fetch_chunk_content_hashes_for_documents
 from onyx.db.document import get_documents_by_ids
 from onyx.db.document import upsert_document_by_connector_credential_pair
 from onyx.db.document import upsert_documents
@@ -41,12 +57,15 @@ from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
 from onyx.file_store.file_store import get_default_file_store
+from onyx.indexing.chunk_hashing import find_changed_chunks
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import IndexChunk
 from onyx.indexing.models import IndexingBatchAdapter
 from onyx.indexing.models import UpdatableChunkData
+from onyx.indexing.vector_db_insertion import update_unchanged_chunks_with_backoff
 from onyx.indexing.vector_db_insertion import write_chunks_to_vector_db_with_backoff
 from onyx.llm.factory import get_default_llm_with_vision
 from onyx.llm.factory import get_llm_for_contextual_rag
@@ -72,6 +91,16 @@ class DocumentBatchPrepareContext(BaseModel):
     updatable_docs: list[Document]
     id_to_boost_map: dict[str, int]
     indexable_docs: list[IndexingDocument] = []
+    # Hashes of the chunks in the document index, for the documents whose unchanged
+    # chunks don't need to be embedded and written again
+    previous_chunk_content_hashes: dict[str, list[str]] = {}
+    # Hashes of the new chunks of each document, None if the document failed to index
+    chunk_content_hashes: dict[str, list[str] | None] = {}
+    # Number of chunks of each document that are left as they are in the document index
+    unchanged_chunk_counts: dict[str, int] = {}
+    # The chunks that are left as they are, written after all if another indexing of
+    # their document gets in between
+    unchanged_chunks: dict[str, list[DocAwareChunk]] = {}
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
@@ -170,9 +199,11 @@ def index_doc_batch_with_handler(
     ignore_time_skip: bool = False,
     enable_contextual_rag: bool = False,
     llm: LLM | None = None,
+    pipelined: bool = False,
 ) -> IndexingPipelineResult:
+    index_fn = index_doc_batch_pipelined if pipelined else index_doc_batch
     try:
-        index_pipeline_result = index_doc_batch(
+        index_pipeline_result = index_fn(
             chunker=chunker,
             embedder=embedder,
             document_index=document_index,
@@ -220,9 +251,13 @@ def index_doc_batch_prepare(
     index_attempt_metadata: IndexAttemptMetadata,
     db_session: Session,
     ignore_time_skip: bool = False,
+    skip_unchanged_chunks: bool = False,
 ) -> DocumentBatchPrepareContext | None:
     """Sets up the documents in the relational DB (source of truth) for permissions, metadata, etc.
-    This preceeds indexing it into the actual document index."""
+    This preceeds indexing it into the actual document index.
+
+    With `skip_unchanged_chunks`, also loads the hashes of the chunks in the document index
+    so that only the chunks that changed are embedded and written."""
     # Create a trimmed list of docs that don't have a newer updated at
     # Shortcuts the time-consuming flow on connector index retries
     document_ids: list[str] = [document.id for document in documents]
@@ -246,6 +281,19 @@ def index_doc_batch_prepare(
             f"because they are up to date. Skipped doc IDs: {skipped_doc_ids}"
         )
 
+    previous_chunk_content_hashes: dict[str, list[str]] = {}
+    if SKIP_UNCHANGED_CHUNKS and updatable_docs:
+        updatable_doc_ids = [doc.id for doc in updatable_docs]
+        if skip_unchanged_chunks:
+            previous_chunk_content_hashes = fetch_chunk_content_hashes_for_documents(
+                document_ids=updatable_doc_ids, db_session=db_session
+            )
+        # Set again once the documents are written. If that fails half way, the document
+        # index no longer matches the hashes, so they must not be used next time
+        clear_docs_chunk_content_hashes__no_commit(
+            document_ids=updatable_doc_ids, db_session=db_session
+        )
+
     # for all updatable docs, upsert into the DB
     # Does not include doc_updated_at which is also used to indicate a successful update
     if updatable_docs:
@@ -274,7 +322,9 @@ def index_doc_batch_prepare(
 
     id_to_boost_map = {doc.id: doc.boost for doc in db_docs}
     return DocumentBatchPrepareContext(
-        updatable_docs=updatable_docs, id_to_boost_map=id_to_boost_map
+        updatable_docs=updatable_docs,
+        id_to_boost_map=id_to_boost_map,
+        previous_chunk_content_hashes=previous_chunk_content_hashes,
     )
 
 
@@ -618,48 +668,17 @@ def add_contextual_summaries(
     return chunks
 
 
-@log_function_time(debug_only=True)
-def index_doc_batch(
+def _chunk_prepared_documents(
     *,
-    document_batch: list[Document],
+    context: DocumentBatchPrepareContext,
     chunker: Chunker,
-    embedder: IndexingEmbedder,
     document_index: DocumentIndex,
-    request_id: str | None,
-    tenant_id: str,
-    adapter: IndexingBatchAdapter,
-    enable_contextual_rag: bool = False,
-    llm: LLM | None = None,
-    ignore_time_skip: bool = False,
-    filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
-) -> IndexingPipelineResult:
-    """End-to-end indexing for a pre-batched set of documents."""
-    """Takes different pieces of the indexing pipeline and applies it to a batch of documents
-    Note that the documents should already be batched at this point so that it does not inflate the
-    memory requirements
-
-    Returns a tuple where the first element is the number of new docs and the
-    second element is the number of chunks."""
-
-    # Log connector info for debugging OOM issues
-    connector_id = getattr(adapter, "connector_id", None)
-    credential_id = getattr(adapter, "credential_id", None)
-    logger.debug(
-        f"Starting index_doc_batch: connector_id={connector_id}, "
-        f"credential_id={credential_id}, tenant_id={tenant_id}, "
-        f"num_docs={len(document_batch)}"
-    )
-
-    filtered_documents = filter_fnc(document_batch)
-    context = adapter.prepare(filtered_documents, ignore_time_skip)
-    if not context:
-        return IndexingPipelineResult(
-            new_docs=0,
-            total_docs=len(filtered_documents),
-            total_chunks=0,
-            failures=[],
-        )
-
+    enable_contextual_rag: bool,
+    llm: LLM | None,
+) -> list[DocAwareChunk]:
+    """Processes image sections, chunks the documents of a prepared batch, drops the
+    chunks that are unchanged in the document index and optionally adds contextual
+    summaries. Sets `context.indexable_docs` and the chunk hashes of the context."""
     # Convert documents to IndexingDocument objects with processed section
     # logger.debug("Processing image sections")
     context.indexable_docs = process_image_sections(context.updatable_docs)
@@ -677,6 +696,31 @@ def index_doc_batch(
     # NOTE: no special handling for failures here, since the chunker is not
     # a common source of failure for the indexing pipeline
     chunks: list[DocAwareChunk] = chunker.chunk(context.indexable_docs)
+
+    if SKIP_UNCHANGED_CHUNKS and document_index.keeps_unchanged_chunks():
+        chunk_changes = find_changed_chunks(
+            chunks=chunks,
+            document_ids=[doc.id for doc in context.indexable_docs],
+            previous_chunk_content_hashes=context.previous_chunk_content_hashes,
+            index_name=document_index.index_name,
+        )
+        num_unchanged_chunks = len(chunks) - len(chunk_changes.changed_chunks)
+        if num_unchanged_chunks:
+            logger.info(
+                f"Skipping {num_unchanged_chunks} unchanged chunks out of "
+                f"{len(chunks)} chunks of "
+                f"{len(chunk_changes.doc_id_to_unchanged_chunk_cnt)} documents"
+            )
+        chunks = chunk_changes.changed_chunks
+        context.chunk_content_hashes = dict(
+            chunk_changes.doc_id_to_chunk_content_hashes
+        )
+        context.unchanged_chunk_counts = chunk_changes.doc_id_to_unchanged_chunk_cnt
+        unchanged_chunks: dict[str, list[DocAwareChunk]] = defaultdict(list)
+        for chunk in chunk_changes.unchanged_chunks:
+            unchanged_chunks[chunk.source_document.id].append(chunk)
+        context.unchanged_chunks = dict(unchanged_chunks)
+
     llm_tokenizer: BaseTokenizer | None = None
 
     # contextual RAG
@@ -696,29 +740,65 @@ def index_doc_batch(
             chunk_token_limit=chunker.chunk_token_limit * 2,
         )
 
-    logger.debug("Starting embedding")
-    chunks_with_embeddings, embedding_failures = (
-        embed_chunks_with_failure_handling(
-            chunks=chunks,
-            embedder=embedder,
-            tenant_id=tenant_id,
-            request_id=request_id,
-        )
-        if chunks
-        else ([], [])
+    return chunks
+
+
+def _embed_concurrently_indexed_documents(
+    *,
+    context: DocumentBatchPrepareContext,
+    doc_ids: list[str],
+    embedder: IndexingEmbedder,
+    tenant_id: str,
+    request_id: str | None,
+) -> tuple[list[IndexChunk], list[ConnectorFailure]]:
+    """Embeds the unchanged chunks of documents that another indexing got to in the
+    meantime, so that all of their chunks are written after all."""
+    logger.info(
+        f"Documents were indexed concurrently, writing their unchanged chunks: {doc_ids}"
     )
+    unchanged_chunks: list[DocAwareChunk] = []
+    for doc_id in doc_ids:
+        context.unchanged_chunk_counts.pop(doc_id, None)
+        doc_unchanged_chunks = context.unchanged_chunks.pop(doc_id, [])
+        unchanged_chunks.extend(doc_unchanged_chunks)
+        # contextual RAG only ran on the changed chunks, so the unchanged ones are
+        # written without it and their hashes must not be trusted next time
+        if any(chunk.contextual_rag_reserved_tokens for chunk in doc_unchanged_chunks):
+            context.chunk_content_hashes[doc_id] = None
+
+    if not unchanged_chunks:
+        return [], []
+    return embed_chunks_with_failure_handling(
+        chunks=unchanged_chunks,
+        embedder=embedder,
+        tenant_id=tenant_id,
+        request_id=request_id,
+    )
+
 
-    chunk_content_scores = [1.0] * len(chunks_with_embeddings)
+def _write_embedded_chunks(
+    *,
+    context: DocumentBatchPrepareContext,
+    filtered_documents: list[Document],
+    chunks_with_embeddings: list[IndexChunk],
+    embedding_failures: list[ConnectorFailure],
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    document_index: DocumentIndex,
+    request_id: str | None,
+    tenant_id: str,
+    adapter: IndexingBatchAdapter,
+) -> IndexingPipelineResult:
+    """Writes the embedded chunks of a prepared batch to the document index and
+    finalizes the batch in Postgres."""
+    # a document whose embedding failed is not written, so none of its chunks are kept
+    for failure in embedding_failures:
+        if failure.failed_document:
+            context.unchanged_chunk_counts.pop(
+                failure.failed_document.document_id, None
+            )
 
     updatable_ids = [doc.id for doc in context.updatable_docs]
-    updatable_chunk_data = [
-        UpdatableChunkData(
-            chunk_id=chunk.chunk_id,
-            document_id=chunk.source_document.id,
-            boost_score=score,
-        )
-        for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
-    ]
 
     # Acquires a lock on the documents so that no other process can modify them
     # NOTE: don't need to acquire till here, since this is when the actual race condition
@@ -731,10 +811,29 @@ def index_doc_batch(
         # always triggers a final metadata sync via the celery queue
         result = adapter.build_metadata_aware_chunks(
             chunks_with_embeddings=chunks_with_embeddings,
-            chunk_content_scores=chunk_content_scores,
+            chunk_content_scores=[1.0] * len(chunks_with_embeddings),
             tenant_id=tenant_id,
             context=context,
         )
+        if result.concurrently_indexed_doc_ids:
+            # rare, so the unchanged chunks are only embedded now, under the lock
+            reembedded_chunks, reembedding_failures = (
+                _embed_concurrently_indexed_documents(
+                    context=context,
+                    doc_ids=result.concurrently_indexed_doc_ids,
+                    embedder=embedder,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                )
+            )
+            chunks_with_embeddings = chunks_with_embeddings + reembedded_chunks
+            embedding_failures = embedding_failures + reembedding_failures
+            result = adapter.build_metadata_aware_chunks(
+                chunks_with_embeddings=chunks_with_embeddings,
+                chunk_content_scores=[1.0] * len(chunks_with_embeddings),
+                tenant_id=tenant_id,
+                context=context,
+            )
 
         short_descriptor_list = [chunk.to_short_descriptor() for chunk in result.chunks]
         short_descriptor_log = str(short_descriptor_list)[:1024]
@@ -757,8 +856,29 @@ def index_doc_batch(
             ),
         )
 
+        vector_db_write_failed_doc_ids = {
+            failure.failed_document.document_id
+            for failure in vector_db_write_failures
+            if failure.failed_document
+        }
+        # the documents with kept chunks still need their new update time
+        unchanged_chunks_update_failures = update_unchanged_chunks_with_backoff(
+            document_index=document_index,
+            documents=[
+                doc
+                for doc in context.updatable_docs
+                if context.unchanged_chunk_counts.get(doc.id)
+                and doc.id not in vector_db_write_failed_doc_ids
+            ],
+            doc_id_to_new_chunk_cnt=result.doc_id_to_new_chunk_cnt,
+            tenant_id=tenant_id,
+        )
+        vector_db_write_failures.extend(unchanged_chunks_update_failures)
+
         all_returned_doc_ids = (
             {record.document_id for record in insertion_records}
+            # documents with only unchanged chunks are not written at all
+            .union(context.unchanged_chunk_counts.keys())
             .union(
                 {
                     record.failed_document.document_id
@@ -782,6 +902,22 @@ def index_doc_batch(
                 "This should never happen."
             )
 
+        # the document index may not match the hashes of the failed documents
+        for failure in vector_db_write_failures + embedding_failures:
+            if (
+                failure.failed_document
+                and failure.failed_document.document_id in context.chunk_content_hashes
+            ):
+                context.chunk_content_hashes[failure.failed_document.document_id] = None
+
+        updatable_chunk_data = [
+            UpdatableChunkData(
+                chunk_id=chunk.chunk_id,
+                document_id=chunk.source_document.id,
+                boost_score=1.0,
+            )
+            for chunk in chunks_with_embeddings
+        ]
         adapter.post_index(
             context=context,
             updatable_chunk_data=updatable_chunk_data,
@@ -797,6 +933,355 @@ def index_doc_batch(
     )
 
 
+@log_function_time(debug_only=True)
+def index_doc_batch(
+    *,
+    document_batch: list[Document],
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    document_index: DocumentIndex,
+    request_id: str | None,
+    tenant_id: str,
+    adapter: IndexingBatchAdapter,
+    enable_contextual_rag: bool = False,
+    llm: LLM | None = None,
+    ignore_time_skip: bool = False,
+    filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
+) -> IndexingPipelineResult:
+    """End-to-end indexing for a pre-batched set of documents."""
+    """Takes different pieces of the indexing pipeline and applies it to a batch of documents
+    Note that the documents should already be batched at this point so that it does not inflate the
+    memory requirements
+
+    Returns a tuple where the first element is the number of new docs and the
+    second element is the number of chunks."""
+
+    # Log connector info for debugging OOM issues
+    connector_id = getattr(adapter, "connector_id", None)
+    credential_id = getattr(adapter, "credential_id", None)
+    logger.debug(
+        f"Starting index_doc_batch: connector_id={connector_id}, "
+        f"credential_id={credential_id}, tenant_id={tenant_id}, "
+        f"num_docs={len(document_batch)}"
+    )
+
+    filtered_documents = filter_fnc(document_batch)
+    context = adapter.prepare(filtered_documents, ignore_time_skip)
+    if not context:
+        return IndexingPipelineResult(
+            new_docs=0,
+            total_docs=len(filtered_documents),
+            total_chunks=0,
+            failures=[],
+        )
+
+    chunks = _chunk_prepared_documents(
+        context=context,
+        chunker=chunker,
+        document_index=document_index,
+        enable_contextual_rag=enable_contextual_rag,
+        llm=llm,
+    )
+
+    logger.debug("Starting embedding")
+    chunks_with_embeddings, embedding_failures = (
+        embed_chunks_with_failure_handling(
+            chunks=chunks,
+            embedder=embedder,
+            tenant_id=tenant_id,
+            request_id=request_id,
+        )
+        if chunks
+        else ([], [])
+    )
+
+    return _write_embedded_chunks(
+        context=context,
+        filtered_documents=filtered_documents,
+        chunks_with_embeddings=chunks_with_embeddings,
+        embedding_failures=embedding_failures,
+        chunker=chunker,
+        embedder=embedder,
+        document_index=document_index,
+        request_id=request_id,
+        tenant_id=tenant_id,
+        adapter=adapter,
+    )
+
+
+# Marks the end of the items produced by a pipeline stage
+_STAGE_DONE = object()
+# How often threads blocked on a pipeline queue check whether the pipeline was aborted
+_PIPELINE_QUEUE_POLL_SECONDS = 0.1
+
+
+@dataclass
+class _StageFailure:
+    error: BaseException
+
+
+@dataclass
+class PipelineStageTiming:
+    name: str
+    sub_batches: int = 0
+    # time spent doing the stage's work
+    busy_seconds: float = 0.0
+    # time spent waiting on the previous stage (starved) or the next one (backpressure)
+    waiting_seconds: float = 0.0
+
+
+@dataclass
+class _IndexingSubBatch:
+    context: DocumentBatchPrepareContext
+    filtered_documents: list[Document]
+    chunks: list[DocAwareChunk] = field(default_factory=list)
+    chunks_with_embeddings: list[IndexChunk] = field(default_factory=list)
+    embedding_failures: list[ConnectorFailure] = field(default_factory=list)
+
+
+def _split_prepared_batch(
+    context: DocumentBatchPrepareContext,
+    filtered_documents: list[Document],
+    sub_batch_size: int,
+) -> list[_IndexingSubBatch]:
+    """Splits a prepared batch into sub-batches of whole documents. Documents that
+    don't need updating are only marked as indexed, which is left to the last one."""
+    updatable_docs = context.updatable_docs
+    sub_batches = [
+        _IndexingSubBatch(
+            context=DocumentBatchPrepareContext(
+                updatable_docs=docs,
+                id_to_boost_map={
+                    doc.id: context.id_to_boost_map[doc.id]
+                    for doc in docs
+                    if doc.id in context.id_to_boost_map
+                },
+                previous_chunk_content_hashes={
+                    doc.id: context.previous_chunk_content_hashes[doc.id]
+                    for doc in docs
+                    if doc.id in context.previous_chunk_content_hashes
+                },
+            ),
+            filtered_documents=list(docs),
+        )
+        for docs in (
+            updatable_docs[i : i + sub_batch_size]
+            for i in range(0, len(updatable_docs), sub_batch_size)
+        )
+    ]
+
+    updatable_ids = {doc.id for doc in updatable_docs}
+    sub_batches[-1].filtered_documents.extend(
+        doc for doc in filtered_documents if doc.id not in updatable_ids
+    )
+    return sub_batches
+
+
+def _put_until_stopped(
+    out_queue: queue.Queue[Any], item: Any, stop_event: threading.Event
+) -> bool:
+    while not stop_event.is_set():
+        try:
+            out_queue.put(item, timeout=_PIPELINE_QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _iter_stage_input(
+    in_queue: queue.Queue[Any],
+    stop_event: threading.Event,
+    timing: PipelineStageTiming,
+) -> Iterator[Any]:
+    """Yields items produced by the previous stage, re-raising its failure if any."""
+    while not stop_event.is_set():
+        start = time.monotonic()
+        try:
+            item = in_queue.get(timeout=_PIPELINE_QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        finally:
+            timing.waiting_seconds += time.monotonic() - start
+
+        if item is _STAGE_DONE:
+            return
+        if isinstance(item, _StageFailure):
+            raise item.error
+        yield item
+
+
+def _run_pipeline_stage(
+    process: Callable[[_IndexingSubBatch], _IndexingSubBatch],
+    inputs: Iterable[_IndexingSubBatch],
+    out_queue: queue.Queue[Any],
+    stop_event: threading.Event,
+    timing: PipelineStageTiming,
+) -> None:
+    try:
+        for sub_batch in inputs:
+            start = time.monotonic()
+            processed = process(sub_batch)
+            timing.busy_seconds += time.monotonic() - start
+            timing.sub_batches += 1
+
+            start = time.monotonic()
+            if not _put_until_stopped(out_queue, processed, stop_event):
+                return
+            timing.waiting_seconds += time.monotonic() - start
+    except BaseException as e:
+        # hand the failure to the next stage so that it surfaces in the caller
+        _put_until_stopped(out_queue, _StageFailure(e), stop_event)
+        return
+
+    _put_until_stopped(out_queue, _STAGE_DONE, stop_event)
+
+
+@log_function_time(debug_only=True)
+def index_doc_batch_pipelined(
+    *,
+    document_batch: list[Document],
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    document_index: DocumentIndex,
+    request_id: str | None,
+    tenant_id: str,
+    adapter: IndexingBatchAdapter,
+    enable_contextual_rag: bool = False,
+    llm: LLM | None = None,
+    ignore_time_skip: bool = False,
+    filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
+    sub_batch_size: int = INDEXING_PIPELINE_SUB_BATCH_SIZE,
+    queue_depth: int = INDEXING_PIPELINE_QUEUE_DEPTH,
+) -> IndexingPipelineResult:
+    """Same as `index_doc_batch`, but splits the batch into sub-batches of
+    `sub_batch_size` documents and overlaps the stages: while sub-batch N is being
+    embedded, sub-batch N+1 is chunked and sub-batch N-1 is written to the document
+    index. At most `queue_depth` sub-batches wait between two stages, so a slow stage
+    holds back the ones before it instead of letting chunks pile up in memory.
+
+    Chunking and embedding run in worker threads. Everything touching the adapter's
+    db session (prepare, locking, metadata, post index) stays on the calling thread."""
+    filtered_documents = filter_fnc(document_batch)
+    context = adapter.prepare(filtered_documents, ignore_time_skip)
+    if not context:
+        return IndexingPipelineResult(
+            new_docs=0,
+            total_docs=len(filtered_documents),
+            total_chunks=0,
+            failures=[],
+        )
+
+    sub_batches = _split_prepared_batch(
+        context, filtered_documents, max(sub_batch_size, 1)
+    )
+    logger.debug(
+        f"Starting pipelined indexing: num_docs={len(context.updatable_docs)} "
+        f"sub_batches={len(sub_batches)}"
+    )
+
+    def _chunk(sub_batch: _IndexingSubBatch) -> _IndexingSubBatch:
+        sub_batch.chunks = _chunk_prepared_documents(
+            context=sub_batch.context,
+            chunker=chunker,
+            document_index=document_index,
+            enable_contextual_rag=enable_contextual_rag,
+            llm=llm,
+        )
+        return sub_batch
+
+    def _embed(sub_batch: _IndexingSubBatch) -> _IndexingSubBatch:
+        if sub_batch.chunks:
+            sub_batch.chunks_with_embeddings, sub_batch.embedding_failures = (
+                embed_chunks_with_failure_handling(
+                    chunks=sub_batch.chunks,
+                    embedder=embedder,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                )
+            )
+        # the un-embedded chunks are no longer needed
+        sub_batch.chunks = []
+        return sub_batch
+
+    chunk_timing = PipelineStageTiming(name="chunk")
+    embed_timing = PipelineStageTiming(name="embed")
+    write_timing = PipelineStageTiming(name="write")
+
+    chunked_queue: queue.Queue[Any] = queue.Queue(maxsize=max(queue_depth, 1))
+    embedded_queue: queue.Queue[Any] = queue.Queue(maxsize=max(queue_depth, 1))
+    stop_event = threading.Event()
+
+    new_docs = 0
+    total_chunks = 0
+    failures: list[ConnectorFailure] = []
+    with ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="indexing_pipeline"
+    ) as executor:
+        # copy the context so that the stages can e.g. get a db session for the tenant
+        executor.submit(
+            contextvars.copy_context().run,
+            _run_pipeline_stage,
+            _chunk,
+            sub_batches,
+            chunked_queue,
+            stop_event,
+            chunk_timing,
+        )
+        executor.submit(
+            contextvars.copy_context().run,
+            _run_pipeline_stage,
+            _embed,
+            _iter_stage_input(chunked_queue, stop_event, embed_timing),
+            embedded_queue,
+            stop_event,
+            embed_timing,
+        )
+
+        try:
+            for sub_batch in _iter_stage_input(
+                embedded_queue, stop_event, write_timing
+            ):
+                start = time.monotonic()
+                result = _write_embedded_chunks(
+                    context=sub_batch.context,
+                    filtered_documents=sub_batch.filtered_documents,
+                    chunks_with_embeddings=sub_batch.chunks_with_embeddings,
+                    embedding_failures=sub_batch.embedding_failures,
+                    chunker=chunker,
+                    embedder=embedder,
+                    document_index=document_index,
+                    request_id=request_id,
+                    tenant_id=tenant_id,
+                    adapter=adapter,
+                )
+                write_timing.busy_seconds += time.monotonic() - start
+                write_timing.sub_batches += 1
+
+                new_docs += result.new_docs
+                total_chunks += result.total_chunks
+                failures.extend(result.failures)
+        finally:
+            # unblocks the worker threads if we are bailing out early
+            stop_event.set()
+
+    logger.info(
+        "Pipelined indexing stage timings: "
+        + ", ".join(
+            f"{timing.name}(sub_batches={timing.sub_batches} "
+            f"busy={timing.busy_seconds:.2f}s waiting={timing.waiting_seconds:.2f}s)"
+            for timing in (chunk_timing, embed_timing, write_timing)
+        )
+    )
+
+    return IndexingPipelineResult(
+        new_docs=new_docs,
+        total_docs=len(filtered_documents),
+        total_chunks=total_chunks,
+        failures=failures,
+    )
+
+
 def run_indexing_pipeline(
     *,
     document_batch: list[Document],
@@ -851,4 +1336,5 @@ def run_indexing_pipeline(
         enable_contextual_rag=enable_contextual_rag,
         llm=llm,
         ignore_time_skip=ignore_time_skip,
+        pipelined=ENABLE_PIPELINED_INDEXING,
     )
@@ -73,6 +73,10 @@ class DocAwareChunk(BaseChunk):
 
     large_chunk_id: int | None
 
+    # Number of tokens in `content`, only set by the chunker in throughput mode. Lets
+    # the embedder skip tokenizing the chunk again
+    content_token_count: int | None = None
+
     large_chunk_reference_ids: list[int] = Field(default_factory=list)
 
     def to_short_descriptor(self) -> str:
@@ -225,6 +229,9 @@ class BuildMetadataAwareChunksResult(BaseModel):
     doc_id_to_new_chunk_cnt: dict[str, int]
     user_file_id_to_raw_text: dict[str, str]
     user_file_id_to_token_count: dict[str, int | None]
+    # Documents whose unchanged chunks can't be kept because another indexing of them
+    # got in between. They are not counted as kept in `doc_id_to_new_chunk_cnt`.
+    concurrently_indexed_doc_ids: list[str] = []
 
 
 class IndexingBatchAdapter(Protocol):
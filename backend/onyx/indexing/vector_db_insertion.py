@@ -1,14 +1,17 @@
 import time
 from collections import defaultdict
+from datetime import datetime
 from http import HTTPStatus
 
 import httpx
 
 from onyx.connectors.models import ConnectorFailure
+from onyx.connectors.models import Document
 from onyx.connectors.models import DocumentFailure
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.document_index.interfaces import IndexBatchParams
+from onyx.document_index.interfaces_new import MetadataUpdateRequest
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.utils.logger import setup_logger
 
@@ -97,3 +100,96 @@ def write_chunks_to_vector_db_with_backoff(
             )
 
     return insertion_records, failures
+
+
+def _build_updated_at_requests(
+    documents: list[Document],
+    doc_id_to_new_chunk_cnt: dict[str, int],
+) -> list[MetadataUpdateRequest]:
+    """One update request per distinct update time, covering all of its documents."""
+    doc_ids_by_updated_at: dict[datetime, list[str]] = defaultdict(list)
+    for document in documents:
+        if document.doc_updated_at is not None:
+            doc_ids_by_updated_at[document.doc_updated_at].append(document.id)
+
+    return [
+        MetadataUpdateRequest(
+            document_ids=doc_ids,
+            # NOTE: -1 represents an unknown chunk count.
+            doc_id_to_chunk_cnt={
+                doc_id: doc_id_to_new_chunk_cnt.get(doc_id, -1) for doc_id in doc_ids
+            },
+            doc_updated_at=doc_updated_at,
+        )
+        for doc_updated_at, doc_ids in doc_ids_by_updated_at.items()
+    ]
+
+
+def update_unchanged_chunks_with_backoff(
+    document_index: DocumentIndex,
+    documents: list[Document],
+    doc_id_to_new_chunk_cnt: dict[str, int],
+    tenant_id: str,
+) -> list[ConnectorFailure]:
+    """Sets the update time on the chunks of the documents that were left in the
+    document index because they did not change. The other fields that are not
+    part of the chunk content hashes are kept up to date by the metadata sync.
+
+    Tries to update all documents in one batched update. If that fails for any reason,
+    goes document by document to isolate the failure(s)."""
+    update_requests = _build_updated_at_requests(documents, doc_id_to_new_chunk_cnt)
+    if not update_requests:
+        return []
+
+    try:
+        document_index.update(update_requests, tenant_id=tenant_id)
+        return []
+    except Exception as e:
+        logger.exception(
+            "Failed to update the unchanged chunks of the batch in vector db. "
+            "Trying individual docs."
+        )
+        _log_insufficient_storage_error(e)
+
+        # wait a couple seconds just to give the vector db a chance to recover
+        time.sleep(2)
+
+    id_to_document = {document.id: document for document in documents}
+    failures: list[ConnectorFailure] = []
+    for update_request in update_requests:
+        for doc_id in update_request.document_ids:
+            try:
+                document_index.update(
+                    [
+                        update_request.model_copy(
+                            update={
+                                "document_ids": [doc_id],
+                                "doc_id_to_chunk_cnt": {
+                                    doc_id: update_request.doc_id_to_chunk_cnt[doc_id]
+                                },
+                            }
+                        )
+                    ],
+                    tenant_id=tenant_id,
+                )
+            except Exception as e:
+                logger.exception(
+                    f"Failed to update the unchanged chunks of '{doc_id}' in vector db"
+                )
+                _log_insufficient_storage_error(e)
+
+                document = id_to_document[doc_id]
+                failures.append(
+                    ConnectorFailure(
+                        failed_document=DocumentFailure(
+                            document_id=doc_id,
+                            document_link=(
+                                document.sections[0].link if document.sections else None
+                            ),
+                        ),
+                        failure_message=str(e),
+                        exception=e,
+                    )
+                )
+
+    return failures
@@ -1,21 +1,25 @@
 import time
+from collections import Counter
 from collections.abc import Generator
+from dataclasses import dataclass
+from dataclasses import field
 from typing import cast
 
 from rapidfuzz.fuzz import ratio
 from redis.lock import Lock as RedisLock
-from sqlalchemy import func
-from sqlalchemy import text
+from sqlalchemy import update
 
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_CLUSTERING_BATCH_SIZE
 from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
 from onyx.configs.kg_configs import KG_CLUSTERING_THRESHOLD
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.entities import get_similar_entities
 from onyx.db.entities import KGEntity
 from onyx.db.entities import KGEntityExtractionStaging
-from onyx.db.entities import merge_entities
-from onyx.db.entities import transfer_entity
+from onyx.db.entities import merge_entities_into
+from onyx.db.entities import transfer_entities
 from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.kg_config import validate_kg_settings
 from onyx.db.models import Document
@@ -27,14 +31,13 @@ from onyx.db.relationships import transfer_relationship_type
 from onyx.db.relationships import upsert_relationship
 from onyx.db.relationships import upsert_relationship_type
 from onyx.document_index.vespa.kg_interactions import (
-    get_kg_vespa_info_update_requests_for_document,
+    get_kg_vespa_info_update_requests_for_documents,
 )
 from onyx.document_index.vespa.kg_interactions import update_kg_chunks_vespa_info
 from onyx.kg.models import KGGroundingType
 from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
-from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
 
 logger = setup_logger()
 
@@ -117,15 +120,16 @@ def _get_batch_entities_with_parent(
             offset += batch_size
 
 
-def _get_batch_kg_processed_documents(
+def _get_batch_kg_processed_document_ids(
     batch_size: int,
-) -> Generator[list[Document], None, None]:
+) -> Generator[list[str], None, None]:
     offset = 0
 
     while True:
         with get_session_with_current_tenant() as db_session:
-            batch = (
-                db_session.query(Document)
+            batch = [
+                document_id
+                for document_id, in db_session.query(Document.id)
                 .join(
                     KGEntityExtractionStaging,
                     Document.id == KGEntityExtractionStaging.document_id,
@@ -133,133 +137,244 @@ def _get_batch_kg_processed_documents(
                 .filter(
                     KGEntityExtractionStaging.transferred_id_name.is_not(None),
                 )
-                .order_by(Document.id)
-                .offset(offset)
-                .limit(batch_size)
-                .all()
-            )
+                # a document has many staging entities
+                .distinct().order_by(Document.id).offset(offset).limit(batch_size).all()
+            ]
             if not batch:
                 break
             yield batch
             offset += batch_size
 
 
-def _cluster_one_grounded_entity(
-    entity: KGEntityExtractionStaging,
-) -> tuple[KGEntity, bool]:
+@dataclass
+class _ClusterTarget:
+    """An entity that staging entities are clustered into. Either an existing entity,
+    or a new one transferred from the staging entities in `transferred`, which all
+    have the same name, type and document."""
+
+    name: str
+    entity_type_id_name: str
+    # set when an entity with a document is merged into an entity without one
+    document_id: str | None
+    existing_entity: KGEntity | None = None
+    transferred: list[KGEntityExtractionStaging] = field(default_factory=list)
+    merged: list[KGEntityExtractionStaging] = field(default_factory=list)
+
+
+def _has_digits(name: str) -> bool:
+    # skip those with numbers so we don't cluster version1 and version2, etc.
+    return any(char.isdigit() for char in name)
+
+
+def _cluster_entities(
+    entities: list[KGEntityExtractionStaging],
+    entity_names: list[str],
+    similar_entities: list[list[KGEntity]],
+) -> list[_ClusterTarget]:
     """
-    Cluster a single grounded entity.
+    Cluster a batch of grounded entities in memory, given the existing entities with
+    a similar name of each. Each entity is merged into the most similar existing or
+    new entity of the batch, or else becomes a new entity, the same as clustering the
+    entities one after the other.
     """
-    with get_session_with_current_tenant() as db_session:
-        # get entity name and filtering conditions
-        if entity.document_id is not None:
-            entity_name = cast(
-                str,
-                db_session.query(Document.semantic_id)
-                .filter(Document.id == entity.document_id)
-                .scalar(),
-            ).lower()
-            filtering = [KGEntity.document_id.is_(None)]
-        else:
-            entity_name = entity.name.lower()
-            filtering = []
-
-        # skip those with numbers so we don't cluster version1 and version2, etc.
-        similar_entities: list[KGEntity] = []
-        if not any(char.isdigit() for char in entity_name):
-            # find similar entities, uses GIN index, very efficient
-            db_session.execute(
-                text(
-                    "SET pg_trgm.similarity_threshold = "
-                    + str(KG_CLUSTERING_RETRIEVE_THRESHOLD)
-                )
-            )
-            similar_entities = (
-                db_session.query(KGEntity)
-                .filter(
-                    # find entities of the same type with a similar name
-                    *filtering,
-                    KGEntity.entity_type_id_name == entity.entity_type_id_name,
-                    getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
-                        KGEntity.name, entity_name
-                    ),
-                )
-                .all()
+    existing_targets: dict[str, _ClusterTarget] = {}
+    new_targets: dict[tuple[str, str, str | None], _ClusterTarget] = {}
+
+    for entity, entity_name, similar in zip(entities, entity_names, similar_entities):
+        candidates: list[_ClusterTarget] = []
+        if not _has_digits(entity_name):
+            for similar_entity in similar:
+                if similar_entity.id_name not in existing_targets:
+                    existing_targets[similar_entity.id_name] = _ClusterTarget(
+                        name=similar_entity.name,
+                        entity_type_id_name=similar_entity.entity_type_id_name,
+                        document_id=similar_entity.document_id,
+                        existing_entity=similar_entity,
+                    )
+                candidates.append(existing_targets[similar_entity.id_name])
+            candidates.extend(
+                target
+                for target in new_targets.values()
+                if target.entity_type_id_name == entity.entity_type_id_name
             )
 
-    # find best match
-    best_score = -1.0
-    best_entity = None
-    for similar in similar_entities:
-        # skip those with numbers so we don't cluster version1 and version2, etc.
-        if any(char.isdigit() for char in similar.name):
+        # find best match
+        best_score = -1.0
+        best_target: _ClusterTarget | None = None
+        for target in candidates:
+            # entities of a document are only merged into entities without one
+            if entity.document_id is not None and target.document_id is not None:
+                continue
+            if _has_digits(target.name):
+                continue
+            score = ratio(target.name, entity_name)
+            if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
+                best_score = score
+                best_target = target
+
+        # if there is a match, merge the entity, otherwise create a new one
+        if best_target is not None:
+            logger.debug(f"Merged {entity.name} with {best_target.name}")
+            best_target.merged.append(entity)
+            best_target.document_id = best_target.document_id or entity.document_id
             continue
-        score = ratio(similar.name, entity_name)
-        if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
-            best_score = score
-            best_entity = similar
 
-    # if there is a match, update the entity, otherwise create a new one
-    with get_session_with_current_tenant() as db_session:
-        if best_entity:
-            logger.debug(f"Merged {entity.name} with {best_entity.name}")
-            update_vespa = (
-                best_entity.document_id is None and entity.document_id is not None
-            )
-            transferred_entity = merge_entities(
-                db_session=db_session, parent=best_entity, child=entity
+        key = (entity.name.casefold(), entity.entity_type_id_name, entity.document_id)
+        if key not in new_targets:
+            new_targets[key] = _ClusterTarget(
+                name=key[0],
+                entity_type_id_name=entity.entity_type_id_name,
+                document_id=entity.document_id,
             )
-        else:
-            update_vespa = entity.document_id is not None
-            transferred_entity = transfer_entity(db_session=db_session, entity=entity)
-
-        db_session.commit()
+        new_targets[key].transferred.append(entity)
 
-    return transferred_entity, update_vespa
+    return list(existing_targets.values()) + list(new_targets.values())
 
 
-def _create_one_parent_child_relationship(entity: KGEntityExtractionStaging) -> None:
+def _cluster_grounded_entities(entities: list[KGEntityExtractionStaging]) -> None:
     """
-    Creates a relationship between the entity and its parent, if it exists.
-    Then, updates the entity's parent to the next ancestor.
+    Cluster a batch of grounded entities, with a single query for the similar
+    entities of the whole batch and bulk statements to transfer and merge them.
     """
     with get_session_with_current_tenant() as db_session:
-        # find the next ancestor
-        parent = (
-            db_session.query(KGEntity)
-            .filter(KGEntity.entity_key == entity.parent_key)
-            .first()
+        # get entity names, entities of a document are named after it
+        document_ids = {
+            entity.document_id for entity in entities if entity.document_id is not None
+        }
+        document_names: dict[str, str] = (
+            {
+                document_id: semantic_id
+                for document_id, semantic_id in db_session.query(
+                    Document.id, Document.semantic_id
+                ).filter(Document.id.in_(document_ids))
+            }
+            if document_ids
+            else {}
         )
+        entity_names = [
+            (
+                document_names.get(entity.document_id, entity.name)
+                if entity.document_id is not None
+                else entity.name
+            ).lower()
+            for entity in entities
+        ]
+
+        # find similar entities of the same type, uses GIN index, very efficient
+        queried_idxs = [
+            idx for idx, name in enumerate(entity_names) if not _has_digits(name)
+        ]
+        queried_similar_entities = get_similar_entities(
+            db_session,
+            [
+                (
+                    entity_names[idx],
+                    entities[idx].entity_type_id_name,
+                    entities[idx].document_id is not None,
+                )
+                for idx in queried_idxs
+            ],
+            similarity_threshold=KG_CLUSTERING_RETRIEVE_THRESHOLD,
+        )
+        similar_entities: list[list[KGEntity]] = [[] for _ in entities]
+        for idx, similar in zip(queried_idxs, queried_similar_entities):
+            similar_entities[idx] = similar
 
-        if parent is not None:
-            # create parent child relationship and relationship type
-            upsert_relationship_type(
-                db_session=db_session,
-                source_entity_type=parent.entity_type_id_name,
-                relationship_type="has_subcomponent",
-                target_entity_type=entity.entity_type_id_name,
+        targets = _cluster_entities(entities, entity_names, similar_entities)
+
+        # transfer the new entities, then merge entities into the existing and new ones
+        new_targets = [target for target in targets if target.transferred]
+        transferred_entities = transfer_entities(
+            db_session, [target.transferred for target in new_targets]
+        )
+        merges: dict[str, tuple[KGEntity, list[KGEntityExtractionStaging]]] = {
+            target.existing_entity.id_name: (target.existing_entity, target.merged)
+            for target in targets
+            if target.existing_entity is not None and target.merged
+        }
+        for target, transferred_entity in zip(new_targets, transferred_entities):
+            if not target.merged:
+                continue
+            # a new entity may have been upserted into one of the existing ones
+            _, merged = merges.get(transferred_entity.id_name, (None, []))
+            merges[transferred_entity.id_name] = (
+                transferred_entity,
+                merged + target.merged,
             )
+        merge_entities_into(db_session, list(merges.values()))
+
+        db_session.commit()
+
+
+def _create_parent_child_relationships(
+    entities: list[KGEntityExtractionStaging],
+) -> None:
+    """
+    Creates the relationships between a batch of entities and their parents, if they
+    exist. Then, updates the entities' parents to the next ancestors.
+    """
+    with get_session_with_current_tenant() as db_session:
+        # find the next ancestors
+        parents: dict[str, KGEntity] = {}
+        for parent in db_session.query(KGEntity).filter(
+            KGEntity.entity_key.in_({entity.parent_key for entity in entities})
+        ):
+            parents.setdefault(parent.entity_key, parent)
+
+        relationship_type_counts: Counter[tuple[str, str]] = Counter()
+        relationship_counts: Counter[tuple[str, str | None]] = Counter()
+        next_ancestors: dict[str, str] = {}
+        for entity in entities:
+            entity_parent = parents.get(cast(str, entity.parent_key))
+            if entity_parent is None:
+                next_ancestors[entity.id_name] = ""
+                continue
+
+            relationship_type_counts[
+                (entity_parent.entity_type_id_name, entity.entity_type_id_name)
+            ] += 1
             relationship_id_name = make_relationship_id(
-                parent.id_name,
+                entity_parent.id_name,
                 "has_subcomponent",
                 cast(str, entity.transferred_id_name),
             )
+            relationship_counts[(relationship_id_name, entity.document_id)] += 1
+            next_ancestors[entity.id_name] = entity_parent.parent_key or ""
+
+        # create parent child relationships and relationship types
+        for (
+            source_entity_type,
+            target_entity_type,
+        ), count in relationship_type_counts.items():
+            upsert_relationship_type(
+                db_session=db_session,
+                source_entity_type=source_entity_type,
+                relationship_type="has_subcomponent",
+                target_entity_type=target_entity_type,
+                extraction_count=count,
+            )
+        for (
+            relationship_id_name,
+            source_document_id,
+        ), count in relationship_counts.items():
             upsert_relationship(
                 db_session=db_session,
                 relationship_id_name=relationship_id_name,
-                source_document_id=entity.document_id,
+                source_document_id=source_document_id,
+                occurrences=count,
             )
 
-            next_ancestor = parent.parent_key or ""
-        else:
-            next_ancestor = ""
-
-        # set the staging entity's parent to the next ancestor
+        # set the staging entities' parents to the next ancestors
         # if there is no parent or next ancestor, set to "" to differentiate from None
         # None will mess up the pagination in _get_batch_entities_with_parent
-        db_session.query(KGEntityExtractionStaging).filter(
-            KGEntityExtractionStaging.id_name == entity.id_name
-        ).update({"parent_key": next_ancestor})
+        if next_ancestors:
+            db_session.execute(
+                update(KGEntityExtractionStaging),
+                [
+                    {"id_name": id_name, "parent_key": next_ancestor}
+                    for id_name, next_ancestor in next_ancestors.items()
+                ],
+            )
         db_session.commit()
 
 
@@ -319,16 +434,13 @@ def kg_clustering(
 
     last_lock_time = time.monotonic()
 
-    # Cluster and transfer grounded entities sequentially
+    # Cluster and transfer grounded entities batch by batch
     start_time = time.monotonic()
     i_batch = 0
     for i_batch, untransferred_grounded_entities in enumerate(
-        _get_batch_untransferred_grounded_entities(
-            batch_size=processing_chunk_batch_size
-        )
+        _get_batch_untransferred_grounded_entities(batch_size=KG_CLUSTERING_BATCH_SIZE)
     ):
-        for entity in untransferred_grounded_entities:
-            _cluster_one_grounded_entity(entity)
+        _cluster_grounded_entities(untransferred_grounded_entities)
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
@@ -339,17 +451,13 @@ def kg_clustering(
         f"Finished transferring {i_batch+1} entity batches in {time_delta:.2f}s"
     )
 
-    # Create parent-child relationships in parallel
+    # Create parent-child relationships batch by batch
     for _ in range(kg_config_settings.KG_MAX_PARENT_RECURSION_DEPTH):
         for root_entities in _get_batch_entities_with_parent(
-            batch_size=processing_chunk_batch_size
+            batch_size=KG_CLUSTERING_BATCH_SIZE
         ):
-            run_functions_tuples_in_parallel(
-                [
-                    (_create_one_parent_child_relationship, (root_entity,))
-                    for root_entity in root_entities
-                ]
-            )
+            if root_entities:
+                _create_parent_child_relationships(root_entities)
             last_lock_time = extend_lock(
                 lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
             )
@@ -400,20 +508,31 @@ def kg_clustering(
     # Update vespa for each document
     start_time = time.monotonic()
     i_batch = 0
-    for i_batch, documents in enumerate(
-        _get_batch_kg_processed_documents(batch_size=processing_chunk_batch_size)
+    for i_batch, document_ids in enumerate(
+        _get_batch_kg_processed_document_ids(batch_size=KG_CLUSTERING_BATCH_SIZE)
     ):
-        batch_update_requests = run_functions_tuples_in_parallel(
-            [
-                (get_kg_vespa_info_update_requests_for_document, (document.id,))
-                for document in documents
-            ]
+        document_update_requests = get_kg_vespa_info_update_requests_for_documents(
+            document_ids
         )
-        for update_requests, document in zip(batch_update_requests, documents):
-            try:
-                update_kg_chunks_vespa_info(update_requests, index_name, tenant_id)
-            except Exception as e:
-                logger.error(f"Error updating vespa for document {document.id}: {e}")
+        try:
+            update_kg_chunks_vespa_info(
+                [
+                    update_request
+                    for update_requests in document_update_requests.values()
+                    for update_request in update_requests
+                ],
+                index_name,
+                tenant_id,
+            )
+        except Exception:
+            # retry document by document so that one document can't fail the batch
+            for document_id, update_requests in document_update_requests.items():
+                try:
+                    update_kg_chunks_vespa_info(update_requests, index_name, tenant_id)
+                except Exception as e:
+                    logger.error(
+                        f"Error updating vespa for document {document_id}: {e}"
+                    )
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
@@ -56,6 +56,8 @@ from onyx.db.engine.connection_warmup import warm_up_connections
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.engine.sql_engine import SqlEngine
 from onyx.file_store.file_store import get_default_file_store
+from onyx.httpx.httpx_pool import AsyncHttpxPool
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.server.api_key.api import router as api_key_router
 from onyx.server.auth_check import check_router_auth
 from onyx.server.documents.cc_pair import router as cc_pair_router
@@ -305,6 +307,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     yield
 
     SqlEngine.reset_engine()
+    HttpxPool.close_all()
+    await AsyncHttpxPool.close_all()
 
     if AUTH_RATE_LIMITING_ENABLED:
         await close_auth_limiter()
@@ -0,0 +1,291 @@
+"""Content-addressed cache for embeddings.
+
+Re-indexing a connector (or re-running a search settings swap with the same model)
+re-embeds every chunk, even if the text is byte-identical to what was embedded on the
+previous run. The cache below sits in front of `EmbeddingModel.encode` and lets only
+the cache misses go to the model server / cloud provider.
+
+Keys are derived from everything that influences the resulting vector: the model
+identity and the endpoint serving it (API URL, API version and deployment, as a
+deployment name can point at any model), the text type, the prefix applied for that
+text type, the reduced dimension, normalization, the max context length and a hash of
+the (already trimmed) text.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from array import array
+from dataclasses import dataclass
+
+from onyx.configs.model_configs import EMBEDDING_CACHE_DIR
+from onyx.configs.model_configs import EMBEDDING_CACHE_ENABLED
+from onyx.configs.model_configs import EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.utils.logger import setup_logger
+from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_EMBEDDING_CACHE_DB_FILENAME = "embedding_cache.sqlite"
+
+
+@dataclass(frozen=True)
+class EmbeddingCacheNamespace:
+    """Everything other than the text itself that determines the embedding."""
+
+    model_name: str | None
+    provider_type: EmbeddingProvider | None
+    api_url: str | None
+    api_version: str | None
+    deployment_name: str | None
+    text_type: EmbedTextType
+    prefix: str | None
+    reduced_dimension: int | None
+    normalize: bool
+    max_context_length: int
+
+    def build_key(self, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        namespace = "|".join(
+            [
+                self.model_name or "",
+                self.provider_type.value if self.provider_type else "",
+                self.api_url or "",
+                self.api_version or "",
+                self.deployment_name or "",
+                self.text_type.value,
+                self.prefix or "",
+                str(self.reduced_dimension or ""),
+                str(self.normalize),
+                str(self.max_context_length),
+            ]
+        )
+        namespace_hash = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:16]
+        return f"{namespace_hash}:{text_hash}"
+
+
+@dataclass
+class EmbeddingCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache(ABC):
+    """Pluggable store for embeddings keyed by `EmbeddingCacheNamespace.build_key`."""
+
+    def __init__(self) -> None:
+        self._stats = EmbeddingCacheStats()
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def _get_many(self, keys: list[str]) -> dict[str, Embedding]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _set_many(self, entries: dict[str, Embedding]) -> int:
+        """Stores the entries and returns the number of evicted entries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def get_many(self, keys: list[str]) -> dict[str, Embedding]:
+        if not keys:
+            return {}
+
+        try:
+            found = self._get_many(keys)
+        except Exception:
+            # the cache is purely an optimization, never fail embedding because of it
+            logger.exception("Failed to read from embedding cache")
+            found = {}
+
+        with self._stats_lock:
+            self._stats.hits += sum(1 for key in keys if key in found)
+            self._stats.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def set_many(self, entries: dict[str, Embedding]) -> None:
+        if not entries:
+            return
+
+        try:
+            evicted = self._set_many(entries)
+        except Exception:
+            logger.exception("Failed to write to embedding cache")
+            return
+
+        with self._stats_lock:
+            self._stats.evictions += evicted
+
+    def get_stats(self) -> EmbeddingCacheStats:
+        with self._stats_lock:
+            return EmbeddingCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+            )
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    """Local on-disk embedding cache with least-recently-used eviction.
+
+    Embeddings are stored as packed float32 arrays. Once the number of stored
+    entries exceeds `max_entries`, the least recently accessed entries are evicted.
+    The entry count is kept in the database next to the entries, so the cap holds for
+    all processes sharing the same file.
+    """
+
+    def __init__(self, db_path: str, max_entries: int) -> None:
+        super().__init__()
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # all access goes through self._lock, so sharing the connection
+        # across the embedding threads is safe
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=60.0, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "key TEXT PRIMARY KEY, "
+                "embedding BLOB NOT NULL, "
+                "last_accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_accessed "
+                "ON embedding_cache (last_accessed)"
+            )
+            # single row, updated in the same transaction as the entries. Counting
+            # the entries on every write would scan the whole table
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache_size ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "num_entries INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO embedding_cache_size (id, num_entries) "
+                "SELECT 0, COUNT(*) FROM embedding_cache"
+            )
+
+    def __del__(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        conn = getattr(self, "_conn", None)
+        if conn is not None:
+            conn.close()
+            self._conn = None  # type: ignore[assignment]
+
+    @staticmethod
+    def _pack(embedding: Embedding) -> bytes:
+        return array("f", embedding).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Embedding:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    def _get_many(self, keys: list[str]) -> dict[str, Embedding]:
+        found: dict[str, Embedding] = {}
+        # stay well below SQLITE_MAX_VARIABLE_NUMBER
+        step = 500
+        now = time.time()
+        with self._lock, self._conn:
+            for i in range(0, len(keys), step):
+                key_batch = keys[i : i + step]
+                placeholders = ",".join("?" * len(key_batch))
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM embedding_cache WHERE key IN ({placeholders})",
+                    key_batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = self._unpack(blob)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET last_accessed = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def _set_many(self, entries: dict[str, Embedding]) -> int:
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (key, embedding, last_accessed) "
+                "VALUES (?, ?, ?)",
+                [(key, self._pack(emb), now) for key, emb in entries.items()],
+            )
+            num_entries = self._add_to_num_entries(self._conn.total_changes - before)
+
+            num_to_evict = num_entries - self.max_entries
+            if num_to_evict <= 0:
+                return 0
+
+            cursor = self._conn.execute(
+                "DELETE FROM embedding_cache WHERE key IN ("
+                "SELECT key FROM embedding_cache ORDER BY last_accessed ASC, rowid ASC LIMIT ?)",
+                (num_to_evict,),
+            )
+            self._add_to_num_entries(-cursor.rowcount)
+            return cursor.rowcount
+
+    def _add_to_num_entries(self, delta: int) -> int:
+        """Must run in the transaction that inserted / deleted the entries. Returns
+        the new number of entries."""
+        self._conn.execute(
+            "UPDATE embedding_cache_size SET num_entries = num_entries + ? WHERE id = 0",
+            (delta,),
+        )
+        return self._conn.execute(
+            "SELECT num_entries FROM embedding_cache_size WHERE id = 0"
+        ).fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._conn.execute(
+                "UPDATE embedding_cache_size SET num_entries = 0 WHERE id = 0"
+            )
+
+
+_default_embedding_cache: EmbeddingCache | None = None
+_default_embedding_cache_lock = threading.Lock()
+
+
+def get_default_embedding_cache() -> EmbeddingCache | None:
+    """Returns the process-wide embedding cache, or None if caching is disabled."""
+    global _default_embedding_cache
+
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+
+    with _default_embedding_cache_lock:
+        if _default_embedding_cache is None:
+            _default_embedding_cache = SQLiteEmbeddingCache(
+                db_path=os.path.join(EMBEDDING_CACHE_DIR, _EMBEDDING_CACHE_DB_FILENAME),
+                max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+            )
+        return _default_embedding_cache
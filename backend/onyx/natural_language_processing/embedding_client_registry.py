@@ -0,0 +1,198 @@
+"""Per-process registry of embedding clients for the current search settings.
+
+KG processing, query embedding and other secondary flows embed short texts in loops.
+Building an EmbeddingModel for each call means looking up the current search settings
+in the DB and setting up the model again, so instead clients are built once per
+version of the search settings and shared.
+
+A client is keyed by everything of the search settings that it is built from, so
+changing the search settings never serves a client of the previous ones. Callers
+without search settings at hand get the tenant's current ones, which are looked up
+again every EMBEDDING_CLIENT_SEARCH_SETTINGS_TTL_SECONDS, or as soon as the tenant's
+search settings version stored in Redis changes. The version is bumped when the
+search settings are swapped or updated, which makes every process switch right away.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import cast
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from onyx.configs.model_configs import EMBEDDING_CLIENT_SEARCH_SETTINGS_TTL_SECONDS
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.models import SearchSettings
+from onyx.db.search_settings import get_current_search_settings
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.configs import MODEL_SERVER_HOST
+from shared_configs.configs import MODEL_SERVER_PORT
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.enums import EmbedTextType
+
+logger = setup_logger()
+
+# more than one client per tenant only exists around search settings swaps
+_MAX_CLIENTS = 256
+# Redis keys are prefixed with the tenant id by the tenant aware client
+_SEARCH_SETTINGS_VERSION_KEY = "embedding_clients:search_settings_version"
+
+
+def get_search_settings_version(tenant_id: str | None = None) -> str | None:
+    """None if the version cannot be read."""
+    try:
+        value = get_redis_client(tenant_id=tenant_id).get(_SEARCH_SETTINGS_VERSION_KEY)
+    except Exception:
+        logger.exception("Failed to read the search settings version")
+        return None
+    return cast(bytes, value).decode("utf-8") if value is not None else "0"
+
+
+def bump_search_settings_version(tenant_id: str | None = None) -> None:
+    """Makes all processes stop using embedding clients of previous search settings of
+    the tenant. Should be called whenever the current search settings change."""
+    try:
+        get_redis_client(tenant_id=tenant_id).incr(_SEARCH_SETTINGS_VERSION_KEY)
+    except Exception:
+        logger.exception("Failed to bump the search settings version")
+
+
+def build_embedding_client_version(search_settings: SearchSettings) -> str:
+    """Identifies the client built from the search settings. Must be called while the
+    session of the search settings is open, as the provider fields are loaded
+    lazily."""
+    fields = [
+        str(search_settings.id),
+        search_settings.model_name,
+        search_settings.provider_type.value if search_settings.provider_type else "",
+        search_settings.query_prefix or "",
+        search_settings.passage_prefix or "",
+        str(search_settings.normalize),
+        str(search_settings.reduced_dimension or ""),
+        search_settings.api_url or "",
+        search_settings.api_version or "",
+        search_settings.deployment_name or "",
+        # a rotated API key needs a new client, but is not kept in plain text
+        hashlib.sha256((search_settings.api_key or "").encode("utf-8")).hexdigest(),
+    ]
+    return "|".join([get_current_tenant_id()] + fields)
+
+
+class EmbeddingClient:
+    def __init__(self, model: EmbeddingModel, version: str) -> None:
+        self.model = model
+        self.version = version
+
+    def encode(
+        self, texts: list[str], text_type: EmbedTextType = EmbedTextType.QUERY
+    ) -> np.ndarray:
+        """Returns a float32 array with one row per text."""
+        return self.model.encode_as_array(texts, text_type=text_type)
+
+
+class EmbeddingClientRegistry:
+    def __init__(
+        self,
+        search_settings_ttl_seconds: float = EMBEDDING_CLIENT_SEARCH_SETTINGS_TTL_SECONDS,
+        max_clients: int = _MAX_CLIENTS,
+    ) -> None:
+        self.search_settings_ttl_seconds = search_settings_ttl_seconds
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        # version -> client, in least recently used order
+        self._clients: OrderedDict[str, EmbeddingClient] = OrderedDict()
+        # tenant id -> (time of the lookup, search settings version in Redis at that
+        # time, client version of the current search settings)
+        self._current_versions: dict[str, tuple[float, str | None, str]] = {}
+
+    def get_client(
+        self,
+        search_settings: SearchSettings | None = None,
+        db_session: Session | None = None,
+    ) -> EmbeddingClient:
+        """Returns the client for the search settings, or for the tenant's current
+        search settings if none are given."""
+        if search_settings is not None:
+            return self._get_or_create_client(search_settings)
+
+        tenant_id = get_current_tenant_id()
+        # if it can't be read, only the TTL applies
+        search_settings_version = get_search_settings_version()
+        with self._lock:
+            current_version = self._current_versions.get(tenant_id)
+            if current_version is not None:
+                looked_up_at, looked_up_search_settings_version, client_version = (
+                    current_version
+                )
+                if (
+                    time.monotonic() - looked_up_at < self.search_settings_ttl_seconds
+                    and looked_up_search_settings_version == search_settings_version
+                    and client_version in self._clients
+                ):
+                    self._clients.move_to_end(client_version)
+                    return self._clients[client_version]
+
+        if db_session is not None:
+            client = self._get_or_create_client(get_current_search_settings(db_session))
+        else:
+            with get_session_with_current_tenant() as db_session:
+                client = self._get_or_create_client(
+                    get_current_search_settings(db_session)
+                )
+
+        with self._lock:
+            self._current_versions[tenant_id] = (
+                time.monotonic(),
+                search_settings_version,
+                client.version,
+            )
+        return client
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._current_versions.clear()
+
+    def _get_or_create_client(self, search_settings: SearchSettings) -> EmbeddingClient:
+        version = build_embedding_client_version(search_settings)
+        with self._lock:
+            client = self._clients.get(version)
+            if client is not None:
+                self._clients.move_to_end(version)
+                return client
+
+        # built outside of the lock, at worst a client is built twice
+        client = EmbeddingClient(
+            model=EmbeddingModel.from_db_model(
+                search_settings=search_settings,
+                server_host=MODEL_SERVER_HOST,
+                server_port=MODEL_SERVER_PORT,
+            ),
+            version=version,
+        )
+        with self._lock:
+            client = self._clients.setdefault(version, client)
+            self._clients.move_to_end(version)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        return client
+
+
+_embedding_client_registry = EmbeddingClientRegistry()
+
+
+def get_embedding_client(
+    search_settings: SearchSettings | None = None,
+    db_session: Session | None = None,
+) -> EmbeddingClient:
+    return _embedding_client_registry.get_client(
+        search_settings=search_settings, db_session=db_session
+    )
+
+
+def invalidate_embedding_clients() -> None:
+    _embedding_client_registry.invalidate()
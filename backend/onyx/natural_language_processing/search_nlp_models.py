@@ -14,6 +14,7 @@ from typing import cast
 
 import aioboto3  # type: ignore
 import httpx
+import numpy as np
 import requests
 import voyageai  # type: ignore[import-untyped]
 from cohere import AsyncClient as CohereAsyncClient
@@ -31,6 +32,8 @@ from onyx.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
 from onyx.configs.model_configs import (
     BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
 )
+from onyx.configs.model_configs import EMBEDDING_BATCH_TOKEN_BUDGET
+from onyx.configs.model_configs import ENABLE_LENGTH_BUCKETED_EMBEDDING_BATCHING
 from onyx.connectors.models import ConnectorStopSignal
 from onyx.db.models import SearchSettings
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
@@ -39,6 +42,11 @@ from onyx.natural_language_processing.constants import DEFAULT_OPENAI_MODEL
 from onyx.natural_language_processing.constants import DEFAULT_VERTEX_MODEL
 from onyx.natural_language_processing.constants import DEFAULT_VOYAGE_MODEL
 from onyx.natural_language_processing.constants import EmbeddingModelTextType
+from onyx.natural_language_processing.embedding_cache import EmbeddingCache
+from onyx.natural_language_processing.embedding_cache import EmbeddingCacheNamespace
+from onyx.natural_language_processing.embedding_cache import (
+    get_default_embedding_cache,
+)
 from onyx.natural_language_processing.exceptions import CohereBillingLimitError
 from onyx.natural_language_processing.exceptions import ModelServerRateLimitError
 from onyx.natural_language_processing.utils import get_tokenizer
@@ -50,11 +58,15 @@ from onyx.utils.timing import log_function_time
 from shared_configs.configs import API_BASED_EMBEDDING_TIMEOUT
 from shared_configs.configs import DOC_EMBEDDING_CONTEXT_SIZE
 from shared_configs.configs import INDEXING_ONLY
+from shared_configs.configs import MODEL_SERVER_EMBEDDING_TRANSPORT_DTYPE
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.configs import OPENAI_EMBEDDING_TIMEOUT
 from shared_configs.configs import SKIP_WARM_UP
 from shared_configs.configs import VERTEXAI_EMBEDDING_LOCAL_BATCH_SIZE
+from shared_configs.embedding_transport import build_ndarray_accept_header
+from shared_configs.embedding_transport import decode_ndarray
+from shared_configs.embedding_transport import NDARRAY_MEDIA_TYPE
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
 from shared_configs.enums import RerankerProvider
@@ -65,6 +77,7 @@ from shared_configs.model_server_models import IntentRequest
 from shared_configs.model_server_models import IntentResponse
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
+from shared_configs.utils import batch_indices_by_token_budget
 from shared_configs.utils import batch_list
 
 logger = setup_logger()
@@ -673,6 +686,7 @@ class EmbeddingModel:
         api_version: str | None = None,
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
+        embedding_cache: EmbeddingCache | None = None,
     ) -> None:
         self.api_key = api_key
         self.provider_type = provider_type
@@ -689,6 +703,7 @@ class EmbeddingModel:
             model_name=model_name, provider_type=provider_type
         )
         self.callback = callback
+        self.embedding_cache = embedding_cache or get_default_embedding_cache()
 
         # Only build model server endpoint for local models
         if self.provider_type is None:
@@ -774,6 +789,35 @@ class EmbeddingModel:
         tenant_id: str | None = None,
         request_id: str | None = None,
     ) -> EmbedResponse:
+        response = self._post_model_server_request(
+            embed_request, tenant_id=tenant_id, request_id=request_id
+        )
+        if response.headers.get("content-type", "").startswith(NDARRAY_MEDIA_TYPE):
+            # already well-formed, skip the per-float pydantic validation
+            return EmbedResponse.model_construct(
+                embeddings=decode_ndarray(response.content).tolist()
+            )
+        return EmbedResponse(**response.json())
+
+    def _make_model_server_array_request(
+        self,
+        embed_request: EmbedRequest,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+    ) -> np.ndarray:
+        response = self._post_model_server_request(
+            embed_request, tenant_id=tenant_id, request_id=request_id
+        )
+        if response.headers.get("content-type", "").startswith(NDARRAY_MEDIA_TYPE):
+            return decode_ndarray(response.content)
+        return np.asarray(response.json()["embeddings"], dtype=np.float32)
+
+    def _post_model_server_request(
+        self,
+        embed_request: EmbedRequest,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+    ) -> Response:
         if self.embed_server_endpoint is None:
             raise ValueError("Model server endpoint is not configured for local models")
 
@@ -788,6 +832,12 @@ class EmbeddingModel:
             if request_id:
                 headers["X-Onyx-Request-ID"] = request_id
 
+            if MODEL_SERVER_EMBEDDING_TRANSPORT_DTYPE:
+                # ask for raw vectors, the model server falls back to JSON otherwise
+                headers["Accept"] = build_ndarray_accept_header(
+                    MODEL_SERVER_EMBEDDING_TRANSPORT_DTYPE
+                )
+
             response = requests.post(
                 endpoint,
                 headers=headers,
@@ -818,8 +868,7 @@ class EmbeddingModel:
         response: Response | None = None
 
         try:
-            response = final_make_request_func()
-            return EmbedResponse(**response.json())
+            return final_make_request_func()
         except requests.HTTPError as e:
             if not response:
                 raise HTTPError("HTTP error occurred - response is None.") from e
@@ -841,12 +890,110 @@ class EmbeddingModel:
         num_threads: int = INDEXING_EMBEDDING_MODEL_NUM_THREADS,
         tenant_id: str | None = None,
         request_id: str | None = None,
+        token_counts: list[int | None] | None = None,
     ) -> list[Embedding]:
-        text_batches = batch_list(texts, batch_size)
+        batch_embeddings, bucketed_order = self._encode_text_batches(
+            texts=texts,
+            text_type=text_type,
+            batch_size=batch_size,
+            max_seq_length=max_seq_length,
+            num_threads=num_threads,
+            tenant_id=tenant_id,
+            request_id=request_id,
+            token_counts=token_counts,
+            as_array=False,
+        )
+        embeddings: list[Embedding] = [
+            embedding
+            for embeddings_of_batch in batch_embeddings
+            for embedding in cast(list[Embedding], embeddings_of_batch)
+        ]
+
+        if bucketed_order is not None:
+            # restore the order of the texts that were passed in
+            ordered_embeddings: list[Embedding] = [[] for _ in texts]
+            for position, original_idx in enumerate(bucketed_order):
+                ordered_embeddings[original_idx] = embeddings[position]
+            return ordered_embeddings
+
+        return embeddings
+
+    def _batch_encode_texts_as_array(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        batch_size: int,
+        max_seq_length: int,
+        num_threads: int = INDEXING_EMBEDDING_MODEL_NUM_THREADS,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+        token_counts: list[int | None] | None = None,
+    ) -> np.ndarray:
+        batch_embeddings, bucketed_order = self._encode_text_batches(
+            texts=texts,
+            text_type=text_type,
+            batch_size=batch_size,
+            max_seq_length=max_seq_length,
+            num_threads=num_threads,
+            tenant_id=tenant_id,
+            request_id=request_id,
+            token_counts=token_counts,
+            as_array=True,
+        )
+        embeddings = np.concatenate(
+            [
+                np.asarray(embeddings_of_batch, dtype=np.float32)
+                for embeddings_of_batch in batch_embeddings
+            ]
+        )
+
+        if bucketed_order is not None:
+            # restore the order of the texts that were passed in
+            ordered_embeddings = np.empty_like(embeddings)
+            ordered_embeddings[bucketed_order] = embeddings
+            return ordered_embeddings
+
+        return embeddings
+
+    def _encode_text_batches(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        batch_size: int,
+        max_seq_length: int,
+        num_threads: int,
+        tenant_id: str | None,
+        request_id: str | None,
+        token_counts: list[int | None] | None,
+        as_array: bool,
+    ) -> tuple[list[list[Embedding] | np.ndarray], list[int] | None]:
+        """Returns the embeddings of each batch, in batch order, and the order of the
+        texts in the batches if they were reordered. With `as_array`, the model server
+        responses are kept as arrays rather than converted to lists."""
+        # Local models pad every text in a batch to the longest one, so batch texts of
+        # similar length together instead of slicing them in document order.
+        # API providers don't pad (and bill per token), so keep fixed size batches there
+        bucketed_order: list[int] | None = None
+        if self.provider_type is None and ENABLE_LENGTH_BUCKETED_EMBEDDING_BATCHING:
+            index_batches = self._build_length_bucketed_batches(
+                texts=texts,
+                token_budget=EMBEDDING_BATCH_TOKEN_BUDGET
+                or batch_size * max_seq_length,
+                max_seq_length=max_seq_length,
+                token_counts=token_counts,
+            )
+            bucketed_order = [
+                idx for index_batch in index_batches for idx in index_batch
+            ]
+            text_batches = [
+                [texts[idx] for idx in index_batch] for index_batch in index_batches
+            ]
+        else:
+            text_batches = batch_list(texts, batch_size)
 
         logger.debug(f"Encoding {len(texts)} texts in {len(text_batches)} batches")
 
-        embeddings: list[Embedding] = []
+        batch_embeddings: list[list[Embedding] | np.ndarray] = []
 
         @_cleanup_thread_local
         def process_batch(
@@ -855,7 +1002,7 @@ class EmbeddingModel:
             text_batch: list[str],
             tenant_id: str | None = None,
             request_id: str | None = None,
-        ) -> tuple[int, list[Embedding]]:
+        ) -> tuple[int, list[Embedding] | np.ndarray]:
             if self.callback:
                 if self.callback.should_stop():
                     raise ConnectorStopSignal(
@@ -881,21 +1028,26 @@ class EmbeddingModel:
             start_time = time.monotonic()
 
             # Route between direct API calls and model server calls
+            embeddings: list[Embedding] | np.ndarray
             if self.provider_type is not None:
                 # For API providers, make direct API call
                 # Use thread-local event loop to prevent memory leaks from creating
                 # thousands of event loops during batch processing
                 loop = _get_or_create_event_loop()
-                response = loop.run_until_complete(
+                embeddings = loop.run_until_complete(
                     self._make_direct_api_call(
                         embed_request, tenant_id=tenant_id, request_id=request_id
                     )
-                )
-            else:
+                ).embeddings
+            elif as_array:
                 # For local models, use model server
-                response = self._make_model_server_request(
+                embeddings = self._make_model_server_array_request(
                     embed_request, tenant_id=tenant_id, request_id=request_id
                 )
+            else:
+                embeddings = self._make_model_server_request(
+                    embed_request, tenant_id=tenant_id, request_id=request_id
+                ).embeddings
 
             end_time = time.monotonic()
 
@@ -904,7 +1056,7 @@ class EmbeddingModel:
                 f"EmbeddingModel.process_batch: Batch {batch_idx}/{batch_len} processing time: {processing_time:.2f} seconds"
             )
 
-            return batch_idx, response.embeddings
+            return batch_idx, embeddings
 
         # only multi thread if:
         #   1. num_threads is greater than 1
@@ -927,7 +1079,7 @@ class EmbeddingModel:
                 }
 
                 # Collect results in order
-                batch_results: list[tuple[int, list[Embedding]]] = []
+                batch_results: list[tuple[int, list[Embedding] | np.ndarray]] = []
                 for future in as_completed(future_to_batch):
                     try:
                         result = future.result()
@@ -936,38 +1088,73 @@ class EmbeddingModel:
                         logger.exception("Embedding model failed to process batch")
                         raise e
 
-                # Sort by batch index and extend embeddings
+                # Sort by batch index
                 batch_results.sort(key=lambda x: x[0])
-                for _, batch_embeddings in batch_results:
-                    embeddings.extend(batch_embeddings)
+                batch_embeddings.extend(
+                    embeddings_of_batch for _, embeddings_of_batch in batch_results
+                )
         else:
             # Original sequential processing
             for idx, text_batch in enumerate(text_batches, start=1):
-                _, batch_embeddings = process_batch(
+                _, embeddings_of_batch = process_batch(
                     idx,
                     len(text_batches),
                     text_batch,
                     tenant_id=tenant_id,
                     request_id=request_id,
                 )
-                embeddings.extend(batch_embeddings)
+                batch_embeddings.append(embeddings_of_batch)
 
-        return embeddings
+        return batch_embeddings, bucketed_order
 
-    @log_function_time(print_only=True, debug_only=True)
-    def encode(
+    def _build_length_bucketed_batches(
         self,
         texts: list[str],
-        text_type: EmbedTextType,
-        large_chunks_present: bool = False,
-        local_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS,
-        api_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
-        max_seq_length: int = DOC_EMBEDDING_CONTEXT_SIZE,
-        tenant_id: str | None = None,
-        request_id: str | None = None,
-    ) -> list[Embedding]:
+        token_budget: int,
+        max_seq_length: int,
+        token_counts: list[int | None] | None = None,
+    ) -> list[list[int]]:
+        """Returns batches of text indices, grouped by tokenized length such that
+        each batch, padded to its longest text, stays within the token budget.
+        Texts with a known token count are not tokenized again."""
+        known_counts = token_counts or [None] * len(texts)
+        # the model truncates anything beyond max_seq_length anyway
+        text_token_counts = [
+            min(
+                (
+                    token_count
+                    if token_count is not None
+                    else len(self.tokenizer.encode(text))
+                ),
+                max_seq_length,
+            )
+            for text, token_count in zip(texts, known_counts)
+        ]
+        index_batches = batch_indices_by_token_budget(text_token_counts, token_budget)
+
+        padded_tokens = sum(
+            len(index_batch) * max(text_token_counts[idx] for idx in index_batch)
+            for index_batch in index_batches
+        )
+        logger.debug(
+            f"Length bucketed {len(texts)} texts into {len(index_batches)} batches: "
+            f"tokens={sum(text_token_counts)} padded_tokens={padded_tokens}"
+        )
+        return index_batches
+
+    def _prepare_texts(
+        self,
+        texts: list[str],
+        large_chunks_present: bool,
+        max_seq_length: int,
+        token_counts: list[int | None] | None,
+    ) -> tuple[list[str], int]:
+        """Validates and cleans up the texts to embed, returns them with the max
+        sequence length to embed them with."""
         if not texts or not all(texts):
             raise ValueError(f"Empty or missing text for embedding: {texts}")
+        if token_counts is not None and len(token_counts) != len(texts):
+            raise ValueError("token_counts must have one entry per text")
 
         if large_chunks_present:
             max_seq_length *= LARGE_CHUNK_RATIO
@@ -977,17 +1164,41 @@ class EmbeddingModel:
             # Note that this uses just the default tokenizer which may also lead to very minor miscountings
             # However this slight miscounting is very unlikely to have any material impact.
             texts = [
-                tokenizer_trim_content(
-                    content=text,
-                    desired_length=max_seq_length,
-                    tokenizer=self.tokenizer,
+                (
+                    text
+                    if token_count is not None and token_count <= max_seq_length
+                    else tokenizer_trim_content(
+                        content=text,
+                        desired_length=max_seq_length,
+                        tokenizer=self.tokenizer,
+                    )
                 )
-                for text in texts
+                for text, token_count in zip(texts, token_counts or [None] * len(texts))
             ]
 
         # Remove invalid Unicode characters (e.g., unpaired surrogates from malformed documents)
         # that would cause UTF-8 encoding errors when sent to embedding providers
         texts = [remove_invalid_unicode_chars(text) or "<>" for text in texts]
+        return texts, max_seq_length
+
+    @log_function_time(print_only=True, debug_only=True)
+    def encode(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        large_chunks_present: bool = False,
+        local_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS,
+        api_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
+        max_seq_length: int = DOC_EMBEDDING_CONTEXT_SIZE,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+        # Token counts of the texts if already known, e.g. from the chunker. None
+        # entries are counted here
+        token_counts: list[int | None] | None = None,
+    ) -> list[Embedding]:
+        texts, max_seq_length = self._prepare_texts(
+            texts, large_chunks_present, max_seq_length, token_counts
+        )
 
         batch_size = (
             api_embedding_batch_size
@@ -995,15 +1206,136 @@ class EmbeddingModel:
             else local_embedding_batch_size
         )
 
-        return self._batch_encode_texts(
+        if self.embedding_cache is None:
+            return self._batch_encode_texts(
+                texts=texts,
+                text_type=text_type,
+                batch_size=batch_size,
+                max_seq_length=max_seq_length,
+                tenant_id=tenant_id,
+                request_id=request_id,
+                token_counts=token_counts,
+            )
+
+        return self._cached_batch_encode_texts(
+            embedding_cache=self.embedding_cache,
             texts=texts,
             text_type=text_type,
             batch_size=batch_size,
             max_seq_length=max_seq_length,
             tenant_id=tenant_id,
             request_id=request_id,
+            token_counts=token_counts,
+        )
+
+    @log_function_time(print_only=True, debug_only=True)
+    def encode_as_array(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        local_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS,
+        api_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
+        max_seq_length: int = DOC_EMBEDDING_CONTEXT_SIZE,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+    ) -> np.ndarray:
+        """Same as encode, but returns a float32 array with one row per text. The
+        vectors of the model server are not converted to lists on the way."""
+        texts, max_seq_length = self._prepare_texts(texts, False, max_seq_length, None)
+
+        batch_size = (
+            api_embedding_batch_size
+            if self.provider_type
+            else local_embedding_batch_size
+        )
+
+        if self.embedding_cache is None:
+            return self._batch_encode_texts_as_array(
+                texts=texts,
+                text_type=text_type,
+                batch_size=batch_size,
+                max_seq_length=max_seq_length,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
+
+        # cached embeddings are stored as lists
+        return np.asarray(
+            self._cached_batch_encode_texts(
+                embedding_cache=self.embedding_cache,
+                texts=texts,
+                text_type=text_type,
+                batch_size=batch_size,
+                max_seq_length=max_seq_length,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            ),
+            dtype=np.float32,
+        )
+
+    def _cached_batch_encode_texts(
+        self,
+        embedding_cache: EmbeddingCache,
+        texts: list[str],
+        text_type: EmbedTextType,
+        batch_size: int,
+        max_seq_length: int,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+        token_counts: list[int | None] | None = None,
+    ) -> list[Embedding]:
+        """Only sends the texts that are not already in the embedding cache to the
+        model server / cloud provider. Duplicate texts within the same call are only
+        embedded once."""
+        namespace = EmbeddingCacheNamespace(
+            model_name=self.model_name,
+            provider_type=self.provider_type,
+            api_url=self.api_url,
+            api_version=self.api_version,
+            deployment_name=self.deployment_name,
+            text_type=text_type,
+            prefix=(
+                self.query_prefix
+                if text_type == EmbedTextType.QUERY
+                else self.passage_prefix
+            ),
+            reduced_dimension=self.reduced_dimension,
+            normalize=self.normalize,
+            max_context_length=max_seq_length,
+        )
+        keys = [namespace.build_key(text) for text in texts]
+        cached = embedding_cache.get_many(list(dict.fromkeys(keys)))
+
+        miss_texts_by_key: dict[str, str] = {}
+        miss_token_counts_by_key: dict[str, int | None] = {}
+        for key, text, token_count in zip(
+            keys, texts, token_counts or [None] * len(texts)
+        ):
+            if key not in cached and key not in miss_texts_by_key:
+                miss_texts_by_key[key] = text
+                miss_token_counts_by_key[key] = token_count
+
+        logger.debug(
+            f"Embedding cache: {len(texts) - len(miss_texts_by_key)} hits, "
+            f"{len(miss_texts_by_key)} misses for {len(texts)} texts"
         )
 
+        if miss_texts_by_key:
+            miss_embeddings = self._batch_encode_texts(
+                texts=list(miss_texts_by_key.values()),
+                text_type=text_type,
+                batch_size=batch_size,
+                max_seq_length=max_seq_length,
+                tenant_id=tenant_id,
+                request_id=request_id,
+                token_counts=list(miss_token_counts_by_key.values()),
+            )
+            new_entries = dict(zip(miss_texts_by_key.keys(), miss_embeddings))
+            embedding_cache.set_many(new_entries)
+            cached.update(new_entries)
+
+        return [cached[key] for key in keys]
+
     @classmethod
     def from_db_model(
         cls,
@@ -45,8 +45,13 @@ class TiktokenTokenizer(BaseTokenizer):
         if not hasattr(self, "encoder"):
             import tiktoken
 
+            self.model_name = model_name
             self.encoder = tiktoken.encoding_for_model(model_name)
 
+    def __reduce__(self) -> tuple[type["TiktokenTokenizer"], tuple[str]]:
+        # instances are shared per model, so unpickle through the constructor
+        return TiktokenTokenizer, (self.model_name,)
+
     def encode(self, string: str) -> list[int]:
         # this ignores special tokens that the model is trained on, see encode_ordinary for details
         return self.encoder.encode_ordinary(string)
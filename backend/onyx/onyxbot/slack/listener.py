@@ -44,7 +44,9 @@ from onyx.db.search_settings import get_current_search_settings
 from onyx.db.slack_bot import fetch_slack_bot
 from onyx.db.slack_bot import fetch_slack_bots
 from onyx.key_value_store.interface import KvKeyNotFoundError
-from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.natural_language_processing.embedding_client_registry import (
+    get_embedding_client,
+)
 from onyx.natural_language_processing.search_nlp_models import warm_up_bi_encoder
 from onyx.onyxbot.slack.config import get_slack_channel_config_for_bot_and_channel
 from onyx.onyxbot.slack.config import MAX_TENANTS_PER_POD
@@ -97,8 +99,6 @@ from onyx.utils.logger import setup_logger
 from onyx.utils.variable_functionality import fetch_ee_implementation_or_noop
 from onyx.utils.variable_functionality import set_is_ee_based_on_env_variable
 from shared_configs.configs import DISALLOWED_SLACK_BOT_TENANT_LIST
-from shared_configs.configs import MODEL_SERVER_HOST
-from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
 from shared_configs.configs import SLACK_CHANNEL_ID
 from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
@@ -248,12 +248,11 @@ class SlackbotHandler:
             else:
                 # Warm up the model if needed
                 search_settings = get_current_search_settings(db_session)
-                embedding_model = EmbeddingModel.from_db_model(
-                    search_settings=search_settings,
-                    server_host=MODEL_SERVER_HOST,
-                    server_port=MODEL_SERVER_PORT,
+                warm_up_bi_encoder(
+                    embedding_model=get_embedding_client(
+                        search_settings=search_settings
+                    ).model
                 )
-                warm_up_bi_encoder(embedding_model=embedding_model)
 
             self.slack_bot_tokens[tenant_bot_pair] = slack_bot_tokens
 
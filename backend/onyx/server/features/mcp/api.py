@@ -308,7 +308,11 @@ def test_mcp_server_credentials(
     try:
         # Attempt to discover tools using the provided credentials
         tools = discover_mcp_tools(
-            server_url, connection_headers, transport=transport, auth=auth
+            server_url,
+            connection_headers,
+            transport=transport,
+            auth=auth,
+            use_cache=False,
         )
 
         if (
@@ -1183,6 +1187,7 @@ def _list_mcp_tools_by_id(
     user_id = str(user.id) if user else ""
     # Discover tools from the MCP server
     auth = None
+    auth_identity = None
     headers: dict[str, str] = {}
 
     if mcp_server.auth_type == MCPAuthenticationType.OAUTH:
@@ -1195,6 +1200,8 @@ def _list_mcp_tools_by_id(
             connection_config.id,
             None,
         )
+        # the provider uses the tokens stored in the connection config
+        auth_identity = f"connection_config:{connection_config.id}"
     elif mcp_server.auth_type == MCPAuthenticationType.PT_OAUTH:
         # Pass-through OAuth: use the user's login OAuth token
         if user and user.oauth_accounts:
@@ -1226,6 +1233,9 @@ def _list_mcp_tools_by_id(
         headers,
         transport=mcp_server.transport,
         auth=auth,
+        auth_identity=auth_identity,
+        # admins sync the stored tools with the server, so they always get fresh ones
+        use_cache=not is_admin,
     )
     logger.info(
         f"Discovered {len(discovered_tools)} tools for MCP server: {mcp_server.name}: {time.time() - t1}"
@@ -14,9 +14,11 @@ from onyx.auth.users import current_chat_accessible_user
 from onyx.auth.users import current_curator_or_admin_user
 from onyx.auth.users import current_limited_user
 from onyx.auth.users import current_user
+from onyx.chat.answer_cache import get_answer_cache
 from onyx.configs.constants import FileOrigin
 from onyx.configs.constants import MilestoneRecordType
 from onyx.configs.constants import PUBLIC_API_TAGS
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
 from onyx.db.engine.sql_engine import get_session
 from onyx.db.models import User
 from onyx.db.persona import create_assistant_label
@@ -42,6 +44,7 @@ from onyx.file_store.models import ChatFileType
 from onyx.server.documents.models import PaginatedReturn
 from onyx.server.features.persona.constants import ADMIN_AGENTS_RESOURCE
 from onyx.server.features.persona.constants import AGENTS_RESOURCE
+from onyx.server.features.persona.models import AnswerCacheStatsSnapshot
 from onyx.server.features.persona.models import FullPersonaSnapshot
 from onyx.server.features.persona.models import MinimalPersonaSnapshot
 from onyx.server.features.persona.models import PersonaLabelCreate
@@ -226,6 +229,35 @@ def get_agents_admin_paginated(
     )
 
 
+@admin_router.get("/{persona_id}/answer-cache/stats")
+def get_persona_answer_cache_stats(
+    persona_id: int,
+    user: User | None = Depends(current_curator_or_admin_user),
+    db_session: Session = Depends(get_session),
+) -> AnswerCacheStatsSnapshot:
+    # checks that the user can edit the persona
+    get_persona_by_id(persona_id=persona_id, user=user, db_session=db_session)
+    stats = get_answer_cache().get_stats(persona_id)
+    return AnswerCacheStatsSnapshot(
+        hits=stats.hits,
+        misses=stats.misses,
+        stale=stats.stale,
+        stores=stats.stores,
+        invalidations=stats.invalidations,
+        hit_rate=stats.hit_rate,
+    )
+
+
+@admin_router.delete("/{persona_id}/answer-cache")
+def invalidate_persona_answer_cache(
+    persona_id: int,
+    user: User | None = Depends(current_curator_or_admin_user),
+    db_session: Session = Depends(get_session),
+) -> None:
+    get_persona_by_id(persona_id=persona_id, user=user, db_session=db_session)
+    get_answer_cache().invalidate_persona(persona_id)
+
+
 @admin_router.patch("/{persona_id}/undelete", tags=PUBLIC_API_TAGS)
 def undelete_persona(
     persona_id: int,
@@ -275,6 +307,7 @@ def create_persona(
         user=user,
         db_session=db_session,
     )
+    bump_search_filter_permission_version()
     mt_cloud_telemetry(
         tenant_id=tenant_id,
         distinct_id=user.email if user else tenant_id,
@@ -302,6 +335,16 @@ def update_persona(
         user=user,
         db_session=db_session,
     )
+    # the persona's document sets, user files and time cutoff may have changed
+    bump_search_filter_permission_version()
+    # the cached answers were generated with the previous prompt and tools. They are
+    # out of scope after the version bump already, this just frees them up
+    try:
+        get_answer_cache().invalidate_persona(persona_id)
+    except Exception:
+        logger.exception(
+            f"Failed to invalidate the answer cache of persona {persona_id}"
+        )
     return persona_snapshot
 
 
@@ -87,6 +87,9 @@ class PersonaUpsertRequest(BaseModel):
     task_prompt: str
     datetime_aware: bool
 
+    # replay cached answers for questions similar to earlier ones
+    answer_cache_enabled: bool = False
+
 
 class MinimalPersonaSnapshot(BaseModel):
     """Minimal persona model optimized for ChatPage.tsx - only includes fields actually used"""
@@ -191,6 +194,8 @@ class PersonaSnapshot(BaseModel):
     task_prompt: str | None = None
     datetime_aware: bool = True
 
+    answer_cache_enabled: bool = False
+
     @classmethod
     def from_model(cls, persona: Persona) -> "PersonaSnapshot":
         return PersonaSnapshot(
@@ -235,6 +240,7 @@ class PersonaSnapshot(BaseModel):
             replace_base_system_prompt=persona.replace_base_system_prompt,
             task_prompt=persona.task_prompt,
             datetime_aware=persona.datetime_aware,
+            answer_cache_enabled=persona.answer_cache_enabled,
         )
 
 
@@ -299,9 +305,19 @@ class FullPersonaSnapshot(PersonaSnapshot):
             replace_base_system_prompt=persona.replace_base_system_prompt,
             task_prompt=persona.task_prompt,
             datetime_aware=persona.datetime_aware,
+            answer_cache_enabled=persona.answer_cache_enabled,
         )
 
 
+class AnswerCacheStatsSnapshot(BaseModel):
+    hits: int
+    misses: int
+    stale: int
+    stores: int
+    invalidations: int
+    hit_rate: float
+
+
 class PromptTemplateResponse(BaseModel):
     final_prompt_template: str
 
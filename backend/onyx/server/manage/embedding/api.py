@@ -12,6 +12,9 @@ from onyx.db.models import User
 from onyx.db.search_settings import get_all_search_settings
 from onyx.db.search_settings import get_current_db_embedding_provider
 from onyx.indexing.models import EmbeddingModelDetail
+from onyx.natural_language_processing.embedding_client_registry import (
+    bump_search_settings_version,
+)
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
 from onyx.server.manage.embedding.models import CloudEmbeddingProvider
 from onyx.server.manage.embedding.models import CloudEmbeddingProviderCreationRequest
@@ -106,4 +109,7 @@ def put_cloud_embedding_provider(
     _: User = Depends(current_admin_user),
     db_session: Session = Depends(get_session),
 ) -> CloudEmbeddingProvider:
-    return upsert_cloud_embedding_provider(db_session, provider)
+    embedding_provider = upsert_cloud_embedding_provider(db_session, provider)
+    # clients of the current search settings may use the previous API key
+    bump_search_settings_version()
+    return embedding_provider
@@ -43,6 +43,7 @@ from onyx.configs.app_configs import VALID_EMAIL_DOMAINS
 from onyx.configs.constants import AuthType
 from onyx.configs.constants import FASTAPI_USERS_AUTH_COOKIE_NAME
 from onyx.configs.constants import PUBLIC_API_TAGS
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
 from onyx.db.api_key import is_api_key_email_address
 from onyx.db.auth import get_live_users_count
 from onyx.db.engine.sql_engine import get_session
@@ -142,6 +143,7 @@ def set_user_role(
         )(db_session, user_to_update)
 
     update_user_role(user_to_update, requested_role, db_session)
+    bump_search_filter_permission_version()
 
 
 class TestUpsertRequest(BaseModel):
@@ -484,6 +486,8 @@ def deactivate_user_api(
         logger.warning("{} is already deactivated".format(user_to_deactivate.email))
 
     deactivate_user(user_to_deactivate, db_session)
+    # stop serving the cached ACL of the deactivated user
+    bump_search_filter_permission_version()
 
 
 @router.delete("/manage/admin/delete-user", tags=PUBLIC_API_TAGS)
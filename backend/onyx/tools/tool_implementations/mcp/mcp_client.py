@@ -5,9 +5,15 @@ This module provides a proper MCP client that follows the JSON-RPC 2.0 specifica
 and handles connection initialization, session management, and protocol communication.
 """
 
+import threading
+import time
+from collections.abc import AsyncIterator
 from collections.abc import Awaitable
 from collections.abc import Callable
+from contextlib import asynccontextmanager
+from datetime import timedelta
 from enum import Enum
+from functools import partial
 from typing import Any
 from typing import Dict
 from typing import TypeVar
@@ -23,7 +29,11 @@ from mcp.types import TextResourceContents
 from mcp.types import Tool as MCPLibTool
 from pydantic import BaseModel
 
+from onyx.configs.tool_configs import MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS
 from onyx.db.enums import MCPTransport
+from onyx.tools.tool_implementations.mcp.mcp_session_pool import get_mcp_session_key
+from onyx.tools.tool_implementations.mcp.mcp_session_pool import get_mcp_session_pool
+from onyx.tools.tool_implementations.mcp.mcp_session_pool import MCPSessionKey
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_async_sync_no_cancel
 
@@ -84,9 +94,8 @@ class MCPMessage(BaseModel):
         return msg
 
 
-# TODO: in the future we should do things like manage sessions and handle errors better
-# using an abstraction like this. For now things are purely functional and we initialize
-# a new session for each tool call.
+# TODO: in the future we should handle errors better using an abstraction like this.
+# For now things are purely functional, sessions are reused through the session pool.
 # class MCPClient:
 #     """
 #     MCP Client implementation that properly handles the protocol lifecycle
@@ -119,14 +128,14 @@ class MCPMessage(BaseModel):
 #         self.process: Optional[subprocess.Popen] = None
 
 
-def _create_mcp_client_function_runner(
-    function: Callable[[ClientSession], Awaitable[T]],
+@asynccontextmanager
+async def _open_mcp_session(
     server_url: str,
     connection_headers: dict[str, str] | None = None,
     transport: MCPTransport = MCPTransport.STREAMABLE_HTTP,
     auth: OAuthClientProvider | None = None,  # TODO: maybe used this for all auth types
-    **kwargs: Any,
-) -> Callable[[], Awaitable[T]]:
+) -> AsyncIterator[ClientSession]:
+    """Opens a session with the MCP server, without initializing it."""
     auth_headers = connection_headers or {}
     # WARNING: httpx.Auth with requires_response_body=True (as in the MCP OAuth
     # provider) forces httpx to fully read the response body. That is incompatible
@@ -140,29 +149,61 @@ def _create_mcp_client_function_runner(
         else sse_client
     )
 
+    async with client_func(
+        server_url, headers=auth_headers, auth=auth_for_request
+    ) as client_tuple:
+        if len(client_tuple) == 3:
+            read, write, _ = client_tuple
+        elif len(client_tuple) == 2:
+            assert isinstance(client_tuple, tuple)  # mypy
+            read, write = client_tuple
+        else:
+            raise ValueError(
+                f"Unexpected number of client tuple elements: {len(client_tuple)}"
+            )
+
+        async with ClientSession(
+            read, write, read_timeout_seconds=timedelta(seconds=300)
+        ) as session:
+            yield session
+
+
+def _create_mcp_client_function_runner(
+    function: Callable[[ClientSession], Awaitable[T]],
+    server_url: str,
+    connection_headers: dict[str, str] | None = None,
+    transport: MCPTransport = MCPTransport.STREAMABLE_HTTP,
+    auth: OAuthClientProvider | None = None,
+    initialize: bool = True,
+    **kwargs: Any,
+) -> Callable[[], Awaitable[T]]:
+    """Runs the function with a new session, closed once the function completes."""
+
     async def run_client_function() -> T:
-        async with client_func(
-            server_url, headers=auth_headers, auth=auth_for_request
-        ) as client_tuple:
-            if len(client_tuple) == 3:
-                read, write, _ = client_tuple
-            elif len(client_tuple) == 2:
-                assert isinstance(client_tuple, tuple)  # mypy
-                read, write = client_tuple
-            else:
-                raise ValueError(
-                    f"Unexpected number of client tuple elements: {len(client_tuple)}"
-                )
-            from datetime import timedelta
-
-            async with ClientSession(
-                read, write, read_timeout_seconds=timedelta(seconds=300)
-            ) as session:
-                return await function(session, **kwargs)
+        async with _open_mcp_session(
+            server_url, connection_headers, transport, auth
+        ) as session:
+            if initialize:
+                await session.initialize()
+            return await function(session, **kwargs)
 
     return run_client_function
 
 
+def _get_pool_key(
+    server_url: str,
+    connection_headers: dict[str, str] | None,
+    transport: MCPTransport,
+    auth: OAuthClientProvider | None,
+    auth_identity: str | None,
+) -> MCPSessionKey | None:
+    """The key to share sessions and discovered tools with, None if they can't be
+    shared, i.e. when the credentials of the OAuth provider are unknown."""
+    if auth is not None and auth_identity is None:
+        return None
+    return get_mcp_session_key(server_url, transport, connection_headers, auth_identity)
+
+
 def log_exception_group(e: ExceptionGroup) -> Exception | None:
     logger.error(e)
     saved_e = None
@@ -182,12 +223,28 @@ def _call_mcp_client_function_sync(
     connection_headers: dict[str, str] | None = None,
     transport: MCPTransport = MCPTransport.STREAMABLE_HTTP,
     auth: OAuthClientProvider | None = None,
+    auth_identity: str | None = None,
+    idempotent: bool = False,
     **kwargs: Any,
 ) -> T:
-    run_client_function = _create_mcp_client_function_runner(
-        function, server_url, connection_headers, transport, auth, **kwargs
+    session_pool = get_mcp_session_pool()
+    pool_key = _get_pool_key(
+        server_url, connection_headers, transport, auth, auth_identity
     )
     try:
+        if session_pool.enabled and pool_key is not None:
+            return session_pool.run(
+                pool_key,
+                partial(
+                    _open_mcp_session, server_url, connection_headers, transport, auth
+                ),
+                partial(function, **kwargs),
+                idempotent=idempotent,
+            )
+
+        run_client_function = _create_mcp_client_function_runner(
+            function, server_url, connection_headers, transport, auth, **kwargs
+        )
         return run_async_sync_no_cancel(run_client_function())
     except Exception as e:
         logger.error(f"Failed to call MCP client function: {e}")
@@ -206,10 +263,17 @@ async def _call_mcp_client_function_async(
     connection_headers: dict[str, str] | None = None,
     transport: MCPTransport = MCPTransport.STREAMABLE_HTTP,
     auth: OAuthClientProvider | None = None,
+    initialize: bool = True,
     **kwargs: Any,
 ) -> T:
     run_client_function = _create_mcp_client_function_runner(
-        function, server_url, connection_headers, transport, auth, **kwargs
+        function,
+        server_url,
+        connection_headers,
+        transport,
+        auth,
+        initialize=initialize,
+        **kwargs,
     )
     return await run_client_function()
 
@@ -236,7 +300,6 @@ def process_mcp_result(call_tool_result: CallToolResult) -> str:
 
 def _call_mcp_tool(tool_name: str, arguments: dict[str, Any]) -> MCPClientFunction[str]:
     async def call_tool(session: ClientSession) -> str:
-        await session.initialize()
         result = await session.call_tool(tool_name, arguments)
         return process_mcp_result(result)
 
@@ -250,14 +313,19 @@ def call_mcp_tool(
     connection_headers: dict[str, str] | None = None,
     transport: MCPTransport = MCPTransport.STREAMABLE_HTTP,
     auth: OAuthClientProvider | None = None,
+    auth_identity: str | None = None,
 ) -> str:
-    """Call a specific tool on the MCP server"""
+    """Call a specific tool on the MCP server.
+
+    `auth_identity` identifies the credentials of `auth`, sessions using an OAuth
+    provider are only reused when it is set."""
     return _call_mcp_client_function_sync(
         _call_mcp_tool(tool_name, arguments),
         server_url,
         connection_headers,
         transport,
         auth,
+        auth_identity,
     )
 
 
@@ -273,41 +341,75 @@ async def initialize_mcp_client(
         connection_headers,
         transport,
         auth,
+        initialize=False,
     )
 
 
 async def _discover_mcp_tools(session: ClientSession) -> list[MCPLibTool]:
-    # 1) initialize
-    import time
-
-    t1 = time.time()
-    init_result = await session.initialize()  # sends JSON-RPC "initialize"
-    logger.info(f"Initialized with server: {init_result.serverInfo}")
-    logger.info(f"Initialized with server time: {time.time() - t1}")
-    # 2) tools/list
-    t2 = time.time()
+    t = time.time()
     tools_response = await session.list_tools()  # sends JSON-RPC "tools/list"
-    logger.info(f"Listed tools with server time: {time.time() - t2}")
+    logger.info(f"Listed tools with server time: {time.time() - t}")
     return tools_response.tools
 
 
+# pool key -> (expiry time, discovered tools)
+_tool_discovery_cache: dict[MCPSessionKey, tuple[float, list[MCPLibTool]]] = {}
+_tool_discovery_cache_lock = threading.Lock()
+
+
 def discover_mcp_tools(
     server_url: str,
     connection_headers: dict[str, str] | None = None,
     transport: MCPTransport = MCPTransport.STREAMABLE_HTTP,
     auth: OAuthClientProvider | None = None,
+    auth_identity: str | None = None,
+    use_cache: bool = True,
 ) -> list[MCPLibTool]:
     """
     Synchronous wrapper for discovering MCP tools.
+
+    The tools are cached for MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS per server and
+    credentials. `use_cache=False` always lists the tools, e.g. to check credentials,
+    and refreshes the cache.
     """
-    return _call_mcp_client_function_sync(
+    cache_key = _get_pool_key(
+        server_url, connection_headers, transport, auth, auth_identity
+    )
+    use_cache = (
+        use_cache and cache_key is not None and MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS > 0
+    )
+    if use_cache and cache_key is not None:
+        with _tool_discovery_cache_lock:
+            cached = _tool_discovery_cache.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+
+    tools = _call_mcp_client_function_sync(
         _discover_mcp_tools,
         server_url,
         connection_headers,
         transport,
         auth,
+        auth_identity,
+        idempotent=True,
     )
 
+    if cache_key is not None and MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS > 0:
+        with _tool_discovery_cache_lock:
+            # drop expired entries so that the cache doesn't grow with old credentials
+            now = time.monotonic()
+            for key in [
+                key
+                for key, (expires_at, _) in _tool_discovery_cache.items()
+                if expires_at <= now
+            ]:
+                del _tool_discovery_cache[key]
+            _tool_discovery_cache[cache_key] = (
+                now + MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS,
+                tools,
+            )
+    return list(tools)
+
 
 async def _discover_mcp_resources(session: ClientSession) -> ListResourcesResult:
     return await session.list_resources()
@@ -318,6 +420,7 @@ def discover_mcp_resources_sync(
     connection_headers: dict[str, str] | None = None,
     transport: str = "streamable-http",
     auth: OAuthClientProvider | None = None,
+    auth_identity: str | None = None,
 ) -> ListResourcesResult:
     """
     Synchronous wrapper for discovering MCP resources.
@@ -329,4 +432,6 @@ def discover_mcp_resources_sync(
         connection_headers,
         MCPTransport(transport),
         auth,
+        auth_identity,
+        idempotent=True,
     )
@@ -0,0 +1,309 @@
+"""
+Pool of initialized MCP client sessions, reused across tool calls.
+
+Opening an MCP session takes a transport connection and an initialize handshake, so
+instead of doing that for every call, sessions are kept open on a background event
+loop and shared by all calls with the same server URL, transport and credentials.
+
+The transports are built on anyio, whose cancel scopes must be exited by the task that
+entered them, so every session is owned by a long running task that opens it, waits
+until the session is closed and then tears it down. Calls run as separate tasks on the
+same event loop and share the session, which supports concurrent requests.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from typing import TypeVar
+
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+
+from onyx.configs.tool_configs import MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS
+from onyx.configs.tool_configs import MCP_SESSION_IDLE_TIMEOUT_SECONDS
+from onyx.configs.tool_configs import MCP_SESSION_POOL_MAX_SIZE
+from onyx.db.enums import MCPTransport
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+# (server_url, transport, hash of the credentials)
+MCPSessionKey = tuple[str, MCPTransport, str]
+
+# opens a session, the pool initializes it
+MCPSessionOpener = Callable[[], AbstractAsyncContextManager[ClientSession]]
+
+_HEALTH_CHECK_TIMEOUT_SECONDS = 10
+_CLOSE_TIMEOUT_SECONDS = 10
+
+
+class MCPSessionClosedError(ConnectionError):
+    """The pooled session was closed, e.g. by the server, while it was being used."""
+
+
+def get_mcp_session_key(
+    server_url: str,
+    transport: MCPTransport,
+    connection_headers: dict[str, str] | None,
+    auth_identity: str | None = None,
+) -> MCPSessionKey:
+    """Sessions are only shared between calls with the exact same credentials. They
+    are hashed so that they are not kept around in plain text as part of the key."""
+    credentials = json.dumps(
+        {"headers": connection_headers or {}, "auth_identity": auth_identity},
+        sort_keys=True,
+    )
+    return (
+        server_url,
+        transport,
+        hashlib.sha256(credentials.encode("utf-8")).hexdigest(),
+    )
+
+
+class _PooledSession:
+    def __init__(self, key: MCPSessionKey, open_session: MCPSessionOpener) -> None:
+        self.key = key
+        self.session: ClientSession | None = None
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self._ready = asyncio.Event()
+        self._close_requested = asyncio.Event()
+        self._error: BaseException | None = None
+        self._task = asyncio.create_task(self._own(open_session))
+
+    @property
+    def alive(self) -> bool:
+        return not self._task.done() and not self._close_requested.is_set()
+
+    async def _own(self, open_session: MCPSessionOpener) -> None:
+        try:
+            async with open_session() as session:
+                init_result = await session.initialize()
+                logger.info(f"Opened MCP session with server: {init_result.serverInfo}")
+                self.session = session
+                self._ready.set()
+                await self._close_requested.wait()
+        except Exception as e:
+            self._error = e
+            if self._ready.is_set():
+                logger.warning(f"MCP session for {self.key[0]} was closed: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def wait_ready(self) -> ClientSession:
+        await self._ready.wait()
+        if self.session is None:
+            if self._error is not None:
+                raise self._error
+            raise MCPSessionClosedError(f"MCP session for {self.key[0]} was closed")
+        return self.session
+
+    async def run(
+        self,
+        session: ClientSession,
+        function: Callable[[ClientSession], Awaitable[T]],
+    ) -> T:
+        """Runs the function with the ready session, failing if the session is
+        closed before it completes rather than waiting for the request to time out."""
+        call = asyncio.ensure_future(function(session))
+        await asyncio.wait([call, self._task], return_when=asyncio.FIRST_COMPLETED)
+        if not call.done():
+            call.cancel()
+            raise MCPSessionClosedError(
+                f"MCP session for {self.key[0]} was closed during the call"
+            ) from self._error
+        return call.result()
+
+    async def is_healthy(self) -> bool:
+        if self.session is None or not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(
+                self.session.send_ping(), timeout=_HEALTH_CHECK_TIMEOUT_SECONDS
+            )
+            return True
+        except Exception as e:
+            logger.info(f"MCP session for {self.key[0]} failed its health check: {e}")
+            return False
+
+    async def close(self) -> None:
+        self._close_requested.set()
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(self._task), timeout=_CLOSE_TIMEOUT_SECONDS
+            )
+        except Exception:
+            self._task.cancel()
+
+
+class MCPSessionPool:
+    """Keeps initialized MCP sessions open on a background event loop.
+
+    Sessions that failed, or that are idle past the health check interval and don't
+    answer a ping, are replaced by a new session. If a reused session turns out to be
+    closed before the call is sent, the session is replaced and the call is retried
+    once, as the server may have dropped the connection while it was idle. A call that
+    fails after it was sent is only retried if it is idempotent, e.g. tool discovery,
+    since the server may have run it already. Errors returned by the server are not
+    retried. Sessions that are idle past the idle timeout are closed.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = MCP_SESSION_IDLE_TIMEOUT_SECONDS,
+        max_size: int = MCP_SESSION_POOL_MAX_SIZE,
+        health_check_interval: float = MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pid: int | None = None
+        # only accessed from the event loop, in least recently used order
+        self._sessions: OrderedDict[MCPSessionKey, _PooledSession] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_timeout > 0 and self.max_size > 0
+
+    def run(
+        self,
+        key: MCPSessionKey,
+        open_session: MCPSessionOpener,
+        function: Callable[[ClientSession], Awaitable[T]],
+        idempotent: bool = False,
+    ) -> T:
+        """Runs the function with a pooled session, blocking until it completes.
+        Functions with side effects, like tool calls, must not be idempotent."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(key, open_session, function, idempotent), self._get_loop()
+        )
+        return future.result()
+
+    def close_all(self) -> None:
+        with self._lock:
+            loop = self._loop if self._pid == os.getpid() else None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_all(), loop).result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # the loop thread doesn't survive a fork, start over in the child
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="mcp-session-pool", daemon=True
+                ).start()
+                self._loop = loop
+                self._pid = os.getpid()
+                self._sessions = OrderedDict()
+                asyncio.run_coroutine_threadsafe(self._evict_idle_sessions(), loop)
+            return self._loop
+
+    async def _run(
+        self,
+        key: MCPSessionKey,
+        open_session: MCPSessionOpener,
+        function: Callable[[ClientSession], Awaitable[T]],
+        idempotent: bool,
+    ) -> T:
+        retried = False
+        while True:
+            pooled, reused = await self._acquire(key, open_session)
+            sent = False
+            try:
+                session = await pooled.wait_ready()
+                sent = True
+                return await pooled.run(session, function)
+            except McpError:
+                raise
+            except Exception as e:
+                await self._discard(pooled)
+                if not reused or retried or (sent and not idempotent):
+                    raise
+                retried = True
+                logger.warning(
+                    f"Call on a reused MCP session for {key[0]} failed, retrying "
+                    f"with a new session: {e}"
+                )
+            finally:
+                self._release(pooled)
+
+    async def _acquire(
+        self, key: MCPSessionKey, open_session: MCPSessionOpener
+    ) -> tuple[_PooledSession, bool]:
+        pooled = self._sessions.get(key)
+        if pooled is not None and pooled.alive and pooled.session is not None:
+            pooled.in_use += 1
+            if (
+                pooled.in_use == 1
+                and time.monotonic() - pooled.last_used > self.health_check_interval
+                and not await pooled.is_healthy()
+            ):
+                pooled.in_use -= 1
+                await self._discard(pooled)
+            else:
+                self._sessions.move_to_end(key)
+                return pooled, True
+        elif pooled is not None and pooled.alive:
+            # another call is opening this session
+            pooled.in_use += 1
+            self._sessions.move_to_end(key)
+            return pooled, False
+        elif pooled is not None:
+            await self._discard(pooled)
+
+        await self._make_room()
+        pooled = _PooledSession(key, open_session)
+        pooled.in_use += 1
+        self._sessions[key] = pooled
+        return pooled, False
+
+    def _release(self, pooled: _PooledSession) -> None:
+        pooled.in_use -= 1
+        pooled.last_used = time.monotonic()
+
+    async def _discard(self, pooled: _PooledSession) -> None:
+        if self._sessions.get(pooled.key) is pooled:
+            del self._sessions[pooled.key]
+        await pooled.close()
+
+    async def _make_room(self) -> None:
+        # sessions in use are not closed, so the pool can go over its size while busy
+        for pooled in list(self._sessions.values()):
+            if len(self._sessions) < self.max_size:
+                return
+            if pooled.in_use == 0:
+                await self._discard(pooled)
+
+    async def _evict_idle_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1))
+            now = time.monotonic()
+            for pooled in list(self._sessions.values()):
+                if pooled.in_use == 0 and now - pooled.last_used > self.idle_timeout:
+                    logger.debug(f"Closing idle MCP session for {pooled.key[0]}")
+                    await self._discard(pooled)
+
+    async def _close_all(self) -> None:
+        for pooled in list(self._sessions.values()):
+            await self._discard(pooled)
+
+
+_session_pool = MCPSessionPool()
+
+
+def get_mcp_session_pool() -> MCPSessionPool:
+    return _session_pool
@@ -10,9 +10,7 @@ from onyx.chat.emitter import Emitter
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import SearchDocsResponse
-from onyx.context.search.preprocessing.access_filters import (
-    build_access_filters_for_user,
-)
+from onyx.context.search.filter_cache import get_search_filter_cache
 from onyx.context.search.utils import convert_inference_sections_to_search_docs
 from onyx.context.search.utils import inference_section_from_chunks
 from onyx.db.document import fetch_document_ids_by_links
@@ -697,7 +695,9 @@ class OpenURLTool(Tool[OpenURLToolOverrideKwargs]):
         return IndexedRetrievalResult(sections=sections, missing_document_ids=missing)
 
     def _build_index_filters(self, db_session: Session) -> IndexFilters:
-        access_control_list = build_access_filters_for_user(self._user, db_session)
+        access_control_list = get_search_filter_cache().get_user_acl(
+            self._user, db_session
+        )
         return IndexFilters(
             source_type=None,
             document_set=None,
@@ -54,7 +54,7 @@ from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import SearchDocsResponse
 from onyx.context.search.pipeline import merge_individual_chunks
-from onyx.context.search.pipeline import search_pipeline
+from onyx.context.search.pipeline import batch_search_pipeline
 from onyx.context.search.utils import convert_inference_sections_to_search_docs
 from onyx.db.connector import check_connectors_exist
 from onyx.db.connector import check_federated_connectors_exist
@@ -410,37 +410,41 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
         finally:
             db_session.close()
 
-    def _run_search_for_query(
+    def _run_search_for_queries(
         self,
-        query: str,
-        hybrid_alpha: float | None,
+        queries: list[tuple[str, float | None]],
         num_hits: int,
-    ) -> list[InferenceChunk]:
-        """Run search pipeline for a single query.
+    ) -> list[list[InferenceChunk]]:
+        """Run the search pipeline for all queries as one batch.
 
         Args:
-            query: The search query string
-            hybrid_alpha: Hybrid search alpha parameter (None for default)
-            num_hits: Maximum number of hits to return
+            queries: The search query strings with their hybrid search alpha
+                parameter (None for default)
+            num_hits: Maximum number of hits to return per query
 
         Returns:
-            List of InferenceChunk results
+            List of InferenceChunk results of each query
         """
         # Create a thread-safe session for this search
         search_db_session = self._get_thread_safe_session()
         try:
-            return search_pipeline(
+            return batch_search_pipeline(
                 db_session=search_db_session,
-                chunk_search_request=ChunkSearchRequest(
-                    query=query,
-                    hybrid_alpha=hybrid_alpha,
-                    # For projects, the search scope is the project and has no other limits
-                    user_selected_filters=(
-                        self.user_selected_filters if self.project_id is None else None
-                    ),
-                    bypass_acl=self.bypass_acl,
-                    limit=num_hits,
-                ),
+                chunk_search_requests=[
+                    ChunkSearchRequest(
+                        query=query,
+                        hybrid_alpha=hybrid_alpha,
+                        # For projects, the search scope is the project and has no other limits
+                        user_selected_filters=(
+                            self.user_selected_filters
+                            if self.project_id is None
+                            else None
+                        ),
+                        bypass_acl=self.bypass_acl,
+                        limit=num_hits,
+                    )
+                    for query, hybrid_alpha in queries
+                ],
                 project_id=self.project_id,
                 document_index=self.document_index,
                 user=self.user,
@@ -642,32 +646,30 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 )
             )
 
-            # Run all searches in parallel with appropriate hybrid_alpha values
+            # Run all searches as one batch with appropriate hybrid_alpha values
             # Keyword queries use hybrid_alpha=0.2 (favor keyword search)
             # Other queries use default hybrid_alpha (balanced semantic/keyword)
-            search_functions: list[tuple[Callable, tuple]] = []
+            search_queries: list[tuple[str, float | None]] = []
             search_weights: list[float] = []
 
             # Add deduplicated semantic queries (use hybrid_alpha=None)
             for query, weight in deduplicated_semantic_queries:
-                search_functions.append(
-                    (
-                        self._run_search_for_query,
-                        (query, None, override_kwargs.num_hits),
-                    )
-                )
+                search_queries.append((query, None))
                 search_weights.append(weight)
 
             # Add deduplicated keyword queries (use hybrid_alpha=0.2)
             for query, weight in deduplicated_keyword_queries:
-                search_functions.append(
-                    (
-                        self._run_search_for_query,
-                        (query, KEYWORD_QUERY_HYBRID_ALPHA, override_kwargs.num_hits),
-                    )
-                )
+                search_queries.append((query, KEYWORD_QUERY_HYBRID_ALPHA))
                 search_weights.append(weight)
 
+            # The filters are resolved and the queries embedded once for the batch
+            search_functions: list[tuple[Callable, tuple]] = [
+                (
+                    self._run_search_for_queries,
+                    (search_queries, override_kwargs.num_hits),
+                )
+            ]
+
             # Add Slack federated search (runs once in parallel with all Vespa queries)
             # This avoids the query multiplication problem where each Vespa query
             # would trigger a separate Slack search
@@ -686,8 +688,11 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 # Use same weight as original query for Slack results
                 search_weights.append(ORIGINAL_QUERY_WEIGHT)
 
-            # Run all searches in parallel (Vespa queries + Slack)
-            all_search_results = run_functions_tuples_in_parallel(search_functions)
+            # Run the batched searches in parallel with Slack
+            parallel_search_results = run_functions_tuples_in_parallel(search_functions)
+            all_search_results = (
+                parallel_search_results[0] + parallel_search_results[1:]
+            )
 
             # Merge results using weighted Reciprocal Rank Fusion
             # This intelligently combines rankings from different queries
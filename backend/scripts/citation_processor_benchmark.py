@@ -0,0 +1,175 @@
+"""Replays long synthetic LLM token streams through DynamicCitationProcessor.
+
+Compares the incremental processor against the previous per-token approach, which
+counted triple backticks over the whole output and searched the held segment again
+for every token. Per-token time of the incremental processor should stay flat as
+the stream grows, while the legacy one grows with the length of the answer.
+
+Usage:
+
+python -m scripts.citation_processor_benchmark --tokens 10000 20000 40000
+"""
+
+import argparse
+import random
+import re
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+from onyx.chat.citation_processor import CitationMode
+from onyx.chat.citation_processor import DynamicCitationProcessor
+from onyx.chat.citation_processor import in_code_block
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import SearchDoc
+
+_NUM_DOCS = 20
+_WORDS = [
+    "the",
+    "connector",
+    "indexes",
+    "documents",
+    "from",
+    "each",
+    "source",
+    "and",
+    "permissions",
+    "are",
+    "synced",
+    "periodically",
+]
+_CODE_LINES = [
+    "def sync(docs):\n",
+    "    for doc in docs:\n",
+    "        index[doc.id] = doc  # see [1]\n",
+    "    return len(index)\n",
+]
+
+
+class _LegacyCitationProcessor(DynamicCitationProcessor):
+    """Recomputes code block and citation state from scratch on every token."""
+
+    def _in_code_block(self) -> bool:
+        return in_code_block(self.llm_out)
+
+    def _possible_citation_at_end(self) -> bool:
+        return bool(re.search(self.possible_citation_pattern, self.curr_segment))
+
+    def _append_to_llm_out(self, token: str) -> None:
+        super()._append_to_llm_out(token)
+        self._segment_may_have_citations = True
+
+
+def _build_docs() -> dict[int, SearchDoc]:
+    return {
+        num: SearchDoc(
+            document_id=f"doc_{num}",
+            chunk_ind=0,
+            semantic_identifier=f"Document {num}",
+            link=f"https://example.com/doc/{num}",
+            blurb="",
+            source_type=DocumentSource.WEB,
+            boost=0,
+            hidden=False,
+            metadata={},
+            score=1.0,
+            match_highlights=[],
+            updated_at=datetime(2024, 1, 1),
+        )
+        for num in range(1, _NUM_DOCS + 1)
+    }
+
+
+def _prose_tokens(num_tokens: int, rng: random.Random) -> list[str]:
+    """Answer text with a citation every few sentences, streamed a word at a time."""
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        tokens.extend(f" {rng.choice(_WORDS)}" for _ in range(rng.randint(5, 15)))
+        if rng.random() < 0.4:
+            # citations tend to arrive split over several tokens
+            tokens.extend([" [", str(rng.randint(1, _NUM_DOCS)), "]"])
+        tokens.append(".\n" if rng.random() < 0.2 else ".")
+    return tokens[:num_tokens]
+
+
+def _code_heavy_tokens(num_tokens: int, rng: random.Random) -> list[str]:
+    """Alternates prose and fenced code blocks, with citation-like text in the code."""
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        tokens.extend(_prose_tokens(rng.randint(20, 60), rng))
+        tokens.extend(["\n", "``", "`python\n"])
+        for _ in range(rng.randint(2, 6)):
+            for line in _CODE_LINES:
+                tokens.extend(re.findall(r"\S+|\s+", line))
+        tokens.extend(["``", "`\n"])
+    return tokens[:num_tokens]
+
+
+def _replay(
+    processor_cls: Callable[..., DynamicCitationProcessor],
+    tokens: list[str],
+    docs: dict[int, SearchDoc],
+    citation_mode: CitationMode,
+) -> tuple[float, str]:
+    processor = processor_cls(citation_mode=citation_mode)
+    processor.update_citation_mapping(docs)
+    output: list[str] = []
+
+    start = time.perf_counter()
+    for token in tokens:
+        for item in processor.process_token(token):
+            if isinstance(item, str):
+                output.append(item)
+    for item in processor.process_token(None):
+        if isinstance(item, str):
+            output.append(item)
+    return time.perf_counter() - start, "".join(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--tokens",
+        type=int,
+        nargs="+",
+        default=[10_000, 20_000, 40_000],
+        help="Stream lengths to replay",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=[mode.value for mode in CitationMode],
+        default=CitationMode.HYPERLINK.value,
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    citation_mode = CitationMode(args.mode)
+    docs = _build_docs()
+    generators = {"prose": _prose_tokens, "code-heavy": _code_heavy_tokens}
+
+    print(
+        f"{'stream':<12}{'tokens':>8}{'legacy us/tok':>16}"
+        f"{'incremental us/tok':>21}{'speedup':>10}"
+    )
+    for name, generate in generators.items():
+        for num_tokens in args.tokens:
+            tokens = generate(num_tokens, random.Random(args.seed))
+            legacy_time, legacy_out = _replay(
+                _LegacyCitationProcessor, tokens, docs, citation_mode
+            )
+            new_time, new_out = _replay(
+                DynamicCitationProcessor, tokens, docs, citation_mode
+            )
+            if legacy_out != new_out:
+                raise RuntimeError(f"Output mismatch for {name} ({num_tokens} tokens)")
+
+            print(
+                f"{name:<12}{num_tokens:>8}"
+                f"{legacy_time / num_tokens * 1e6:>16.2f}"
+                f"{new_time / num_tokens * 1e6:>21.2f}"
+                f"{legacy_time / new_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Times merging and deduplication of retrieved chunks on synthetic result sets.
+
+Simulates the output of many parallel search queries over the same documents, with
+overlapping hits, and runs it through `combine_retrieval_results` and
+`merge_individual_chunks`. Both are compared against the previous implementations,
+which grouped chunks through several dicts and searched every section for its
+center chunk, and the outputs are checked to be identical.
+
+Usage:
+
+python -m scripts.search_chunk_merging_benchmark --chunks 10000 --queries 10
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime
+from typing import TypeVar
+
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import InferenceSection
+from onyx.context.search.pipeline import merge_individual_chunks
+from onyx.context.search.retrieval.search_runner import combine_retrieval_results
+from onyx.context.search.utils import inference_section_from_chunks
+
+T = TypeVar("T")
+
+
+def _legacy_combine_retrieval_results(
+    chunk_sets: list[list[InferenceChunk]],
+) -> list[InferenceChunk]:
+    all_chunks = [chunk for chunk_set in chunk_sets for chunk in chunk_set]
+
+    unique_chunks: dict[tuple[str, int], InferenceChunk] = {}
+    for chunk in all_chunks:
+        key = (chunk.document_id, chunk.chunk_id)
+        if key not in unique_chunks:
+            unique_chunks[key] = chunk
+            continue
+
+        stored_chunk_score = unique_chunks[key].score or 0
+        this_chunk_score = chunk.score or 0
+        if stored_chunk_score < this_chunk_score:
+            unique_chunks[key] = chunk
+
+    return sorted(unique_chunks.values(), key=lambda x: x.score or 0, reverse=True)
+
+
+def _legacy_merge_individual_chunks(
+    chunks: list[InferenceChunk],
+) -> list[InferenceSection]:
+    if not chunks:
+        return []
+
+    chunk_to_original_index: dict[tuple[str, int], int] = {}
+    for idx, chunk in enumerate(chunks):
+        chunk_to_original_index[(chunk.document_id, chunk.chunk_id)] = idx
+
+    doc_chunks: dict[str, list[InferenceChunk]] = defaultdict(list)
+    for chunk in chunks:
+        doc_chunks[chunk.document_id].append(chunk)
+    for doc_id in doc_chunks:
+        doc_chunks[doc_id].sort(key=lambda c: c.chunk_id)
+
+    chunk_to_section: dict[tuple[str, int], InferenceSection] = {}
+
+    def _add_section(section_chunks: list[InferenceChunk]) -> None:
+        center_chunk = min(
+            section_chunks,
+            key=lambda c: chunk_to_original_index.get(
+                (c.document_id, c.chunk_id), float("inf")
+            ),
+        )
+        section = inference_section_from_chunks(
+            center_chunk=center_chunk, chunks=section_chunks.copy()
+        )
+        if section:
+            for chunk in section_chunks:
+                chunk_to_section[(chunk.document_id, chunk.chunk_id)] = section
+
+    for doc_chunk_list in doc_chunks.values():
+        current_section_chunks = [doc_chunk_list[0]]
+        for i in range(1, len(doc_chunk_list)):
+            prev_chunk = doc_chunk_list[i - 1]
+            curr_chunk = doc_chunk_list[i]
+            if curr_chunk.chunk_id == prev_chunk.chunk_id + 1:
+                current_section_chunks.append(curr_chunk)
+            else:
+                _add_section(current_section_chunks)
+                current_section_chunks = [curr_chunk]
+        _add_section(current_section_chunks)
+
+    seen_section_ids: set[tuple[str, int]] = set()
+    result: list[InferenceSection] = []
+    for chunk in chunks:
+        section = chunk_to_section[(chunk.document_id, chunk.chunk_id)]
+        section_id = (section.center_chunk.document_id, section.center_chunk.chunk_id)
+        if section_id not in seen_section_ids:
+            seen_section_ids.add(section_id)
+            result.append(section)
+
+    return result
+
+
+def _chunk(document_id: str, chunk_id: int, score: float) -> InferenceChunk:
+    return InferenceChunk(
+        document_id=document_id,
+        chunk_id=chunk_id,
+        content=f"content of {document_id} chunk {chunk_id}",
+        source_links=None,
+        image_file_id=None,
+        section_continuation=False,
+        source_type=DocumentSource.WEB,
+        semantic_identifier=document_id,
+        title=None,
+        boost=0,
+        score=score,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        doc_summary="",
+        chunk_context="",
+        updated_at=datetime(2024, 1, 1),
+        blurb="",
+    )
+
+
+def _build_result_sets(
+    num_chunks: int, num_queries: int, rng: random.Random
+) -> list[list[InferenceChunk]]:
+    """Result sets of similar queries, which hit overlapping chunks of the same
+    documents with different scores."""
+    num_docs = max(1, num_chunks // 20)
+    per_query = num_chunks // num_queries
+    result_sets: list[list[InferenceChunk]] = []
+    for _ in range(num_queries):
+        result_set = [
+            _chunk(
+                f"doc_{rng.randrange(num_docs)}",
+                rng.randrange(40),
+                # repeated scores exercise the tie breaking
+                round(rng.random(), 2),
+            )
+            for _ in range(per_query)
+        ]
+        result_set.sort(key=lambda chunk: chunk.score or 0, reverse=True)
+        result_sets.append(result_set)
+    return result_sets
+
+
+def _best_time(func: Callable[[], T], repeat: int) -> tuple[float, T]:
+    timings: list[float] = []
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    result = func()
+    timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result_sets = _build_result_sets(
+        args.chunks, args.queries, random.Random(args.seed)
+    )
+    all_chunks = [chunk for result_set in result_sets for chunk in result_set]
+
+    legacy_combine_time, legacy_combined = _best_time(
+        lambda: _legacy_combine_retrieval_results(result_sets), args.repeat
+    )
+    combine_time, combined = _best_time(
+        lambda: combine_retrieval_results(result_sets), args.repeat
+    )
+    if combined != legacy_combined:
+        raise RuntimeError("combine_retrieval_results output mismatch")
+
+    # Merging also runs on fused results that still contain repeated chunks
+    legacy_merge_time, legacy_sections = _best_time(
+        lambda: _legacy_merge_individual_chunks(all_chunks), args.repeat
+    )
+    merge_time, sections = _best_time(
+        lambda: merge_individual_chunks(all_chunks), args.repeat
+    )
+    if sections != legacy_sections:
+        raise RuntimeError("merge_individual_chunks output mismatch")
+
+    print(
+        f"{len(all_chunks)} chunks from {args.queries} queries, "
+        f"{len(combined)} unique, {len(sections)} sections"
+    )
+    print(f"{'step':<28}{'legacy ms':>12}{'new ms':>10}{'speedup':>10}")
+    for name, legacy_time, new_time in [
+        ("combine_retrieval_results", legacy_combine_time, combine_time),
+        ("merge_individual_chunks", legacy_merge_time, merge_time),
+    ]:
+        print(
+            f"{name:<28}{legacy_time * 1e3:>12.2f}{new_time * 1e3:>10.2f}"
+            f"{legacy_time / new_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
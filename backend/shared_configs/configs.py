@@ -61,6 +61,27 @@ DISABLE_RERANK_FOR_STREAMING = (
 # model. If torch finds more threads on its own, this value is not used.
 MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
 
+# Concurrent bi-encoder requests for the same model are coalesced into one forward pass.
+# A batch is flushed once it holds this many texts or after the max wait, whichever is first
+MODEL_SERVER_EMBED_MAX_BATCH_SIZE = int(
+    os.environ.get("MODEL_SERVER_EMBED_MAX_BATCH_SIZE") or 64
+)
+MODEL_SERVER_EMBED_BATCH_MAX_WAIT_MS = float(
+    os.environ.get("MODEL_SERVER_EMBED_BATCH_MAX_WAIT_MS") or 5
+)
+
+# Embeddings are sent back from the model server as raw little-endian buffers of this
+# dtype instead of JSON float lists. float16 halves the payload again at some precision
+# cost. Set to "json" to always use JSON.
+_MODEL_SERVER_EMBEDDING_TRANSPORT = (
+    os.environ.get("MODEL_SERVER_EMBEDDING_TRANSPORT") or "float32"
+).lower()
+MODEL_SERVER_EMBEDDING_TRANSPORT_DTYPE: str | None = (
+    _MODEL_SERVER_EMBEDDING_TRANSPORT
+    if _MODEL_SERVER_EMBEDDING_TRANSPORT in ("float32", "float16")
+    else None
+)
+
 # Model server that has indexing only set will throw exception if used for reranking
 # or intent classification
 INDEXING_ONLY = os.environ.get("INDEXING_ONLY", "").lower() == "true"
@@ -0,0 +1,92 @@
+"""Binary transport for embedding vectors between the API server and the model server.
+
+JSON encoding 1024-dim vectors as lists of Python floats is expensive on both ends, so
+clients can ask for the raw little-endian buffer instead by sending
+`Accept: application/x-onyx-ndarray` (optionally with `; dtype=float16`). Servers that
+don't know the media type just keep answering with JSON, which clients still accept.
+
+Layout (all little-endian):
+    magic     4 bytes   b"ONDA"
+    version   uint8
+    dtype     uint8     see _DTYPE_CODES
+    ndim      uint8
+    reserved  uint8
+    shape     ndim x uint32
+    data      prod(shape) x itemsize bytes
+"""
+
+import struct
+
+import numpy as np
+
+NDARRAY_MEDIA_TYPE = "application/x-onyx-ndarray"
+
+_MAGIC = b"ONDA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBBB")
+_DTYPE_CODES: dict[str, int] = {"float32": 0, "float16": 1}
+_CODE_TO_DTYPE: dict[int, np.dtype] = {
+    code: np.dtype(name).newbyteorder("<") for name, code in _DTYPE_CODES.items()
+}
+
+
+class NDArrayDecodeError(ValueError):
+    pass
+
+
+def build_ndarray_accept_header(dtype: str = "float32") -> str:
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported transport dtype: {dtype}")
+    return f"{NDARRAY_MEDIA_TYPE}; dtype={dtype}"
+
+
+def parse_ndarray_accept_header(accept: str | None) -> str | None:
+    """Returns the requested dtype if the client accepts the binary format, else None."""
+    if not accept:
+        return None
+
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type != NDARRAY_MEDIA_TYPE:
+            continue
+
+        dtype = "float32"
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "dtype":
+                dtype = value.strip()
+        return dtype if dtype in _DTYPE_CODES else "float32"
+
+    return None
+
+
+def encode_ndarray(array: np.ndarray, dtype: str = "float32") -> bytes:
+    out = np.ascontiguousarray(array, dtype=_CODE_TO_DTYPE[_DTYPE_CODES[dtype]])
+    header = _HEADER.pack(_MAGIC, _VERSION, _DTYPE_CODES[dtype], out.ndim, 0)
+    shape = struct.pack(f"<{out.ndim}I", *out.shape)
+    return header + shape + out.tobytes()
+
+
+def decode_ndarray(payload: bytes) -> np.ndarray:
+    """Decodes without copying, the result is a read-only view on the payload."""
+    if len(payload) < _HEADER.size:
+        raise NDArrayDecodeError("Payload is too short to contain a header")
+
+    magic, version, dtype_code, ndim, _ = _HEADER.unpack_from(payload)
+    if magic != _MAGIC or version != _VERSION:
+        raise NDArrayDecodeError(f"Unknown payload format: {magic!r} v{version}")
+    if dtype_code not in _CODE_TO_DTYPE:
+        raise NDArrayDecodeError(f"Unknown dtype code: {dtype_code}")
+
+    shape_offset = _HEADER.size
+    data_offset = shape_offset + 4 * ndim
+    shape = struct.unpack_from(f"<{ndim}I", payload, shape_offset)
+
+    dtype = _CODE_TO_DTYPE[dtype_code]
+    expected_size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    if len(payload) - data_offset != expected_size:
+        raise NDArrayDecodeError(
+            f"Expected {expected_size} bytes of data, got {len(payload) - data_offset}"
+        )
+
+    return np.frombuffer(payload, dtype=dtype, offset=data_offset).reshape(shape)
@@ -9,3 +9,28 @@ def batch_list(
     batch_size: int,
 ) -> list[list[T]]:
     return [lst[i : i + batch_size] for i in range(0, len(lst), batch_size)]
+
+
+def batch_indices_by_token_budget(
+    token_counts: list[int],
+    token_budget: int,
+) -> list[list[int]]:
+    """Groups the indices of similarly sized items into batches such that each batch,
+    padded to its longest item, stays within `token_budget` tokens. Items are sorted by
+    length first so that short items are not padded up to long ones. An item that is
+    larger than the budget on its own ends up in a batch by itself."""
+    order = sorted(range(len(token_counts)), key=lambda i: token_counts[i])
+
+    batches: list[list[int]] = []
+    current: list[int] = []
+    for idx in order:
+        # sorted ascending, so the current item is the longest of the batch so far
+        padded_length = max(token_counts[idx], 1)
+        if current and padded_length * (len(current) + 1) > token_budget:
+            batches.append(current)
+            current = []
+        current.append(idx)
+
+    if current:
+        batches.append(current)
+    return batches
@@ -50,7 +50,7 @@ def test_single_text_file_with_metadata(
     mock_get_filestore.return_value = mock_file_store
     mock_file_store.read_file_record.return_value = mock_filestore_record
     mock_get_session.return_value.__enter__.return_value = mock_db_session
-    mock_file_store.read_file.return_value = file_content
+    mock_file_store.open_stream.return_value = file_content
 
     with patch(
         "onyx.connectors.file.connector.get_default_file_store",
@@ -90,7 +90,7 @@ def test_two_text_files_with_zip_metadata(
         MagicMock(file_id=str(uuid4()), display_name="file1.txt"),
         MagicMock(file_id=str(uuid4()), display_name="file2.txt"),
     ]
-    mock_file_store.read_file.side_effect = [file1_content, file2_content]
+    mock_file_store.open_stream.side_effect = [file1_content, file2_content]
     zip_metadata = {
         "file1.txt": {
             "filename": "file1.txt",
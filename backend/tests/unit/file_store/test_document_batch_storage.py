@@ -0,0 +1,133 @@
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+from typing import Any
+from typing import IO
+
+import pytest
+
+from onyx.configs.constants import FileOrigin
+from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentSource
+from onyx.connectors.models import TextSection
+from onyx.file_store.document_batch_storage import DocumentBatchStorageFormat
+from onyx.file_store.document_batch_storage import FileStoreDocumentBatchStorage
+
+
+class InMemoryFileStore:
+    def __init__(self) -> None:
+        self.files: dict[str, tuple[bytes, str]] = {}
+
+    def has_file(self, file_id: str, file_origin: FileOrigin, file_type: str) -> bool:
+        return file_id in self.files and self.files[file_id][1] == file_type
+
+    def save_file(self, content: IO, file_id: str, file_type: str, **_: Any) -> str:
+        data = content.read()
+        self.files[file_id] = (
+            data if isinstance(data, bytes) else data.encode("utf-8"),
+            file_type,
+        )
+        return file_id
+
+    def read_file(self, file_id: str, **_: Any) -> IO[bytes]:
+        return BytesIO(self.files[file_id][0])
+
+    def delete_file(self, file_id: str) -> None:
+        del self.files[file_id]
+
+    def change_file_id(self, old_file_id: str, new_file_id: str) -> None:
+        self.files[new_file_id] = self.files.pop(old_file_id)
+
+
+def _build_documents(count: int) -> list[Document]:
+    return [
+        Document(
+            id=f"doc_{i}",
+            sections=[TextSection(text=f"content {i}\nwith newlines", link="link")],
+            source=DocumentSource.FILE,
+            semantic_identifier=f"Doc {i}",
+            metadata={"tags": ["a", "b"]},
+            doc_updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+
+def _build_storage(
+    file_store: InMemoryFileStore,
+    storage_format: DocumentBatchStorageFormat,
+    index_attempt_id: int = 2,
+) -> FileStoreDocumentBatchStorage:
+    return FileStoreDocumentBatchStorage(
+        cc_pair_id=1,
+        index_attempt_id=index_attempt_id,
+        file_store=file_store,  # type: ignore[arg-type]
+        storage_format=storage_format,
+    )
+
+
+@pytest.mark.parametrize("storage_format", list(DocumentBatchStorageFormat))
+def test_store_and_get_batch_roundtrip(
+    storage_format: DocumentBatchStorageFormat,
+) -> None:
+    file_store = InMemoryFileStore()
+    storage = _build_storage(file_store, storage_format)
+    documents = _build_documents(5)
+
+    storage.store_batch(0, documents)
+
+    assert storage.get_batch(0) == documents
+    assert storage.get_batch(1) is None
+
+    storage.delete_batch_by_num(0)
+    assert file_store.files == {}
+
+
+def test_jsonl_gzip_batches_are_smaller() -> None:
+    file_store = InMemoryFileStore()
+    documents = _build_documents(50)
+
+    _build_storage(file_store, DocumentBatchStorageFormat.JSON).store_batch(
+        0, documents
+    )
+    _build_storage(file_store, DocumentBatchStorageFormat.JSONL_GZIP).store_batch(
+        0, documents
+    )
+
+    json_size = len(file_store.files["iab/1/2/0.json"][0])
+    jsonl_gzip_size = len(file_store.files["iab/1/2/0.jsonl.gz"][0])
+    assert jsonl_gzip_size < json_size / 2
+
+
+def test_reads_batches_stored_in_previous_format() -> None:
+    file_store = InMemoryFileStore()
+    documents = _build_documents(3)
+    _build_storage(file_store, DocumentBatchStorageFormat.JSON).store_batch(
+        0, documents
+    )
+
+    storage = _build_storage(file_store, DocumentBatchStorageFormat.JSONL_GZIP)
+    assert storage.get_batch(0) == documents
+
+    storage.delete_batch_by_num(0)
+    assert file_store.files == {}
+
+
+def test_moving_batches_to_new_attempt_keeps_format() -> None:
+    file_store = InMemoryFileStore()
+    documents = _build_documents(3)
+    _build_storage(file_store, DocumentBatchStorageFormat.JSONL_GZIP).store_batch(
+        4, documents
+    )
+
+    new_storage = _build_storage(
+        file_store, DocumentBatchStorageFormat.JSON, index_attempt_id=3
+    )
+    new_storage.update_old_batches_to_new_index_attempt(["iab/1/2/4.jsonl.gz"])
+
+    assert list(file_store.files) == ["iab/1/3/4.jsonl.gz"]
+    assert new_storage.get_batch(4) == documents
+
+    path_info = new_storage.extract_path_info("iab/1/3/4.jsonl.gz")
+    assert path_info is not None
+    assert path_info.batch_num == 4
@@ -238,6 +238,40 @@ class TestExternalStorageFileStore:
                 assert call_args[1]["Key"] == "onyx-files/public/test-file.txt"
                 assert call_args[1]["ContentType"] == "text/plain"
 
+    @patch("boto3.client")
+    def test_s3_open_stream_mock(self, mock_boto3: MagicMock) -> None:
+        """Test that S3 streams are read lazily with range requests"""
+        content = b"0123456789" * 10
+        mock_s3_client: Mock = Mock()
+        mock_boto3.return_value = mock_s3_client
+        mock_s3_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": '"etag"',
+        }
+
+        def _get_object(Range: str, **_: Any) -> dict[str, Any]:
+            start, end = Range.removeprefix("bytes=").split("-")
+            return {"Body": BytesIO(content[int(start) : int(end) + 1])}
+
+        mock_s3_client.get_object.side_effect = _get_object
+
+        file_record = Mock(bucket_name="test-bucket", object_key="test-key")
+        with patch(
+            "onyx.file_store.file_store.get_filerecord_by_file_id",
+            return_value=file_record,
+        ):
+            file_store = S3BackedFileStore(bucket_name="test-bucket")
+            stream = file_store.open_stream("test-file", db_session=Mock())
+
+        mock_s3_client.get_object.assert_not_called()
+        stream.seek(95)
+        assert stream.read() == content[95:]
+        assert stream.seek(0, 2) == len(content)
+
+        call_kwargs = mock_s3_client.get_object.call_args_list[0].kwargs
+        assert call_kwargs["Range"] == "bytes=95-99"
+        assert call_kwargs["IfMatch"] == '"etag"'
+
     def test_minio_client_initialization(self) -> None:
         """Test S3 client initialization with MinIO endpoint"""
         with (
@@ -0,0 +1,121 @@
+import io
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from onyx.db._deprecated import pg_file_store
+from onyx.db._deprecated.pg_file_store import open_lobj_stream
+from onyx.file_store.streaming import RangeReadStream
+
+
+class _RangeReader:
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+        self.ranges: list[tuple[int, int]] = []
+
+    def __call__(self, start: int, end: int) -> bytes:
+        self.ranges.append((start, end))
+        return self.content[start:end]
+
+
+def test_range_read_stream_reads_ahead() -> None:
+    content = bytes(range(256)) * 4
+    reader = _RangeReader(content)
+    stream = RangeReadStream(size=len(content), read_range=reader, read_ahead_size=100)
+
+    assert reader.ranges == []
+    assert stream.read(10) == content[:10]
+    assert stream.read(20) == content[10:30]
+    # reads within the read ahead range don't fetch again
+    assert reader.ranges == [(0, 100)]
+
+    stream.seek(50)
+    assert stream.read() == content[50:]
+    # the rest of the read ahead range is reused
+    assert reader.ranges == [(0, 100), (100, 1024)]
+
+    assert stream.seek(-24, io.SEEK_END) == 1000
+    assert stream.read(50) == content[1000:]
+    assert stream.read(10) == b""
+    stream.seek(10)
+    assert stream.read(10) == content[10:20]
+    assert reader.ranges == [(0, 100), (100, 1024), (1000, 1024), (10, 110)]
+
+    stream.close()
+    with pytest.raises(ValueError):
+        stream.read(1)
+
+
+def test_range_read_stream_buffered() -> None:
+    content = b"line 1\nline 2\nline 3\n" * 1000
+    reader = _RangeReader(content)
+    stream = io.BufferedReader(
+        RangeReadStream(size=len(content), read_range=reader, read_ahead_size=4096)
+    )
+
+    assert stream.readline() == b"line 1\n"
+    stream.seek(7 * 3000 - 7)
+    assert stream.readline() == b"line 3\n"
+    assert stream.readline() == b""
+    assert max(end - start for start, end in reader.ranges) <= 8192
+
+
+def test_range_read_stream_detects_short_reads() -> None:
+    stream = RangeReadStream(size=100, read_range=lambda start, end: b"short")
+
+    with pytest.raises(IOError):
+        stream.read(10)
+
+
+class _LargeObject:
+    def __init__(self, content: bytes) -> None:
+        self.stream = io.BytesIO(content)
+        self.closed = False
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.stream.seek(offset, whence)
+
+    def read(self, size: int) -> bytes:
+        return self.stream.read(size)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_lobj_stream_releases_the_large_object(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    content = b"large object" * 1000
+    large_object = _LargeObject(content)
+    pg_conn = MagicMock()
+    pg_conn.lobject.return_value = large_object
+    monkeypatch.setattr(
+        pg_file_store, "get_pg_conn_from_session", lambda db_session: pg_conn
+    )
+
+    with open_lobj_stream(lobj_oid=1, db_session=MagicMock()) as stream:
+        assert stream.read(12) == b"large object"
+        stream.seek(-6, io.SEEK_END)
+        assert stream.read() == b"object"
+        assert not large_object.closed
+    assert large_object.closed
+
+
+def test_lobj_stream_without_lobject_closes_its_descriptor(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        pg_file_store, "get_pg_conn_from_session", lambda db_session: object()
+    )
+    statements: list[str] = []
+
+    def _execute(statement: Any, params: dict[str, int]) -> MagicMock:
+        statements.append(str(statement).split("(")[0])
+        if "lo_get" in str(statement):
+            return MagicMock(scalar=lambda: b"x" * params["length"])
+        return MagicMock(scalar_one=lambda: 7 if "lo_open" in str(statement) else 10)
+
+    with open_lobj_stream(lobj_oid=1, db_session=MagicMock(execute=_execute)) as stream:
+        assert statements == ["SELECT lo_open", "SELECT lo_lseek64", "SELECT lo_close"]
+        assert stream.read() == b"x" * 10
@@ -5,10 +5,20 @@ from typing import List
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
 from model_server.encoders import embed_text
 from model_server.encoders import process_embed_request
+from model_server.encoders import router
+from shared_configs.embedding_transport import build_ndarray_accept_header
+from shared_configs.embedding_transport import decode_ndarray
+from shared_configs.embedding_transport import encode_ndarray
+from shared_configs.embedding_transport import NDARRAY_MEDIA_TYPE
+from shared_configs.embedding_transport import NDArrayDecodeError
+from shared_configs.embedding_transport import parse_ndarray_accept_header
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import EmbedRequest
 
@@ -50,9 +60,9 @@ async def test_embed_text_local_model() -> None:
 
 @pytest.mark.asyncio
 async def test_concurrent_embeddings() -> None:
-    def mock_encode(*args: Any, **kwargs: Any) -> List[List[float]]:
+    def mock_encode(texts: List[str], **kwargs: Any) -> List[List[float]]:
         time.sleep(5)
-        return [[0.1, 0.2, 0.3]]
+        return [[0.1, 0.2, 0.3] for _ in texts]
 
     test_req = EmbedRequest(
         texts=["test"],
@@ -85,3 +95,102 @@ async def test_concurrent_embeddings() -> None:
         # However, the developer may still introduce unnecessary blocking above the mock and this test will
         # still pass as long as it's less than (7 - 5) / 5 seconds
         assert end_time - start_time < 7
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced() -> None:
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: [
+            [float(len(text))] for text in texts
+        ]
+        mock_get_model.return_value = mock_model
+
+        results = await asyncio.gather(
+            *[
+                embed_text(
+                    texts=["a" * i, "b" * (i + 10)],
+                    model_name="fake-local-model",
+                    max_context_length=512,
+                    normalize_embeddings=True,
+                    prefix=None,
+                )
+                for i in range(1, 4)
+            ]
+        )
+
+        # each request gets back exactly its own embeddings, in order
+        assert results == [
+            [[1.0], [11.0]],
+            [[2.0], [12.0]],
+            [[3.0], [13.0]],
+        ]
+        # but the model only ran a single forward pass
+        mock_model.encode.assert_called_once()
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_ndarray_transport_roundtrip(dtype: str) -> None:
+    embeddings = np.array([[0.5, -1.25, 2.0], [0.0, 3.5, -0.75]])
+
+    payload = encode_ndarray(embeddings, dtype=dtype)
+    decoded = decode_ndarray(payload)
+
+    assert decoded.shape == (2, 3)
+    assert decoded.dtype == np.dtype(dtype)
+    assert decoded.tolist() == embeddings.tolist()
+    # header + raw buffer, no per-float text encoding
+    assert len(payload) == 8 + 2 * 4 + embeddings.size * np.dtype(dtype).itemsize
+
+    with pytest.raises(NDArrayDecodeError):
+        decode_ndarray(payload[:-1])
+
+
+def test_ndarray_accept_header_negotiation() -> None:
+    assert parse_ndarray_accept_header(None) is None
+    assert parse_ndarray_accept_header("application/json") is None
+    assert (
+        parse_ndarray_accept_header(build_ndarray_accept_header("float16")) == "float16"
+    )
+    assert (
+        parse_ndarray_accept_header("application/json, application/x-onyx-ndarray")
+        == "float32"
+    )
+
+
+def test_bi_encoder_endpoint_negotiates_binary_response() -> None:
+    app = FastAPI()
+    app.include_router(router)
+    app.state.gpu_type = "none"
+    client = TestClient(app)
+
+    embed_request = EmbedRequest(
+        texts=["test1", "test2"],
+        model_name="fake-local-model",
+        max_context_length=512,
+        normalize_embeddings=True,
+        text_type=EmbedTextType.PASSAGE,
+    )
+
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: np.array(
+            [[0.5, 1.5], [2.5, 3.5]], dtype=np.float32
+        )
+        mock_get_model.return_value = mock_model
+
+        json_response = client.post(
+            "/encoder/bi-encoder-embed", json=embed_request.model_dump()
+        )
+        binary_response = client.post(
+            "/encoder/bi-encoder-embed",
+            json=embed_request.model_dump(),
+            headers={"Accept": build_ndarray_accept_header()},
+        )
+
+    assert json_response.json() == {"embeddings": [[0.5, 1.5], [2.5, 3.5]]}
+    assert binary_response.headers["content-type"].startswith(NDARRAY_MEDIA_TYPE)
+    assert decode_ndarray(binary_response.content).tolist() == [
+        [0.5, 1.5],
+        [2.5, 3.5],
+    ]
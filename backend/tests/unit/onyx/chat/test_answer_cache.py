@@ -0,0 +1,201 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from onyx.chat import answer_cache
+from onyx.chat.answer_cache import AnswerCache
+from onyx.chat.answer_cache import AnswerCacheRequest
+from onyx.chat.chat_state import ChatStateContainer
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import SearchDoc
+from onyx.server.query_and_chat.placement import Placement
+from onyx.server.query_and_chat.streaming_models import AgentResponseDelta
+from onyx.server.query_and_chat.streaming_models import AgentResponseStart
+from onyx.server.query_and_chat.streaming_models import CitationInfo
+from onyx.server.query_and_chat.streaming_models import OverallStop
+from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.tools.models import ToolCallInfo
+
+_SEARCH_TOOL_ID = 1
+_STARTED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def redis_client(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeRedis:
+    redis_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(answer_cache, "get_redis_client", lambda: redis_client)
+    return redis_client
+
+
+@pytest.fixture
+def last_modified(
+    monkeypatch: pytest.MonkeyPatch, redis_client: fakeredis.FakeRedis
+) -> dict[str, datetime]:
+    last_modified = {"doc_1": _STARTED_AT - timedelta(days=1)}
+    monkeypatch.setattr(
+        answer_cache,
+        "fetch_last_modified_for_documents",
+        lambda document_ids, _: {
+            document_id: last_modified[document_id]
+            for document_id in document_ids
+            if document_id in last_modified
+        },
+    )
+    return last_modified
+
+
+def _request(
+    question_embedding: list[float], scope: str = "scope"
+) -> AnswerCacheRequest:
+    return AnswerCacheRequest(
+        persona_id=1,
+        scope=scope,
+        question="how do I reset my VPN?",
+        question_embedding=question_embedding,
+        started_at=_STARTED_AT,
+    )
+
+
+def _search_doc(document_id: str) -> SearchDoc:
+    return SearchDoc(
+        document_id=document_id,
+        chunk_ind=0,
+        semantic_identifier=document_id,
+        blurb="blurb",
+        source_type=DocumentSource.WEB,
+        boost=0,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+    )
+
+
+def _packets(stop_reason: str | None = None) -> list[Packet]:
+    placement = Placement(turn_index=1)
+    return [
+        Packet(placement=placement, obj=AgentResponseStart()),
+        Packet(placement=placement, obj=AgentResponseDelta(content="Restart ")),
+        Packet(placement=placement, obj=AgentResponseDelta(content="it ")),
+        Packet(
+            placement=placement,
+            obj=CitationInfo(citation_number=1, document_id="doc_1"),
+        ),
+        Packet(placement=placement, obj=AgentResponseDelta(content="[1]")),
+        Packet(placement=placement, obj=OverallStop(stop_reason=stop_reason)),
+    ]
+
+
+def _state_container(
+    document_id: str = "doc_1", tool_id: int = _SEARCH_TOOL_ID
+) -> ChatStateContainer:
+    state_container = ChatStateContainer()
+    state_container.set_answer_tokens("Restart it [1]")
+    state_container.set_citation_mapping({1: _search_doc(document_id)})
+    state_container.add_tool_call(
+        ToolCallInfo(
+            parent_tool_call_id=None,
+            turn_index=0,
+            tab_index=0,
+            tool_name="internal_search",
+            tool_call_id="call_1",
+            tool_id=tool_id,
+            reasoning_tokens=None,
+            tool_call_arguments={"queries": ["reset vpn"]},
+            tool_call_response="results",
+            search_docs=[_search_doc(document_id)],
+        )
+    )
+    return state_container
+
+
+def _store(cache: AnswerCache, request: AnswerCacheRequest, **kwargs: Any) -> None:
+    cache.store(
+        request=request,
+        packets=kwargs.pop("packets", _packets()),
+        state_container=kwargs.pop("state_container", _state_container()),
+        search_tool_id=_SEARCH_TOOL_ID,
+        db_session=MagicMock(),
+    )
+
+
+def test_similar_questions_replay_the_answer(
+    last_modified: dict[str, datetime],
+) -> None:
+    cache = AnswerCache(similarity_threshold=0.95, ttl_seconds=60)
+    _store(cache, _request([1.0, 0.0]))
+
+    cached_answer = cache.lookup(_request([0.99, 0.05]), MagicMock())
+    assert cached_answer is not None
+    assert cached_answer.answer == "Restart it [1]"
+    assert cached_answer.cited_document_ids == ["doc_1"]
+    assert [tool_call.tool_call_id for tool_call in cached_answer.tool_calls] == [
+        "call_1"
+    ]
+    # the answer deltas around the citation are merged
+    assert [packet.obj.type for packet in cached_answer.packets] == [
+        "message_start",
+        "message_delta",
+        "citation_info",
+        "message_delta",
+        "stop",
+    ]
+    assert cached_answer.packets[1].obj == AgentResponseDelta(content="Restart it ")
+
+    # different questions and other scopes don't match
+    assert cache.lookup(_request([0.0, 1.0]), MagicMock()) is None
+    assert cache.lookup(_request([1.0, 0.0], scope="other"), MagicMock()) is None
+
+    # answers citing documents that changed since are dropped
+    last_modified["doc_1"] = _STARTED_AT + timedelta(minutes=1)
+    assert cache.lookup(_request([1.0, 0.0]), MagicMock()) is None
+    last_modified["doc_1"] = _STARTED_AT
+    assert cache.lookup(_request([1.0, 0.0]), MagicMock()) is None
+
+    stats = cache.get_stats(persona_id=1)
+    assert (stats.hits, stats.misses, stats.stale, stats.stores) == (1, 3, 1, 1)
+    assert stats.hit_rate == pytest.approx(0.2)
+
+
+def test_incomplete_or_unverifiable_answers_are_not_cached(
+    last_modified: dict[str, datetime],
+) -> None:
+    cache = AnswerCache(similarity_threshold=0.95, ttl_seconds=60)
+
+    _store(cache, _request([1.0, 0.0]), packets=_packets("user_cancelled"))
+    # other tools may depend on anything
+    _store(cache, _request([1.0, 0.0]), state_container=_state_container(tool_id=2))
+    # documents that are not indexed can't be checked for changes
+    _store(
+        cache,
+        _request([1.0, 0.0]),
+        state_container=_state_container(document_id="federated_doc"),
+    )
+    last_modified["doc_1"] = _STARTED_AT + timedelta(seconds=1)
+    _store(cache, _request([1.0, 0.0]))
+
+    assert cache.get_stats(persona_id=1).stores == 0
+
+
+def test_oldest_answers_are_dropped_and_personas_invalidated(
+    last_modified: dict[str, datetime], redis_client: fakeredis.FakeRedis
+) -> None:
+    cache = AnswerCache(
+        similarity_threshold=0.95, ttl_seconds=60, max_entries_per_scope=2
+    )
+    _store(cache, _request([1.0, 0.0, 0.0]))
+    _store(cache, _request([0.0, 1.0, 0.0]))
+    _store(cache, _request([0.0, 0.0, 1.0]))
+
+    assert cache.lookup(_request([1.0, 0.0, 0.0]), MagicMock()) is None
+    assert cache.lookup(_request([0.0, 1.0, 0.0]), MagicMock()) is not None
+    assert cache.lookup(_request([0.0, 0.0, 1.0]), MagicMock()) is not None
+
+    cache.invalidate_persona(persona_id=1)
+    assert cache.lookup(_request([0.0, 0.0, 1.0]), MagicMock()) is None
+    assert redis_client.keys("*answer_cache:1:scope*") == []
+    assert cache.get_stats(persona_id=1).invalidations == 1
@@ -1881,6 +1881,45 @@ class TestCitationModesWithCodeBlocks:
         assert "[1]" in output
         assert len(citations) == 0
 
+    def test_code_fence_split_across_tokens(
+        self, mock_search_docs: CitationMapping
+    ) -> None:
+        """Test that a fence streamed one backtick at a time still opens a code block."""
+        processor = DynamicCitationProcessor(citation_mode=CitationMode.HYPERLINK)
+        processor.update_citation_mapping({1: mock_search_docs[1]})
+
+        tokens: list[str | None] = [
+            "Code:\n`",
+            "`",
+            "`python\nx = a[",
+            "1]\n`",
+            "``\nSee [",
+            "1].",
+        ]
+        output, citations = process_tokens(processor, tokens)
+
+        assert "x = a[1]" in output
+        assert "See [[1]](https://example.com/doc1)." in output
+        assert len(citations) == 1
+
+    def test_citations_after_long_output(
+        self, mock_search_docs: CitationMapping
+    ) -> None:
+        """Test citations and code blocks deep into a long streamed answer."""
+        processor = DynamicCitationProcessor(citation_mode=CitationMode.HYPERLINK)
+        processor.update_citation_mapping({1: mock_search_docs[1]})
+
+        tokens: list[str | None] = [" word"] * 5000
+        tokens += ["\n```\n", "a[1]", "\n```\n", " done", " [", "1", "]"]
+        output, citations = process_tokens(processor, tokens)
+
+        assert output.startswith(" word" * 5000)
+        assert output.endswith(
+            "\n```plaintext\na[1]\n```\n done [[1]](https://example.com/doc1)"
+        )
+        assert len(citations) == 1
+        assert processor.llm_out == "".join(t for t in tokens if t is not None)
+
     def test_keep_markers_mode_ignores_citations_in_code_block(
         self, mock_search_docs: CitationMapping
     ) -> None:
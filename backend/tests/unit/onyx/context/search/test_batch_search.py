@@ -0,0 +1,159 @@
+from datetime import datetime
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.configs.constants import FederatedConnectorSource
+from onyx.context.search import pipeline
+from onyx.context.search.models import ChunkIndexRequest
+from onyx.context.search.models import ChunkSearchRequest
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.retrieval import search_runner
+from onyx.federated_connectors.federated_retrieval import FederatedRetrievalInfo
+
+
+def _chunk(document_id: str, score: float, content: str = "content") -> InferenceChunk:
+    return InferenceChunk(
+        document_id=document_id,
+        chunk_id=0,
+        content=content,
+        source_links=None,
+        image_file_id=None,
+        section_continuation=False,
+        source_type=DocumentSource.WEB,
+        semantic_identifier=document_id,
+        title=None,
+        boost=0,
+        score=score,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        doc_summary="",
+        chunk_context="",
+        updated_at=datetime(2024, 1, 1),
+        blurb="",
+    )
+
+
+def test_batch_search_chunks_embeds_queries_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        search_runner,
+        "get_federated_retrieval_functions",
+        lambda **_: [
+            FederatedRetrievalInfo(
+                retrieval_function=lambda request: [
+                    _chunk(f"slack_{request.query}", 0.1)
+                ],
+                source=FederatedConnectorSource.FEDERATED_SLACK,
+            )
+        ],
+    )
+    embedded_batches: list[list[str]] = []
+
+    def _get_query_embeddings(queries: list[str], _: Any) -> list[list[float]]:
+        embedded_batches.append(queries)
+        return [[float(idx)] for idx in range(len(queries))]
+
+    monkeypatch.setattr(search_runner, "get_query_embeddings", _get_query_embeddings)
+
+    document_index = MagicMock()
+    document_index.hybrid_retrieval.side_effect = lambda query, **kwargs: [
+        _chunk(f"web_{query}", 0.5 + kwargs["query_embedding"][0] / 10)
+    ]
+    filters = IndexFilters(access_control_list=None)
+
+    results = search_runner.batch_search_chunks(
+        query_requests=[
+            ChunkIndexRequest(query="first", filters=filters),
+            ChunkIndexRequest(query="second", hybrid_alpha=0.2, filters=filters),
+        ],
+        user_id=None,
+        document_index=document_index,
+        db_session=MagicMock(),
+    )
+
+    assert embedded_batches == [["first", "second"]]
+    assert [[chunk.document_id for chunk in chunks] for chunks in results] == [
+        ["web_first", "slack_first"],
+        ["web_second", "slack_second"],
+    ]
+    assert [
+        call.kwargs["hybrid_alpha"]
+        for call in document_index.hybrid_retrieval.call_args_list
+    ] == [pytest.approx(search_runner.HYBRID_ALPHA), 0.2]
+
+
+def test_batch_search_pipeline_censors_chunks_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    build_filters_calls: list[ChunkSearchRequest] = []
+
+    def _build_search_filters(
+        chunk_search_request: ChunkSearchRequest, **_: Any
+    ) -> IndexFilters:
+        build_filters_calls.append(chunk_search_request)
+        return IndexFilters(access_control_list=["PUBLIC"])
+
+    monkeypatch.setattr(pipeline, "_build_search_filters", _build_search_filters)
+    monkeypatch.setattr(
+        pipeline,
+        "batch_search_chunks",
+        lambda query_requests, **_: [
+            [_chunk("shared", 0.9), _chunk("hidden", 0.8)],
+            [_chunk("other", 0.7), _chunk("shared", 0.3)],
+        ],
+    )
+    censor_calls: list[list[str]] = []
+
+    def _censor_chunks(chunks: list[InferenceChunk], _: Any) -> list[InferenceChunk]:
+        censor_calls.append([chunk.document_id for chunk in chunks])
+        return [
+            (
+                chunk.model_copy(update={"content": "censored"})
+                if chunk.document_id == "shared"
+                else chunk
+            )
+            for chunk in chunks
+            if chunk.document_id != "hidden"
+        ]
+
+    monkeypatch.setattr(pipeline, "_censor_chunks", _censor_chunks)
+
+    results = pipeline.batch_search_pipeline(
+        chunk_search_requests=[
+            ChunkSearchRequest(query="first"),
+            ChunkSearchRequest(query="second", hybrid_alpha=0.2),
+        ],
+        document_index=MagicMock(),
+        user=None,
+        persona=None,
+        db_session=MagicMock(),
+    )
+
+    assert len(build_filters_calls) == 1
+    assert censor_calls == [["shared", "hidden", "other"]]
+    # censored chunks keep the score they had for each query
+    assert [
+        [(chunk.document_id, chunk.score, chunk.content) for chunk in chunks]
+        for chunks in results
+    ] == [
+        [("shared", 0.9, "censored")],
+        [("other", 0.7, "content"), ("shared", 0.3, "censored")],
+    ]
+
+    with pytest.raises(ValueError):
+        pipeline.batch_search_pipeline(
+            chunk_search_requests=[
+                ChunkSearchRequest(query="first"),
+                ChunkSearchRequest(query="second", bypass_acl=True),
+            ],
+            document_index=MagicMock(),
+            user=None,
+            persona=None,
+            db_session=MagicMock(),
+        )
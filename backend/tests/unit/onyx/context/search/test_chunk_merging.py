@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.pipeline import merge_individual_chunks
+from onyx.context.search.retrieval.search_runner import combine_retrieval_results
+
+
+def _chunk(
+    document_id: str, chunk_id: int, score: float | None = 1.0
+) -> InferenceChunk:
+    return InferenceChunk(
+        document_id=document_id,
+        chunk_id=chunk_id,
+        content=f"{document_id}-{chunk_id}",
+        source_links=None,
+        image_file_id=None,
+        section_continuation=False,
+        source_type=DocumentSource.WEB,
+        semantic_identifier=document_id,
+        title=None,
+        boost=0,
+        score=score,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        doc_summary="",
+        chunk_context="",
+        updated_at=datetime(2024, 1, 1),
+        blurb="",
+    )
+
+
+def test_merge_individual_chunks_groups_adjacent_chunks() -> None:
+    chunks = [
+        _chunk("a", 2),
+        _chunk("b", 0),
+        _chunk("a", 1),
+        _chunk("a", 5),
+        _chunk("b", 1),
+        _chunk("a", 3),
+    ]
+
+    sections = merge_individual_chunks(chunks)
+
+    assert [
+        (
+            section.center_chunk.document_id,
+            section.center_chunk.chunk_id,
+            section.combined_content,
+        )
+        for section in sections
+    ] == [
+        ("a", 2, "a-1\na-2\na-3"),
+        ("b", 0, "b-0\nb-1"),
+        ("a", 5, "a-5"),
+    ]
+    assert sections[0].chunks == [chunks[2], chunks[0], chunks[5]]
+
+
+def test_merge_individual_chunks_repeated_chunks() -> None:
+    # a repeated chunk splits the run and belongs to the later section
+    chunks = [_chunk("a", 0), _chunk("a", 1), _chunk("a", 1), _chunk("a", 2)]
+
+    sections = merge_individual_chunks(chunks)
+
+    assert [[chunk.chunk_id for chunk in section.chunks] for section in sections] == [
+        [0, 1],
+        [1, 2],
+    ]
+    assert merge_individual_chunks([]) == []
+
+
+def test_combine_retrieval_results_keeps_best_score() -> None:
+    first_set = [_chunk("a", 0, 0.2), _chunk("b", 0, 0.5), _chunk("c", 0, None)]
+    second_set = [_chunk("a", 0, 0.5), _chunk("b", 0, 0.5), _chunk("d", 0, 0.9)]
+
+    combined = combine_retrieval_results([first_set, second_set])
+
+    # ties keep the first seen chunk, and are ordered by first appearance
+    assert combined == [second_set[2], second_set[0], first_set[1], first_set[2]]
+    assert combined[1] is second_set[0]
+    assert combined[2] is first_set[1]
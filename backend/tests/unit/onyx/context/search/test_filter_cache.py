@@ -0,0 +1,137 @@
+from typing import Any
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from onyx.context.search import filter_cache
+from onyx.context.search.filter_cache import bump_search_filter_permission_version
+from onyx.context.search.filter_cache import search_filter_cache_scope
+from onyx.context.search.filter_cache import SearchFilterCache
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, int] = {}
+        self.fail = False
+
+    def get(self, key: str) -> bytes | None:
+        if self.fail:
+            raise ConnectionError("redis is down")
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incr(self, key: str) -> int:
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+@pytest.fixture
+def redis_client(monkeypatch: pytest.MonkeyPatch) -> _FakeRedis:
+    redis_client = _FakeRedis()
+    monkeypatch.setattr(filter_cache, "get_redis_client", lambda **_: redis_client)
+    return redis_client
+
+
+@pytest.fixture
+def acl_lookups(monkeypatch: pytest.MonkeyPatch) -> list[Any]:
+    lookups: list[Any] = []
+
+    def _build_access_filters_for_user(user: Any, _: Any) -> list[str]:
+        lookups.append(user)
+        return [f"user_email:{user.email}", "PUBLIC"]
+
+    monkeypatch.setattr(
+        filter_cache, "build_access_filters_for_user", _build_access_filters_for_user
+    )
+    return lookups
+
+
+def _user(email: str) -> MagicMock:
+    user = MagicMock()
+    user.id = uuid4()
+    user.email = email
+    return user
+
+
+def test_acl_cached_until_permission_version_bumped(
+    redis_client: _FakeRedis, acl_lookups: list[Any]
+) -> None:
+    cache = SearchFilterCache(ttl_seconds=60, enabled=True)
+    alice, bob = _user("alice@test.com"), _user("bob@test.com")
+
+    acl = cache.get_user_acl(alice, MagicMock())
+    # callers get their own copy
+    acl.append("mutated")
+    assert cache.get_user_acl(alice, MagicMock()) == [
+        "user_email:alice@test.com",
+        "PUBLIC",
+    ]
+    cache.get_user_acl(bob, MagicMock())
+    assert acl_lookups == [alice, bob]
+
+    bump_search_filter_permission_version()
+    cache.get_user_acl(alice, MagicMock())
+    assert acl_lookups == [alice, bob, alice]
+    assert cache.get_stats().hits == 1
+
+
+def test_turn_scope_counts_round_trips_saved(
+    redis_client: _FakeRedis, acl_lookups: list[Any]
+) -> None:
+    cache = SearchFilterCache(ttl_seconds=60, enabled=True)
+    alice = _user("alice@test.com")
+    persona = MagicMock()
+    persona.id = 1
+    persona.user_files = []
+    persona.document_sets = [MagicMock()]
+    persona.document_sets[0].name = "engineering"
+    persona.search_start_date = None
+
+    with search_filter_cache_scope() as stats:
+        for _ in range(3):
+            cache.get_user_acl(alice, MagicMock())
+            assert cache.get_persona_filters(persona).document_set_names == (
+                "engineering",
+            )
+
+    assert len(acl_lookups) == 1
+    assert stats.misses == 2
+    assert stats.db_round_trips_saved == 4
+
+
+def test_redis_failure_only_memoizes_within_turn(
+    redis_client: _FakeRedis, acl_lookups: list[Any]
+) -> None:
+    cache = SearchFilterCache(ttl_seconds=60, enabled=True)
+    alice = _user("alice@test.com")
+    redis_client.fail = True
+
+    cache.get_user_acl(alice, MagicMock())
+    cache.get_user_acl(alice, MagicMock())
+    assert len(acl_lookups) == 2
+
+    with search_filter_cache_scope():
+        cache.get_user_acl(alice, MagicMock())
+        cache.get_user_acl(alice, MagicMock())
+    assert len(acl_lookups) == 3
+
+
+def test_unsaved_personas_are_not_cached(redis_client: _FakeRedis) -> None:
+    cache = SearchFilterCache(ttl_seconds=60, enabled=True)
+    personas = []
+    for name in ("engineering", "sales"):
+        persona = MagicMock()
+        persona.id = None
+        persona.user_files = []
+        persona.document_sets = [MagicMock()]
+        persona.document_sets[0].name = name
+        persona.search_start_date = None
+        personas.append(persona)
+
+    with search_filter_cache_scope():
+        assert [
+            cache.get_persona_filters(persona).document_set_names
+            for persona in personas
+        ] == [("engineering",), ("sales",)]
+    assert cache.get_stats().misses == 0
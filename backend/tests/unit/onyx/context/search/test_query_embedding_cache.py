@@ -0,0 +1,155 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from onyx.context.search.query_embedding_cache import build_query_embedding_namespace
+from onyx.context.search.query_embedding_cache import (
+    QUERY_EMBEDDING_CACHE_LOOKUPS_COUNTER,
+)
+from onyx.context.search.query_embedding_cache import QueryEmbeddingCache
+from onyx.natural_language_processing import embedding_client_registry
+from onyx.natural_language_processing.embedding_client_registry import (
+    bump_search_settings_version,
+)
+from shared_configs.model_server_models import Embedding
+
+
+def _fake_encode(texts: list[str]) -> list[Embedding]:
+    return [[float(len(text))] for text in texts]
+
+
+def test_cache_hits_skip_encoding() -> None:
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60, use_redis=False)
+    calls: list[list[str]] = []
+
+    def _encode(texts: list[str]) -> list[Embedding]:
+        calls.append(texts)
+        return _fake_encode(texts)
+
+    first = cache.get_embeddings("model-a", ["hi", "hello", "hi"], _encode)
+    second = cache.get_embeddings("model-a", ["hello", "hey"], _encode)
+
+    assert first == [[2.0], [5.0], [2.0]]
+    assert second == [[5.0], [3.0]]
+    assert calls == [["hi", "hello"], ["hey"]]
+
+    stats = cache.get_stats()
+    assert stats.hits == 1
+    assert stats.misses == 3
+
+
+def test_lookups_are_exported() -> None:
+    def _count(result: str) -> float:
+        return QUERY_EMBEDDING_CACHE_LOOKUPS_COUNTER.labels(result=result)._value.get()
+
+    hits, misses = _count("hit"), _count("miss")
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60, use_redis=False)
+    cache.get_embeddings("model-a", ["hi", "hello"], _fake_encode)
+    cache.get_embeddings("model-a", ["hi"], _fake_encode)
+
+    assert _count("hit") - hits == 1
+    assert _count("miss") - misses == 2
+
+
+def test_cache_is_keyed_by_namespace() -> None:
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60, use_redis=False)
+    calls: list[list[str]] = []
+
+    def _encode(texts: list[str]) -> list[Embedding]:
+        calls.append(texts)
+        return _fake_encode(texts)
+
+    cache.get_embeddings("model-a", ["hi"], _encode)
+    cache.get_embeddings("model-b", ["hi"], _encode)
+
+    assert calls == [["hi"], ["hi"]]
+
+
+def test_namespace_changes_with_the_search_settings_version(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    redis_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(
+        embedding_client_registry,
+        "get_redis_client",
+        lambda tenant_id=None: redis_client,
+    )
+    search_settings = MagicMock(
+        id=1,
+        model_name="model-a",
+        provider_type=None,
+        query_prefix=None,
+        normalize=True,
+        reduced_dimension=None,
+    )
+
+    namespace = build_query_embedding_namespace(search_settings)
+    assert build_query_embedding_namespace(search_settings) == namespace
+
+    # e.g. a swap in another process
+    bump_search_settings_version()
+    assert build_query_embedding_namespace(search_settings) != namespace
+
+
+def test_cache_ttl_and_lru_eviction() -> None:
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=60, use_redis=False)
+    calls: list[list[str]] = []
+
+    def _encode(texts: list[str]) -> list[Embedding]:
+        calls.append(texts)
+        return _fake_encode(texts)
+
+    cache.get_embeddings("m", ["a"], _encode)
+    cache.get_embeddings("m", ["bb"], _encode)
+    cache.get_embeddings("m", ["a"], _encode)  # "bb" is now least recently used
+    cache.get_embeddings("m", ["ccc"], _encode)  # evicts "bb"
+    cache.get_embeddings("m", ["a", "bb"], _encode)
+
+    assert calls == [["a"], ["bb"], ["ccc"], ["bb"]]
+
+    expiring_cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=0, use_redis=False)
+    expiring_cache.get_embeddings("m", ["a"], _encode)
+    expiring_cache.get_embeddings("m", ["a"], _encode)
+    assert calls[-2:] == [["a"], ["a"]]
+
+
+def test_concurrent_identical_queries_are_coalesced() -> None:
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60, use_redis=False)
+    num_calls = 0
+    calls_lock = threading.Lock()
+
+    def _slow_encode(texts: list[str]) -> list[Embedding]:
+        nonlocal num_calls
+        with calls_lock:
+            num_calls += 1
+        time.sleep(0.2)
+        return _fake_encode(texts)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(
+            executor.map(
+                lambda _: cache.get_embeddings("m", ["same query"], _slow_encode),
+                range(5),
+            )
+        )
+
+    assert results == [[[10.0]]] * 5
+    assert num_calls == 1
+    assert cache.get_stats().coalesced == 4
+
+
+def test_failed_encode_releases_waiters() -> None:
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60, use_redis=False)
+
+    def _failing_encode(texts: list[str]) -> list[Embedding]:
+        raise RuntimeError("model server unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get_embeddings("m", ["q"], _failing_encode)
+
+    # the failed key must not stay claimed
+    assert cache.get_embeddings("m", ["q"], _fake_encode) == [[1.0]]
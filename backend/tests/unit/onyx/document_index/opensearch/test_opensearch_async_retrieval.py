@@ -0,0 +1,69 @@
+from collections.abc import Generator
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.context.search.enums import QueryType
+from onyx.context.search.models import IndexFilters
+from onyx.document_index.interfaces_new import DocumentSectionRequest
+from onyx.document_index.interfaces_new import TenantState
+from onyx.document_index.opensearch import opensearch_document_index
+from onyx.document_index.opensearch.opensearch_document_index import (
+    OpenSearchDocumentIndex,
+)
+
+
+@pytest.fixture
+def os_client() -> Generator[MagicMock, None, None]:
+    client = MagicMock()
+    client.search.return_value = []
+    client.async_search = AsyncMock(return_value=[])
+    with patch.object(
+        opensearch_document_index, "OpenSearchClient", return_value=client
+    ):
+        yield client
+
+
+def _index() -> OpenSearchDocumentIndex:
+    return OpenSearchDocumentIndex(
+        index_name="test_index",
+        tenant_state=TenantState(tenant_id="public", multitenant=False),
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_hybrid_retrieval_sends_the_sync_query(
+    os_client: MagicMock,
+) -> None:
+    retrieval_kwargs = dict(
+        query="how do I reset my VPN?",
+        query_embedding=[0.1, 0.2],
+        final_keywords=None,
+        query_type=QueryType.SEMANTIC,
+        filters=IndexFilters(access_control_list=None),
+        num_to_retrieve=10,
+    )
+    index = _index()
+
+    assert index.hybrid_retrieval(**retrieval_kwargs) == []  # type: ignore[arg-type]
+    assert await index.async_hybrid_retrieval(**retrieval_kwargs) == []  # type: ignore[arg-type]
+    assert os_client.async_search.call_args == os_client.search.call_args
+
+
+@pytest.mark.asyncio
+async def test_async_id_based_retrieval_searches_each_document(
+    os_client: MagicMock,
+) -> None:
+    chunk_requests = [
+        DocumentSectionRequest(document_id="doc_a"),
+        DocumentSectionRequest(document_id="doc_b", min_chunk_ind=1, max_chunk_ind=3),
+    ]
+    filters = IndexFilters(access_control_list=None)
+    index = _index()
+
+    index.id_based_retrieval(chunk_requests, filters)
+    await index.async_id_based_retrieval(chunk_requests, filters)
+    assert os_client.async_search.call_args_list == os_client.search.call_args_list
+    assert os_client.async_search.await_count == 2
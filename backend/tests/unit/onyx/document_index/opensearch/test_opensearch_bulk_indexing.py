@@ -0,0 +1,186 @@
+from collections.abc import Generator
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.document_index.interfaces_new import IndexingMetadata
+from onyx.document_index.interfaces_new import TenantState
+from onyx.document_index.opensearch import opensearch_document_index
+from onyx.document_index.opensearch.client import BulkItemResult
+from onyx.document_index.opensearch.opensearch_document_index import (
+    OpenSearchBulkIndexingError,
+)
+from onyx.document_index.opensearch.opensearch_document_index import (
+    OpenSearchDocumentIndex,
+)
+from onyx.document_index.opensearch.schema import DEFAULT_MAX_CHUNK_SIZE
+from onyx.document_index.opensearch.schema import get_opensearch_doc_chunk_id
+
+
+def _chunk(
+    document_id: str, chunk_index: int, max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE
+) -> Any:
+    # Stands in for both the Onyx chunk and its converted OpenSearch chunk.
+    return SimpleNamespace(
+        document_id=document_id,
+        chunk_index=chunk_index,
+        max_chunk_size=max_chunk_size,
+    )
+
+
+def _index_result(
+    document_id: str,
+    chunk_index: int,
+    result: str,
+    max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE,
+) -> BulkItemResult:
+    return BulkItemResult(
+        operation="index",
+        document_chunk_id=get_opensearch_doc_chunk_id(
+            document_id, chunk_index, max_chunk_size
+        ),
+        status=201 if result == "created" else 200,
+        result=result,
+    )
+
+
+@pytest.fixture
+def os_client() -> Generator[MagicMock, None, None]:
+    client = MagicMock()
+    with (
+        patch.object(
+            opensearch_document_index, "OpenSearchClient", return_value=client
+        ),
+        patch.object(
+            opensearch_document_index,
+            "_convert_onyx_chunk_to_opensearch_document",
+            side_effect=lambda chunk: chunk,
+        ),
+        patch.object(
+            opensearch_document_index, "OPENSEARCH_BULK_INDEXING_ENABLED", True
+        ),
+    ):
+        yield client
+
+
+def _build_index() -> OpenSearchDocumentIndex:
+    return OpenSearchDocumentIndex(
+        index_name="test_index",
+        tenant_state=TenantState(tenant_id="public", multitenant=False),
+    )
+
+
+def _metadata(counts: dict[str, tuple[int, int]]) -> IndexingMetadata:
+    return IndexingMetadata(
+        doc_id_to_chunk_cnt_diff={
+            document_id: IndexingMetadata.ChunkCounts(
+                old_chunk_cnt=old_count, new_chunk_cnt=new_count
+            )
+            for document_id, (old_count, new_count) in counts.items()
+        }
+    )
+
+
+def test_bulk_index_deletes_stale_chunks_by_id(os_client: MagicMock) -> None:
+    os_client.bulk_index_and_delete_documents.return_value = [
+        _index_result("doc_a", 0, "updated"),
+        _index_result("doc_b", 0, "updated"),
+        _index_result("doc_b", 1, "created"),
+    ]
+    chunks = [_chunk("doc_a", 0), _chunk("doc_b", 0), _chunk("doc_b", 1)]
+
+    records = _build_index().index(
+        chunks, _metadata({"doc_a": (3, 1), "doc_b": (1, 2)})
+    )
+
+    call = os_client.bulk_index_and_delete_documents.call_args.kwargs
+    assert call["documents"] == chunks
+    assert call["document_chunk_ids_to_delete"] == [
+        get_opensearch_doc_chunk_id("doc_a", 1),
+        get_opensearch_doc_chunk_id("doc_a", 2),
+    ]
+    # All previous chunk counts were known, no query based deletes are needed.
+    os_client.delete_by_query.assert_not_called()
+    assert [(r.document_id, r.already_existed) for r in records] == [
+        ("doc_a", True),
+        ("doc_b", True),
+    ]
+
+
+def test_bulk_index_stale_chunk_ids_use_the_written_chunk_size(
+    os_client: MagicMock,
+) -> None:
+    os_client.bulk_index_and_delete_documents.return_value = [
+        _index_result("doc_a", 0, "updated", max_chunk_size=2048),
+    ]
+
+    _build_index().index(
+        [_chunk("doc_a", 0, max_chunk_size=2048)], _metadata({"doc_a": (2, 1)})
+    )
+
+    assert os_client.bulk_index_and_delete_documents.call_args.kwargs[
+        "document_chunk_ids_to_delete"
+    ] == [get_opensearch_doc_chunk_id("doc_a", 1, 2048)]
+
+
+def test_bulk_index_cleans_up_unknown_chunk_counts_in_one_query(
+    os_client: MagicMock,
+) -> None:
+    os_client.bulk_index_and_delete_documents.return_value = [
+        _index_result("new_doc", 0, "created"),
+        _index_result("legacy_doc", 0, "updated"),
+    ]
+    os_client.delete_by_query.return_value = 4
+
+    records = _build_index().index(
+        [_chunk("new_doc", 0), _chunk("legacy_doc", 0)],
+        _metadata({"new_doc": (0, 1), "legacy_doc": (0, 1)}),
+    )
+
+    assert (
+        os_client.bulk_index_and_delete_documents.call_args.kwargs[
+            "document_chunk_ids_to_delete"
+        ]
+        == []
+    )
+    os_client.delete_by_query.assert_called_once()
+    query = os_client.delete_by_query.call_args.args[0]
+    per_document_clauses = query["query"]["bool"]["filter"][0]["bool"]["should"]
+    assert len(per_document_clauses) == 2
+    assert [(r.document_id, r.already_existed) for r in records] == [
+        ("new_doc", False),
+        ("legacy_doc", True),
+    ]
+
+
+def test_bulk_index_failures_name_the_affected_documents(
+    os_client: MagicMock,
+) -> None:
+    os_client.bulk_index_and_delete_documents.return_value = [
+        _index_result("doc_a", 0, "created"),
+        BulkItemResult(
+            operation="index",
+            document_chunk_id=get_opensearch_doc_chunk_id("doc_b", 0),
+            status=429,
+            error="es_rejected_execution_exception",
+        ),
+        # Stale chunks that are already gone are not failures.
+        BulkItemResult(
+            operation="delete",
+            document_chunk_id=get_opensearch_doc_chunk_id("doc_a", 1),
+            status=404,
+            result="not_found",
+        ),
+    ]
+
+    with pytest.raises(OpenSearchBulkIndexingError) as exc_info:
+        _build_index().index(
+            [_chunk("doc_a", 0), _chunk("doc_b", 0)],
+            _metadata({"doc_a": (2, 1), "doc_b": (1, 1)}),
+        )
+
+    assert exc_info.value.failed_document_ids == ["doc_b"]
+    os_client.delete_by_query.assert_not_called()
@@ -0,0 +1,144 @@
+import json
+from typing import Any
+
+import httpx
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.enums import QueryType
+from onyx.context.search.models import IndexFilters
+from onyx.document_index.interfaces_new import DocumentSectionRequest
+from onyx.document_index.interfaces_new import TenantState
+from onyx.document_index.vespa import chunk_retrieval
+from onyx.document_index.vespa.vespa_document_index import VespaDocumentIndex
+from onyx.document_index.vespa_constants import CHUNK_ID
+from onyx.document_index.vespa_constants import CONTENT
+from onyx.document_index.vespa_constants import DOCUMENT_ID
+from onyx.document_index.vespa_constants import SECTION_CONTINUATION
+from onyx.document_index.vespa_constants import SEMANTIC_IDENTIFIER
+from onyx.document_index.vespa_constants import SOURCE_TYPE
+
+
+def _hit(document_id: str, chunk_id: int, relevance: float = 1.0) -> dict[str, Any]:
+    return {
+        "id": f"id:{document_id}:{chunk_id}",
+        "relevance": relevance,
+        "fields": {
+            DOCUMENT_ID: document_id,
+            CHUNK_ID: chunk_id,
+            CONTENT: f"content {chunk_id}",
+            SECTION_CONTINUATION: False,
+            SOURCE_TYPE: DocumentSource.WEB.value,
+            SEMANTIC_IDENTIFIER: document_id,
+        },
+    }
+
+
+def _use_mock_vespa(
+    monkeypatch: pytest.MonkeyPatch, handler: Any
+) -> list[httpx.Request]:
+    requests: list[httpx.Request] = []
+
+    def _record(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_record))
+    monkeypatch.setattr(
+        chunk_retrieval, "get_vespa_async_query_http_client", lambda: client
+    )
+    return requests
+
+
+def _index() -> VespaDocumentIndex:
+    return VespaDocumentIndex(
+        index_name="test_index",
+        tenant_state=TenantState(tenant_id="public", multitenant=False),
+        large_chunks_enabled=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_hybrid_retrieval_matches_query_params(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requests = _use_mock_vespa(
+        monkeypatch,
+        lambda _: httpx.Response(
+            200, json={"root": {"children": [_hit("doc", 0), _hit("doc", 1)]}}
+        ),
+    )
+    index = _index()
+    filters = IndexFilters(access_control_list=None)
+
+    chunks = await index.async_hybrid_retrieval(
+        query="what is onyx",
+        query_embedding=[0.1, 0.2],
+        final_keywords=None,
+        query_type=QueryType.SEMANTIC,
+        filters=filters,
+        num_to_retrieve=5,
+    )
+
+    assert [(chunk.document_id, chunk.chunk_id) for chunk in chunks] == [
+        ("doc", 0),
+        ("doc", 1),
+    ]
+    assert len(requests) == 1
+    sent_params = json.loads(requests[0].content)
+    expected_params = index._build_hybrid_query_params(
+        "what is onyx", [0.1, 0.2], None, QueryType.SEMANTIC, filters, 5, 0
+    )
+    assert {k: sent_params[k] for k in expected_params} == expected_params
+
+
+@pytest.mark.asyncio
+async def test_async_query_retries_on_server_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    responses = iter(
+        [
+            httpx.Response(503),
+            httpx.Response(200, json={"root": {"children": [_hit("doc", 0)]}}),
+        ]
+    )
+    requests = _use_mock_vespa(monkeypatch, lambda _: next(responses))
+    monkeypatch.setattr(chunk_retrieval, "_QUERY_RETRY_DELAY", 0)
+
+    chunks = await chunk_retrieval.async_query_vespa({"yql": "select *"})
+
+    assert len(requests) == 2
+    assert [chunk.document_id for chunk in chunks] == ["doc"]
+
+
+@pytest.mark.asyncio
+async def test_async_id_based_retrieval_visits_each_document(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def _handler(request: httpx.Request) -> httpx.Response:
+        selection = request.url.params["selection"]
+        if "doc_a" in selection:
+            if "continuation" not in request.url.params:
+                return httpx.Response(
+                    200,
+                    json={"documents": [_hit("doc_a", 0)], "continuation": "next"},
+                )
+            return httpx.Response(200, json={"documents": [_hit("doc_a", 1)]})
+        # failed visits are dropped, as in the sync retrieval
+        return httpx.Response(500)
+
+    requests = _use_mock_vespa(monkeypatch, _handler)
+
+    chunks = await _index().async_id_based_retrieval(
+        chunk_requests=[
+            DocumentSectionRequest(document_id="doc_a"),
+            DocumentSectionRequest(document_id="doc_b"),
+        ],
+        filters=IndexFilters(access_control_list=None),
+    )
+
+    assert [(chunk.document_id, chunk.chunk_id) for chunk in chunks] == [
+        ("doc_a", 0),
+        ("doc_a", 1),
+    ]
+    assert len(requests) == 3
@@ -0,0 +1,89 @@
+import threading
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+from prometheus_client import REGISTRY
+
+from onyx.httpx.httpx_pool import AsyncHttpxPool
+from onyx.httpx.httpx_pool import HttpxPool
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Generator[str, None, None]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_count(pool: str) -> float:
+    return (
+        REGISTRY.get_sample_value("onyx_httpx_pool_wait_seconds_count", {"pool": pool})
+        or 0.0
+    )
+
+
+def test_pooled_client_reuses_connections_and_reports_metrics(
+    server_url: str,
+) -> None:
+    pool = "test_sync_pool"
+    HttpxPool.init_client(name=pool, http2=False)
+    try:
+        client = HttpxPool.get(pool)
+        assert HttpxPool.get(pool) is client
+
+        for _ in range(3):
+            assert client.get(server_url).text == "ok"
+
+        assert _wait_count(pool) == 3
+        assert (
+            REGISTRY.get_sample_value(
+                "onyx_httpx_pool_requests_in_flight", {"pool": pool}
+            )
+            == 0
+        )
+        # the first request opened the connection, the others reused it
+        assert (
+            REGISTRY.get_sample_value(
+                "onyx_httpx_pool_connections", {"pool": pool, "state": "idle"}
+            )
+            == 1
+        )
+    finally:
+        HttpxPool.close_client(pool)
+
+
+@pytest.mark.asyncio
+async def test_async_pool_client_per_event_loop(server_url: str) -> None:
+    pool = "test_async_pool"
+    client = AsyncHttpxPool.get(pool, http2=False)
+    try:
+        assert AsyncHttpxPool.get(pool) is client
+
+        response = await client.get(server_url)
+        assert response.text == "ok"
+        assert _wait_count(pool) == 1
+    finally:
+        await AsyncHttpxPool.close_all()
+
+    assert client.is_closed
+    assert AsyncHttpxPool.get(pool) is not client
+    await AsyncHttpxPool.close_all()
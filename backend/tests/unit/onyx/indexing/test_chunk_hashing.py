@@ -0,0 +1,356 @@
+from contextlib import nullcontext
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from onyx.connectors.models import ConnectorFailure
+from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentFailure
+from onyx.connectors.models import DocumentSource
+from onyx.connectors.models import TextSection
+from onyx.document_index.interfaces_new import MetadataUpdateRequest
+from onyx.indexing.chunk_hashing import find_changed_chunks
+from onyx.indexing.chunk_hashing import get_chunk_content_hash
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
+from onyx.indexing.indexing_pipeline import index_doc_batch
+from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.indexing_pipeline import IndexingPipelineResult
+from onyx.indexing.vector_db_insertion import update_unchanged_chunks_with_backoff
+
+
+def _document(doc_id: str, title: str = "Title") -> Document:
+    return Document(
+        id=doc_id,
+        title=title,
+        semantic_identifier=doc_id,
+        sections=[TextSection(text="text", link="link")],
+        source=DocumentSource.FILE,
+        metadata={"tag": ["a", "b"]},
+        doc_updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _chunk(document: Document, chunk_id: int, content: str) -> DocAwareChunk:
+    return DocAwareChunk(
+        chunk_id=chunk_id,
+        blurb=content[:10],
+        content=content,
+        source_links={0: "link"},
+        image_file_id=None,
+        section_continuation=False,
+        source_document=document,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        contextual_rag_reserved_tokens=0,
+        doc_summary="",
+        chunk_context="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+    )
+
+
+def test_chunk_content_hash() -> None:
+    document = _document("doc")
+    chunk = _chunk(document, 0, "content")
+    chunk_content_hash = get_chunk_content_hash(chunk, "index")
+
+    assert get_chunk_content_hash(_chunk(document, 0, "content"), "index") == (
+        chunk_content_hash
+    )
+    # only a partial update is needed for a new update time
+    updated_document = document.model_copy(
+        update={"doc_updated_at": datetime(2024, 2, 1, tzinfo=timezone.utc)}
+    )
+    assert get_chunk_content_hash(_chunk(updated_document, 0, "content"), "index") == (
+        chunk_content_hash
+    )
+
+    assert get_chunk_content_hash(chunk, "other_index") != chunk_content_hash
+    assert get_chunk_content_hash(_chunk(document, 1, "content"), "index") != (
+        chunk_content_hash
+    )
+    assert get_chunk_content_hash(_chunk(document, 0, "changed"), "index") != (
+        chunk_content_hash
+    )
+    # with contextual RAG, the chunk depends on the rest of the document
+    contextual_chunk = _chunk(document, 0, "content").model_copy(
+        update={"contextual_rag_reserved_tokens": 100}
+    )
+    edited_document = document.model_copy(
+        update={"sections": [TextSection(text="edited", link="link")]}
+    )
+    assert get_chunk_content_hash(
+        contextual_chunk.model_copy(update={"source_document": edited_document}),
+        "index",
+    ) != get_chunk_content_hash(contextual_chunk, "index")
+    assert get_chunk_content_hash(_chunk(edited_document, 0, "content"), "index") == (
+        chunk_content_hash
+    )
+
+    # the title is stored with every chunk of the document
+    assert get_chunk_content_hash(
+        _chunk(_document("doc", title="New Title"), 0, "content"), "index"
+    ) != (chunk_content_hash)
+
+
+def test_find_changed_chunks() -> None:
+    doc_a, doc_b, doc_c = _document("a"), _document("b"), _document("c")
+    previous_chunks = [
+        _chunk(doc_a, 0, "a0"),
+        _chunk(doc_a, 1, "a1"),
+        _chunk(doc_a, 2, "a2"),
+        _chunk(doc_b, 0, "b0"),
+    ]
+    previous_hashes = find_changed_chunks(
+        chunks=previous_chunks,
+        document_ids=["a", "b"],
+        previous_chunk_content_hashes={},
+        index_name="index",
+    ).doc_id_to_chunk_content_hashes
+
+    chunks = [
+        _chunk(doc_a, 0, "a0"),
+        _chunk(doc_a, 1, "a1 changed"),
+        _chunk(doc_b, 0, "b0"),
+        _chunk(doc_c, 0, "c0"),
+    ]
+    changes = find_changed_chunks(
+        chunks=chunks,
+        # a document without any chunks still gets its hashes reset
+        document_ids=["a", "b", "c", "d"],
+        previous_chunk_content_hashes=previous_hashes,
+        index_name="index",
+    )
+
+    assert changes.changed_chunks == [chunks[1], chunks[3]]
+    assert changes.doc_id_to_unchanged_chunk_cnt == {"a": 1, "b": 1}
+    assert changes.doc_id_to_chunk_content_hashes == {
+        "a": [previous_hashes["a"][0], get_chunk_content_hash(chunks[1], "index")],
+        "b": previous_hashes["b"],
+        "c": [get_chunk_content_hash(chunks[3], "index")],
+        "d": [],
+    }
+
+
+def _adapter(
+    context: DocumentBatchPrepareContext,
+    concurrently_indexed_doc_ids: list[str] | None = None,
+) -> Mock:
+    """Reports `concurrently_indexed_doc_ids` the first time the chunks are built."""
+    pending_conflicts = list(concurrently_indexed_doc_ids or [])
+
+    def _build_metadata_aware_chunks(
+        chunks_with_embeddings: list[DocAwareChunk],
+        context: DocumentBatchPrepareContext,
+        **_: Any,
+    ) -> Mock:
+        conflicts = list(pending_conflicts)
+        pending_conflicts.clear()
+        return Mock(
+            chunks=chunks_with_embeddings,
+            doc_id_to_previous_chunk_cnt={},
+            doc_id_to_new_chunk_cnt={
+                doc.id: len(
+                    [
+                        chunk
+                        for chunk in chunks_with_embeddings
+                        if chunk.source_document.id == doc.id
+                    ]
+                )
+                + (
+                    context.unchanged_chunk_counts.get(doc.id, 0)
+                    if doc.id not in conflicts
+                    else 0
+                )
+                for doc in context.updatable_docs
+            },
+            concurrently_indexed_doc_ids=conflicts,
+        )
+
+    adapter = Mock()
+    adapter.prepare.return_value = context
+    adapter.lock_context.side_effect = lambda _: nullcontext()
+    adapter.build_metadata_aware_chunks.side_effect = _build_metadata_aware_chunks
+    return adapter
+
+
+def _document_index() -> Mock:
+    document_index = Mock(index_name="index")
+    document_index.keeps_unchanged_chunks.return_value = True
+    return document_index
+
+
+def _index_doc_batch(
+    documents: list[Document],
+    chunks: list[DocAwareChunk],
+    adapter: Mock,
+    document_index: Mock,
+    failed_write_doc_ids: tuple[str, ...] = (),
+) -> tuple[IndexingPipelineResult, Mock, list[DocAwareChunk]]:
+    written_chunks: list[DocAwareChunk] = []
+
+    def _write(
+        chunks: list[DocAwareChunk], **_: Any
+    ) -> tuple[list[Mock], list[ConnectorFailure]]:
+        written_chunks.extend(chunks)
+        records = [
+            Mock(document_id=chunk.source_document.id, already_existed=True)
+            for chunk in chunks
+            if chunk.source_document.id not in failed_write_doc_ids
+        ]
+        failures = [
+            ConnectorFailure(
+                failed_document=DocumentFailure(document_id=doc_id),
+                failure_message="write failed",
+            )
+            for doc_id in failed_write_doc_ids
+        ]
+        return records, failures
+
+    with (
+        patch("onyx.indexing.indexing_pipeline.SKIP_UNCHANGED_CHUNKS", True),
+        patch(
+            "onyx.indexing.indexing_pipeline.embed_chunks_with_failure_handling",
+            side_effect=lambda chunks, **_: (chunks, []),
+        ) as embed,
+        patch(
+            "onyx.indexing.indexing_pipeline.write_chunks_to_vector_db_with_backoff",
+            side_effect=_write,
+        ),
+    ):
+        result = index_doc_batch(
+            document_batch=documents,
+            chunker=Mock(enable_large_chunks=False, chunk=Mock(return_value=chunks)),
+            embedder=Mock(),
+            document_index=document_index,
+            request_id=None,
+            tenant_id="test_tenant",
+            adapter=adapter,
+        )
+    return result, embed, written_chunks
+
+
+def test_index_doc_batch_skips_unchanged_chunks() -> None:
+    doc_a, doc_b, doc_c = _document("a"), _document("b"), _document("c")
+    previous_chunks = [
+        _chunk(doc_a, 0, "a0"),
+        _chunk(doc_a, 1, "a1"),
+        _chunk(doc_b, 0, "b0"),
+        _chunk(doc_c, 0, "c0"),
+    ]
+    previous_hashes = find_changed_chunks(
+        chunks=previous_chunks,
+        document_ids=["a", "b", "c"],
+        previous_chunk_content_hashes={},
+        index_name="index",
+    ).doc_id_to_chunk_content_hashes
+    chunks = [
+        _chunk(doc_a, 0, "a0"),
+        _chunk(doc_a, 1, "a1 changed"),
+        _chunk(doc_b, 0, "b0"),
+        _chunk(doc_c, 0, "c0 changed"),
+    ]
+
+    context = DocumentBatchPrepareContext(
+        updatable_docs=[doc_a, doc_b, doc_c],
+        id_to_boost_map={},
+        previous_chunk_content_hashes=previous_hashes,
+    )
+    adapter = _adapter(context)
+    document_index = _document_index()
+    result, embed, _ = _index_doc_batch(
+        [doc_a, doc_b, doc_c],
+        chunks,
+        adapter,
+        document_index,
+        failed_write_doc_ids=("c",),
+    )
+
+    # only the changed chunks are embedded
+    assert embed.call_args.kwargs["chunks"] == [chunks[1], chunks[3]]
+    assert result.total_chunks == 2
+    assert [failure.failure_message for failure in result.failures] == ["write failed"]
+
+    # the kept chunks of both written documents get the new update time in one update
+    document_index.update.assert_called_once()
+    (update_request,) = document_index.update.call_args.args[0]
+    assert update_request.document_ids == ["a", "b"]
+    assert update_request.doc_id_to_chunk_cnt == {"a": 2, "b": 1}
+    assert update_request.doc_updated_at == doc_a.doc_updated_at
+
+    # the hashes of the failed document are not kept
+    post_index_context = adapter.post_index.call_args.kwargs["context"]
+    assert post_index_context.chunk_content_hashes == {
+        "a": [previous_hashes["a"][0], get_chunk_content_hash(chunks[1], "index")],
+        "b": previous_hashes["b"],
+        "c": None,
+    }
+
+
+def test_index_doc_batch_writes_concurrently_indexed_documents() -> None:
+    doc_a, doc_b = _document("a"), _document("b")
+    chunks = [
+        _chunk(doc_a, 0, "a0"),
+        _chunk(doc_a, 1, "a1"),
+        _chunk(doc_b, 0, "b0"),
+    ]
+    previous_hashes = find_changed_chunks(
+        chunks=chunks,
+        document_ids=["a", "b"],
+        previous_chunk_content_hashes={},
+        index_name="index",
+    ).doc_id_to_chunk_content_hashes
+    # another indexing of "a" got in between, so its chunks are written after all
+    context = DocumentBatchPrepareContext(
+        updatable_docs=[doc_a, doc_b],
+        id_to_boost_map={},
+        previous_chunk_content_hashes=previous_hashes,
+    )
+    adapter = _adapter(context, concurrently_indexed_doc_ids=["a"])
+    document_index = _document_index()
+    result, embed, written_chunks = _index_doc_batch(
+        [doc_a, doc_b], chunks, adapter, document_index
+    )
+
+    assert result.failures == []
+    assert embed.call_args.kwargs["chunks"] == chunks[:2]
+    assert written_chunks == chunks[:2]
+    (update_request,) = document_index.update.call_args.args[0]
+    assert update_request.document_ids == ["b"]
+    assert adapter.post_index.call_args.kwargs["context"].chunk_content_hashes == (
+        previous_hashes
+    )
+
+
+def test_update_unchanged_chunks_isolates_failed_documents() -> None:
+    doc_a, doc_b = _document("a"), _document("b")
+    document_index = Mock()
+
+    def _update(update_requests: list[MetadataUpdateRequest], **_: Any) -> None:
+        doc_ids = [
+            doc_id
+            for update_request in update_requests
+            for doc_id in update_request.document_ids
+        ]
+        if "b" in doc_ids:
+            raise RuntimeError("update failed")
+
+    document_index.update.side_effect = _update
+    with patch("onyx.indexing.vector_db_insertion.time.sleep"):
+        failures = update_unchanged_chunks_with_backoff(
+            document_index=document_index,
+            documents=[doc_a, doc_b],
+            doc_id_to_new_chunk_cnt={"a": 2, "b": 1},
+            tenant_id="test_tenant",
+        )
+
+    assert [
+        failure.failed_document.document_id
+        for failure in failures
+        if failure.failed_document
+    ] == ["b"]
+    # the batch, then each document on its own
+    assert document_index.update.call_count == 3
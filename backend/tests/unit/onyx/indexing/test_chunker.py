@@ -1,3 +1,5 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 from unittest.mock import Mock
 
@@ -7,11 +9,14 @@ from onyx.configs.app_configs import USE_CHUNK_SUMMARY
 from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.models import Document
+from onyx.connectors.models import ImageSection
 from onyx.connectors.models import TextSection
+from onyx.indexing import chunker as chunker_module
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.natural_language_processing.utils import BaseTokenizer
 from tests.unit.onyx.indexing.conftest import MockHeartbeat
 
 
@@ -105,3 +110,103 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+class _WhitespaceTokenizer(BaseTokenizer):
+    """Token counts of joined texts add up exactly, so throughput mode must produce
+    the same chunks as the default mode."""
+
+    def encode(self, string: str) -> list[int]:
+        return [len(token) for token in string.split()]
+
+    def tokenize(self, string: str) -> list[str]:
+        return string.split()
+
+    def decode(self, tokens: list[int]) -> str:
+        return " ".join("x" * token for token in tokens)
+
+
+def _throughput_test_documents(num_documents: int) -> list[Document]:
+    documents: list[Document] = []
+    for doc_num in range(num_documents):
+        sections: list[TextSection | ImageSection] = [
+            TextSection(
+                text=f"Section {section_num} of document {doc_num}. " * 20,
+                link=f"link{section_num}",
+            )
+            for section_num in range(12)
+        ]
+        sections.append(TextSection(text="A very long sentence that goes on. " * 200))
+        documents.append(
+            Document(
+                id=f"doc_{doc_num}",
+                source=DocumentSource.WEB,
+                semantic_identifier=f"Document {doc_num}",
+                metadata={"tags": ["tag1", "tag2"]},
+                doc_updated_at=None,
+                sections=sections,
+            )
+        )
+    return documents
+
+
+def test_chunker_throughput_mode_matches_default_mode() -> None:
+    indexing_documents = process_image_sections(_throughput_test_documents(2))
+    chunker_kwargs: dict[str, Any] = dict(
+        tokenizer=_WhitespaceTokenizer(),
+        enable_multipass=True,
+        enable_large_chunks=True,
+        chunk_token_limit=512,
+    )
+
+    default_chunks = Chunker(**chunker_kwargs).chunk(indexing_documents)
+    throughput_chunks = Chunker(**chunker_kwargs, throughput_mode=True).chunk(
+        indexing_documents
+    )
+
+    assert len(default_chunks) > len(indexing_documents) * 2
+    for default_chunk, throughput_chunk in zip(default_chunks, throughput_chunks):
+        assert default_chunk.content_token_count is None
+        assert throughput_chunk.content_token_count == len(
+            default_chunk.content.split()
+        )
+        assert throughput_chunk.model_dump(
+            exclude={"content_token_count"}
+        ) == default_chunk.model_dump(exclude={"content_token_count"})
+    assert len(throughput_chunks) == len(default_chunks)
+
+
+def test_chunker_process_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    indexing_documents = process_image_sections(_throughput_test_documents(3))
+    expected_chunks = Chunker(
+        tokenizer=_WhitespaceTokenizer(), throughput_mode=True
+    ).chunk(indexing_documents)
+
+    monkeypatch.setattr(chunker_module, "CHUNKER_NUM_PROCESSES", 2)
+    monkeypatch.setattr(chunker_module, "CHUNKER_PROCESS_POOL_MIN_DOCUMENTS", 3)
+    # spawned processes take long to import everything, forking is enough to check
+    # that chunkers and chunks make it across processes
+    monkeypatch.setattr(
+        chunker_module,
+        "_chunker_process_pool",
+        ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context("fork")
+        ),
+    )
+    heartbeat = MockHeartbeat()
+
+    try:
+        chunks = Chunker(
+            tokenizer=_WhitespaceTokenizer(),
+            callback=heartbeat,
+            throughput_mode=True,
+        ).chunk(indexing_documents)
+    finally:
+        chunker_module._reset_chunker_process_pool()
+
+    assert [chunk.model_dump() for chunk in chunks] == [
+        chunk.model_dump() for chunk in expected_chunks
+    ]
+    # chunks point back at the documents that were passed in
+    assert chunks[0].source_document is indexing_documents[0]
+    assert heartbeat.call_count == len(indexing_documents)
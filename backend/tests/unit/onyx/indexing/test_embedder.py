@@ -95,6 +95,7 @@ def test_default_indexing_embedder_embed_chunks(
         large_chunks_present=False,
         tenant_id=None,
         request_id=None,
+        token_counts=None,
     )
     # Same for title only embedding call
     mock_embedding_model.return_value.encode.assert_any_call(
@@ -1,3 +1,5 @@
+import threading
+from contextlib import nullcontext
 from typing import Any
 from typing import cast
 from typing import List
@@ -14,7 +16,9 @@ from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import add_contextual_summaries
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
 from onyx.indexing.indexing_pipeline import filter_documents
+from onyx.indexing.indexing_pipeline import index_doc_batch_pipelined
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.constants import LlmProviderNames
 from onyx.llm.model_response import Choice
@@ -218,3 +222,139 @@ def test_contextual_rag(
             count += 1
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+def _build_pipelined_adapter(skipped_doc_ids: set[str]) -> Mock:
+    adapter = Mock()
+    adapter.prepare.side_effect = lambda docs, _: DocumentBatchPrepareContext(
+        updatable_docs=[doc for doc in docs if doc.id not in skipped_doc_ids],
+        id_to_boost_map={},
+    )
+    adapter.lock_context.side_effect = lambda _: nullcontext()
+    adapter.build_metadata_aware_chunks.side_effect = (
+        lambda chunks_with_embeddings, **_: Mock(
+            chunks=chunks_with_embeddings,
+            doc_id_to_previous_chunk_cnt={},
+            doc_id_to_new_chunk_cnt={},
+            concurrently_indexed_doc_ids=[],
+        )
+    )
+    return adapter
+
+
+def _fake_chunks(context: DocumentBatchPrepareContext, **_: Any) -> list[Mock]:
+    return [
+        Mock(chunk_id=0, source_document=Mock(id=doc.id))
+        for doc in context.updatable_docs
+    ]
+
+
+def _fake_write(chunks: list[Mock], **_: Any) -> tuple[list[Mock], list]:
+    return [
+        Mock(document_id=chunk.source_document.id, already_existed=False)
+        for chunk in chunks
+    ], []
+
+
+def test_index_doc_batch_pipelined_overlaps_stages() -> None:
+    documents = [create_test_document(doc_id=f"doc_{i}") for i in range(6)]
+    adapter = _build_pipelined_adapter(skipped_doc_ids={"doc_5"})
+
+    second_embed_started = threading.Event()
+    overlapped = False
+    embedded_doc_ids: list[list[str]] = []
+
+    def _fake_embed(chunks: list[Mock], **_: Any) -> tuple[list[Mock], list]:
+        embedded_doc_ids.append([chunk.source_document.id for chunk in chunks])
+        if len(embedded_doc_ids) == 2:
+            second_embed_started.set()
+        return chunks, []
+
+    def _write(chunks: list[Mock], **kwargs: Any) -> tuple[list[Mock], list]:
+        nonlocal overlapped
+        if chunks[0].source_document.id == "doc_0":
+            # the next sub-batch is embedded while this one is being written
+            overlapped = second_embed_started.wait(timeout=5)
+        return _fake_write(chunks, **kwargs)
+
+    with (
+        patch(
+            "onyx.indexing.indexing_pipeline._chunk_prepared_documents",
+            side_effect=_fake_chunks,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.embed_chunks_with_failure_handling",
+            side_effect=_fake_embed,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.write_chunks_to_vector_db_with_backoff",
+            side_effect=_write,
+        ),
+    ):
+        result = index_doc_batch_pipelined(
+            document_batch=documents,
+            chunker=Mock(enable_large_chunks=False),
+            embedder=Mock(),
+            document_index=Mock(),
+            request_id=None,
+            tenant_id="test_tenant",
+            adapter=adapter,
+            sub_batch_size=2,
+        )
+
+    assert overlapped
+    assert embedded_doc_ids == [["doc_0", "doc_1"], ["doc_2", "doc_3"], ["doc_4"]]
+    assert result.total_docs == 6
+    assert result.new_docs == 5
+    assert result.total_chunks == 5
+    assert result.failures == []
+
+    # the document that didn't need updating is still marked as indexed
+    post_index_doc_ids = [
+        [doc.id for doc in call.kwargs["filtered_documents"]]
+        for call in adapter.post_index.call_args_list
+    ]
+    assert post_index_doc_ids == [
+        ["doc_0", "doc_1"],
+        ["doc_2", "doc_3"],
+        ["doc_4", "doc_5"],
+    ]
+
+
+def test_index_doc_batch_pipelined_surfaces_stage_failures() -> None:
+    documents = [create_test_document(doc_id=f"doc_{i}") for i in range(6)]
+    adapter = _build_pipelined_adapter(skipped_doc_ids=set())
+
+    def _failing_embed(chunks: list[Mock], **_: Any) -> tuple[list[Mock], list]:
+        if chunks[0].source_document.id == "doc_2":
+            raise RuntimeError("model server unavailable")
+        return chunks, []
+
+    with (
+        patch(
+            "onyx.indexing.indexing_pipeline._chunk_prepared_documents",
+            side_effect=_fake_chunks,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.embed_chunks_with_failure_handling",
+            side_effect=_failing_embed,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.write_chunks_to_vector_db_with_backoff",
+            side_effect=_fake_write,
+        ),
+    ):
+        with pytest.raises(RuntimeError, match="model server unavailable"):
+            index_doc_batch_pipelined(
+                document_batch=documents,
+                chunker=Mock(enable_large_chunks=False),
+                embedder=Mock(),
+                document_index=Mock(),
+                request_id=None,
+                tenant_id="test_tenant",
+                adapter=adapter,
+                sub_batch_size=2,
+            )
+
+    # only the sub-batch embedded before the failure made it to the index
+    assert adapter.post_index.call_count == 1
@@ -0,0 +1,108 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.kg.clustering.clustering import _cluster_entities
+from onyx.kg.clustering.clustering import get_similar_entities
+
+
+def _staging_entity(
+    name: str, document_id: str | None = None, entity_type: str = "ACCOUNT"
+) -> KGEntityExtractionStaging:
+    return KGEntityExtractionStaging(
+        id_name=f"{entity_type}::{name}",
+        name=name,
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+        occurrences=1,
+        attributes={},
+    )
+
+
+def _entity(
+    id_name: str,
+    name: str,
+    document_id: str | None = None,
+    entity_type: str = "ACCOUNT",
+) -> KGEntity:
+    return KGEntity(
+        id_name=id_name,
+        name=name,
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+    )
+
+
+def test_cluster_entities() -> None:
+    existing = _entity("ACCOUNT::existing", "acme corporation")
+    entities = [
+        # merged into the existing entity, which gets the document
+        _staging_entity("Acme Corporation", document_id="doc_1"),
+        # the existing entity now has a document, so this becomes a new entity
+        _staging_entity("Acme Corporation", document_id="doc_2"),
+        # merged into the entity of doc_2 created earlier in the batch, the only
+        # similar one
+        _staging_entity("acme corporatio"),
+        # names with numbers are never merged
+        _staging_entity("Widget 2"),
+        _staging_entity("Widget 2"),
+        # other types are never merged
+        _staging_entity("acme corporation", entity_type="OPPORTUNITY"),
+    ]
+    entity_names = [
+        "acme corporation",
+        "acme corporation",
+        "acme corporatio",
+        "widget 2",
+        "widget 2",
+        "acme corporation",
+    ]
+    similar_entities = [[existing], [existing], [], [], [], []]
+
+    targets = _cluster_entities(entities, entity_names, similar_entities)
+
+    assert [
+        (
+            target.existing_entity is not None,
+            target.name,
+            target.document_id,
+            [entity.id_name for entity in target.transferred],
+            [entity.id_name for entity in target.merged],
+        )
+        for target in targets
+    ] == [
+        (True, "acme corporation", "doc_1", [], ["ACCOUNT::Acme Corporation"]),
+        (
+            False,
+            "acme corporation",
+            "doc_2",
+            ["ACCOUNT::Acme Corporation"],
+            ["ACCOUNT::acme corporatio"],
+        ),
+        # the same name, type and document is transferred into the same entity
+        (False, "widget 2", None, ["ACCOUNT::Widget 2", "ACCOUNT::Widget 2"], []),
+        (False, "acme corporation", None, ["OPPORTUNITY::acme corporation"], []),
+    ]
+
+
+def test_get_similar_entities_single_query() -> None:
+    db_session = MagicMock()
+    found = _entity("ACCOUNT::found", "acme")
+    db_session.execute.return_value.all.return_value = [(1, found)]
+
+    results = get_similar_entities(
+        db_session,
+        [("globex", "ACCOUNT", False), ("acme", "ACCOUNT", True)],
+        similarity_threshold=0.6,
+    )
+
+    assert results == [[], [found]]
+    # the threshold is set, then all names are queried at once
+    assert db_session.execute.call_count == 2
+    query = str(
+        db_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    )
+    assert "LATERAL" in query
+    assert "similarity_op" in query
@@ -0,0 +1,121 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from onyx.natural_language_processing.embedding_cache import EmbeddingCacheNamespace
+from onyx.natural_language_processing.embedding_cache import SQLiteEmbeddingCache
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import Embedding
+
+
+def _namespace(
+    text_type: EmbedTextType = EmbedTextType.PASSAGE,
+    reduced_dimension: int | None = None,
+    api_url: str | None = None,
+    deployment_name: str | None = None,
+) -> EmbeddingCacheNamespace:
+    return EmbeddingCacheNamespace(
+        model_name="test-model",
+        provider_type=None,
+        api_url=api_url,
+        api_version=None,
+        deployment_name=deployment_name,
+        text_type=text_type,
+        prefix=None,
+        reduced_dimension=reduced_dimension,
+        normalize=True,
+        max_context_length=512,
+    )
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> SQLiteEmbeddingCache:
+    return SQLiteEmbeddingCache(
+        db_path=str(tmp_path / "embedding_cache.sqlite"), max_entries=3
+    )
+
+
+def test_namespace_key_depends_on_model_identity() -> None:
+    assert _namespace().build_key("hello") == _namespace().build_key("hello")
+    assert _namespace().build_key("hello") != _namespace().build_key("hello!")
+    assert _namespace().build_key("hello") != _namespace(
+        text_type=EmbedTextType.QUERY
+    ).build_key("hello")
+    assert _namespace().build_key("hello") != _namespace(
+        reduced_dimension=256
+    ).build_key("hello")
+    # the same model name can be served by different endpoints / deployments
+    assert _namespace().build_key("hello") != _namespace(
+        api_url="https://embeddings.example.com"
+    ).build_key("hello")
+    assert _namespace(deployment_name="a").build_key("hello") != _namespace(
+        deployment_name="b"
+    ).build_key("hello")
+
+
+def test_sqlite_cache_roundtrip_and_stats(cache: SQLiteEmbeddingCache) -> None:
+    cache.set_many({"a": [0.5, 1.0], "b": [2.0, -1.5]})
+
+    found = cache.get_many(["a", "b", "c"])
+
+    assert found == {"a": [0.5, 1.0], "b": [2.0, -1.5]}
+    stats = cache.get_stats()
+    assert stats.hits == 2
+    assert stats.misses == 1
+
+
+def test_sqlite_cache_evicts_least_recently_used(cache: SQLiteEmbeddingCache) -> None:
+    cache.set_many({"a": [1.0]})
+    cache.set_many({"b": [2.0]})
+    cache.set_many({"c": [3.0]})
+    # touch "a" so that "b" becomes the least recently used entry
+    cache.get_many(["a"])
+    cache.set_many({"d": [4.0]})
+
+    assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert cache.get_stats().evictions == 1
+
+
+def test_sqlite_cache_cap_holds_across_processes(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "embedding_cache.sqlite")
+    # two caches on the same file, like two worker processes on the same host
+    first = SQLiteEmbeddingCache(db_path=db_path, max_entries=3)
+    second = SQLiteEmbeddingCache(db_path=db_path, max_entries=3)
+
+    first.set_many({"a": [1.0], "b": [2.0]})
+    second.set_many({"c": [3.0], "d": [4.0]})
+
+    assert set(first.get_many(["a", "b", "c", "d"])) == {"b", "c", "d"}
+    assert second.get_stats().evictions == 1
+
+
+def test_encode_only_embeds_cache_misses(cache: SQLiteEmbeddingCache) -> None:
+    with patch("onyx.natural_language_processing.search_nlp_models.get_tokenizer"):
+        model = EmbeddingModel(
+            server_host="localhost",
+            server_port=9000,
+            model_name="test-model",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+            embedding_cache=cache,
+        )
+
+    def _fake_batch_encode(texts: list[str], **kwargs: object) -> list[Embedding]:
+        return [[float(len(text))] for text in texts]
+
+    with patch.object(
+        model, "_batch_encode_texts", side_effect=_fake_batch_encode
+    ) as mock_encode:
+        first = model.encode(["one", "three", "one"], text_type=EmbedTextType.PASSAGE)
+        second = model.encode(["three", "four"], text_type=EmbedTextType.PASSAGE)
+
+    assert first == [[3.0], [5.0], [3.0]]
+    assert second == [[5.0], [4.0]]
+    assert mock_encode.call_args_list[0].kwargs["texts"] == ["one", "three"]
+    assert mock_encode.call_args_list[1].kwargs["texts"] == ["four"]
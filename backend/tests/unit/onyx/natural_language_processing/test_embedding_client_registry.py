@@ -0,0 +1,130 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from onyx.natural_language_processing import embedding_client_registry
+from onyx.natural_language_processing.embedding_client_registry import (
+    bump_search_settings_version,
+)
+from onyx.natural_language_processing.embedding_client_registry import (
+    EmbeddingClientRegistry,
+)
+
+
+class _CurrentSearchSettings:
+    def __init__(self) -> None:
+        self.model_name = "model-a"
+        self.lookups = 0
+
+    def get(self, db_session: Any) -> MagicMock:
+        self.lookups += 1
+        return MagicMock(model_name=self.model_name)
+
+
+@pytest.fixture
+def current_search_settings(
+    monkeypatch: pytest.MonkeyPatch,
+) -> _CurrentSearchSettings:
+    current = _CurrentSearchSettings()
+    redis_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(
+        embedding_client_registry,
+        "get_redis_client",
+        lambda tenant_id=None: redis_client,
+    )
+
+    @contextmanager
+    def _get_session_with_current_tenant() -> Iterator[MagicMock]:
+        yield MagicMock()
+
+    monkeypatch.setattr(
+        embedding_client_registry,
+        "get_session_with_current_tenant",
+        _get_session_with_current_tenant,
+    )
+    monkeypatch.setattr(
+        embedding_client_registry, "get_current_search_settings", current.get
+    )
+    monkeypatch.setattr(
+        embedding_client_registry,
+        "build_embedding_client_version",
+        lambda search_settings: search_settings.model_name,
+    )
+    monkeypatch.setattr(
+        embedding_client_registry.EmbeddingModel,
+        "from_db_model",
+        lambda search_settings, **_: MagicMock(model_name=search_settings.model_name),
+    )
+    return current
+
+
+def test_clients_are_reused_per_version(
+    current_search_settings: _CurrentSearchSettings,
+) -> None:
+    registry = EmbeddingClientRegistry(search_settings_ttl_seconds=60)
+
+    client = registry.get_client()
+    assert client.model.model_name == "model-a"
+    # the current search settings are not looked up again within the TTL
+    assert registry.get_client() is client
+    assert current_search_settings.lookups == 1
+
+    # given search settings of the same version share the client
+    assert registry.get_client(MagicMock(model_name="model-a")) is client
+    assert registry.get_client(MagicMock(model_name="model-b")) is not client
+
+    # a swap invalidates the clients
+    current_search_settings.model_name = "model-b"
+    registry.invalidate()
+    new_client = registry.get_client()
+    assert new_client.model.model_name == "model-b"
+    assert current_search_settings.lookups == 2
+
+
+def test_current_search_settings_expire(
+    current_search_settings: _CurrentSearchSettings,
+) -> None:
+    registry = EmbeddingClientRegistry(search_settings_ttl_seconds=0)
+
+    client = registry.get_client()
+    assert registry.get_client() is client
+    assert current_search_settings.lookups == 2
+
+    current_search_settings.model_name = "model-b"
+    assert registry.get_client().model.model_name == "model-b"
+
+
+def test_search_settings_version_bumps_invalidate_other_processes(
+    current_search_settings: _CurrentSearchSettings,
+) -> None:
+    registry = EmbeddingClientRegistry(search_settings_ttl_seconds=60)
+    client = registry.get_client()
+
+    # e.g. a swap in another process
+    current_search_settings.model_name = "model-b"
+    bump_search_settings_version()
+    new_client = registry.get_client()
+    assert new_client.model.model_name == "model-b"
+    assert registry.get_client() is new_client
+    assert current_search_settings.lookups == 2
+    # the previous client is only dropped once it is the least recently used
+    assert registry.get_client(MagicMock(model_name="model-a")) is client
+
+
+def test_least_recently_used_clients_are_dropped(
+    current_search_settings: _CurrentSearchSettings,
+) -> None:
+    registry = EmbeddingClientRegistry(max_clients=2)
+
+    client_a = registry.get_client(MagicMock(model_name="model-a"))
+    registry.get_client(MagicMock(model_name="model-b"))
+    assert registry.get_client(MagicMock(model_name="model-a")) is client_a
+    registry.get_client(MagicMock(model_name="model-c"))
+
+    assert registry.get_client(MagicMock(model_name="model-a")) is client_a
+    assert len(registry._clients) == 2
+    assert list(registry._clients) == ["model-c", "model-a"]
@@ -4,14 +4,19 @@ from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
 
 from onyx.llm.constants import LlmProviderNames
 from onyx.natural_language_processing.search_nlp_models import CloudEmbedding
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EmbedRequest
+from shared_configs.model_server_models import EmbedResponse
+from shared_configs.utils import batch_indices_by_token_budget
 
 
 @pytest.fixture
@@ -84,3 +89,106 @@ async def test_rate_limit_handling() -> None:
                 model_name="fake-model",
                 text_type=EmbedTextType.QUERY,
             )
+
+
+def test_batch_indices_by_token_budget() -> None:
+    token_counts = [20, 512, 30, 500, 25, 10]
+
+    batches = batch_indices_by_token_budget(token_counts, token_budget=1024)
+
+    # short texts are grouped together rather than padded up to the long ones
+    assert batches == [[5, 0, 4, 2], [3, 1]]
+    # an item larger than the budget still gets a batch of its own
+    assert batch_indices_by_token_budget([2048, 10], token_budget=1024) == [
+        [1],
+        [0],
+    ]
+
+
+def test_length_bucketed_encode_restores_order() -> None:
+    tokenizer = MagicMock()
+    tokenizer.encode.side_effect = lambda text: list(range(len(text)))
+    with patch(
+        "onyx.natural_language_processing.search_nlp_models.get_tokenizer",
+        return_value=tokenizer,
+    ):
+        model = EmbeddingModel(
+            server_host="localhost",
+            server_port=9000,
+            model_name="test-model",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+        )
+
+    sent_batches: list[list[str]] = []
+
+    def _fake_request(embed_request: EmbedRequest, **kwargs: object) -> EmbedResponse:
+        sent_batches.append(embed_request.texts)
+        return EmbedResponse(
+            embeddings=[[float(len(text))] for text in embed_request.texts]
+        )
+
+    texts = ["a" * 500, "b" * 10, "c" * 480, "d" * 12, "e" * 11]
+    with (
+        patch.object(model, "_make_model_server_request", side_effect=_fake_request),
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.EMBEDDING_BATCH_TOKEN_BUDGET",
+            1000,
+        ),
+    ):
+        embeddings = model.encode(
+            texts, text_type=EmbedTextType.PASSAGE, local_embedding_batch_size=2
+        )
+
+    assert embeddings == [[500.0], [10.0], [480.0], [12.0], [11.0]]
+    assert sent_batches == [["b" * 10, "e" * 11, "d" * 12], ["c" * 480, "a" * 500]]
+
+
+def test_encode_as_array_restores_order() -> None:
+    tokenizer = MagicMock()
+    tokenizer.encode.side_effect = lambda text: list(range(len(text)))
+    with patch(
+        "onyx.natural_language_processing.search_nlp_models.get_tokenizer",
+        return_value=tokenizer,
+    ):
+        model = EmbeddingModel(
+            server_host="localhost",
+            server_port=9000,
+            model_name="test-model",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+            embedding_cache=None,
+        )
+
+    def _fake_request(embed_request: EmbedRequest, **kwargs: object) -> np.ndarray:
+        return np.array(
+            [[float(len(text)), 1.0] for text in embed_request.texts],
+            dtype=np.float16,
+        )
+
+    texts = ["a" * 500, "b" * 10, "c" * 480, "d" * 12]
+    with (
+        patch.object(
+            model, "_make_model_server_array_request", side_effect=_fake_request
+        ),
+        patch.object(model, "_make_model_server_request") as list_request,
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.EMBEDDING_BATCH_TOKEN_BUDGET",
+            1000,
+        ),
+    ):
+        embeddings = model.encode_as_array(
+            texts, text_type=EmbedTextType.QUERY, local_embedding_batch_size=2
+        )
+
+    list_request.assert_not_called()
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == [[500.0, 1.0], [10.0, 1.0], [480.0, 1.0], [12.0, 1.0]]
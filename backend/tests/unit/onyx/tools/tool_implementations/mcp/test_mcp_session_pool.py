@@ -0,0 +1,209 @@
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import ErrorData
+
+from onyx.db.enums import MCPTransport
+from onyx.tools.tool_implementations.mcp import mcp_client
+from onyx.tools.tool_implementations.mcp.mcp_session_pool import get_mcp_session_key
+from onyx.tools.tool_implementations.mcp.mcp_session_pool import (
+    MCPSessionClosedError,
+)
+from onyx.tools.tool_implementations.mcp.mcp_session_pool import MCPSessionPool
+
+
+class _FakeSession:
+    def __init__(self, session_id: int) -> None:
+        self.session_id = session_id
+        self.initialize_calls = 0
+        self.healthy = True
+        self.closed = False
+
+    async def initialize(self) -> Any:
+        self.initialize_calls += 1
+        return MagicMock(serverInfo="fake")
+
+    async def send_ping(self) -> None:
+        if not self.healthy:
+            raise ConnectionError("connection lost")
+
+
+class _FakeServer:
+    def __init__(self) -> None:
+        self.sessions: list[_FakeSession] = []
+
+    @asynccontextmanager
+    async def open_session(self) -> AsyncIterator[ClientSession]:
+        session = _FakeSession(len(self.sessions))
+        self.sessions.append(session)
+        try:
+            yield session  # type: ignore[misc]
+        finally:
+            session.closed = True
+
+
+async def _session_id(session: ClientSession) -> int:
+    return session.session_id  # type: ignore[attr-defined]
+
+
+@pytest.fixture
+def pool() -> Iterator[MCPSessionPool]:
+    pool = MCPSessionPool(idle_timeout=300, max_size=2, health_check_interval=300)
+    yield pool
+    pool.close_all()
+
+
+def _key(server_url: str, token: str = "token") -> Any:
+    return get_mcp_session_key(
+        server_url, MCPTransport.STREAMABLE_HTTP, {"Authorization": token}
+    )
+
+
+def test_sessions_are_reused(pool: MCPSessionPool) -> None:
+    server = _FakeServer()
+
+    assert pool.run(_key("a"), server.open_session, _session_id) == 0
+    assert pool.run(_key("a"), server.open_session, _session_id) == 0
+    assert server.sessions[0].initialize_calls == 1
+
+    # other credentials get their own session
+    assert pool.run(_key("a", "other"), server.open_session, _session_id) == 1
+    # the least recently used session is closed to stay within the max size
+    assert pool.run(_key("b"), server.open_session, _session_id) == 2
+    assert [session.closed for session in server.sessions] == [True, False, False]
+
+
+def test_failed_calls_reconnect(pool: MCPSessionPool) -> None:
+    server = _FakeServer()
+    calls: list[int] = []
+
+    async def _fail_on_first_session(session: ClientSession) -> int:
+        session_id = await _session_id(session)
+        calls.append(session_id)
+        if session_id == 0:
+            raise ConnectionError("connection lost")
+        return session_id
+
+    # a new session is not retried
+    with pytest.raises(ConnectionError):
+        pool.run(_key("a"), server.open_session, _fail_on_first_session)
+    assert calls == [0]
+    assert pool.run(_key("a"), server.open_session, _session_id) == 1
+
+    async def _fail_on_second_session(session: ClientSession) -> int:
+        session_id = await _session_id(session)
+        calls.append(session_id)
+        if session_id == 1:
+            raise ConnectionError("connection lost")
+        return session_id
+
+    # a call that failed after it was sent may have run, it is not retried unless
+    # it is idempotent
+    with pytest.raises(ConnectionError):
+        pool.run(_key("a"), server.open_session, _fail_on_second_session)
+    assert calls == [0, 1]
+    assert server.sessions[1].closed
+    assert pool.run(_key("a"), server.open_session, _session_id) == 2
+
+    async def _fail_on_third_session(session: ClientSession) -> int:
+        session_id = await _session_id(session)
+        calls.append(session_id)
+        if session_id == 2:
+            raise ConnectionError("connection lost")
+        return session_id
+
+    assert (
+        pool.run(
+            _key("a"), server.open_session, _fail_on_third_session, idempotent=True
+        )
+        == 3
+    )
+    assert calls == [0, 1, 2, 3]
+    assert server.sessions[2].closed
+
+    async def _server_error(session: ClientSession) -> int:
+        raise McpError(ErrorData(code=-32602, message="invalid params"))
+
+    # errors from the server are not retried and keep the session
+    with pytest.raises(McpError):
+        pool.run(_key("a"), server.open_session, _server_error)
+    assert len(server.sessions) == 4
+    assert pool.run(_key("a"), server.open_session, _session_id) == 3
+
+
+def test_calls_are_retried_if_the_session_closed_before_sending(
+    pool: MCPSessionPool,
+) -> None:
+    server = _FakeServer()
+    assert pool.run(_key("a"), server.open_session, _session_id) == 0
+
+    async def _closed() -> ClientSession:
+        raise MCPSessionClosedError("closed")
+
+    pool._sessions[_key("a")].wait_ready = _closed  # type: ignore[method-assign]
+    assert pool.run(_key("a"), server.open_session, _session_id) == 1
+    assert server.sessions[0].closed
+
+
+def test_idle_sessions_are_health_checked(pool: MCPSessionPool) -> None:
+    pool.health_check_interval = 0
+    server = _FakeServer()
+
+    assert pool.run(_key("a"), server.open_session, _session_id) == 0
+    assert pool.run(_key("a"), server.open_session, _session_id) == 0
+
+    server.sessions[0].healthy = False
+    assert pool.run(_key("a"), server.open_session, _session_id) == 1
+    assert server.sessions[0].closed
+
+
+def test_discover_mcp_tools_is_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mcp_client, "MCP_TOOL_DISCOVERY_CACHE_TTL_SECONDS", 60)
+    monkeypatch.setattr(mcp_client, "_tool_discovery_cache", {})
+    discover_calls: list[dict[str, str] | None] = []
+
+    def _call_mcp_client_function_sync(
+        function: Any,
+        server_url: str,
+        connection_headers: dict[str, str] | None = None,
+        *args: Any,
+        **kwargs: Any,
+    ) -> list[Any]:
+        discover_calls.append(connection_headers)
+        return [MagicMock(name=f"tool_{len(discover_calls)}")]
+
+    monkeypatch.setattr(
+        mcp_client, "_call_mcp_client_function_sync", _call_mcp_client_function_sync
+    )
+
+    tools = mcp_client.discover_mcp_tools("url", {"Authorization": "a"})
+    assert mcp_client.discover_mcp_tools("url", {"Authorization": "a"}) == tools
+    assert len(discover_calls) == 1
+
+    # other credentials may see other tools
+    assert mcp_client.discover_mcp_tools("url", {"Authorization": "b"}) != tools
+    assert len(discover_calls) == 2
+
+    # skipping the cache refreshes it
+    refreshed_tools = mcp_client.discover_mcp_tools(
+        "url", {"Authorization": "a"}, use_cache=False
+    )
+    assert refreshed_tools != tools
+    assert mcp_client.discover_mcp_tools("url", {"Authorization": "a"}) == (
+        refreshed_tools
+    )
+    assert len(discover_calls) == 3
+
+    # the credentials of an OAuth provider are unknown without an identity
+    mcp_client.discover_mcp_tools("url", auth=MagicMock())
+    mcp_client.discover_mcp_tools("url", auth=MagicMock())
+    assert len(discover_calls) == 5
+    mcp_client.discover_mcp_tools("url", auth=MagicMock(), auth_identity="user")
+    mcp_client.discover_mcp_tools("url", auth=MagicMock(), auth_identity="user")
+    assert len(discover_calls) == 6
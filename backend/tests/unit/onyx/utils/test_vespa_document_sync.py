@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+
+from onyx.access.models import DocumentAccess
+from onyx.background.celery.tasks.vespa.document_sync import (
+    build_metadata_update_requests,
+)
+from onyx.background.celery.tasks.vespa.document_sync import (
+    generate_document_sync_tasks,
+)
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
+from onyx.configs.constants import OnyxCeleryTask
+
+
+def _access(*user_groups: str) -> DocumentAccess:
+    return DocumentAccess.build(
+        user_emails=[],
+        user_groups=list(user_groups),
+        external_user_emails=[],
+        external_user_group_ids=[],
+        is_public=False,
+    )
+
+
+def _doc(doc_id: str, chunk_count: int | None = 3) -> Any:
+    return SimpleNamespace(id=doc_id, chunk_count=chunk_count, boost=0, hidden=False)
+
+
+def test_documents_with_identical_fields_share_an_update_request() -> None:
+    docs = [_doc("a"), _doc("b", chunk_count=None), _doc("c")]
+
+    update_requests = build_metadata_update_requests(
+        docs=docs,
+        doc_id_to_doc_sets={"a": ["set_1"], "b": ["set_1"], "c": ["set_2"]},
+        doc_id_to_access={
+            "a": _access("group_1"),
+            "b": _access("group_1"),
+            "c": _access("group_1"),
+        },
+    )
+
+    assert len(update_requests) == 2
+    shared, single = update_requests
+    assert shared.document_ids == ["a", "b"]
+    assert shared.doc_id_to_chunk_cnt == {"a": 3, "b": -1}
+    assert shared.document_sets == {"set_1"}
+    assert single.document_ids == ["c"]
+    assert single.document_sets == {"set_2"}
+
+
+def test_documents_with_different_access_are_not_grouped() -> None:
+    update_requests = build_metadata_update_requests(
+        docs=[_doc("a"), _doc("b")],
+        doc_id_to_doc_sets={},
+        doc_id_to_access={"a": _access("group_1"), "b": _access("group_2")},
+    )
+
+    assert [request.document_ids for request in update_requests] == [["a"], ["b"]]
+    assert all(request.document_sets == set() for request in update_requests)
+
+
+def test_generate_document_sync_tasks_sends_batches() -> None:
+    doc_ids = [f"doc_{i}" for i in range(2 * VESPA_SYNC_BATCH_SIZE + 1)]
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = iter(doc_ids)
+    celery_app = MagicMock()
+    r = MagicMock()
+
+    tasks_generated, num_docs = generate_document_sync_tasks(
+        r, 10, celery_app, db_session, MagicMock(), "tenant"
+    )
+
+    assert (tasks_generated, num_docs) == (3, len(doc_ids))
+    sent_batches = [
+        call.kwargs["kwargs"]["document_ids"]
+        for call in celery_app.send_task.call_args_list
+    ]
+    assert sent_batches == [
+        doc_ids[:VESPA_SYNC_BATCH_SIZE],
+        doc_ids[VESPA_SYNC_BATCH_SIZE:-1],
+        doc_ids[-1:],
+    ]
+    assert all(
+        call.args[0] == OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK
+        for call in celery_app.send_task.call_args_list
+    )
+    assert r.sadd.call_count == 3
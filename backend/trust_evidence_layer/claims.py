@@ -96,9 +96,8 @@ def classify_claim_type(claim_text: str) -> str:
     return ClaimType.FACTUAL
 
 
-def _check_contradiction(claim_text: str, snippet: str) -> bool:
-    claim = claim_text.lower()
-    text = snippet.lower()
+def _check_contradiction(claim: str, text: str) -> bool:
+    """Expects the lowercased claim and snippet."""
     if " not " in claim and " not " not in text:
         return True
     if " not " not in claim and " not " in text:
@@ -106,29 +105,72 @@ def _check_contradiction(claim_text: str, snippet: str) -> bool:
     return False
 
 
+class EvidenceIndex:
+    """Lowercased snippets and token postings for a set of evidence sources.
+
+    Built once per gate call so matching a claim only touches the sources that share a
+    token with it, instead of re-tokenizing every snippet for every claim.
+    """
+
+    def __init__(self, evidence_sources: list[EvidenceSource]) -> None:
+        self.sources = evidence_sources
+        self.lowered_snippets = [src.snippet.lower() for src in evidence_sources]
+        # token -> positions (ascending) of the sources whose lowercased snippet contains it
+        self.postings: dict[str, list[int]] = {}
+        for position, snippet_l in enumerate(self.lowered_snippets):
+            for token in set(_WORD_RE.findall(snippet_l)):
+                self.postings.setdefault(token, []).append(position)
+
+    def _keyword_candidates(self, claim_keywords: set[str], minimum_keyword_hits: int) -> set[int]:
+        hits: dict[int, int] = {}
+        for keyword in claim_keywords:
+            for position in self.postings.get(keyword, ()):
+                hits[position] = hits.get(position, 0) + 1
+        return {position for position, count in hits.items() if count >= minimum_keyword_hits}
+
+    def _substring_candidates(self, claim_l: str) -> set[int] | None:
+        """Sources that can contain `claim_l`, or None if every source can. Tokens that
+        are not at either end of the claim must appear as whole tokens in the snippet."""
+        candidates: set[int] | None = None
+        for match in _WORD_RE.finditer(claim_l):
+            if match.start() == 0 or match.end() == len(claim_l):
+                continue
+            positions = set(self.postings.get(match.group(), ()))
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                break
+        return candidates
+
+    def find_matches(self, claim_text: str, *, minimum_keyword_hits: int = 1) -> list[int]:
+        """Positions of the sources that contain the claim or share enough keywords with it."""
+        claim_l = claim_text.lower()
+        claim_keywords = _keywords(claim_text)
+
+        matched = self._keyword_candidates(claim_keywords, minimum_keyword_hits) if claim_keywords else set()
+
+        substring_candidates = self._substring_candidates(claim_l)
+        if substring_candidates is None:
+            substring_candidates = set(range(len(self.sources)))
+        for position in substring_candidates - matched:
+            if claim_l in self.lowered_snippets[position]:
+                matched.add(position)
+
+        return sorted(matched)
+
+
 def _find_lexical_matches(
     claim_text: str,
-    evidence_sources: list[EvidenceSource],
+    evidence_index: EvidenceIndex,
     *,
     minimum_keyword_hits: int = 1,
 ) -> tuple[list[EvidenceSource], bool]:
     claim_l = claim_text.lower()
-    claim_keywords = _keywords(claim_text)
     matches: list[EvidenceSource] = []
     contradicted = False
 
-    for src in evidence_sources:
-        snippet_l = src.snippet.lower()
-        if claim_l in snippet_l:
-            matches.append(src)
-            contradicted = contradicted or _check_contradiction(claim_text, src.snippet)
-            continue
-
-        if claim_keywords:
-            overlap = claim_keywords.intersection(_keywords(snippet_l))
-            if len(overlap) >= minimum_keyword_hits:
-                matches.append(src)
-                contradicted = contradicted or _check_contradiction(claim_text, src.snippet)
+    for position in evidence_index.find_matches(claim_text, minimum_keyword_hits=minimum_keyword_hits):
+        matches.append(evidence_index.sources[position])
+        contradicted = contradicted or _check_contradiction(claim_l, evidence_index.lowered_snippets[position])
 
     return matches, contradicted
 
@@ -167,6 +209,7 @@ def enforce_claims(
     evidence_sources: list[EvidenceSource],
     *,
     system_claims: list[SystemBehaviorClaim],
+    evidence_index: EvidenceIndex | None = None,
 ) -> tuple[
     str,
     list[dict[str, Any]],
@@ -202,12 +245,15 @@ def enforce_claims(
 
     supported_claim_ids: list[str] = []
 
+    if evidence_index is None:
+        evidence_index = EvidenceIndex(evidence_sources)
+
     for idx, claim_text in enumerate(claims, start=1):
         claim_id = f"claim_{idx}"
         claim_type = classify_claim_type(claim_text)
         evidence_required = not is_conversational_claim(claim_text)
 
-        matches, contradicted = _find_lexical_matches(claim_text, evidence_sources)
+        matches, contradicted = _find_lexical_matches(claim_text, evidence_index)
         source_ids = [m.id for m in matches]
 
         hallucination_mode: str | None = None
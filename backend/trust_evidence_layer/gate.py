@@ -7,6 +7,7 @@ from datetime import timedelta
 from typing import Any
 
 from trust_evidence_layer.claims import ClaimType
+from trust_evidence_layer.claims import EvidenceIndex
 from trust_evidence_layer.claims import VerificationStatus
 from trust_evidence_layer.claims import enforce_claims
 from trust_evidence_layer.evidence import normalize_raw_evidence
@@ -15,6 +16,7 @@ from trust_evidence_layer.kill_switch import current_kill_switch_state
 from trust_evidence_layer.kill_switch import should_halt
 from trust_evidence_layer.policies import evaluate_policy_checks
 from trust_evidence_layer.redaction import redact_text
+from trust_evidence_layer.redaction import redact_texts
 from trust_evidence_layer.registry import get_default_store
 from trust_evidence_layer.registry import get_policy_change_log
 from trust_evidence_layer.registry import get_policy_versions_map
@@ -108,6 +110,7 @@ class TrustEvidenceGate:
             draft_answer_text=draft_answer_text,
             evidence_sources=evidence_sources,
             system_claims=get_system_behavior_claims(),
+            evidence_index=EvidenceIndex(evidence_sources),
         )
 
         claim_types = sorted({c["claim_type"] for c in claim_records})
@@ -131,8 +134,8 @@ class TrustEvidenceGate:
         redaction_events.extend(answer_redactions)
 
         redacted_sources = []
-        for src in evidence_sources:
-            redacted_snippet, snippet_redactions = redact_text(src.snippet)
+        snippet_results = redact_texts(src.snippet for src in evidence_sources)
+        for src, (redacted_snippet, snippet_redactions) in zip(evidence_sources, snippet_results):
             if snippet_redactions:
                 redaction_events.extend(snippet_redactions)
             redacted_sources.append(replace(src, snippet=redacted_snippet))
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable
 from typing import Any
 
 EMAIL_RE = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
@@ -16,19 +17,38 @@ _PATTERNS = [
 ]
 
 
+class RedactionEngine:
+    """Runs the detectors one after another, in the order given, over the text.
+
+    This is not a single pass: each detector scans the output of the ones before it
+    with one subn, which both replaces and counts its matches (the previous code did a
+    findall and a sub per detector, so this halves the scans). Where matches overlap
+    the detector listed first wins, e.g. "MRN 5551234567" becomes "MRN [REDACTED_PHONE]".
+    A combined alternation of all detectors was tried and was slower than separate
+    patterns that keep their literal prefix optimizations.
+    """
+
+    def __init__(self, detectors: list[tuple[str, re.Pattern[str]]]) -> None:
+        self._detectors = [(label, pattern, f"[REDACTED_{label}]") for label, pattern in detectors]
+
+    def redact(self, text: str) -> tuple[str, list[dict[str, Any]]]:
+        events: list[dict[str, Any]] = []
+        for label, pattern, replacement in self._detectors:
+            text, count = pattern.subn(replacement, text)
+            if count:
+                events.append({"policy_id": "pii_redaction", "detector": label, "count": count})
+        return text, events
+
+    def redact_many(self, texts: Iterable[str]) -> list[tuple[str, list[dict[str, Any]]]]:
+        return [self.redact(text) for text in texts]
+
+
+_default_engine = RedactionEngine(_PATTERNS)
+
+
 def redact_text(text: str) -> tuple[str, list[dict[str, Any]]]:
-    redacted = text
-    events: list[dict[str, Any]] = []
-    for label, pattern in _PATTERNS:
-        matches = pattern.findall(redacted)
-        if not matches:
-            continue
-        redacted = pattern.sub(f"[REDACTED_{label}]", redacted)
-        events.append(
-            {
-                "policy_id": "pii_redaction",
-                "detector": label,
-                "count": len(matches),
-            }
-        )
-    return redacted, events
+    return _default_engine.redact(text)
+
+
+def redact_texts(texts: Iterable[str]) -> list[tuple[str, list[dict[str, Any]]]]:
+    return _default_engine.redact_many(texts)
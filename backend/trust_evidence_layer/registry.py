@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+import os
+
 from trust_evidence_layer.policy_registry import get_policy_definitions
 from trust_evidence_layer.policy_registry import get_policy_version_change_log
 from trust_evidence_layer.policy_registry import get_policy_versions
 from trust_evidence_layer.risk_registry import get_active_risks
 from trust_evidence_layer.storage.file_store import TraceFileStore
+from trust_evidence_layer.storage.segment_store import SegmentLogTraceStore
 from trust_evidence_layer.system_claims import SystemBehaviorClaim
 from trust_evidence_layer.system_claims import get_active_system_claims
 
-_default_store = TraceFileStore()
+
+def _build_default_store() -> TraceFileStore:
+    # "file" (one JSON file per trace) or "segment" (append-only segments + SQLite index)
+    backend = os.environ.get("TRUST_EVIDENCE_STORE_BACKEND", "file").lower()
+    if backend == "segment":
+        return SegmentLogTraceStore()
+    return TraceFileStore()
+
+
+_default_store = _build_default_store()
 _TRUSTED_TOOLS = {"search_docs"}
 
 
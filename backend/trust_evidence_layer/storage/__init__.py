@@ -1,4 +1,5 @@
 from trust_evidence_layer.storage.file_store import TraceFileStore
 from trust_evidence_layer.storage.inmem_store import InMemoryTraceStore
+from trust_evidence_layer.storage.segment_store import SegmentLogTraceStore
 
-__all__ = ["TraceFileStore", "InMemoryTraceStore"]
+__all__ = ["TraceFileStore", "InMemoryTraceStore", "SegmentLogTraceStore"]
@@ -28,13 +28,13 @@ class TraceFileStore:
             "expiry_at": expiry.isoformat(),
         }
 
-    def store(
+    def _build_record(
         self,
         trace_id: str,
         response_payload: dict[str, Any],
         raw_context_minimal: dict[str, Any],
         replay_inputs: dict[str, Any] | None = None,
-    ) -> Path:
+    ) -> dict[str, Any]:
         response_retention = response_payload.get("decision_record", {}).get("retention")
         retention = (
             response_retention if isinstance(response_retention, dict) else self._default_retention()
@@ -51,6 +51,16 @@ class TraceFileStore:
             "context_hash": self._hash_obj(raw_context_minimal),
             "replay_inputs_hash": self._hash_obj(replay_inputs),
         }
+        return out
+
+    def store(
+        self,
+        trace_id: str,
+        response_payload: dict[str, Any],
+        raw_context_minimal: dict[str, Any],
+        replay_inputs: dict[str, Any] | None = None,
+    ) -> Path:
+        out = self._build_record(trace_id, response_payload, raw_context_minimal, replay_inputs)
         target = self.base_dir / f"{trace_id}.json"
         target.write_text(json.dumps(out, ensure_ascii=False, sort_keys=True, indent=2))
         return target
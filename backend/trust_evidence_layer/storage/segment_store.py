@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from trust_evidence_layer.storage.file_store import TraceFileStore
+
+_DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+# share of deleted bytes at which sweeps rewrite a segment
+_DEFAULT_COMPACTION_DEAD_RATIO = 0.5
+_SEGMENT_SUFFIX = ".log"
+
+
+def _to_timestamp(value: Any) -> float | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.timestamp()
+
+
+class SegmentLogTraceStore(TraceFileStore):
+    """Trace store backed by append-only segment files plus a SQLite index.
+
+    Each trace is appended as one compact JSON line to the active segment. The index
+    maps trace_id to (segment, offset, length) and keeps created_at, expiry_at and
+    legal_hold, so lookups read a single record and retention sweeps or audit range
+    scans never parse trace payloads. Deleting a trace only removes its index entry,
+    which makes its record dead. Retention sweeps compact the segments whose share
+    of dead bytes reached compaction_dead_ratio: their live records are copied to a
+    new segment and the old segment file is removed. compact() does the same on
+    demand, e.g. with a ratio of 0 to remove every deleted payload from disk.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path = ".trust_evidence",
+        segment_max_bytes: int = _DEFAULT_SEGMENT_MAX_BYTES,
+        compaction_dead_ratio: float = _DEFAULT_COMPACTION_DEAD_RATIO,
+    ) -> None:
+        super().__init__(base_dir)
+        self.segment_max_bytes = segment_max_bytes
+        self.compaction_dead_ratio = compaction_dead_ratio
+        self.segments_dir = self.base_dir / "segments"
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.base_dir / "trace_index.sqlite"
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trace_index (
+                trace_id TEXT PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expiry_at REAL,
+                legal_hold INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trace_created_at ON trace_index (created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trace_expiry_at ON trace_index (expiry_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trace_segment ON trace_index (segment)")
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[tuple[sqlite3.Connection, list[Path]]]:
+        """Yields the connection and a list of segment files to remove once the
+        transaction committed, so the index never points at a removed segment."""
+        # BEGIN IMMEDIATE also serializes segment appends across processes sharing base_dir
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            obsolete_segments: list[Path] = []
+            try:
+                yield self._conn, obsolete_segments
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            for path in obsolete_segments:
+                path.unlink(missing_ok=True)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.segments_dir / f"{segment:08d}{_SEGMENT_SUFFIX}"
+
+    def _segment_numbers(self) -> list[int]:
+        return sorted(int(path.stem) for path in self.segments_dir.glob(f"*{_SEGMENT_SUFFIX}"))
+
+    def _active_segment(self, incoming_bytes: int) -> int:
+        segments = self._segment_numbers()
+        if not segments:
+            return 0
+        current = segments[-1]
+        size = self._segment_path(current).stat().st_size
+        if size and size + incoming_bytes > self.segment_max_bytes:
+            return current + 1
+        return current
+
+    def store(
+        self,
+        trace_id: str,
+        response_payload: dict[str, Any],
+        raw_context_minimal: dict[str, Any],
+        replay_inputs: dict[str, Any] | None = None,
+    ) -> Path:
+        out = self._build_record(trace_id, response_payload, raw_context_minimal, replay_inputs)
+        line = (json.dumps(out, ensure_ascii=False, sort_keys=True) + "\n").encode("utf-8")
+        retention = out["retention"]
+
+        with self._write_transaction() as (conn, _):
+            segment = self._active_segment(len(line))
+            target = self._segment_path(segment)
+            with target.open("ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            conn.execute(
+                "INSERT OR REPLACE INTO trace_index "
+                "(trace_id, segment, offset, length, created_at, expiry_at, legal_hold) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    trace_id,
+                    segment,
+                    offset,
+                    len(line),
+                    _to_timestamp(out["created_at"]),
+                    _to_timestamp(retention.get("expiry_at")),
+                    int(bool(retention.get("legal_hold"))),
+                ),
+            )
+        return target
+
+    def exists(self, trace_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM trace_index WHERE trace_id = ?", (trace_id,)).fetchone()
+        return row is not None
+
+    def load(self, trace_id: str) -> dict[str, Any]:
+        # another process may compact the segment between the index lookup and the
+        # read, the record is then found in its new segment on the second attempt
+        for attempt in range(2):
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT segment, offset, length FROM trace_index WHERE trace_id = ?",
+                    (trace_id,),
+                ).fetchone()
+                if row is None:
+                    raise FileNotFoundError(f"Trace {trace_id} not found")
+
+                segment, offset, length = row
+                try:
+                    with self._segment_path(segment).open("rb") as f:
+                        f.seek(offset)
+                        data = f.read(length)
+                except FileNotFoundError:
+                    data = None
+            record = self._parse_record(data)
+            if record is not None and record.get("trace_id") == trace_id:
+                return record
+        raise FileNotFoundError(f"Trace {trace_id} not found")
+
+    @staticmethod
+    def _parse_record(data: bytes | None) -> dict[str, Any] | None:
+        # a segment number of a removed segment can be reused for a new one
+        if not data:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def delete(self, trace_id: str) -> None:
+        with self._write_transaction() as (conn, _):
+            row = conn.execute("SELECT legal_hold FROM trace_index WHERE trace_id = ?", (trace_id,)).fetchone()
+            if row is None:
+                return
+            if row[0]:
+                raise PermissionError("Deletion blocked by legal hold")
+            conn.execute("DELETE FROM trace_index WHERE trace_id = ?", (trace_id,))
+
+    def sweep_expired(self, now: datetime | None = None) -> list[str]:
+        """Deletes every trace past its expiry_at that is not under legal hold."""
+        cutoff = (now or datetime.now(UTC)).timestamp()
+        with self._write_transaction() as (conn, obsolete_segments):
+            expired = [
+                trace_id
+                for (trace_id,) in conn.execute(
+                    "SELECT trace_id FROM trace_index WHERE expiry_at IS NOT NULL AND expiry_at <= ? AND legal_hold = 0",
+                    (cutoff,),
+                )
+            ]
+            conn.executemany("DELETE FROM trace_index WHERE trace_id = ?", [(trace_id,) for trace_id in expired])
+            obsolete_segments.extend(self._compact_segments(conn, self.compaction_dead_ratio))
+        return expired
+
+    def compact(self, min_dead_ratio: float | None = None) -> None:
+        """Compacts the segments whose share of dead bytes reached min_dead_ratio,
+        compaction_dead_ratio by default."""
+        if min_dead_ratio is None:
+            min_dead_ratio = self.compaction_dead_ratio
+        with self._write_transaction() as (conn, obsolete_segments):
+            obsolete_segments.extend(self._compact_segments(conn, min_dead_ratio))
+
+    def scan(
+        self,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        legal_hold: bool | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Index entries in created_at order, e.g. to select traces for audit packs."""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if created_from is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_from.timestamp())
+        if created_to is not None:
+            clauses.append("created_at < ?")
+            params.append(created_to.timestamp())
+        if legal_hold is not None:
+            clauses.append("legal_hold = ?")
+            params.append(int(legal_hold))
+
+        query = "SELECT trace_id, created_at, expiry_at, legal_hold FROM trace_index"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at, trace_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "trace_id": trace_id,
+                "created_at": datetime.fromtimestamp(created_at, UTC).isoformat(),
+                "expiry_at": (datetime.fromtimestamp(expiry_at, UTC).isoformat() if expiry_at is not None else None),
+                "legal_hold": bool(hold),
+            }
+            for trace_id, created_at, expiry_at, hold in rows
+        ]
+
+    def _compact_segments(self, conn: sqlite3.Connection, min_dead_ratio: float) -> list[Path]:
+        """Copies the live records of every segment whose share of dead bytes reached
+        min_dead_ratio to a new segment and returns the segment files to remove.
+
+        Segments without live records are only removed. The new segments are numbered
+        after the active one, so nothing is appended to a segment that is about to be
+        removed.
+        """
+        segments = self._segment_numbers()
+        if not segments:
+            return []
+        live_bytes = dict(conn.execute("SELECT segment, SUM(length) FROM trace_index GROUP BY segment"))
+        next_segment = segments[-1] + 1
+
+        obsolete: list[Path] = []
+        for segment in segments:
+            path = self._segment_path(segment)
+            size = path.stat().st_size
+            live = live_bytes.get(segment, 0)
+            dead = size - live
+            if not size or dead <= 0 or dead < min_dead_ratio * size:
+                continue
+            if live:
+                self._rewrite_segment(conn, segment, next_segment)
+                next_segment += 1
+            obsolete.append(path)
+        return obsolete
+
+    def _rewrite_segment(self, conn: sqlite3.Connection, segment: int, target_segment: int) -> None:
+        rows = conn.execute(
+            "SELECT trace_id, offset, length FROM trace_index WHERE segment = ? ORDER BY offset",
+            (segment,),
+        ).fetchall()
+        moved: list[tuple[int, int, str]] = []
+        with self._segment_path(segment).open("rb") as src, self._segment_path(target_segment).open("wb") as dst:
+            for trace_id, offset, length in rows:
+                src.seek(offset)
+                moved.append((target_segment, dst.tell(), trace_id))
+                dst.write(src.read(length))
+            dst.flush()
+            os.fsync(dst.fileno())
+        conn.executemany("UPDATE trace_index SET segment = ?, offset = ? WHERE trace_id = ?", moved)
@@ -0,0 +1,18 @@
+from pathlib import Path
+
+import pytest
+
+from trust_evidence_layer import registry
+from trust_evidence_layer.storage.file_store import TraceFileStore
+from trust_evidence_layer.storage.legal_hold_store import LegalHoldStore
+
+
+@pytest.fixture(autouse=True)
+def isolated_trust_evidence_stores(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keeps the traces and legal hold copies the gate stores out of the working tree."""
+    base_dir = tmp_path_factory.mktemp("trust_evidence")
+    monkeypatch.setattr(registry, "_default_store", TraceFileStore(base_dir=base_dir / "traces"))
+    legal_hold_store = LegalHoldStore(base_dir=base_dir / "legal_hold")
+    monkeypatch.setattr("trust_evidence_layer.gate.LegalHoldStore", lambda: legal_hold_store)
+    monkeypatch.setattr("trust_evidence_layer.audit_pack.LegalHoldStore", lambda: legal_hold_store)
+    return base_dir
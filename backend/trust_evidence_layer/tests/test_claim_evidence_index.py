@@ -0,0 +1,48 @@
+import random
+
+from trust_evidence_layer.claims import EvidenceIndex
+from trust_evidence_layer.claims import _find_lexical_matches
+from trust_evidence_layer.claims import _keywords
+from trust_evidence_layer.evidence import normalize_raw_evidence
+from trust_evidence_layer.types import EvidenceSource
+
+_WORDS = ["sky", "blue", "grass", "green", "is", "not", "the", "ocean", "deep", "rain", "a.b", "Sky-blue"]
+
+
+def _brute_force_matches(claim_text: str, sources: list[EvidenceSource]) -> list[str]:
+    claim_l = claim_text.lower()
+    claim_keywords = _keywords(claim_text)
+    return [
+        src.id
+        for src in sources
+        if claim_l in src.snippet.lower() or claim_keywords.intersection(_keywords(src.snippet.lower()))
+    ]
+
+
+def test_evidence_index_matches_brute_force_scan() -> None:
+    rng = random.Random(7)
+    sources = normalize_raw_evidence(
+        [
+            {"id": f"s{i}", "snippet": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 12)))}
+            for i in range(60)
+        ]
+    )
+    index = EvidenceIndex(sources)
+
+    claims = [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 5))) for _ in range(200)]
+    claims += ["ky is", "is the", "s not th", "a.b"]
+    for claim in claims:
+        matches, _ = _find_lexical_matches(claim, index)
+        assert [m.id for m in matches] == _brute_force_matches(claim, sources), claim
+
+
+def test_evidence_index_flags_contradictions() -> None:
+    sources = normalize_raw_evidence([{"id": "d", "snippet": "The sky is not green."}])
+    index = EvidenceIndex(sources)
+
+    matches, contradicted = _find_lexical_matches("The sky is green.", index)
+    assert [m.id for m in matches] == ["d"]
+    assert contradicted
+
+    _, contradicted = _find_lexical_matches("The sky is not green.", index)
+    assert not contradicted
@@ -0,0 +1,47 @@
+from trust_evidence_layer.benchmarks.redaction_benchmark import build_evidence_bundle
+from trust_evidence_layer.benchmarks.redaction_benchmark import legacy_redact_text
+from trust_evidence_layer.benchmarks.redaction_benchmark import run_benchmark
+from trust_evidence_layer.redaction import redact_text
+from trust_evidence_layer.redaction import redact_texts
+
+
+def test_engine_matches_findall_and_sub_redaction() -> None:
+    texts = [
+        "Contact john.doe@example.com or +1 555-123-4567 MRN-123456.",
+        "Email john.doe@example.com and SSN 123-45-6789",
+        "mrn:1234567 and (555) 123-4567, twice: (555) 123-4567",
+        "nothing to see here",
+        "",
+        # overlapping matches of different detectors
+        "MRN 5551234567",
+        "mrn:5551234567 and MRN-123456",
+        "5551234567@example.com",
+        "MRN-123-45-6789 and MRN 1234567890",
+        "call +1 (555) 123-4567 or 555-123-4567.",
+    ] + build_evidence_bundle(num_sources=20, snippet_chars=500, pii_rate=0.1)
+
+    assert redact_texts(texts) == [legacy_redact_text(text) for text in texts]
+
+
+def test_earlier_detectors_win_overlapping_matches() -> None:
+    assert redact_text("MRN 5551234567") == (
+        "MRN [REDACTED_PHONE]",
+        [{"policy_id": "pii_redaction", "detector": "PHONE", "count": 1}],
+    )
+
+
+def test_redaction_events_are_in_detector_order() -> None:
+    redacted, events = redact_text("MRN-1234567 then a@b.io")
+
+    assert redacted == "[REDACTED_MEDICAL_RECORD] then [REDACTED_EMAIL]"
+    assert events == [
+        {"policy_id": "pii_redaction", "detector": "EMAIL", "count": 1},
+        {"policy_id": "pii_redaction", "detector": "MEDICAL_RECORD", "count": 1},
+    ]
+
+
+def test_redaction_benchmark_runs() -> None:
+    result = run_benchmark(num_sources=5, snippet_chars=200, repeats=1)
+
+    assert result["sources"] == 5
+    assert result["engine_ms"] >= 0
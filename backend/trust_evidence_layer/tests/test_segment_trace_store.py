@@ -0,0 +1,162 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from trust_evidence_layer.audit_pack import AuditPackExporter
+from trust_evidence_layer.gate import TrustEvidenceGate
+from trust_evidence_layer.storage.segment_store import SegmentLogTraceStore
+
+
+def _response(trace_id: str, expiry_at: str | None, legal_hold: bool = False) -> dict:
+    return {
+        "answer_text": "UNKNOWN: no supporting evidence found.",
+        "evidence_bundle_user": {"sources": [], "citations": [], "retrieval_metadata": {}},
+        "decision_record": {
+            "claims": [],
+            "evidence_links": [],
+            "policy_checks": [],
+            "failure_modes": [],
+            "timestamps": {},
+            "retention": {
+                "retention_policy": "30_DAYS",
+                "retention_reason": "AUDIT",
+                "legal_hold": legal_hold,
+                "expiry_at": expiry_at,
+            },
+        },
+        "trace_id": trace_id,
+    }
+
+
+def test_segment_store_roundtrip_and_legal_hold(tmp_path: Path) -> None:
+    store = SegmentLogTraceStore(base_dir=tmp_path)
+    store.store(trace_id="t1", response_payload=_response("t1", None), raw_context_minimal={"a": 1})
+    store.store(trace_id="t2", response_payload=_response("t2", None, legal_hold=True), raw_context_minimal={})
+
+    record = store.load("t1")
+    assert record["trace_id"] == "t1"
+    assert record["context"] == {"a": 1}
+    assert store.load("t2")["retention"]["legal_hold"] is True
+
+    with pytest.raises(PermissionError, match="legal hold"):
+        store.delete("t2")
+
+    store.delete("t1")
+    assert not store.exists("t1")
+    with pytest.raises(FileNotFoundError):
+        store.load("t1")
+
+    # the index survives reopening the store
+    assert SegmentLogTraceStore(base_dir=tmp_path).load("t2")["trace_id"] == "t2"
+
+
+def test_segment_store_sweeps_expired_traces_and_segments(tmp_path: Path) -> None:
+    store = SegmentLogTraceStore(base_dir=tmp_path, segment_max_bytes=1)
+    past = (datetime.now(UTC) - timedelta(days=1)).isoformat()
+    future = (datetime.now(UTC) + timedelta(days=1)).isoformat()
+
+    store.store(trace_id="expired", response_payload=_response("expired", past), raw_context_minimal={})
+    store.store(trace_id="held", response_payload=_response("held", past, legal_hold=True), raw_context_minimal={})
+    store.store(trace_id="live", response_payload=_response("live", future), raw_context_minimal={})
+    store.store(trace_id="forever", response_payload=_response("forever", None), raw_context_minimal={})
+    assert len(list(store.segments_dir.iterdir())) == 4
+
+    assert store.sweep_expired() == ["expired"]
+    assert sorted(entry["trace_id"] for entry in store.scan()) == ["forever", "held", "live"]
+    # the segment that only held the expired trace is gone
+    assert len(list(store.segments_dir.iterdir())) == 3
+
+    assert [entry["trace_id"] for entry in store.scan(legal_hold=True)] == ["held"]
+    assert store.scan(created_from=datetime.now(UTC) + timedelta(minutes=1)) == []
+    assert len(store.scan(limit=2)) == 2
+
+
+def _segment_bytes(store: SegmentLogTraceStore) -> bytes:
+    return b"".join(path.read_bytes() for path in sorted(store.segments_dir.iterdir()))
+
+
+def test_segment_store_compacts_deleted_payloads(tmp_path: Path) -> None:
+    store = SegmentLogTraceStore(base_dir=tmp_path, segment_max_bytes=4096)
+    past = (datetime.now(UTC) - timedelta(days=1)).isoformat()
+
+    for trace_id in ("kept-1", "deleted", "kept-2", "expired", "kept-3"):
+        expiry_at = past if trace_id == "expired" else None
+        store.store(
+            trace_id=trace_id,
+            response_payload=_response(trace_id, expiry_at),
+            raw_context_minimal={"secret": f"payload-of-{trace_id}"},
+        )
+    segments = sorted(store.segments_dir.iterdir())
+    assert len(segments) > 1
+
+    # deleting only updates the index, no segment is rewritten
+    store.delete("deleted")
+    with pytest.raises(FileNotFoundError):
+        store.load("deleted")
+    assert sorted(store.segments_dir.iterdir()) == segments
+    assert b"payload-of-deleted" in _segment_bytes(store)
+
+    # sweeps only compact segments that are mostly dead
+    store.compaction_dead_ratio = 1.0
+    assert store.sweep_expired() == ["expired"]
+    assert b"payload-of-expired" in _segment_bytes(store)
+
+    store.compact(min_dead_ratio=0)
+    raw = _segment_bytes(store)
+    assert b"payload-of-deleted" not in raw and b"payload-of-expired" not in raw
+    assert b"payload-of-kept-1" in raw and b"payload-of-kept-2" in raw
+
+    # the moved records are still readable, also by another process
+    for reopened in (store, SegmentLogTraceStore(base_dir=tmp_path)):
+        assert reopened.load("kept-1")["context"] == {"secret": "payload-of-kept-1"}
+        assert reopened.load("kept-3")["context"] == {"secret": "payload-of-kept-3"}
+
+    store.store(trace_id="new", response_payload=_response("new", None), raw_context_minimal={})
+    assert store.load("new")["trace_id"] == "new"
+    assert store.load("kept-2")["trace_id"] == "kept-2"
+
+
+def test_segment_store_load_follows_compactions_of_other_processes(tmp_path: Path) -> None:
+    store = SegmentLogTraceStore(base_dir=tmp_path)
+    for trace_id in ("a", "b"):
+        store.store(trace_id=trace_id, response_payload=_response(trace_id, None), raw_context_minimal={})
+    store.delete("a")
+
+    # another process moves "b" to a new segment right after the index lookup
+    other = SegmentLogTraceStore(base_dir=tmp_path)
+    segment_path = store._segment_path
+    lookups: list[int] = []
+
+    def _segment_path_after_compaction(segment: int) -> Path:
+        lookups.append(segment)
+        if len(lookups) == 1:
+            store._lock.release()
+            try:
+                other.compact(min_dead_ratio=0)
+            finally:
+                store._lock.acquire()
+        return segment_path(segment)
+
+    store._segment_path = _segment_path_after_compaction  # type: ignore[method-assign]
+    assert store.load("b")["trace_id"] == "b"
+    assert lookups == [0, 1]
+
+
+def test_segment_store_supports_audit_pack_export(tmp_path: Path) -> None:
+    store = SegmentLogTraceStore(base_dir=tmp_path)
+    response = TrustEvidenceGate().gate_response(
+        draft_answer_text="The sky is blue.",
+        retrieved_evidence=[{"id": "d", "snippet": "The sky is blue.", "origin": "INTERNAL", "trust_level": "PRIMARY"}],
+        context={"chat_session_id": "seg1", "message_id": 1},
+    )
+    store.store(
+        trace_id=response.trace_id,
+        response_payload=response.to_ordered_dict(),
+        raw_context_minimal={"request_metadata": {"chat_session_id": "seg1"}},
+    )
+
+    zip_path = AuditPackExporter(store).export_audit_pack(response.trace_id, output_dir=tmp_path)
+    assert zip_path.exists()